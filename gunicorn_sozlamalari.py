@@ -0,0 +1,9 @@
+# MedCase Pro Platform - Gunicorn Hooklari
+# Prometheus multiprocess rejimi: to'xtagan worker metrika fayllarini belgilash
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Worker chiqqanda uning livesum gauge qiymatlari yig'indidan chiqariladi."""
+    multiprocess.mark_process_dead(worker.pid)
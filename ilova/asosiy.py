@@ -6,17 +6,23 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import logging
 import time
 
 from sozlamalar.sozlamalar import sozlamalar
-from sozlamalar.malumotlar_bazasi import malumotlar_bazasi
+from sozlamalar.malumotlar_bazasi import malumotlar_bazasi, yozuvni_belgilash, OQISH_METODLARI
 from sozlamalar.redis_kesh import redis_kesh
+from vositalar.jarayon_hovuzi import jarayon_hovuzini_yopish
 from middleware.rate_limiter import rate_limiter, rate_limit_xato_ishlovchi
+from middleware.sql_kuzatuv import sql_kuzatuv_middleware
+from middleware.qabul_nazorati import qabul_nazorati_middleware
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy import text
+from vositalar.metrikalar import HTTP_KECHIKISH, HTTP_JARAYONDA, METRIKALAR_TURI, metrikalar_matni
 import hashlib
 
 # Logger sozlash
@@ -56,6 +62,7 @@ async def hayot_sikli(app: FastAPI):
 
     await malumotlar_bazasi.uzish()
     await redis_kesh.uzish()
+    jarayon_hovuzini_yopish()
 
     logger.info("MedCase Pro platformasi yopildi")
 
@@ -76,6 +83,27 @@ def ilova_yaratish() -> FastAPI:
 
     # ============== Middleware ==============
 
+    # Uzilgan DB ulanishi (pre-ping o'rniga) - birinchi qo'shilgan, eng ichki middleware
+    @app.middleware("http")
+    async def qayta_ulanish_middleware(request: Request, call_next):
+        """Ulanish uzilgan bo'lsa idempotent GET/HEAD so'rovi bir marta qaytariladi."""
+        if request.method not in OQISH_METODLARI:
+            return await call_next(request)
+
+        try:
+            return await call_next(request)
+        except DBAPIError as xato:
+            if not xato.connection_invalidated:
+                raise
+            logger.warning(f"DB ulanishi uzildi, qayta urinish: {request.url.path}")
+            return await call_next(request)
+
+    # Statementlarni marshrutga bog'lash (qayta urinishlar bitta so'rov sifatida sanaladi)
+    app.middleware("http")(sql_kuzatuv_middleware)
+
+    # Qabul nazorati - CORS ichida, shuning uchun 503 javoblar ham CORS sarlavhali
+    app.middleware("http")(qabul_nazorati_middleware)
+
     # CORS
     app.add_middleware(
         CORSMiddleware,
@@ -142,12 +170,24 @@ def ilova_yaratish() -> FastAPI:
 
     @app.middleware("http")
     async def sorov_vaqti_middleware(request: Request, call_next):
-        """So'rov vaqtini o'lchaydi va log qiladi."""
-        boshlash = time.time()
+        """So'rov vaqtini o'lchaydi, log qiladi va marshrut gistogrammasiga yozadi."""
+        boshlash = time.perf_counter()
 
-        response = await call_next(request)
+        HTTP_JARAYONDA.inc()
+        holat_kodi = 500
+        try:
+            response = await call_next(request)
+            holat_kodi = response.status_code
+        finally:
+            HTTP_JARAYONDA.dec()
+            davomiylik = time.perf_counter() - boshlash
+            route = request.scope.get("route")
+            HTTP_KECHIKISH.labels(
+                request.method,
+                route.path if route else "<nomalum>",
+                f"{holat_kodi // 100}xx"
+            ).observe(davomiylik)
 
-        davomiylik = time.time() - boshlash
         response.headers["X-Javob-Vaqti"] = f"{davomiylik:.4f}"
 
         # Sekin so'rovlarni log qilish
@@ -158,6 +198,16 @@ def ilova_yaratish() -> FastAPI:
 
         return response
 
+    @app.middleware("http")
+    async def replika_yopishqoqlik_middleware(request: Request, call_next):
+        """Muvaffaqiyatli yozuvdan keyin foydalanuvchi o'qishlarini asosiy bazaga bog'laydi."""
+        response = await call_next(request)
+
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            await yozuvni_belgilash(request)
+
+        return response
+
     @app.middleware("http")
     async def xavfsizlik_sarlavhalari(request: Request, call_next):
         """Xavfsizlik sarlavhalarini qo'shadi."""
@@ -248,7 +298,10 @@ def ilova_yaratish() -> FastAPI:
         # Ma'lumotlar bazasi
         try:
             if malumotlar_bazasi.ulangan:
+                async with malumotlar_bazasi.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
                 natija["komponentlar"]["malumotlar_bazasi"] = "soglom"
+                natija["komponentlar"]["replika"] = malumotlar_bazasi.replika_holati
             else:
                 natija["komponentlar"]["malumotlar_bazasi"] = "ulanmagan"
                 natija["holat"] = "qisman"
@@ -266,6 +319,15 @@ def ilova_yaratish() -> FastAPI:
 
         return natija
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrikalar(request: Request):
+        """Prometheus metrikalari (barcha gunicorn workerlari bo'yicha yig'ilgan)."""
+        if sozlamalar.metrikalar_token and (
+            request.headers.get("Authorization") != f"Bearer {sozlamalar.metrikalar_token}"
+        ):
+            return Response(status_code=status.HTTP_401_UNAUTHORIZED)
+        return Response(await metrikalar_matni(), media_type=METRIKALAR_TURI)
+
     @app.get("/statistika", tags=["Tizim"])
     async def tizim_statistikasi():
         """Tizim statistikasini qaytaradi (admin uchun)."""
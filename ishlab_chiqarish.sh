@@ -31,10 +31,16 @@ GUNICORN_KEEPALIVE=${GUNICORN_KEEPALIVE:-5}
 GUNICORN_MAX_REQUESTS=${GUNICORN_MAX_REQUESTS:-1000}
 GUNICORN_MAX_REQUESTS_JITTER=${GUNICORN_MAX_REQUESTS_JITTER:-50}
 
+# Prometheus multiprocess katalogi - workerlar metrikalari /metrics da yig'iladi
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/medcase_metrikalar}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Gunicorn bilan ishga tushirish
 echo "Server ishga tushmoqda (Gunicorn)..."
 echo "Workers: $GUNICORN_WORKERS, Threads: $GUNICORN_THREADS"
 gunicorn ilova.asosiy:ilova \
+    --config gunicorn_sozlamalari.py \
     --workers "$GUNICORN_WORKERS" \
     --threads "$GUNICORN_THREADS" \
     --worker-class uvicorn.workers.UvicornWorker \
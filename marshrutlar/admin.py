@@ -2,6 +2,8 @@
 # Kontent va foydalanuvchi boshqaruvi
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Body
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from uuid import UUID
@@ -11,12 +13,13 @@ from servislar.foydalanuvchi_servisi import FoydalanuvchiServisi
 from servislar.kategoriya_servisi import KategoriyaServisi
 from servislar.holat_servisi import HolatServisi
 from servislar.media_servisi import media_servisi
-from servislar.import_servisi import ImportServisi
+from servislar.import_servisi import ImportServisi, ImportVazifasi
 from sxemalar.kategoriya import (
     AsosiyKategoriyaYaratish, AsosiyKategoriyaYangilash,
     KichikKategoriyaYaratish, BolimYaratish
 )
 from sxemalar.holat import HolatYaratish, HolatYangilash
+from sxemalar.gamifikatsiya import DarajaYaratish
 from sxemalar.asosiy import MuvaffaqiyatJavob
 from middleware.autentifikatsiya import admin_talab_qilish
 from modellar.foydalanuvchi import Foydalanuvchi, FoydalanuvchiRoli
@@ -73,10 +76,6 @@ async def holat_yaratish(
     """Yangi klinik holat yaratadi."""
     servis = HolatServisi(db)
     holat = await servis.yaratish(malumot)
-    
-    # Bo'lim statistikasini yangilash
-    kat_servis = KategoriyaServisi(db)
-    await kat_servis.holatlar_sonini_yangilash(malumot.bolim_id)
 
     # Barcha foydalanuvchilarga bildirishnoma yuborish
     from servislar.bildirishnoma_servisi import BildirishnomServisi
@@ -557,6 +556,185 @@ async def excel_toliq_import(
     }
 
 
+@router.post("/import/excel/vazifa", summary="Excel importni fon vazifasi sifatida boshlash")
+async def excel_import_vazifasi_boshlash(
+    fayl: UploadFile = File(..., description="Excel fayl (.xlsx)"),
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """
+    Excel faylni fon vazifasiga topshiradi.
+    Tahlil va import workerda bajariladi, jarayonni
+    /import/excel/vazifa/{vazifa_id} orqali kuzating.
+    """
+    if not fayl.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Faqat Excel fayllar (.xlsx, .xls) qabul qilinadi"
+        )
+    
+    content = await fayl.read()
+    if len(content) > 10 * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Fayl hajmi 10MB dan oshmasligi kerak"
+        )
+    
+    from vositalar.tasks import excel_import_vazifasi
+    
+    vazifa = await ImportVazifasi.yaratish(content, str(admin.id))
+    excel_import_vazifasi.delay(vazifa["vazifa_id"])
+    
+    return vazifa
+
+
+@router.get("/import/excel/vazifa/{vazifa_id}", summary="Import vazifasi holati")
+async def excel_import_vazifasi_holati(
+    vazifa_id: str,
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Fon import vazifasining jarayoni va checkpoint."""
+    vazifa = await ImportVazifasi.olish(vazifa_id)
+    if not vazifa:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import vazifasi topilmadi"
+        )
+    return vazifa
+
+
+@router.post("/import/excel/vazifa/{vazifa_id}/davom", summary="Import vazifasini davom ettirish")
+async def excel_import_vazifasini_davom_ettirish(
+    vazifa_id: str,
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Xato bilan to'xtagan importni oxirgi checkpoint dan davom ettiradi."""
+    vazifa = await ImportVazifasi.olish(vazifa_id)
+    if not vazifa:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import vazifasi topilmadi"
+        )
+    if vazifa["holat"] != ImportVazifasi.XATO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Faqat xato bilan to'xtagan vazifani davom ettirish mumkin"
+        )
+    
+    from vositalar.tasks import excel_import_vazifasi
+    
+    vazifa = await ImportVazifasi.yangilash(vazifa_id, holat=ImportVazifasi.NAVBATDA)
+    excel_import_vazifasi.delay(vazifa_id)
+    
+    return vazifa
+
+
+@router.get("/kategoriya/hisoblagichlar/tekshirish", summary="Kategoriya hisoblagichlarini tekshirish")
+async def kategoriya_hisoblagichlarini_tekshirish(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Saqlangan holatlar sonini haqiqiy qiymatlar bilan solishtiradi (faqat o'qish)."""
+    from servislar.hisoblagich_servisi import HisoblagichServisi
+    
+    return await HisoblagichServisi(db).nomuvofiqliklarni_aniqlash(tuzatish=False)
+
+
+@router.post("/kategoriya/hisoblagichlar/tuzatish", summary="Kategoriya hisoblagichlarini tuzatish")
+async def kategoriya_hisoblagichlarini_tuzatish(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Nomuvofiqliklarni aniqlaydi va saqlangan sonlarni haqiqiy qiymatlarga tenglashtiradi."""
+    from servislar.hisoblagich_servisi import HisoblagichServisi
+    
+    return await HisoblagichServisi(db).nomuvofiqliklarni_aniqlash(tuzatish=True)
+
+
+
+@router.post("/kategoriya/rivojlanish/qayta-hisoblash", summary="Kategoriya rivojlanishini qayta hisoblash")
+async def kategoriya_rivojlanishini_qayta_hisoblash(
+    foydalanuvchi_id: Optional[UUID] = Query(None, description="Bo'sh bo'lsa barcha foydalanuvchilar"),
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Foydalanuvchi x kategoriya agregatini urinishlar tarixidan fon rejimida qayta quradi."""
+    from vositalar.tasks import kategoriya_rivojlanishini_qayta_hisoblash as vazifa
+    
+    natija = vazifa.delay(str(foydalanuvchi_id) if foydalanuvchi_id else None)
+    return {"vazifa_id": natija.id}
+
+
+
+@router.post("/takrorlash/qayta-rejalashtirish", summary="Takrorlash kartalarini qayta rejalashtirish")
+async def takrorlash_qayta_rejalashtirish(
+    siyosat: str = Query(..., description="tatil | tekislash | ef_kalibrlash | interval"),
+    parametrlar: Dict[str, Any] = Body(default={}),
+    foydalanuvchi_id: Optional[UUID] = Query(None, description="Bo'sh bo'lsa barcha foydalanuvchilar"),
+    sinov: bool = Query(True, description="Faqat hisobot, yozmasdan"),
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Siyosatni kartalarga vektorlashtirilgan holda fon rejimida qo'llaydi."""
+    from servislar.rejalashtirish_servisi import SIYOSATLAR
+    from sxemalar.takrorlash import SIYOSAT_PARAMETRLARI
+    from vositalar.tasks import takrorlash_qayta_rejalashtirish as vazifa
+    
+    if siyosat not in SIYOSATLAR:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Noma'lum siyosat. Mavjudlar: {', '.join(SIYOSATLAR)}"
+        )
+    try:
+        parametrlar = SIYOSAT_PARAMETRLARI[siyosat].model_validate(parametrlar).model_dump()
+    except ValidationError as xato:
+        raise RequestValidationError(
+            [{**x, "loc": ("body", *x["loc"])} for x in xato.errors()]
+        )
+    
+    natija = vazifa.delay(
+        siyosat, parametrlar, str(foydalanuvchi_id) if foydalanuvchi_id else None, sinov
+    )
+    return {"vazifa_id": natija.id}
+
+
+@router.put("/darajalar", summary="Daraja konfiguratsiyasini almashtirish")
+async def darajalar_saqlash(
+    darajalar: List[DarajaYaratish],
+    admin: Foydalanuvchi = Depends(admin_talab_qilish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Chegaralarni saqlaydi va barcha foydalanuvchilar darajasini fon rejimida qayta hisoblaydi."""
+    from servislar.daraja_servisi import DarajaServisi
+    from vositalar.tasks import darajalarni_qayta_hisoblash
+    
+    if not darajalar:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Kamida bitta daraja kerak"
+        )
+    if len({d.daraja for d in darajalar}) != len(darajalar):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Daraja raqamlari takrorlanmasligi kerak"
+        )
+    
+    await DarajaServisi(db).konfiguratsiya_saqlash([d.model_dump() for d in darajalar])
+    # Workerlar va fon vazifasi yangi chegaralarni ko'rishi uchun versiyadan oldin commit
+    await db.commit()
+    versiya = await DarajaServisi.versiyani_oshirish()
+    natija = darajalarni_qayta_hisoblash.delay()
+    return {"versiya": versiya, "vazifa_id": natija.id}
+
+
+@router.post("/darajalar/qayta-hisoblash", summary="Darajalarni qayta hisoblash")
+async def darajalarni_qayta_hisoblash(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Barcha foydalanuvchilar darajasini joriy chegaralar bo'yicha fon rejimida qayta hisoblaydi."""
+    from vositalar.tasks import darajalarni_qayta_hisoblash as vazifa
+    
+    natija = vazifa.delay()
+    return {"vazifa_id": natija.id}
+
+
 # ============== Statistika ==============
 
 @router.get("/statistika", summary="Umumiy statistika")
@@ -575,3 +753,59 @@ async def umumiy_statistika(
         "foydalanuvchilar_soni": foydalanuvchilar_soni,
         **kategoriya_stat
     }
+
+
+# ============== SQL kuzatuvi ==============
+
+@router.get("/sql/statistika", summary="Marshrutlar bo'yicha SQL statistikasi")
+async def sql_statistikasi(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Har bir marshrut uchun o'rtacha statementlar soni, DB vaqti va N+1 nomzodlari."""
+    from middleware import sql_kuzatuv
+    
+    return await sql_kuzatuv.statistika()
+
+
+@router.get("/sql/sekinlar", summary="Sekin SQL statementlar")
+async def sql_sekinlar(
+    soni: int = Query(50, ge=1, le=200),
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Chegaradan sekin statementlar (EXPLAIN rejasi bilan, agar yoqilgan bo'lsa)."""
+    from middleware import sql_kuzatuv
+    
+    return await sql_kuzatuv.sekinlar(soni)
+
+
+@router.post("/sql/explain", summary="Sekin so'rovlar uchun EXPLAIN ni yoqish")
+async def sql_explain_yoqish(
+    daqiqa: int = Body(10, ge=0, le=120, embed=True),
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Sekin SELECT statementlari uchun EXPLAIN (ANALYZE, BUFFERS) ni vaqtincha yoqadi (0 - o'chirish)."""
+    from middleware import sql_kuzatuv
+    
+    await sql_kuzatuv.explain_yoqish(daqiqa)
+    return {"daqiqa": daqiqa}
+
+
+@router.delete("/sql/statistika", response_model=MuvaffaqiyatJavob)
+async def sql_statistikasini_tozalash(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Yig'ilgan SQL statistikasi va sekin statementlarni o'chiradi."""
+    from middleware import sql_kuzatuv
+    
+    await sql_kuzatuv.tozalash()
+    return MuvaffaqiyatJavob(xabar="SQL statistikasi tozalandi")
+
+
+@router.get("/qabul", summary="Qabul nazorati holati")
+async def qabul_nazorati_holati(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Joriy worker dagi sinflar limiti, bajarilayotgan va navbatdagi so'rovlar."""
+    from middleware.qabul_nazorati import qabul_nazoratchisi
+    
+    return qabul_nazoratchisi.holati()
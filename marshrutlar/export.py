@@ -1,16 +1,22 @@
 # MedCase Platform - Export Marshrutlari
 # PDF va Excel hisobotlar
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.responses import StreamingResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, List
+from uuid import UUID
 import io
 
 from sozlamalar.malumotlar_bazasi import sessiya_olish
-from servislar.export_servisi import ExportServisi
-from middleware.autentifikatsiya import joriy_foydalanuvchi_olish
+from servislar.export_servisi import (
+    ExportServisi,
+    EksportVazifasi,
+    artefakt_olish,
+    urinishlar_oqimi
+)
+from middleware.autentifikatsiya import joriy_foydalanuvchi_olish, oqituvchi_talab_qilish
 from modellar.foydalanuvchi import Foydalanuvchi
 
 router = APIRouter()
@@ -80,3 +86,152 @@ async def rivojlanish_excel(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Excel yaratishda xatolik: {str(e)}"
         )
+
+
+# ============== Fon eksport vazifalari ==============
+
+@router.post("/rivojlanish/vazifa", summary="Rivojlanish hisoboti vazifasini boshlash")
+async def rivojlanish_vazifasi(
+    formati: str = Query("pdf", pattern="^(pdf|excel)$", description="pdf yoki excel"),
+    boshlangich_sana: Optional[datetime] = None,
+    tugash_sana: Optional[datetime] = None,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """
+    Hisobotni fon rejimida tayyorlaydi.
+    Ma'lumotlar o'zgarmagan bo'lsa vazifa darhol "tugadi" holatida qaytadi.
+    Render Celery workerda bajariladi; tayyor bo'lganda bildirishnoma yoziladi.
+    """
+    return await EksportVazifasi.boshlash(
+        db,
+        joriy_foydalanuvchi.id,
+        formati,
+        boshlangich_sana,
+        tugash_sana
+    )
+
+
+async def _vazifa_tekshirish(vazifa_id: str, foydalanuvchi: Foydalanuvchi) -> dict:
+    """Vazifa mavjudligi va egasini tekshiradi."""
+    vazifa = await EksportVazifasi.olish(vazifa_id)
+    if not vazifa or vazifa.get("foydalanuvchi_id") != str(foydalanuvchi.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Eksport vazifasi topilmadi"
+        )
+    return vazifa
+
+
+@router.get("/vazifa/{vazifa_id}", summary="Eksport vazifasi holati")
+async def eksport_vazifasi_holati(
+    vazifa_id: str,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish)
+):
+    """Vazifa holatini qaytaradi (navbatda, ishlanmoqda, tugadi, xato)."""
+    return await _vazifa_tekshirish(vazifa_id, joriy_foydalanuvchi)
+
+
+@router.get("/vazifa/{vazifa_id}/yuklab-olish", summary="Tayyor hisobotni yuklab olish")
+async def eksport_yuklab_olish(
+    vazifa_id: str,
+    request: Request,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish)
+):
+    """Tayyor artefaktni yuklab olish. ETag - kontent sha256."""
+    vazifa = await _vazifa_tekshirish(vazifa_id, joriy_foydalanuvchi)
+    if vazifa.get("holat") != EksportVazifasi.TUGADI:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Hisobot hali tayyor emas"
+        )
+    
+    etag = f'"{vazifa["sha256"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    kontent = await artefakt_olish(vazifa["sha256"])
+    if kontent is None:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Hisobot muddati tugagan, qaytadan yarating"
+        )
+    
+    return Response(
+        content=kontent,
+        media_type=vazifa["media_turi"],
+        headers={
+            "Content-Disposition": f"attachment; filename={vazifa['fayl_nomi']}",
+            "ETag": etag
+        }
+    )
+
+
+# ============== Oqimli urinishlar eksporti ==============
+
+def _oqim_javobi(oqim, formati: str, siqish: bool, nom: str) -> StreamingResponse:
+    """CSV/NDJSON oqimi uchun javob (gzip bo'lsa .gz fayl)."""
+    kengaytma = "csv" if formati == "csv" else "ndjson"
+    media_turi = "text/csv" if formati == "csv" else "application/x-ndjson"
+    fayl_nomi = f"{nom}_{datetime.now().strftime('%Y%m%d')}.{kengaytma}"
+    if siqish:
+        fayl_nomi += ".gz"
+        media_turi = "application/gzip"
+    
+    return StreamingResponse(
+        oqim,
+        media_type=media_turi,
+        headers={"Content-Disposition": f"attachment; filename={fayl_nomi}"}
+    )
+
+
+@router.get("/urinishlar", summary="Urinishlar tarixini oqim bilan eksport qilish")
+async def urinishlar_eksporti(
+    formati: str = Query("csv", pattern="^(csv|ndjson)$", description="csv yoki ndjson"),
+    siqish: bool = Query(False, description="gzip bilan siqish"),
+    boshlangich_sana: Optional[datetime] = None,
+    tugash_sana: Optional[datetime] = None,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish)
+):
+    """Joriy foydalanuvchining barcha urinishlari (CSV yoki NDJSON)."""
+    oqim = urinishlar_oqimi(
+        formati,
+        siqish,
+        foydalanuvchi_idlari=[joriy_foydalanuvchi.id],
+        boshlangich_sana=boshlangich_sana,
+        tugash_sana=tugash_sana
+    )
+    return _oqim_javobi(oqim, formati, siqish, "urinishlar")
+
+
+@router.get("/urinishlar/kohorta", summary="Kohorta urinishlarini oqim bilan eksport qilish")
+async def kohorta_urinishlari_eksporti(
+    formati: str = Query("csv", pattern="^(csv|ndjson)$", description="csv yoki ndjson"),
+    siqish: bool = Query(True, description="gzip bilan siqish"),
+    foydalanuvchi_idlari: Optional[List[UUID]] = Query(None, description="Foydalanuvchi IDlari"),
+    muassasa: Optional[str] = Query(None, description="Muassasa bo'yicha"),
+    kurs_yili: Optional[int] = Query(None, ge=1, le=6, description="Kurs yili bo'yicha"),
+    boshlangich_sana: Optional[datetime] = None,
+    tugash_sana: Optional[datetime] = None,
+    oqituvchi: Foydalanuvchi = Depends(oqituvchi_talab_qilish)
+):
+    """
+    O'qituvchi uchun guruh (kohorta) urinishlari eksporti.
+    Semestr ma'lumotlari ham doimiy xotira bilan oqim sifatida yuboriladi.
+    """
+    if not (foydalanuvchi_idlari or muassasa or kurs_yili):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Kamida bitta filtr kerak: foydalanuvchi_idlari, muassasa yoki kurs_yili"
+        )
+    
+    oqim = urinishlar_oqimi(
+        formati,
+        siqish,
+        foydalanuvchi_idlari=foydalanuvchi_idlari,
+        muassasa=muassasa,
+        kurs_yili=kurs_yili,
+        boshlangich_sana=boshlangich_sana,
+        tugash_sana=tugash_sana
+    )
+    return _oqim_javobi(oqim, formati, siqish, "kohorta_urinishlari")
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
-from sozlamalar.malumotlar_bazasi import sessiya_olish
+from sozlamalar.malumotlar_bazasi import sessiya_olish, faqat_oqish_sessiyasi
 from servislar.gamifikatsiya_servisi import GamifikatsiyaServisi
 from sxemalar.gamifikatsiya import (
     NishonJavob,
@@ -29,7 +29,7 @@ router = APIRouter()
 )
 async def nishonlar_royxati(
     joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Barcha nishonlar va foydalanuvchi qo'lga kiritgan nishonlar.
@@ -56,7 +56,7 @@ async def nishonlar_royxati(
 )
 async def mening_nishonlarim(
     joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Foydalanuvchi qo'lga kiritgan nishonlar.
@@ -74,7 +74,7 @@ async def ball_tarixi(
     sahifa: int = Query(1, ge=1),
     hajm: int = Query(20, ge=1, le=100),
     joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Foydalanuvchi ball tarixi.
@@ -102,7 +102,7 @@ async def reyting_jadvali(
     sahifa: int = Query(1, ge=1),
     hajm: int = Query(50, ge=1, le=100),
     joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Reyting jadvalini qaytaradi.
@@ -1,14 +1,16 @@
 # MedCase Platform - Holat Marshrutlari
 # Klinik holatlar boshqaruvi
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
+import json
 
 from sozlamalar.malumotlar_bazasi import sessiya_olish
 from servislar.holat_servisi import HolatServisi
 from servislar.rivojlanish_servisi import RivojlanishServisi
+from servislar.kunlik_holat_servisi import KunlikHolatServisi
 from sxemalar.holat import (
     HolatJavob,
     HolatToliqJavob,
@@ -22,11 +24,23 @@ from middleware.autentifikatsiya import (
     ixtiyoriy_foydalanuvchi
 )
 from modellar.foydalanuvchi import Foydalanuvchi
-from modellar.holat import QiyinlikDarajasi, HolatTuri
+from modellar.holat import Holat, QiyinlikDarajasi, HolatTuri
 
 router = APIRouter()
 
 
+def _royxat_javobi(tanalar: List[bytes], jami: int, sahifa: int, hajm: int) -> Response:
+    """HolatRoyxati shaklidagi javobni tayyor holat baytlaridan yig'adi (qayta serializatsiyasiz)."""
+    sahifalar_soni = (jami + hajm - 1) // hajm if hajm > 0 else 0
+    tana = b"".join((
+        b'{"holatlar":[', b",".join(tanalar), b"],",
+        json.dumps({
+            "jami": jami, "sahifa": sahifa, "hajm": hajm, "sahifalar_soni": sahifalar_soni
+        }).encode()[1:]
+    ))
+    return Response(content=tana, media_type="application/json")
+
+
 @router.get(
     "/",
     response_model=HolatRoyxati,
@@ -57,17 +71,8 @@ async def holatlar_royxati(
     )
 
     foydalanuvchi_id = joriy_foydalanuvchi.id if joriy_foydalanuvchi else None
-    holatlar, jami = await servis.qidirish(qidiruv_malumot, foydalanuvchi_id)
-
-    sahifalar_soni = (jami + hajm - 1) // hajm if hajm > 0 else 0
-
-    return HolatRoyxati(
-        holatlar=holatlar,
-        jami=jami,
-        sahifa=sahifa,
-        hajm=hajm,
-        sahifalar_soni=sahifalar_soni
-    )
+    tanalar, jami = await servis.qidirish_korinishlar(qidiruv_malumot, foydalanuvchi_id)
+    return _royxat_javobi(tanalar, jami, sahifa, hajm)
 
 
 @router.get(
@@ -108,17 +113,8 @@ async def bolim_holatlari(
     Bo'limga tegishli holatlar ro'yxati.
     """
     servis = HolatServisi(db)
-    holatlar, jami = await servis.bolim_boyicha(bolim_id, sahifa, hajm)
-
-    sahifalar_soni = (jami + hajm - 1) // hajm if hajm > 0 else 0
-
-    return HolatRoyxati(
-        holatlar=holatlar,
-        jami=jami,
-        sahifa=sahifa,
-        hajm=hajm,
-        sahifalar_soni=sahifalar_soni
-    )
+    tanalar, jami = await servis.bolim_korinishlar(bolim_id, sahifa, hajm)
+    return _royxat_javobi(tanalar, jami, sahifa, hajm)
 
 
 @router.get(
@@ -142,51 +138,40 @@ async def teglar_royxati(
     summary="Kunlik holat (Daily Challenge)"
 )
 async def kunlik_holat(
+    request: Request,
     db: AsyncSession = Depends(sessiya_olish)
 ):
     """
     Kunlik challenge holatini qaytaradi.
-    Har kuni tasodifiy holat tanlanadi va kun davomida saqlanadi.
+    Holat oldindan tanlanib tayyor JSON baytlariga render qilingan - ETag bilan beriladi.
     """
-    from datetime import date
-    from sozlamalar.redis_kesh import redis_kesh
-    import json
-
-    bugun = date.today().isoformat()
-    kesh_kaliti = f"kunlik_holat:{bugun}"
-
-    # Keshdan tekshirish
-    keshdan = await redis_kesh.olish(kesh_kaliti)
-    if keshdan:
-        holat_id = keshdan
-        servis = HolatServisi(db)
-        holat = await servis.olish(UUID(holat_id))
-        if holat:
-            return holat
-
-    # Yangi kunlik holat tanlash (o'rtacha yoki qiyin)
-    servis = HolatServisi(db)
-    holatlar = await servis.tasodifiy_olish(
-        soni=1,
-        qiyinlik=None  # Barcha qiyinlikdan
-    )
-
-    if not holatlar:
+    tayyor = await KunlikHolatServisi(db).olish()
+    if tayyor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Kunlik holat topilmadi. Holatlar mavjud emas."
         )
 
-    holat = holatlar[0]
+    sarlavhalar = {"ETag": tayyor["etag"], "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == tayyor["etag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=sarlavhalar)
 
-    # 24 soatga keshlash
-    await redis_kesh.saqlash(
-        kesh_kaliti,
-        str(holat.id),
-        muddati=86400  # 24 soat
+    return Response(
+        content=tayyor["tana"],
+        media_type="application/json",
+        headers=sarlavhalar
     )
 
-    return holat
+
+@router.get(
+    "/kunlik/statistika",
+    summary="Kunlik holat statistikasi"
+)
+async def kunlik_holat_statistikasi():
+    """
+    Bugungi challenge bo'yicha urinishlar, to'g'ri javoblar va o'rtacha vaqt.
+    """
+    return await KunlikHolatServisi.statistika()
 
 
 @router.get(
@@ -202,21 +187,23 @@ async def holat_olish(
     Holat ma'lumotlarini qaytaradi (javoblarsiz).
     """
     servis = HolatServisi(db)
-    holat = await servis.olish(holat_id)
+    holat_holati = await servis.kontent_holati(holat_id)
 
-    if not holat:
+    if not holat_holati:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Holat topilmadi"
         )
 
-    if not holat.chop_etilgan:
+    versiya, chop_etilgan = holat_holati
+    if not chop_etilgan:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Bu holat hali chop etilmagan"
         )
 
-    return holat
+    tanalar = await servis.korinishlar({holat_id: versiya})
+    return Response(content=tanalar[holat_id], media_type="application/json")
 
 
 @router.post(
@@ -235,9 +222,9 @@ async def javob_berish(
     """
     Holatga javob berish va natijani olish.
     """
-    # Holatni tekshirish
+    # Holatni tekshirish - urinish_yaratish ham shu obyektni identity mapdan oladi
     holat_servis = HolatServisi(db)
-    holat = await holat_servis.olish(holat_id)
+    holat = await db.get(Holat, holat_id)
 
     if not holat:
         raise HTTPException(
@@ -295,27 +282,34 @@ async def holat_javoblari(
     Faqat javob bergandan keyin ko'rish mumkin.
     """
     holat_servis = HolatServisi(db)
-    holat = await holat_servis.olish(holat_id)
+    holat_holati = await holat_servis.kontent_holati(holat_id)
 
-    if not holat:
+    if not holat_holati:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Holat topilmadi"
         )
 
-    # Foydalanuvchi javob berganligini tekshirish
-    rivojlanish_servis = RivojlanishServisi(db)
-    from sqlalchemy import select, and_
-    from modellar.rivojlanish import HolatUrinishi
-
-    sorov = select(HolatUrinishi).where(
-        and_(
-            HolatUrinishi.foydalanuvchi_id == joriy_foydalanuvchi.id,
-            HolatUrinishi.holat_id == holat_id
+    # Foydalanuvchi javob berganligini tekshirish (arxivlangan oylar ham)
+    from sqlalchemy import select, and_, union_all
+    from modellar.rivojlanish import HolatUrinishi, ArxivlanganYechim
+
+    sorov = union_all(
+        select(HolatUrinishi.holat_id).where(
+            and_(
+                HolatUrinishi.foydalanuvchi_id == joriy_foydalanuvchi.id,
+                HolatUrinishi.holat_id == holat_id
+            )
+        ),
+        select(ArxivlanganYechim.holat_id).where(
+            and_(
+                ArxivlanganYechim.foydalanuvchi_id == joriy_foydalanuvchi.id,
+                ArxivlanganYechim.holat_id == holat_id
+            )
         )
-    )
+    ).limit(1)
     natija = await db.execute(sorov)
-    urinish = natija.scalar_one_or_none()
+    urinish = natija.scalars().first()
 
     if not urinish:
         raise HTTPException(
@@ -323,8 +317,5 @@ async def holat_javoblari(
             detail="Avval holatga javob bering"
         )
 
-    return HolatToliqJavob(
-        **holat.__dict__,
-        togri_javob=holat.togri_javob,
-        umumiy_tushuntirish=holat.umumiy_tushuntirish
-    )
+    tanalar = await holat_servis.korinishlar({holat_id: holat_holati[0]}, toliq=True)
+    return Response(content=tanalar[holat_id], media_type="application/json")
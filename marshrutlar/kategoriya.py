@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
-from sozlamalar.malumotlar_bazasi import sessiya_olish
+from sozlamalar.malumotlar_bazasi import faqat_oqish_sessiyasi
 from servislar.kategoriya_servisi import KategoriyaServisi
 from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
 from sxemalar.kategoriya import (
@@ -27,7 +27,7 @@ router = APIRouter()
     summary="To'liq kategoriyalar ro'yxati (Admin uchun)"
 )
 async def toliq_kategoriyalar(
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Admin panel uchun to'liq kategoriyalar ierarxiyasi.
@@ -83,7 +83,7 @@ async def toliq_kategoriyalar(
     summary="Barcha kategoriyalar"
 )
 async def kategoriyalar_royxati(
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Barcha kategoriyalar, kichik kategoriyalar va bo'limlar
@@ -155,7 +155,7 @@ async def kategoriyalar_royxati(
     summary="Asosiy kategoriyalar ro'yxati"
 )
 async def asosiy_kategoriyalar(
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Faqat asosiy kategoriyalar ro'yxatini qaytaradi.
@@ -178,7 +178,7 @@ async def asosiy_kategoriyalar(
 )
 async def asosiy_kategoriya_olish(
     kategoriya_id: UUID,
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Asosiy kategoriyani kichik kategoriyalar bilan qaytaradi.
@@ -202,7 +202,7 @@ async def asosiy_kategoriya_olish(
 )
 async def asosiy_kategoriya_slug_bilan(
     slug: str,
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Slug bo'yicha asosiy kategoriyani qaytaradi.
@@ -226,7 +226,7 @@ async def asosiy_kategoriya_slug_bilan(
 )
 async def kichik_kategoriyalar(
     asosiy_id: UUID,
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Asosiy kategoriyaga tegishli kichik kategoriyalar.
@@ -242,7 +242,7 @@ async def kichik_kategoriyalar(
 )
 async def kichik_kategoriya_olish(
     kategoriya_id: UUID,
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Kichik kategoriyani bo'limlar bilan qaytaradi.
@@ -283,7 +283,7 @@ async def kichik_kategoriya_olish(
 )
 async def bolimlar(
     kichik_kategoriya_id: UUID,
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Kichik kategoriyaga tegishli bo'limlar.
@@ -299,7 +299,7 @@ async def bolimlar(
 )
 async def bolim_olish(
     bolim_id: UUID,
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Bo'lim ma'lumotlarini qaytaradi.
@@ -321,7 +321,7 @@ async def bolim_olish(
     summary="Kategoriyalar statistikasi"
 )
 async def kategoriyalar_statistikasi(
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Kategoriyalar statistikasini qaytaradi.
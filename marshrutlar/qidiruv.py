@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from uuid import UUID
 
-from sozlamalar.malumotlar_bazasi import sessiya_olish
+from sozlamalar.malumotlar_bazasi import faqat_oqish_sessiyasi
 from servislar.qidiruv_servisi import QidiruvServisi
 from middleware.autentifikatsiya import ixtiyoriy_foydalanuvchi
 from modellar.foydalanuvchi import Foydalanuvchi
@@ -17,7 +17,7 @@ router = APIRouter()
 @router.get("/", summary="Umumiy qidiruv")
 async def umumiy_qidiruv(
     q: str = Query(..., min_length=2, max_length=100, description="Qidiruv so'zi"),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Barcha turlar bo'yicha umumiy qidiruv.
@@ -35,7 +35,7 @@ async def holatlar_qidirish(
     qiyinlik: Optional[str] = None,
     sahifa: int = Query(1, ge=1),
     hajm: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """Holatlarni full-text search bilan qidiradi."""
     servis = QidiruvServisi(db)
@@ -61,7 +61,7 @@ async def kategoriyalar_qidirish(
     q: str = Query(..., min_length=2, max_length=100),
     sahifa: int = Query(1, ge=1),
     hajm: int = Query(20, ge=1, le=50),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """Kategoriyalarni qidiradi."""
     servis = QidiruvServisi(db)
@@ -80,7 +80,7 @@ async def foydalanuvchilar_qidirish(
     q: str = Query(..., min_length=2, max_length=100),
     sahifa: int = Query(1, ge=1),
     hajm: int = Query(20, ge=1, le=50),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """Foydalanuvchilarni qidiradi (faqat profili ochiq bo'lganlar)."""
     servis = QidiruvServisi(db)
@@ -98,7 +98,7 @@ async def foydalanuvchilar_qidirish(
 async def taklif_qidiruv(
     q: str = Query(..., min_length=1, max_length=50),
     limit: int = Query(10, ge=1, le=20),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Autocomplete uchun tez taklif qidiruv.
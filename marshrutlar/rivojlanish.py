@@ -9,8 +9,12 @@ from uuid import UUID
 from datetime import date, timedelta
 import random
 
-from sozlamalar.malumotlar_bazasi import sessiya_olish
+from sozlamalar.malumotlar_bazasi import sessiya_olish, faqat_oqish_sessiyasi
 from servislar.rivojlanish_servisi import RivojlanishServisi
+from servislar.dashboard_servisi import DashboardServisi
+from servislar.kategoriya_rivojlanishi_servisi import KategoriyaRivojlanishiServisi
+from servislar.arxiv_servisi import ArxivServisi
+from servislar.bolak_servisi import oy_boshi
 from sxemalar.rivojlanish import (
     RivojlanishJavob,
     UrinishJavob,
@@ -61,83 +65,20 @@ async def rivojlanish_olish(
 )
 async def dashboard_statistika(
     joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
-    db: AsyncSession = Depends(sessiya_olish)
+    db: AsyncSession = Depends(faqat_oqish_sessiyasi)
 ):
     """
     Dashboard uchun qisqacha statistika.
+    Redis'dagi snapshotdan o'qiladi, sovuq foydalanuvchi uchun qayta quriladi.
     """
-    servis = RivojlanishServisi(db)
-    rivojlanish = await servis.rivojlanish_olish(joriy_foydalanuvchi.id)
-
-    # Bugungi statistika
-    bugun = date.today()
-    kunlik_sorov = select(KunlikStatistika).where(
-        and_(
-            KunlikStatistika.foydalanuvchi_id == joriy_foydalanuvchi.id,
-            KunlikStatistika.sana == bugun
-        )
-    )
-    kunlik_natija = await db.execute(kunlik_sorov)
-    kunlik = kunlik_natija.scalar_one_or_none()
-
-    # Haftalik vaqt
-    hafta_boshi = bugun - timedelta(days=bugun.weekday())
-    haftalik_sorov = select(KunlikStatistika).where(
-        and_(
-            KunlikStatistika.foydalanuvchi_id == joriy_foydalanuvchi.id,
-            KunlikStatistika.sana >= hafta_boshi
-        )
-    )
-    haftalik_natija = await db.execute(haftalik_sorov)
-    haftalik = haftalik_natija.scalars().all()
-    haftalik_vaqt = sum((k.jami_vaqt or 0) for k in haftalik) // 60  # daqiqaga
-
-    # Oxirgi urinishlar
-    urinishlar, _ = await servis.urinishlar_olish(
-        joriy_foydalanuvchi.id, sahifa=1, hajm=5
-    )
+    snapshot = await DashboardServisi(db).olish(joriy_foydalanuvchi.id)
 
     # Kunlik maqsad
     kunlik_maqsad = 10
     if joriy_foydalanuvchi.profil:
         kunlik_maqsad = joriy_foydalanuvchi.profil.kunlik_maqsad
 
-    # Kategoriya statistikasi
-    kategoriya_stat_query = select(
-        AsosiyKategoriya.nomi,
-        func.count(HolatUrinishi.id).label('total')
-    ).select_from(HolatUrinishi).join(
-        Holat, HolatUrinishi.holat_id == Holat.id
-    ).join(
-        Bolim, Holat.bolim_id == Bolim.id
-    ).join(
-        KichikKategoriya, Bolim.kichik_kategoriya_id == KichikKategoriya.id
-    ).join(
-        AsosiyKategoriya, KichikKategoriya.asosiy_kategoriya_id == AsosiyKategoriya.id
-    ).where(
-        HolatUrinishi.foydalanuvchi_id == joriy_foydalanuvchi.id
-    ).group_by(AsosiyKategoriya.nomi).order_by(desc('total'))
-
-    kategoriya_stat_result = await db.execute(kategoriya_stat_query)
-    kategoriya_stats = kategoriya_stat_result.all()
-
-    eng_kop_yechilgan_kategoriya = kategoriya_stats[0].nomi if kategoriya_stats else None
-    eng_kam_yechilgan_kategoriya = kategoriya_stats[-1].nomi if kategoriya_stats else None
-
-    return DashboardStatistika(
-        jami_holatlar=rivojlanish.jami_urinishlar if rivojlanish else 0,
-        aniqlik_foizi=rivojlanish.aniqlik_foizi if rivojlanish else 0,
-        bu_hafta_vaqt=haftalik_vaqt,
-        daraja=rivojlanish.daraja if rivojlanish else 1,
-        joriy_streak=rivojlanish.joriy_streak if rivojlanish else 0,
-        bugungi_holatlar=kunlik.yechilgan_holatlar if kunlik else 0,
-        kunlik_maqsad=kunlik_maqsad,
-        oxirgi_urinishlar=urinishlar,
-        jami_yechilgan_holatlar=rivojlanish.jami_urinishlar if rivojlanish else 0,
-        ortacha_aniqlik=rivojlanish.aniqlik_foizi if rivojlanish else 0,
-        eng_kop_yechilgan_kategoriya=eng_kop_yechilgan_kategoriya,
-        eng_kam_yechilgan_kategoriya=eng_kam_yechilgan_kategoriya,
-    )
+    return DashboardStatistika(**snapshot, kunlik_maqsad=kunlik_maqsad)
 
 
 @router.get(
@@ -258,45 +199,13 @@ async def zaif_tomonlar_olish(
     Foydalanuvchining zaif tomonlarini (past aniqlikli kategoriyalar) qaytaradi.
     Minimum 3 ta urinish bo'lgan kategoriyalar hisobga olinadi.
     """
-    # Kategoriya bo'yicha statistika olish
-    sorov = select(
-        AsosiyKategoriya.id,
-        AsosiyKategoriya.nomi,
-        func.count(HolatUrinishi.id).label('jami'),
-        func.sum(func.cast(HolatUrinishi.togri, Integer)).label('togri')
-    ).select_from(HolatUrinishi).join(
-        Holat, HolatUrinishi.holat_id == Holat.id
-    ).join(
-        Bolim, Holat.bolim_id == Bolim.id
-    ).join(
-        KichikKategoriya, Bolim.kichik_kategoriya_id == KichikKategoriya.id
-    ).join(
-        AsosiyKategoriya, KichikKategoriya.asosiy_kategoriya_id == AsosiyKategoriya.id
-    ).where(
-        HolatUrinishi.foydalanuvchi_id == joriy_foydalanuvchi.id
-    ).group_by(
-        AsosiyKategoriya.id, AsosiyKategoriya.nomi
-    ).having(
-        func.count(HolatUrinishi.id) >= 3  # Minimum 3 urinish
+    # Kategoriya agregatidan o'qish (minimum 3 urinish)
+    statistika = await KategoriyaRivojlanishiServisi(db).royxat(
+        joriy_foydalanuvchi.id, minimal_urinish=3
     )
-
-    natija = await db.execute(sorov)
-    rows = natija.all()
-
-    # Aniqlik hisoblash va saralash
-    zaif_tomonlar = []
-    for row in rows:
-        jami = row.jami or 0
-        togri = row.togri or 0
-        aniqlik = (togri / jami * 100) if jami > 0 else 0
-
-        zaif_tomonlar.append({
-            "kategoriya_id": str(row.id),
-            "kategoriya": row.nomi,
-            "jami_urinishlar": jami,
-            "togri_javoblar": togri,
-            "aniqlik": round(aniqlik, 1)
-        })
+    zaif_tomonlar = [
+        {k: v for k, v in kat.items() if k != "rang"} for kat in statistika
+    ]
 
     # Aniqlik bo'yicha saralash (eng past birinchi)
     zaif_tomonlar.sort(key=lambda x: x["aniqlik"])
@@ -321,43 +230,12 @@ async def kuchli_tomonlar_olish(
     """
     Foydalanuvchining kuchli tomonlarini (yuqori aniqlikli kategoriyalar) qaytaradi.
     """
-    sorov = select(
-        AsosiyKategoriya.id,
-        AsosiyKategoriya.nomi,
-        func.count(HolatUrinishi.id).label('jami'),
-        func.sum(func.cast(HolatUrinishi.togri, Integer)).label('togri')
-    ).select_from(HolatUrinishi).join(
-        Holat, HolatUrinishi.holat_id == Holat.id
-    ).join(
-        Bolim, Holat.bolim_id == Bolim.id
-    ).join(
-        KichikKategoriya, Bolim.kichik_kategoriya_id == KichikKategoriya.id
-    ).join(
-        AsosiyKategoriya, KichikKategoriya.asosiy_kategoriya_id == AsosiyKategoriya.id
-    ).where(
-        HolatUrinishi.foydalanuvchi_id == joriy_foydalanuvchi.id
-    ).group_by(
-        AsosiyKategoriya.id, AsosiyKategoriya.nomi
-    ).having(
-        func.count(HolatUrinishi.id) >= 3
+    statistika = await KategoriyaRivojlanishiServisi(db).royxat(
+        joriy_foydalanuvchi.id, minimal_urinish=3
     )
-
-    natija = await db.execute(sorov)
-    rows = natija.all()
-
-    kuchli_tomonlar = []
-    for row in rows:
-        jami = row.jami or 0
-        togri = row.togri or 0
-        aniqlik = (togri / jami * 100) if jami > 0 else 0
-
-        kuchli_tomonlar.append({
-            "kategoriya_id": str(row.id),
-            "kategoriya": row.nomi,
-            "jami_urinishlar": jami,
-            "togri_javoblar": togri,
-            "aniqlik": round(aniqlik, 1)
-        })
+    kuchli_tomonlar = [
+        {k: v for k, v in kat.items() if k != "rang"} for kat in statistika
+    ]
 
     # Aniqlik bo'yicha teskari saralash (eng yuqori birinchi)
     kuchli_tomonlar.sort(key=lambda x: x["aniqlik"], reverse=True)
@@ -381,42 +259,22 @@ async def kategoriya_statistika(
     """
     Barcha kategoriyalar bo'yicha foydalanuvchi statistikasi.
     """
-    sorov = select(
-        AsosiyKategoriya.id,
-        AsosiyKategoriya.nomi,
-        AsosiyKategoriya.rang,
-        func.count(HolatUrinishi.id).label('jami'),
-        func.sum(func.cast(HolatUrinishi.togri, Integer)).label('togri')
-    ).select_from(HolatUrinishi).join(
-        Holat, HolatUrinishi.holat_id == Holat.id
-    ).join(
-        Bolim, Holat.bolim_id == Bolim.id
-    ).join(
-        KichikKategoriya, Bolim.kichik_kategoriya_id == KichikKategoriya.id
-    ).join(
-        AsosiyKategoriya, KichikKategoriya.asosiy_kategoriya_id == AsosiyKategoriya.id
-    ).where(
-        HolatUrinishi.foydalanuvchi_id == joriy_foydalanuvchi.id
-    ).group_by(
-        AsosiyKategoriya.id, AsosiyKategoriya.nomi, AsosiyKategoriya.rang
-    ).order_by(AsosiyKategoriya.nomi)
+    return await KategoriyaRivojlanishiServisi(db).royxat(joriy_foydalanuvchi.id)
 
-    natija = await db.execute(sorov)
-    rows = natija.all()
-
-    statistika = []
-    for row in rows:
-        jami = row.jami or 0
-        togri = row.togri or 0
-        aniqlik = (togri / jami * 100) if jami > 0 else 0
-
-        statistika.append({
-            "kategoriya_id": str(row.id),
-            "kategoriya": row.nomi,
-            "rang": row.rang,
-            "jami_urinishlar": jami,
-            "togri_javoblar": togri,
-            "aniqlik": round(aniqlik, 1)
-        })
-
-    return statistika
+
+# ============== Oylik statistika ==============
+
+@router.get(
+    "/oylik-statistika",
+    summary="Oylik statistika"
+)
+async def oylik_statistika(
+    oylar: int = Query(12, ge=1, le=60),
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+) -> Dict[str, Any]:
+    """
+    Oxirgi N oy: oylar, qiyinlik va kategoriyalar bo'yicha urinishlar, aniqlik va vaqt.
+    Arxivlangan oylar oylik yig'indidan, yangilari xom urinishlardan olinadi.
+    """
+    return await ArxivServisi(db).statistika(joriy_foydalanuvchi.id, oy_boshi(oylar - 1))
@@ -8,10 +8,14 @@ from uuid import UUID
 
 from sozlamalar.malumotlar_bazasi import sessiya_olish
 from servislar.takrorlash_servisi import TakrorlashServisi
+from servislar.muddat_servisi import MuddatServisi
 from sxemalar.takrorlash import (
     TakrorlashKartasiJavob, TakrorlashBaholash,
     BugungiTakrorlashlar, TakrorlashStatistikasi,
-    TakrorlashTarixiJavob
+    TakrorlashTarixiJavob, TakrorlashNavbati,
+    TakrorlashPaketi, TakrorlashPaketNatijasi,
+    TakrorlashSessiyasiBoshlash, TakrorlashSessiyasiJavob,
+    TakrorlashSessiyasiNavbati
 )
 from middleware.autentifikatsiya import joriy_foydalanuvchi_olish
 from modellar.foydalanuvchi import Foydalanuvchi
@@ -80,6 +84,19 @@ async def takrorlash_statistikasi(
     return TakrorlashStatistikasi(**stat)
 
 
+@router.get(
+    "/bugun-soni",
+    summary="Bugun takrorlash kerak bo'lgan kartalar soni"
+)
+async def bugun_takrorlash_soni(
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Muddatlar indeksidan (Redis) o'qiladi - badge va eslatmalar uchun."""
+    soni = await MuddatServisi(db).bugun_soni(joriy_foydalanuvchi.id)
+    return {"bugun_takrorlash_kerak": soni}
+
+
 @router.post(
     "/qoshish/{holat_id}",
     response_model=TakrorlashKartasiJavob,
@@ -126,6 +143,92 @@ async def takrorlash_baholash(
     return karta_javobga(karta)
 
 
+# ============== Sessiya va paketli baholash ==============
+
+@router.get(
+    "/navbat",
+    response_model=TakrorlashNavbati,
+    summary="Takrorlash navbati (oflayn baholash uchun)"
+)
+async def takrorlash_navbati(
+    limit: int = Query(50, ge=1, le=200),
+    faqat_bugungi: bool = Query(True),
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Kartalar holat mazmuni bilan birga - mijoz baholarni paket qilib yuboradi."""
+    servis = TakrorlashServisi(db)
+    kartalar = await servis.navbat_olish(joriy_foydalanuvchi.id, limit, faqat_bugungi)
+    return TakrorlashNavbati(kartalar=kartalar, jami=len(kartalar))
+
+
+@router.post(
+    "/sessiya",
+    response_model=TakrorlashSessiyasiNavbati,
+    status_code=status.HTTP_201_CREATED,
+    summary="Takrorlash sessiyasini boshlash"
+)
+async def takrorlash_sessiyasi_boshlash(
+    malumot: TakrorlashSessiyasiBoshlash,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Sessiya yaratadi va rejadagi kartalar navbatini qaytaradi."""
+    servis = TakrorlashServisi(db)
+    sessiya = await servis.sessiya_boshlash(joriy_foydalanuvchi.id, malumot.reja_kartalar)
+    kartalar = await servis.navbat_olish(
+        joriy_foydalanuvchi.id, malumot.reja_kartalar, malumot.faqat_bugungi
+    )
+    return TakrorlashSessiyasiNavbati(
+        sessiya=TakrorlashSessiyasiJavob.model_validate(sessiya),
+        navbat=TakrorlashNavbati(kartalar=kartalar, jami=len(kartalar))
+    )
+
+
+@router.post(
+    "/sessiya/{sessiya_id}/tugatish",
+    response_model=TakrorlashSessiyasiJavob,
+    summary="Takrorlash sessiyasini tugatish"
+)
+async def takrorlash_sessiyasi_tugatish(
+    sessiya_id: UUID,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """Takrorlash sessiyasini tugatadi."""
+    servis = TakrorlashServisi(db)
+    sessiya = await servis.sessiya_tugatish(joriy_foydalanuvchi.id, sessiya_id)
+    
+    if not sessiya:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sessiya topilmadi"
+        )
+    
+    return sessiya
+
+
+@router.post(
+    "/paket",
+    response_model=TakrorlashPaketNatijasi,
+    summary="Paketli baholash (SM-2)"
+)
+async def takrorlash_paketi(
+    malumot: TakrorlashPaketi,
+    joriy_foydalanuvchi: Foydalanuvchi = Depends(joriy_foydalanuvchi_olish),
+    db: AsyncSession = Depends(sessiya_olish)
+):
+    """
+    Oflayn baholangan kartalarni bitta so'rovda qo'llaydi.
+    Boshqa foydalanuvchiga tegishli yoki mavjud bo'lmagan kartalar "topilmagan"da qaytadi.
+    """
+    servis = TakrorlashServisi(db)
+    natija = await servis.paket_baholash(
+        joriy_foydalanuvchi.id, malumot.baholar, malumot.sessiya_id
+    )
+    return TakrorlashPaketNatijasi(**natija)
+
+
 @router.post(
     "/oqilgan/{holat_id}",
     response_model=TakrorlashKartasiJavob,
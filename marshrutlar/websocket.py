@@ -12,6 +12,8 @@ from servislar.websocket_servisi import (
     xabar_yaratish
 )
 from yordamchilar.xavfsizlik import token_dekodlash
+from middleware.autentifikatsiya import admin_talab_qilish
+from modellar.foydalanuvchi import Foydalanuvchi
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -69,7 +71,7 @@ async def websocket_endpoint(
                 "onlayn_soni": websocket_manager.ulangan_foydalanuvchilar_soni()
             }
         )
-        await websocket.send_json(tasdiqlash)
+        await websocket_manager.ulanishga_yuborish(websocket, foydalanuvchi_id, tasdiqlash)
         
         # Xabarlarni tinglash
         while True:
@@ -84,7 +86,7 @@ async def websocket_endpoint(
                     kanal = xabar.get("kanal")
                     if kanal:
                         await websocket_manager.kanalga_obuna(foydalanuvchi_id, kanal)
-                        await websocket.send_json({
+                        await websocket_manager.ulanishga_yuborish(websocket, foydalanuvchi_id, {
                             "turi": "obuna_tasdiqlandi",
                             "kanal": kanal
                         })
@@ -94,17 +96,17 @@ async def websocket_endpoint(
                     kanal = xabar.get("kanal")
                     if kanal:
                         await websocket_manager.kanaldan_chiqish(foydalanuvchi_id, kanal)
-                        await websocket.send_json({
+                        await websocket_manager.ulanishga_yuborish(websocket, foydalanuvchi_id, {
                             "turi": "obunadan_chiqildi",
                             "kanal": kanal
                         })
                 
                 elif amal == "ping":
                     # Keep-alive
-                    await websocket.send_json({"turi": "pong"})
+                    await websocket_manager.ulanishga_yuborish(websocket, foydalanuvchi_id, {"turi": "pong"})
                 
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await websocket_manager.ulanishga_yuborish(websocket, foydalanuvchi_id, {
                     "turi": XabarTuri.XATO,
                     "xabar": "Noto'g'ri JSON format"
                 })
@@ -118,8 +120,21 @@ async def websocket_endpoint(
 
 
 @router.get("/ws/statistika")
-async def websocket_statistika():
+async def websocket_statistika(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
     """WebSocket statistikasi (admin uchun)."""
     return {
-        "ulangan_foydalanuvchilar": websocket_manager.ulangan_foydalanuvchilar_soni()
+        "ulangan_foydalanuvchilar": websocket_manager.ulangan_foydalanuvchilar_soni(),
+        "navbatlar": websocket_manager.umumiy_metrikalar()
+    }
+
+
+@router.get("/ws/statistika/ulanishlar")
+async def websocket_ulanishlar_statistikasi(
+    admin: Foydalanuvchi = Depends(admin_talab_qilish)
+):
+    """Har bir ulanish navbati bo'yicha metrikalar (admin uchun)."""
+    return {
+        "ulanishlar": websocket_manager.ulanishlar_metrikalari()
     }
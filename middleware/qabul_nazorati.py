@@ -0,0 +1,314 @@
+# MedCase Pro Platform - Qabul Nazorati Middleware
+# Marshrut sinflari bo'yicha moslashuvchan parallellik limiti va tez 503 (load shedding)
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import asyncio
+import logging
+import math
+import re
+import time
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from sozlamalar.sozlamalar import sozlamalar
+from sozlamalar.malumotlar_bazasi import malumotlar_bazasi
+from vositalar.metrikalar import (
+    QABUL_JARAYONDA,
+    QABUL_KUTISH,
+    QABUL_LIMIT,
+    QABUL_NAVBAT,
+    QABUL_RAD,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sinf: (boshlang'ich limit, navbatda kutish byudjeti - soniya)
+SINFLAR: Dict[str, tuple] = {
+    "javob": (30, 5.0),
+    "autentifikatsiya": (10, 2.0),
+    "umumiy": (40, 1.0),
+    "admin": (5, 10.0),
+    "eksport": (2, 0.5),
+}
+
+# Bo'shagan joylar shu tartibda taqsimlanadi
+USTUVORLIK = ("javob", "autentifikatsiya", "umumiy", "admin", "eksport")
+
+# Javob yuborish marshrutlari (holat, imtihon javobi/yakunlash, takrorlash baholash/paket)
+_JAVOB_YOLLARI = re.compile(
+    r"^/api/v1/(holat/[^/]+/javob|imtihon/[^/]+/(javob|yakunlash)$|takrorlash/(baholash/|paket$))"
+)
+
+# Imtihon so'rovi shu oraliqda ko'rilgan bo'lsa javoblar uchun zaxira ushlab turiladi
+IMTIHON_OYNASI = 300
+
+# Kechikish uzoq muddatli o'rtachadan shuncha marta oshmaguncha limit kamaymaydi
+TOLERANTLIK = 2.0
+UZOQ_ALFA = 1 / 500
+QISQA_ALFA = 0.1
+SILLIQLASH = 0.2
+
+
+def sinf_aniqlash(metod: str, yol: str) -> Optional[str]:
+    """So'rov sinfi; None - nazoratdan tashqari (tizim marshrutlari, preflight)."""
+    if metod == "OPTIONS" or not yol.startswith("/api/"):
+        return None
+    if yol.startswith("/api/v1/autentifikatsiya"):
+        return "autentifikatsiya"
+    if yol.startswith("/api/v1/admin"):
+        return "admin"
+    if yol.startswith("/api/v1/export"):
+        return "eksport"
+    if metod == "POST" and _JAVOB_YOLLARI.match(yol):
+        return "javob"
+    return "umumiy"
+
+
+class MoslashuvchanLimit:
+    """
+    Bitta sinf uchun gradient asosidagi parallellik limiti.
+    Kechikish uzoq muddatli o'rtachadan TOLERANTLIK martadan oshsa limit
+    mutanosib kamayadi, aks holda sqrt(limit) qadam bilan o'sadi.
+    """
+
+    def __init__(self, nom: str, boshlangich: int, byudjet: float):
+        self.nom = nom
+        self.limit = float(boshlangich)
+        self.maksimal = float(boshlangich)
+        self.byudjet = byudjet
+        self.jarayonda = 0
+        self.navbat: Deque[asyncio.Future] = deque()
+        self.uzoq_rtt: Optional[float] = None
+        self.ortacha_rtt = 0.05
+
+        self._limit_metrikasi = QABUL_LIMIT.labels(nom)
+        self._jarayonda_metrikasi = QABUL_JARAYONDA.labels(nom)
+        self._navbat_metrikasi = QABUL_NAVBAT.labels(nom)
+        self._kutish_metrikasi = QABUL_KUTISH.labels(nom)
+        self._limit_metrikasi.set(self.limit)
+
+    def kutish_bahosi(self) -> float:
+        """Navbat oxiriga qo'shilgan so'rovning kutilayotgan kutish vaqti."""
+        return (len(self.navbat) + 1) * self.ortacha_rtt / max(self.limit, 1.0)
+
+    def qayd_etish(self, rtt: float) -> None:
+        """Tugagan so'rov kechikishi bo'yicha limitni moslaydi."""
+        rtt = max(rtt, 1e-4)
+        self.ortacha_rtt += (rtt - self.ortacha_rtt) * QISQA_ALFA
+        if self.uzoq_rtt is None:
+            self.uzoq_rtt = rtt
+        else:
+            self.uzoq_rtt += (rtt - self.uzoq_rtt) * UZOQ_ALFA
+            # Yuklama tushgandan keyin uzoq o'rtacha tezroq pasayadi
+            if self.uzoq_rtt > rtt * 2:
+                self.uzoq_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, TOLERANTLIK * self.uzoq_rtt / rtt))
+        if gradient >= 1.0 and self.jarayonda < self.limit / 2:
+            # Limitga yetilmayapti - o'stirish uchun asos yo'q
+            return
+        yangi = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = max(1.0, min(self.maksimal, self.limit * (1 - SILLIQLASH) + yangi * SILLIQLASH))
+        self._limit_metrikasi.set(self.limit)
+
+    def yuklama_xatosi(self) -> None:
+        """DB pool timeout - limit darhol ikki baravar kamayadi."""
+        self.limit = max(1.0, self.limit / 2)
+        self._limit_metrikasi.set(self.limit)
+
+    def holati(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 1),
+            "jarayonda": self.jarayonda,
+            "navbatda": len(self.navbat),
+            "ortacha_rtt_ms": round(self.ortacha_rtt * 1000, 1),
+            "uzoq_rtt_ms": round((self.uzoq_rtt or 0) * 1000, 1),
+            "byudjet_soniya": self.byudjet,
+        }
+
+
+class QabulNazorati:
+    """
+    Jarayon (worker) darajasidagi qabul nazorati.
+    Barcha sinflar yig'indisi DB pool sig'imidan oshmaydi; imtihon paytida
+    sig'imning qabul_imtihon_zaxirasi qismi faqat javob yuborish uchun qoladi.
+    """
+
+    def __init__(self):
+        self.sinflar = {
+            nom: MoslashuvchanLimit(nom, boshlangich, byudjet)
+            for nom, (boshlangich, byudjet) in SINFLAR.items()
+        }
+        self.jarayonda = 0
+        self._umumiy: Optional[int] = None
+        self._imtihon_oxirgi = float("-inf")
+
+    @property
+    def umumiy_limit(self) -> int:
+        if self._umumiy is None:
+            umumiy = sozlamalar.qabul_umumiy_limit or malumotlar_bazasi.pool_sigimi
+            if not umumiy:
+                # Baza hali ulanmagan - keyingi so'rovda qayta hisoblanadi
+                return 100
+            self._umumiy = umumiy
+            for sinf in self.sinflar.values():
+                sinf.maksimal = float(umumiy)
+        return self._umumiy
+
+    def imtihon_belgilash(self) -> None:
+        self._imtihon_oxirgi = time.monotonic()
+
+    def imtihon_rejimi(self) -> bool:
+        return time.monotonic() - self._imtihon_oxirgi < IMTIHON_OYNASI
+
+    def _sigadimi(self, sinf: MoslashuvchanLimit) -> bool:
+        if sinf.jarayonda >= sinf.limit:
+            return False
+        chegara = self.umumiy_limit
+        if sinf.nom != "javob" and self.imtihon_rejimi():
+            chegara = int(chegara * (1 - sozlamalar.qabul_imtihon_zaxirasi))
+        return self.jarayonda < chegara
+
+    def _egallash(self, sinf: MoslashuvchanLimit) -> None:
+        sinf.jarayonda += 1
+        self.jarayonda += 1
+        sinf._jarayonda_metrikasi.inc()
+
+    def _taqsimlash(self) -> None:
+        """Bo'shagan joylarni navbatdagilarga ustuvorlik tartibida beradi."""
+        for nom in USTUVORLIK:
+            sinf = self.sinflar[nom]
+            while sinf.navbat and self._sigadimi(sinf):
+                kutuvchi = sinf.navbat.popleft()
+                sinf._navbat_metrikasi.dec()
+                if kutuvchi.done():
+                    continue
+                self._egallash(sinf)
+                kutuvchi.set_result(True)
+
+    async def kirish(self, sinf: MoslashuvchanLimit) -> Optional[int]:
+        """
+        So'rovni qabul qiladi (None) yoki rad etadi - Retry-After soniyalari.
+        Kutilayotgan kutish byudjetdan oshsa navbatga qo'yilmasdan darhol rad etiladi.
+        """
+        if not sinf.navbat and self._sigadimi(sinf):
+            self._egallash(sinf)
+            sinf._kutish_metrikasi.observe(0.0)
+            return None
+
+        baho = sinf.kutish_bahosi()
+        if baho > sinf.byudjet:
+            QABUL_RAD.labels(sinf.nom, "kutish_bahosi").inc()
+            return max(1, math.ceil(baho))
+
+        kutuvchi = asyncio.get_running_loop().create_future()
+        sinf.navbat.append(kutuvchi)
+        sinf._navbat_metrikasi.inc()
+        boshlanish = time.perf_counter()
+        try:
+            await asyncio.wait((kutuvchi,), timeout=sinf.byudjet)
+        except asyncio.CancelledError:
+            # Klient uzildi - berilgan joy qaytariladi
+            if kutuvchi.done() and not kutuvchi.cancelled():
+                self.chiqish(sinf, None)
+            else:
+                self._navbatdan_olish(sinf, kutuvchi)
+            raise
+
+        if kutuvchi.done() and not kutuvchi.cancelled():
+            sinf._kutish_metrikasi.observe(time.perf_counter() - boshlanish)
+            return None
+
+        self._navbatdan_olish(sinf, kutuvchi)
+        QABUL_RAD.labels(sinf.nom, "kutish_muddati").inc()
+        return max(1, math.ceil(sinf.kutish_bahosi()))
+
+    @staticmethod
+    def _navbatdan_olish(sinf: MoslashuvchanLimit, kutuvchi: asyncio.Future) -> None:
+        kutuvchi.cancel()
+        try:
+            sinf.navbat.remove(kutuvchi)
+            sinf._navbat_metrikasi.dec()
+        except ValueError:
+            pass
+
+    def chiqish(self, sinf: MoslashuvchanLimit, rtt: Optional[float]) -> None:
+        """So'rov tugadi: joy bo'shatiladi va limit moslanadi."""
+        sinf.jarayonda -= 1
+        self.jarayonda -= 1
+        sinf._jarayonda_metrikasi.dec()
+        if rtt is not None:
+            sinf.qayd_etish(rtt)
+        self._taqsimlash()
+
+    def holati(self) -> Dict[str, Any]:
+        return {
+            "umumiy_limit": self.umumiy_limit,
+            "jarayonda": self.jarayonda,
+            "imtihon_rejimi": self.imtihon_rejimi(),
+            "sinflar": {nom: sinf.holati() for nom, sinf in self.sinflar.items()},
+        }
+
+
+# Global (worker ichidagi) qabul nazoratchisi
+qabul_nazoratchisi = QabulNazorati()
+
+
+def _band_javobi(soniya: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "muvaffaqiyat": False,
+            "xato": "Server band. Keyinroq urinib ko'ring",
+            "xato_kodi": "SERVER_BAND"
+        },
+        headers={"Retry-After": str(soniya)}
+    )
+
+
+async def qabul_nazorati_middleware(request: Request, call_next):
+    """So'rovni sinfi limitiga ko'ra qabul qiladi, navbatga qo'yadi yoki tez 503 qaytaradi."""
+    if not sozlamalar.qabul_nazorati:
+        return await call_next(request)
+
+    yol = request.url.path
+    nom = sinf_aniqlash(request.method, yol)
+    if nom is None:
+        return await call_next(request)
+    if yol.startswith("/api/v1/imtihon"):
+        qabul_nazoratchisi.imtihon_belgilash()
+
+    sinf = qabul_nazoratchisi.sinflar[nom]
+    qayta_urinish = await qabul_nazoratchisi.kirish(sinf)
+    if qayta_urinish is not None:
+        return _band_javobi(qayta_urinish)
+
+    boshlanish = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except PoolTimeoutError:
+        logger.warning(f"DB pool timeout - '{nom}' limiti kamaytirildi")
+        sinf.yuklama_xatosi()
+        qabul_nazoratchisi.chiqish(sinf, None)
+        raise
+    except BaseException:
+        qabul_nazoratchisi.chiqish(sinf, None)
+        raise
+
+    # call_next tana oqimidan oldin qaytadi - joy oxirgi bo'lak yuborilganda bo'shatiladi
+    response.body_iterator = _tana_oxirida_chiqish(response.body_iterator, sinf, boshlanish)
+    return response
+
+
+async def _tana_oxirida_chiqish(tana, sinf: MoslashuvchanLimit, boshlanish: float):
+    """Javob tanasini uzatadi; tugagach (yoki klient uzilganda) qabul joyini qaytaradi."""
+    rtt = None
+    try:
+        async for bolak in tana:
+            yield bolak
+        rtt = time.perf_counter() - boshlanish
+    finally:
+        qabul_nazoratchisi.chiqish(sinf, rtt)
@@ -0,0 +1,237 @@
+# MedCase Pro Platform - SQL Kuzatuv Middleware
+# So'rov bo'yicha statementlar soni, DB vaqti, eng sekin statement va N+1 nomzodlari
+
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import time
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from sozlamalar.sozlamalar import sozlamalar
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+
+logger = logging.getLogger(__name__)
+
+STATISTIKA_KALITI = f"{KeshKalitlari.SQL}:statistika"
+SEKINLAR_KALITI = f"{KeshKalitlari.SQL}:sekinlar"
+EXPLAIN_KALITI = f"{KeshKalitlari.SQL}:explain"
+
+# Redisda saqlanadigan sekin statementlar soni
+SEKINLAR_MAKSIMAL = 200
+
+# Saqlanadigan statement matni uzunligi
+SQL_UZUNLIGI = 2000
+
+# Jarayon ichidagi yig'indilar Redisga shu oraliqda yuboriladi
+YUBORISH_ORALIGI = 10
+
+# EXPLAIN rejimi bayrog'i shu oraliqda qayta o'qiladi
+EXPLAIN_TEKSHIRISH_ORALIGI = 10
+
+
+class SorovKuzatuvi:
+    """Bitta HTTP so'rovi davomida bajarilgan statementlar."""
+
+    __slots__ = ("soni", "vaqt", "eng_sekin", "eng_sekin_sql", "takrorlar", "sekinlar", "explain")
+
+    def __init__(self, explain: bool = False):
+        self.soni = 0
+        self.vaqt = 0.0
+        self.eng_sekin = 0.0
+        self.eng_sekin_sql: Optional[str] = None
+        self.takrorlar: Counter = Counter()
+        self.sekinlar: List[Dict[str, Any]] = []
+        self.explain = explain
+
+    def qayd_etish(self, sql: str, soniya: float) -> None:
+        self.soni += 1
+        self.vaqt += soniya
+        self.takrorlar[sql] += 1
+        if soniya > self.eng_sekin:
+            self.eng_sekin = soniya
+            self.eng_sekin_sql = sql
+
+    def n1_nomzodlari(self) -> List[Tuple[str, int]]:
+        """Bir so'rovda chegaradan ko'p takrorlangan bir xil statementlar."""
+        return [
+            (sql, soni) for sql, soni in self.takrorlar.most_common()
+            if soni >= sozlamalar.sql_n1_chegara
+        ]
+
+
+_joriy: ContextVar[Optional[SorovKuzatuvi]] = ContextVar("sql_kuzatuvi", default=None)
+
+# "METOD marshrut\tmetrika" -> qiymat (Redisga yuborilmagan qism)
+_jamlanma: Counter = Counter()
+_yuborilgan = time.monotonic()
+_explain_holati: Tuple[float, bool] = (0.0, False)
+
+
+# ============== Engine hodisalari ==============
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _boshlash(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _joriy.get() is not None:
+        conn.info["sql_boshlanish"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _tugatish(conn, cursor, statement, parameters, context, executemany) -> None:
+    kuzatuv = _joriy.get()
+    if kuzatuv is None or conn.info.get("sql_explain"):
+        return
+
+    soniya = time.perf_counter() - conn.info.pop("sql_boshlanish", time.perf_counter())
+    kuzatuv.qayd_etish(statement, soniya)
+
+    if soniya * 1000 < sozlamalar.sql_sekin_chegara_ms:
+        return
+    yozuv = {"sql": statement[:SQL_UZUNLIGI], "ms": round(soniya * 1000, 1)}
+    if kuzatuv.explain and _explain_mumkin(conn, statement, executemany):
+        yozuv["reja"] = _explain(conn, statement, parameters)
+    kuzatuv.sekinlar.append(yozuv)
+
+
+def _explain_mumkin(conn, statement: str, executemany: bool) -> bool:
+    """
+    EXPLAIN ANALYZE statementni qayta bajaradi - faqat SELECT va faqat autocommit
+    (GET) ulanishida: xato bo'lsa ham so'rov tranzaksiyasi buzilmaydi.
+    """
+    return (
+        not executemany
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+    )
+
+
+def _explain(conn, statement: str, parameters) -> List[str]:
+    """Sekin statementning haqiqiy rejasi (EXPLAIN (ANALYZE, BUFFERS))."""
+    conn.info["sql_explain"] = True
+    try:
+        natija = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        return [qator[0] for qator in natija]
+    except Exception as xato:
+        return [f"EXPLAIN xatosi: {xato}"]
+    finally:
+        conn.info.pop("sql_explain", None)
+
+
+# ============== Middleware ==============
+
+async def _explain_yoqilgan() -> bool:
+    """Admin yoqqan EXPLAIN rejimi (Redis bayrog'i, jarayon ichida keshlanadi)."""
+    global _explain_holati
+    tekshirilgan, yoqilgan = _explain_holati
+    if time.monotonic() - tekshirilgan >= EXPLAIN_TEKSHIRISH_ORALIGI:
+        yoqilgan = await redis_kesh.mavjud(EXPLAIN_KALITI)
+        _explain_holati = (time.monotonic(), yoqilgan)
+    return yoqilgan
+
+
+def _marshrut(request: Request) -> str:
+    """Marshrut shabloni (/holat/{holat_id}) - aniq URL emas."""
+    route = request.scope.get("route")
+    return f"{request.method} {route.path if route else '<nomalum>'}"
+
+
+async def _yakunlash(marshrut: str, kuzatuv: SorovKuzatuvi) -> None:
+    """N+1 ogohlantirishi, sekin statementlar va marshrut yig'indilari."""
+    global _yuborilgan
+
+    nomzodlar = kuzatuv.n1_nomzodlari()
+    for sql, soni in nomzodlar:
+        logger.warning(f"N+1 nomzodi: {marshrut} - {soni} marta: {sql[:200]}")
+
+    if kuzatuv.sekinlar:
+        vaqt = time.time()
+        await redis_kesh.royxatga_qoshish(
+            SEKINLAR_KALITI,
+            [{**yozuv, "marshrut": marshrut, "vaqt": vaqt} for yozuv in kuzatuv.sekinlar],
+            SEKINLAR_MAKSIMAL
+        )
+
+    _jamlanma[f"{marshrut}\tsorovlar"] += 1
+    _jamlanma[f"{marshrut}\tstatementlar"] += kuzatuv.soni
+    _jamlanma[f"{marshrut}\tdb_mks"] += int(kuzatuv.vaqt * 1_000_000)
+    _jamlanma[f"{marshrut}\tsekinlar"] += len(kuzatuv.sekinlar)
+    _jamlanma[f"{marshrut}\tn1"] += 1 if nomzodlar else 0
+
+    if time.monotonic() - _yuborilgan >= YUBORISH_ORALIGI:
+        deltalar = dict(_jamlanma)
+        _jamlanma.clear()
+        _yuborilgan = time.monotonic()
+        await redis_kesh.hash_qoshish(STATISTIKA_KALITI, deltalar)
+
+
+async def sql_kuzatuv_middleware(request: Request, call_next):
+    """
+    So'rovdagi statementlarni marshrutga bog'laydi.
+    Debug rejimida natija X-SQL-* sarlavhalarida qaytariladi.
+    """
+    if not sozlamalar.sql_kuzatuv:
+        return await call_next(request)
+
+    kuzatuv = SorovKuzatuvi(explain=await _explain_yoqilgan())
+    belgi = _joriy.set(kuzatuv)
+    try:
+        response = await call_next(request)
+    finally:
+        _joriy.reset(belgi)
+
+    await _yakunlash(_marshrut(request), kuzatuv)
+
+    if sozlamalar.debug:
+        response.headers["X-SQL-Soni"] = str(kuzatuv.soni)
+        response.headers["X-SQL-Vaqti"] = f"{kuzatuv.vaqt * 1000:.1f}"
+        response.headers["X-SQL-Eng-Sekin"] = f"{kuzatuv.eng_sekin * 1000:.1f}"
+        response.headers["X-SQL-N1"] = str(len(kuzatuv.n1_nomzodlari()))
+
+    return response
+
+
+# ============== Admin ==============
+
+async def statistika() -> List[Dict[str, Any]]:
+    """Marshrutlar bo'yicha yig'indilar, DB vaqti bo'yicha kamayish tartibida."""
+    marshrutlar: Dict[str, Dict[str, int]] = {}
+    for maydon, qiymat in (await redis_kesh.hash_olish(STATISTIKA_KALITI)).items():
+        marshrut, _, metrika = maydon.rpartition("\t")
+        marshrutlar.setdefault(marshrut, {})[metrika] = int(qiymat)
+
+    natija = []
+    for marshrut, m in marshrutlar.items():
+        sorovlar = m.get("sorovlar", 0) or 1
+        natija.append({
+            "marshrut": marshrut,
+            "sorovlar": m.get("sorovlar", 0),
+            "ortacha_statementlar": round(m.get("statementlar", 0) / sorovlar, 2),
+            "ortacha_db_ms": round(m.get("db_mks", 0) / sorovlar / 1000, 2),
+            "jami_db_soniya": round(m.get("db_mks", 0) / 1_000_000, 2),
+            "sekin_statementlar": m.get("sekinlar", 0),
+            "n1_sorovlar": m.get("n1", 0),
+        })
+    return sorted(natija, key=lambda m: m["jami_db_soniya"], reverse=True)
+
+
+async def sekinlar(soni: int = 50) -> List[Dict[str, Any]]:
+    """Oxirgi sekin statementlar (EXPLAIN rejasi bilan, agar yoqilgan bo'lsa)."""
+    return await redis_kesh.royxat_olish(SEKINLAR_KALITI, soni)
+
+
+async def explain_yoqish(daqiqa: int) -> None:
+    """Sekin SELECT statementlari uchun EXPLAIN (ANALYZE, BUFFERS) ni vaqtincha yoqadi (0 - o'chiradi)."""
+    if daqiqa:
+        await redis_kesh.saqlash(EXPLAIN_KALITI, 1, daqiqa * 60)
+    else:
+        await redis_kesh.ochirish(EXPLAIN_KALITI)
+
+
+async def tozalash() -> None:
+    """Yig'ilgan statistika va sekin statementlarni o'chiradi."""
+    _jamlanma.clear()
+    await redis_kesh.ochirish(STATISTIKA_KALITI)
+    await redis_kesh.ochirish(SEKINLAR_KALITI)
@@ -0,0 +1,168 @@
+"""holat_urinishlari oylik bo'laklar (RANGE partition) va BRIN indeks
+
+Mavjud oddiy jadval yangi bo'laklangan jadvalga ko'chiriladi: eski tarix
+oylik bo'laklarga taqsimlanadi, birlamchi kalit (id, yaratilgan_vaqt) ga
+kengayadi, vaqt bo'yicha B-tree indekslar BRIN bilan almashtiriladi.
+Ko'chirish bitta tranzaksiyada - katta bazada texnik oynada ishga tushiring.
+
+Bo'sh bazada (jadval hali yo'q) hech narsa qilinmaydi: jadval modeldan
+create_all bilan bo'laklangan holda yaratiladi.
+
+Revision ID: a3f1c2d4e5b6
+Revises: d5e9f3a2b0c4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c2d4e5b6'
+down_revision: Union[str, None] = 'd5e9f3a2b0c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Migratsiya o'z nusxasini saqlaydi - keyingi model o'zgarishlari unga ta'sir qilmaydi
+BOLAKLAR_FUNKSIYASI = """
+CREATE OR REPLACE FUNCTION urinish_bolaklarini_yaratish(
+    oldinga integer DEFAULT 3,
+    boshlanish date DEFAULT NULL
+) RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    oy date := date_trunc('month', coalesce(boshlanish, (now() AT TIME ZONE 'UTC')::date))::date;
+    oxirgi date := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => oldinga))::date;
+    dan timestamptz;
+    gacha timestamptz;
+    nom text;
+    yaratildi integer := 0;
+BEGIN
+    WHILE oy <= oxirgi LOOP
+        nom := 'holat_urinishlari_' || to_char(oy, 'YYYY_MM');
+        IF to_regclass(nom) IS NULL THEN
+            dan := oy::timestamp AT TIME ZONE 'UTC';
+            gacha := (oy + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+            EXECUTE 'CREATE TABLE ' || quote_ident(nom) || ' (LIKE holat_urinishlari INCLUDING DEFAULTS)';
+            IF to_regclass('holat_urinishlari_standart') IS NOT NULL THEN
+                EXECUTE 'WITH k AS (DELETE FROM holat_urinishlari_standart'
+                    || ' WHERE yaratilgan_vaqt >= $1 AND yaratilgan_vaqt < $2 RETURNING *)'
+                    || ' INSERT INTO ' || quote_ident(nom) || ' SELECT * FROM k'
+                    USING dan, gacha;
+            END IF;
+            EXECUTE 'ALTER TABLE holat_urinishlari ATTACH PARTITION ' || quote_ident(nom)
+                || ' FOR VALUES FROM (' || quote_literal(dan) || ') TO (' || quote_literal(gacha) || ')';
+            yaratildi := yaratildi + 1;
+        END IF;
+        oy := (oy + interval '1 month')::date;
+    END LOOP;
+    RETURN yaratildi;
+END
+$$
+"""
+
+JADVAL = "holat_urinishlari"
+ESKI = "holat_urinishlari_eski"
+
+TASHQI_KALITLAR = (
+    ("holat_urinishlari_foydalanuvchi_id_fkey", "foydalanuvchilar", "foydalanuvchi_id", "CASCADE"),
+    ("holat_urinishlari_holat_id_fkey", "holatlar", "holat_id", "CASCADE"),
+    ("holat_urinishlari_sessiya_id_fkey", "oqish_sessiyalari", "sessiya_id", "SET NULL"),
+)
+
+# Ikkala tomonda ham bir xil indekslar
+UMUMIY_INDEKSLAR = (
+    ("ix_holat_urinishlari_foydalanuvchi_id", ["foydalanuvchi_id"]),
+    ("ix_holat_urinishlari_holat_id", ["holat_id"]),
+    ("ix_holat_urinishlari_togri", ["togri"]),
+    ("ix_holat_urinishlari_faol", ["faol"]),
+    ("idx_urinish_foyd_holat", ["foydalanuvchi_id", "holat_id"]),
+    ("idx_urinish_foyd_togri", ["foydalanuvchi_id", "togri"]),
+)
+
+
+def _relkind(nom: str):
+    return op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:nom)"), {"nom": nom}
+    ).scalar()
+
+
+def _eskini_tayyorlash() -> None:
+    """Jadvalni ESKI ga o'tkazadi; indeks nomlari sxema bo'yicha unikal - ularni bo'shatadi."""
+    op.rename_table(JADVAL, ESKI)
+    op.drop_constraint("holat_urinishlari_pkey", ESKI, type_="primary")
+    indekslar = op.get_bind().execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE tablename = :jadval"), {"jadval": ESKI}
+    ).scalars().all()
+    for nom in indekslar:
+        op.drop_index(nom, table_name=ESKI)
+
+
+def _kalitlar_va_indekslar(bolaklangan: bool) -> None:
+    for nom, jadval, ustun, ochirilganda in TASHQI_KALITLAR:
+        op.create_foreign_key(nom, JADVAL, jadval, [ustun], ["id"], ondelete=ochirilganda)
+    for nom, ustunlar in UMUMIY_INDEKSLAR:
+        op.create_index(nom, JADVAL, ustunlar)
+    if bolaklangan:
+        op.create_index("idx_urinish_foyd_vaqt", JADVAL, ["foydalanuvchi_id", "yaratilgan_vaqt"])
+        op.create_index("idx_urinish_sana_brin", JADVAL, ["yaratilgan_vaqt"], postgresql_using="brin")
+    else:
+        op.create_index("ix_holat_urinishlari_yaratilgan_vaqt", JADVAL, ["yaratilgan_vaqt"])
+        op.create_index("idx_urinish_sana", JADVAL, ["yaratilgan_vaqt"])
+
+
+def upgrade() -> None:
+    turi = _relkind(JADVAL)
+    if turi is None:
+        return
+
+    op.execute(BOLAKLAR_FUNKSIYASI)
+    if turi == "p":
+        # Jadval allaqachon create_all bilan bo'laklangan holda yaratilgan
+        op.execute(f"CREATE TABLE IF NOT EXISTS {JADVAL}_standart PARTITION OF {JADVAL} DEFAULT")
+        op.execute("SELECT urinish_bolaklarini_yaratish()")
+        return
+
+    _eskini_tayyorlash()
+    op.execute(
+        f"CREATE TABLE {JADVAL} (LIKE {ESKI} INCLUDING DEFAULTS INCLUDING COMMENTS) "
+        "PARTITION BY RANGE (yaratilgan_vaqt)"
+    )
+    op.execute(f"CREATE TABLE {JADVAL}_standart PARTITION OF {JADVAL} DEFAULT")
+    # Eng eski urinish oyidan boshlab barcha oylik bo'laklar
+    op.execute(
+        "SELECT urinish_bolaklarini_yaratish(3, "
+        f"(SELECT (min(yaratilgan_vaqt) AT TIME ZONE 'UTC')::date FROM {ESKI}))"
+    )
+
+    # Indekslar ma'lumotdan keyin - bir marta, har bir bo'lakda alohida quriladi
+    op.execute(f"INSERT INTO {JADVAL} SELECT * FROM {ESKI}")
+    op.create_primary_key("holat_urinishlari_pkey", JADVAL, ["id", "yaratilgan_vaqt"])
+    _kalitlar_va_indekslar(bolaklangan=True)
+
+    op.drop_table(ESKI)
+    op.execute(f"ANALYZE {JADVAL}")
+
+
+def downgrade() -> None:
+    if _relkind(JADVAL) != "p":
+        return
+
+    op.rename_table(JADVAL, ESKI)
+    # Bo'laklangan indekslar ham ESKI bilan birga o'chadi, lekin nomlari hozir kerak
+    op.drop_constraint("holat_urinishlari_pkey", ESKI, type_="primary")
+    for nom, _ in UMUMIY_INDEKSLAR:
+        op.drop_index(nom, table_name=ESKI)
+    op.drop_index("idx_urinish_foyd_vaqt", table_name=ESKI)
+    op.drop_index("idx_urinish_sana_brin", table_name=ESKI)
+
+    op.execute(f"CREATE TABLE {JADVAL} (LIKE {ESKI} INCLUDING DEFAULTS INCLUDING COMMENTS)")
+    op.execute(f"INSERT INTO {JADVAL} SELECT * FROM {ESKI}")
+    op.create_primary_key("holat_urinishlari_pkey", JADVAL, ["id"])
+    _kalitlar_va_indekslar(bolaklangan=False)
+
+    op.drop_table(ESKI)
+    op.execute("DROP FUNCTION IF EXISTS urinish_bolaklarini_yaratish(integer, date)")
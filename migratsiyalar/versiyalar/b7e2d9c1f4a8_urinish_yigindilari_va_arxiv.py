@@ -0,0 +1,144 @@
+"""urinishlar oylik yig'indisi, arxivlangan yechimlar va arxiv reyestri
+
+holat_urinishlari standart (DEFAULT) bo'lagi olib tashlanadi: u bilan eski
+oyni DETACH PARTITION ... CONCURRENTLY qilib bo'lmaydi. Undagi qatorlar
+avval mos oylik bo'laklarga ko'chiriladi.
+
+Bo'sh bazada (jadvallar hali yo'q) hech narsa qilinmaydi: jadvallar
+modeldan create_all bilan yaratiladi.
+
+Revision ID: b7e2d9c1f4a8
+Revises: a3f1c2d4e5b6
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d9c1f4a8'
+down_revision: Union[str, None] = 'a3f1c2d4e5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STANDART = "holat_urinishlari_standart"
+
+
+def _mavjud(jadval: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT to_regclass(:jadval) IS NOT NULL"), {"jadval": jadval}
+    ).scalar()
+
+
+def _asosiy_ustunlar():
+    """AsosiyModel ustunlari."""
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("faol", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("yaratilgan_vaqt", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("yangilangan_vaqt", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    ]
+
+
+def _foydalanuvchi_ustuni():
+    return sa.Column(
+        "foydalanuvchi_id", postgresql.UUID(as_uuid=True),
+        sa.ForeignKey("foydalanuvchilar.id", ondelete="CASCADE"), nullable=False
+    )
+
+
+def _standart_bolakni_olib_tashlash() -> None:
+    """Standart bo'lak qatorlari oylik bo'laklarga ko'chadi, bo'sh bo'lak o'chiriladi."""
+    if not _mavjud(STANDART):
+        return
+    op.execute(
+        "SELECT urinish_bolaklarini_yaratish(3, "
+        f"(SELECT (min(yaratilgan_vaqt) AT TIME ZONE 'UTC')::date FROM {STANDART}))"
+    )
+    qolgan = op.get_bind().execute(sa.text(f"SELECT count(*) FROM {STANDART}")).scalar()
+    if qolgan:
+        raise RuntimeError(f"{STANDART}: {qolgan} ta qator oylik bo'laklarga sig'madi")
+    op.execute(f"DROP TABLE {STANDART}")
+
+
+def upgrade() -> None:
+    if not _mavjud("foydalanuvchilar"):
+        return
+
+    _standart_bolakni_olib_tashlash()
+
+    if not _mavjud("urinish_oylik_yigindilari"):
+        op.create_table(
+            "urinish_oylik_yigindilari",
+            *_asosiy_ustunlar(),
+            _foydalanuvchi_ustuni(),
+            sa.Column("oy", sa.Date(), nullable=False),
+            sa.Column(
+                "asosiy_kategoriya_id", postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("asosiy_kategoriyalar.id", ondelete="CASCADE"), nullable=False
+            ),
+            sa.Column(
+                "qiyinlik",
+                postgresql.ENUM(name="qiyinlikdarajasi", create_type=False),
+                nullable=False
+            ),
+            sa.Column("jami_urinishlar", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("togri_javoblar", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("jami_vaqt", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("jami_ball", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index(
+            "idx_yigindi_foyd_oy", "urinish_oylik_yigindilari",
+            ["foydalanuvchi_id", "oy", "asosiy_kategoriya_id", "qiyinlik"], unique=True
+        )
+        op.create_index("ix_urinish_oylik_yigindilari_faol", "urinish_oylik_yigindilari", ["faol"])
+        op.create_index(
+            "ix_urinish_oylik_yigindilari_yaratilgan_vaqt", "urinish_oylik_yigindilari", ["yaratilgan_vaqt"]
+        )
+
+    if not _mavjud("arxivlangan_yechimlar"):
+        op.create_table(
+            "arxivlangan_yechimlar",
+            *_asosiy_ustunlar(),
+            _foydalanuvchi_ustuni(),
+            sa.Column(
+                "holat_id", postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("holatlar.id", ondelete="CASCADE"), nullable=False
+            ),
+            sa.Column("togri", sa.Boolean(), nullable=False, server_default=sa.false()),
+        )
+        op.create_index(
+            "idx_arxiv_yechim_foyd_holat", "arxivlangan_yechimlar",
+            ["foydalanuvchi_id", "holat_id"], unique=True
+        )
+        op.create_index("ix_arxivlangan_yechimlar_faol", "arxivlangan_yechimlar", ["faol"])
+        op.create_index(
+            "ix_arxivlangan_yechimlar_yaratilgan_vaqt", "arxivlangan_yechimlar", ["yaratilgan_vaqt"]
+        )
+
+    if not _mavjud("urinish_arxivlari"):
+        op.create_table(
+            "urinish_arxivlari",
+            *_asosiy_ustunlar(),
+            sa.Column("oy", sa.Date(), nullable=False, unique=True),
+            sa.Column("fayl", sa.String(500), nullable=False),
+            sa.Column("qatorlar", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("hajm", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("sha256", sa.String(64), nullable=False),
+        )
+        op.create_index("ix_urinish_arxivlari_faol", "urinish_arxivlari", ["faol"])
+        op.create_index("ix_urinish_arxivlari_yaratilgan_vaqt", "urinish_arxivlari", ["yaratilgan_vaqt"])
+
+
+def downgrade() -> None:
+    # Arxivlangan oylarning xom qatorlari faqat arxiv fayllarida qoladi
+    op.execute("DROP TABLE IF EXISTS urinish_arxivlari")
+    op.execute("DROP TABLE IF EXISTS arxivlangan_yechimlar")
+    op.execute("DROP TABLE IF EXISTS urinish_oylik_yigindilari")
+    if _mavjud("holat_urinishlari"):
+        op.execute(f"CREATE TABLE IF NOT EXISTS {STANDART} PARTITION OF holat_urinishlari DEFAULT")
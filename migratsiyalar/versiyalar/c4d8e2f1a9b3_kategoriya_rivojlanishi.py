@@ -0,0 +1,95 @@
+"""kategoriya_rivojlanishi agregati va uni urinishlar tarixidan to'ldirish
+
+Jadval yaratiladi va mavjud urinishlar bo'yicha bir marta to'ldiriladi -
+yangilangan bazada zaif/kuchli tomonlar va kategoriya statistikasi darhol
+to'liq bo'ladi.
+
+Bo'sh bazada (jadvallar hali yo'q) hech narsa qilinmaydi: jadvallar
+modeldan create_all bilan yaratiladi.
+
+Revision ID: c4d8e2f1a9b3
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2f1a9b3'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Migratsiya o'z nusxasini saqlaydi - servisdagi so'rov o'zgarsa ham ta'sir qilmaydi
+TOLDIRISH_SOROVI = """
+    INSERT INTO kategoriya_rivojlanishi (
+        id, foydalanuvchi_id, asosiy_kategoriya_id, jami_urinishlar,
+        togri_javoblar, aniqlik_foizi, jami_vaqt, faol, yaratilgan_vaqt, yangilangan_vaqt
+    )
+    SELECT gen_random_uuid(), u.foydalanuvchi_id, kk.asosiy_kategoriya_id,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE u.togri),
+           COUNT(*) FILTER (WHERE u.togri) * 100.0 / COUNT(*),
+           COALESCE(SUM(u.sarflangan_vaqt), 0),
+           true, now(), now()
+    FROM holat_urinishlari u
+    JOIN holatlar h ON h.id = u.holat_id
+    JOIN bolimlar b ON b.id = h.bolim_id
+    JOIN kichik_kategoriyalar kk ON kk.id = b.kichik_kategoriya_id
+    GROUP BY u.foydalanuvchi_id, kk.asosiy_kategoriya_id
+    ON CONFLICT (foydalanuvchi_id, asosiy_kategoriya_id) DO NOTHING
+"""
+
+
+def _mavjud(jadval: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT to_regclass(:jadval) IS NOT NULL"), {"jadval": jadval}
+    ).scalar()
+
+
+def upgrade() -> None:
+    if not _mavjud("foydalanuvchilar") or _mavjud("kategoriya_rivojlanishi"):
+        return
+
+    op.create_table(
+        "kategoriya_rivojlanishi",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("faol", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("yaratilgan_vaqt", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("yangilangan_vaqt", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column(
+            "foydalanuvchi_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("foydalanuvchilar.id", ondelete="CASCADE"), nullable=False,
+            comment="Foydalanuvchi ID"
+        ),
+        sa.Column(
+            "asosiy_kategoriya_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("asosiy_kategoriyalar.id", ondelete="CASCADE"), nullable=False,
+            comment="Asosiy kategoriya ID"
+        ),
+        sa.Column("jami_urinishlar", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("togri_javoblar", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("aniqlik_foizi", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("jami_vaqt", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "idx_kat_riv_foyd_kat", "kategoriya_rivojlanishi",
+        ["foydalanuvchi_id", "asosiy_kategoriya_id"], unique=True
+    )
+    op.create_index("ix_kategoriya_rivojlanishi_faol", "kategoriya_rivojlanishi", ["faol"])
+    op.create_index(
+        "ix_kategoriya_rivojlanishi_yaratilgan_vaqt", "kategoriya_rivojlanishi", ["yaratilgan_vaqt"]
+    )
+
+    op.execute(TOLDIRISH_SOROVI)
+    op.execute("ANALYZE kategoriya_rivojlanishi")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS kategoriya_rivojlanishi")
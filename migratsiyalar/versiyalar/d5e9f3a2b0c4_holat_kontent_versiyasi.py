@@ -0,0 +1,58 @@
+"""holatlar.kontent_versiyasi - kontent keshi kaliti
+
+Mavjud holatlar 1-versiyadan boshlanadi (server_default).
+
+Bo'sh bazada (jadvallar hali yo'q) hech narsa qilinmaydi: jadvallar
+modeldan create_all bilan yaratiladi.
+
+Revision ID: d5e9f3a2b0c4
+Revises: f7a1b5c4d2e6
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e9f3a2b0c4'
+down_revision: Union[str, None] = 'f7a1b5c4d2e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _ustun_mavjud(jadval: str, ustun: str) -> bool:
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = :jadval AND column_name = :ustun)"
+        ),
+        {"jadval": jadval, "ustun": ustun}
+    ).scalar()
+
+
+def _mavjud(jadval: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT to_regclass(:jadval) IS NOT NULL"), {"jadval": jadval}
+    ).scalar()
+
+
+def upgrade() -> None:
+    if not _mavjud("holatlar") or _ustun_mavjud("holatlar", "kontent_versiyasi"):
+        return
+
+    # Doimiy default bilan qo'shish jadvalni qayta yozmaydi (PostgreSQL 11+)
+    op.add_column(
+        "holatlar",
+        sa.Column(
+            "kontent_versiyasi", sa.Integer(), nullable=False,
+            server_default="1", comment="Kontent versiyasi"
+        )
+    )
+
+
+def downgrade() -> None:
+    if _ustun_mavjud("holatlar", "kontent_versiyasi"):
+        op.drop_column("holatlar", "kontent_versiyasi")
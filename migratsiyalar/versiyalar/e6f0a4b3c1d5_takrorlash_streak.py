@@ -0,0 +1,95 @@
+"""foydalanuvchi_rivojlanishi: saqlangan takrorlash streaki
+
+takrorlash_streak va oxirgi_takrorlash_sanasi qo'shiladi va takrorlash_tarixi
+bo'yicha to'ldiriladi: har bir foydalanuvchi uchun eng so'nggi takrorlash kuni
+va shu kun bilan tugaydigan ketma-ket kunlar soni. Streak 0 dan boshlanmaydi.
+
+Bo'sh bazada (jadvallar hali yo'q) hech narsa qilinmaydi: jadvallar
+modeldan create_all bilan yaratiladi.
+
+Revision ID: e6f0a4b3c1d5
+Revises: c4d8e2f1a9b3
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f0a4b3c1d5'
+down_revision: Union[str, None] = 'c4d8e2f1a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JADVAL = "foydalanuvchi_rivojlanishi"
+
+# Ketma-ket kunlar "orollari": kun - tartib raqami bir xil bo'lgan kunlar bitta
+# uzluksiz qator. Har bir foydalanuvchining eng so'nggi oroli - joriy streak.
+TOLDIRISH_SOROVI = f"""
+    WITH kunlar AS (
+        SELECT DISTINCT k.foydalanuvchi_id, t.yaratilgan_vaqt::date AS kun
+        FROM takrorlash_tarixi t
+        JOIN takrorlash_kartalari k ON k.id = t.karta_id
+    ), orollar AS (
+        SELECT foydalanuvchi_id, kun,
+               kun - CAST(ROW_NUMBER() OVER (PARTITION BY foydalanuvchi_id ORDER BY kun) AS integer) AS guruh
+        FROM kunlar
+    ), streaklar AS (
+        SELECT DISTINCT ON (foydalanuvchi_id)
+               foydalanuvchi_id, max(kun) AS oxirgi, count(*) AS uzunlik
+        FROM orollar
+        GROUP BY foydalanuvchi_id, guruh
+        ORDER BY foydalanuvchi_id, max(kun) DESC
+    )
+    UPDATE {JADVAL} r
+    SET takrorlash_streak = s.uzunlik,
+        oxirgi_takrorlash_sanasi = s.oxirgi
+    FROM streaklar s
+    WHERE r.foydalanuvchi_id = s.foydalanuvchi_id
+"""
+
+
+def _ustun_mavjud(jadval: str, ustun: str) -> bool:
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = :jadval AND column_name = :ustun)"
+        ),
+        {"jadval": jadval, "ustun": ustun}
+    ).scalar()
+
+
+def _mavjud(jadval: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT to_regclass(:jadval) IS NOT NULL"), {"jadval": jadval}
+    ).scalar()
+
+
+def upgrade() -> None:
+    if not _mavjud(JADVAL) or _ustun_mavjud(JADVAL, "takrorlash_streak"):
+        return
+
+    op.add_column(
+        JADVAL,
+        sa.Column(
+            "takrorlash_streak", sa.Integer(), nullable=False,
+            server_default="0", comment="Ketma-ket takrorlash kunlari"
+        )
+    )
+    op.add_column(
+        JADVAL,
+        sa.Column("oxirgi_takrorlash_sanasi", sa.Date(), nullable=True, comment="Oxirgi takrorlash sanasi")
+    )
+
+    if _mavjud("takrorlash_tarixi"):
+        op.execute(TOLDIRISH_SOROVI)
+
+
+def downgrade() -> None:
+    if _ustun_mavjud(JADVAL, "takrorlash_streak"):
+        op.drop_column(JADVAL, "oxirgi_takrorlash_sanasi")
+        op.drop_column(JADVAL, "takrorlash_streak")
@@ -0,0 +1,86 @@
+"""takrorlash_kartalari: muddatli kartalar uchun partial covering indekslar
+
+idx_takrorlash_muddatli (foydalanuvchi navbati) va idx_takrorlash_muddat_global
+("bugun kimda karta bor") yaratiladi, eski idx_takrorlash_keyingi o'chiriladi.
+Indekslar CONCURRENTLY - jadval yozuvlari to'xtamaydi.
+
+Bo'sh bazada (jadvallar hali yo'q) hech narsa qilinmaydi: jadvallar
+modeldan create_all bilan yaratiladi.
+
+Revision ID: f7a1b5c4d2e6
+Revises: e6f0a4b3c1d5
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a1b5c4d2e6'
+down_revision: Union[str, None] = 'e6f0a4b3c1d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JADVAL = "takrorlash_kartalari"
+MUDDATLI = sa.text("oqilgan = false AND faol = true")
+
+
+def _mavjud(jadval: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT to_regclass(:jadval) IS NOT NULL"), {"jadval": jadval}
+    ).scalar()
+
+
+def upgrade() -> None:
+    if not _mavjud(JADVAL):
+        return
+
+    # CONCURRENTLY tranzaksiya ichida ishlamaydi
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_takrorlash_muddatli", JADVAL,
+            ["foydalanuvchi_id", "keyingi_takrorlash"],
+            postgresql_include=["holat_id", "repetition"],
+            postgresql_where=MUDDATLI,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            "idx_takrorlash_muddat_global", JADVAL,
+            ["keyingi_takrorlash", "foydalanuvchi_id"],
+            postgresql_where=MUDDATLI,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.drop_index(
+            "idx_takrorlash_keyingi", table_name=JADVAL,
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+
+
+def downgrade() -> None:
+    if not _mavjud(JADVAL):
+        return
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_takrorlash_keyingi", JADVAL,
+            ["foydalanuvchi_id", "keyingi_takrorlash"],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.drop_index(
+            "idx_takrorlash_muddat_global", table_name=JADVAL,
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+        op.drop_index(
+            "idx_takrorlash_muddatli", table_name=JADVAL,
+            postgresql_concurrently=True,
+            if_exists=True
+        )
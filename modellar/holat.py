@@ -170,6 +170,15 @@ class Holat(AsosiyModel):
         comment="Tekshirilgan holati"
     )
     
+    # Kontent versiyasi - tahrir, variant va media o'zgarishida oshiriladi (kesh kaliti)
+    kontent_versiyasi = Column(
+        Integer,
+        default=1,
+        server_default="1",
+        nullable=False,
+        comment="Kontent versiyasi"
+    )
+    
     # Munosabatlar
     bolim = relationship("Bolim", back_populates="holatlar")
     variantlar = relationship(
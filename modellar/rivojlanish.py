@@ -2,22 +2,33 @@
 # Foydalanuvchi rivojlanishi, urinishlar va statistika
 
 from sqlalchemy import (
-    Column, String, Integer, ForeignKey, Text,
-    Boolean, Float, DateTime, Date, Index, func
+    Column, String, Integer, BigInteger, ForeignKey, Text,
+    Boolean, Float, DateTime, Date, Index, Enum as SQLEnum, event, func
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
 from modellar.asosiy import AsosiyModel
+from modellar.holat import QiyinlikDarajasi
 
 
 class HolatUrinishi(AsosiyModel):
     """
     Holat urinishi modeli.
     Har bir foydalanuvchining har bir holatni yechish urinishi.
+    Jadval yaratilgan_vaqt bo'yicha oylik bo'laklarga (RANGE partition) ajratilgan.
     """
     __tablename__ = "holat_urinishlari"
     
+    # Bo'lak kaliti birlamchi kalitning bir qismi bo'lishi shart
+    yaratilgan_vaqt = Column(
+        DateTime(timezone=True),
+        default=func.now(),
+        primary_key=True,
+        nullable=False,
+        comment="Yozuv yaratilgan vaqt (bo'lak kaliti)"
+    )
+    
     foydalanuvchi_id = Column(
         UUID(as_uuid=True),
         ForeignKey("foydalanuvchilar.id", ondelete="CASCADE"),
@@ -95,14 +106,68 @@ class HolatUrinishi(AsosiyModel):
     holat = relationship("Holat", back_populates="urinishlar")
     sessiya = relationship("OqishSessiyasi", back_populates="urinishlar")
     
-    # Indekslar
+    # Indekslar (har bir bo'lakda lokal)
     __table_args__ = (
         Index("idx_urinish_foyd_holat", "foydalanuvchi_id", "holat_id"),
         Index("idx_urinish_foyd_togri", "foydalanuvchi_id", "togri"),
-        Index("idx_urinish_sana", "yaratilgan_vaqt"),
+        Index("idx_urinish_foyd_vaqt", "foydalanuvchi_id", "yaratilgan_vaqt"),
+        # Vaqt ketma-ket yoziladi - BRIN B-tree'ning kichik bir qismi hajmida
+        Index("idx_urinish_sana_brin", "yaratilgan_vaqt", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (yaratilgan_vaqt)"},
     )
 
 
+# Oylik bo'laklar: holat_urinishlari_YYYY_MM (UTC oylari). Standart (DEFAULT) bo'lak
+# yo'q - u bilan eski oyni DETACH ... CONCURRENTLY qilib bo'lmaydi; kelgusi oylar
+# kunlik vazifa bilan oldindan yaratiladi. Funksiya boshlanish oyidan joriy oy +
+# oldinga oygacha yetishmayotgan bo'laklarni yaratadi; eski bazada standart bo'lak
+# qolgan bo'lsa, undagi qatorlar yangi bo'lakka ko'chiriladi.
+URINISH_BOLAKLARI_FUNKSIYASI = """
+CREATE OR REPLACE FUNCTION urinish_bolaklarini_yaratish(
+    oldinga integer DEFAULT 3,
+    boshlanish date DEFAULT NULL
+) RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    oy date := date_trunc('month', coalesce(boshlanish, (now() AT TIME ZONE 'UTC')::date))::date;
+    oxirgi date := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => oldinga))::date;
+    dan timestamptz;
+    gacha timestamptz;
+    nom text;
+    yaratildi integer := 0;
+BEGIN
+    WHILE oy <= oxirgi LOOP
+        nom := 'holat_urinishlari_' || to_char(oy, 'YYYY_MM');
+        IF to_regclass(nom) IS NULL THEN
+            dan := oy::timestamp AT TIME ZONE 'UTC';
+            gacha := (oy + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+            EXECUTE 'CREATE TABLE ' || quote_ident(nom) || ' (LIKE holat_urinishlari INCLUDING DEFAULTS)';
+            IF to_regclass('holat_urinishlari_standart') IS NOT NULL THEN
+                EXECUTE 'WITH k AS (DELETE FROM holat_urinishlari_standart'
+                    || ' WHERE yaratilgan_vaqt >= $1 AND yaratilgan_vaqt < $2 RETURNING *)'
+                    || ' INSERT INTO ' || quote_ident(nom) || ' SELECT * FROM k'
+                    USING dan, gacha;
+            END IF;
+            EXECUTE 'ALTER TABLE holat_urinishlari ATTACH PARTITION ' || quote_ident(nom)
+                || ' FOR VALUES FROM (' || quote_literal(dan) || ') TO (' || quote_literal(gacha) || ')';
+            yaratildi := yaratildi + 1;
+        END IF;
+        oy := (oy + interval '1 month')::date;
+    END LOOP;
+    RETURN yaratildi;
+END
+$$
+"""
+
+@event.listens_for(HolatUrinishi.__table__, "after_create")
+def _urinish_bolaklari(jadval, conn, **kw):
+    """create_all bilan yaratilganda (PostgreSQL) funksiya va kelgusi oylik bo'laklar."""
+    if conn.dialect.name != "postgresql":
+        return
+    conn.exec_driver_sql(URINISH_BOLAKLARI_FUNKSIYASI)
+    conn.exec_driver_sql("SELECT urinish_bolaklarini_yaratish()")
+
+
 class OqishSessiyasi(AsosiyModel):
     """
     O'qish sessiyasi modeli.
@@ -358,6 +423,19 @@ class FoydalanuvchiRivojlanishi(AsosiyModel):
     qiyin_yechilgan = Column(Integer, default=0, nullable=False)
     qiyin_togri = Column(Integer, default=0, nullable=False)
     
+    # Takrorlash (spaced repetition) streaki - baholashda yangilanadi
+    takrorlash_streak = Column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="Ketma-ket takrorlash kunlari"
+    )
+    oxirgi_takrorlash_sanasi = Column(
+        Date,
+        nullable=True,
+        comment="Oxirgi takrorlash sanasi"
+    )
+    
     # Kategoriya bo'yicha statistika (JSONB)
     kategoriya_statistikasi = Column(
         JSONB,
@@ -438,3 +516,115 @@ class BolimRivojlanishi(AsosiyModel):
     __table_args__ = (
         Index("idx_bolim_riv_foyd_bolim", "foydalanuvchi_id", "bolim_id", unique=True),
     )
+
+
+class KategoriyaRivojlanishi(AsosiyModel):
+    """
+    Asosiy kategoriya bo'yicha rivojlanish modeli.
+    Har bir urinishda delta bilan yangilanadi - kategoriya statistikasi
+    urinishlar tarixini join qilmasdan o'qiladi.
+    """
+    __tablename__ = "kategoriya_rivojlanishi"
+    
+    foydalanuvchi_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("foydalanuvchilar.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Foydalanuvchi ID"
+    )
+    asosiy_kategoriya_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("asosiy_kategoriyalar.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Asosiy kategoriya ID"
+    )
+    
+    # Statistika
+    jami_urinishlar = Column(Integer, default=0, nullable=False)
+    togri_javoblar = Column(Integer, default=0, nullable=False)
+    aniqlik_foizi = Column(Float, default=0.0, nullable=False)
+    jami_vaqt = Column(Integer, default=0, nullable=False)
+    
+    # Indekslar
+    __table_args__ = (
+        Index("idx_kat_riv_foyd_kat", "foydalanuvchi_id", "asosiy_kategoriya_id", unique=True),
+    )
+
+
+class UrinishOylikYigindisi(AsosiyModel):
+    """
+    Urinishlarning oylik yig'indisi.
+    Foydalanuvchi x oy x asosiy kategoriya x qiyinlik - arxivlangan oylar
+    statistikasi xom urinishlarsiz shu jadvaldan o'qiladi.
+    """
+    __tablename__ = "urinish_oylik_yigindilari"
+    
+    foydalanuvchi_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("foydalanuvchilar.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Foydalanuvchi ID"
+    )
+    oy = Column(Date, nullable=False, comment="Oy boshi (UTC)")
+    asosiy_kategoriya_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("asosiy_kategoriyalar.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Asosiy kategoriya ID"
+    )
+    qiyinlik = Column(SQLEnum(QiyinlikDarajasi), nullable=False, comment="Qiyinlik darajasi")
+    
+    # Statistika
+    jami_urinishlar = Column(Integer, default=0, nullable=False)
+    togri_javoblar = Column(Integer, default=0, nullable=False)
+    jami_vaqt = Column(Integer, default=0, nullable=False)
+    jami_ball = Column(Integer, default=0, nullable=False)
+    
+    # Indekslar
+    __table_args__ = (
+        Index(
+            "idx_yigindi_foyd_oy", "foydalanuvchi_id", "oy", "asosiy_kategoriya_id", "qiyinlik",
+            unique=True
+        ),
+    )
+
+
+class ArxivlanganYechim(AsosiyModel):
+    """
+    Arxivlangan oylardagi (foydalanuvchi, holat) juftlari.
+    "Yechilgan/yechilmagan" filtri xom urinishlar arxivga ketgandan keyin ham to'g'ri ishlaydi.
+    """
+    __tablename__ = "arxivlangan_yechimlar"
+    
+    foydalanuvchi_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("foydalanuvchilar.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Foydalanuvchi ID"
+    )
+    holat_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("holatlar.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Holat ID"
+    )
+    togri = Column(Boolean, default=False, nullable=False, comment="Kamida bir marta to'g'ri")
+    
+    # Indekslar
+    __table_args__ = (
+        Index("idx_arxiv_yechim_foyd_holat", "foydalanuvchi_id", "holat_id", unique=True),
+    )
+
+
+class UrinishArxivi(AsosiyModel):
+    """
+    Arxivlangan oy: yig'indisi olingan, xom qatorlari gzip CSV faylga
+    ko'chirilgan va bo'lagi o'chirilgan.
+    """
+    __tablename__ = "urinish_arxivlari"
+    
+    oy = Column(Date, unique=True, nullable=False, comment="Oy boshi (UTC)")
+    fayl = Column(String(500), nullable=False, comment="Arxiv fayli (csv.gz)")
+    qatorlar = Column(BigInteger, default=0, nullable=False, comment="Arxivlangan qatorlar")
+    hajm = Column(BigInteger, default=0, nullable=False, comment="Fayl hajmi (bayt)")
+    sha256 = Column(String(64), nullable=False, comment="Fayl nazorat yig'indisi")
@@ -3,15 +3,46 @@
 
 from sqlalchemy import (
     Column, String, Integer, ForeignKey, Float,
-    Boolean, DateTime, Date, Index, func
+    Boolean, DateTime, Date, Index, func, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, date, timedelta
+from typing import Tuple
 
 from modellar.asosiy import AsosiyModel
 
 
+def sm2_qadam(
+    easiness_factor: float,
+    interval: int,
+    repetition: int,
+    sifat: int
+) -> Tuple[float, int, int, bool]:
+    """
+    Bitta SM-2 qadami (ORM'siz) - paketli baholash ham shuni ishlatadi.
+    Qaytaradi: (yangi EF, yangi interval, yangi repetition, to'g'rimi).
+    """
+    # EF yangilash
+    easiness_factor = max(
+        1.3,
+        easiness_factor + (0.1 - (5 - sifat) * (0.08 + (5 - sifat) * 0.02))
+    )
+    
+    if sifat < 3:
+        # Noto'g'ri javob - qaytadan boshlash
+        return easiness_factor, 1, 0, False
+    
+    # To'g'ri javob
+    if repetition == 0:
+        interval = 1
+    elif repetition == 1:
+        interval = 6
+    else:
+        interval = round(interval * easiness_factor)
+    return easiness_factor, interval, repetition + 1, True
+
+
 class TakrorlashKartasi(AsosiyModel):
     """
     Spaced Repetition kartasi (SM-2 algoritmi).
@@ -103,7 +134,19 @@ class TakrorlashKartasi(AsosiyModel):
     
     __table_args__ = (
         Index("idx_takrorlash_foydalanuvchi_holat", "foydalanuvchi_id", "holat_id", unique=True),
-        Index("idx_takrorlash_keyingi", "foydalanuvchi_id", "keyingi_takrorlash"),
+        # Muddatli (faol, o'qilmagan) kartalar uchun covering partial indekslar:
+        # foydalanuvchi navbati va "bugun kimda karta bor" so'rovi index-only bajariladi
+        Index(
+            "idx_takrorlash_muddatli",
+            "foydalanuvchi_id", "keyingi_takrorlash",
+            postgresql_include=["holat_id", "repetition"],
+            postgresql_where=text("oqilgan = false AND faol = true")
+        ),
+        Index(
+            "idx_takrorlash_muddat_global",
+            "keyingi_takrorlash", "foydalanuvchi_id",
+            postgresql_where=text("oqilgan = false AND faol = true")
+        ),
     )
     
     def sm2_hisoblash(self, sifat: int) -> None:
@@ -118,26 +161,11 @@ class TakrorlashKartasi(AsosiyModel):
             4 - To'g'ri, biroz o'ylab topdim
             5 - To'g'ri, oson
         """
-        # EF yangilash
-        self.easiness_factor = max(
-            1.3,
-            self.easiness_factor + (0.1 - (5 - sifat) * (0.08 + (5 - sifat) * 0.02))
+        self.easiness_factor, self.interval, self.repetition, togri = sm2_qadam(
+            self.easiness_factor, self.interval, self.repetition, sifat
         )
-        
-        if sifat < 3:
-            # Noto'g'ri javob - qaytadan boshlash
-            self.repetition = 0
-            self.interval = 1
-        else:
-            # To'g'ri javob
+        if togri:
             self.togri_javoblar += 1
-            if self.repetition == 0:
-                self.interval = 1
-            elif self.repetition == 1:
-                self.interval = 6
-            else:
-                self.interval = round(self.interval * self.easiness_factor)
-            self.repetition += 1
         
         self.jami_takrorlashlar += 1
         self.oxirgi_takrorlash = datetime.utcnow()
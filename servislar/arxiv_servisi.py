@@ -0,0 +1,300 @@
+# MedCase Pro Platform - Urinishlar Arxivi Servisi
+# Eski oylarni oylik yig'indiga o'tkazish, xom qatorlarni gzip CSV arxivga ko'chirish
+
+import hashlib
+import logging
+import os
+import re
+import zlib
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from modellar.rivojlanish import UrinishArxivi
+from servislar.bolak_servisi import oy_boshi
+from sozlamalar.sozlamalar import sozlamalar
+
+logger = logging.getLogger(__name__)
+
+BOLAK_NOMI = re.compile(r"^holat_urinishlari_(\d{4})_(\d{2})$")
+
+# Urinish -> asosiy kategoriya; yig'indi va aralash statistika uchun umumiy qism
+_KATEGORIYA_JOIN = """
+    JOIN holatlar h ON h.id = u.holat_id
+    JOIN bolimlar b ON b.id = h.bolim_id
+    JOIN kichik_kategoriyalar kk ON kk.id = b.kichik_kategoriya_id
+"""
+
+# Bitta bo'lakning oylik yig'indisi (qayta ishga tushirishda ustiga yoziladi)
+_YIGINDI_SOROVI = """
+    INSERT INTO urinish_oylik_yigindilari (
+        id, foydalanuvchi_id, oy, asosiy_kategoriya_id, qiyinlik,
+        jami_urinishlar, togri_javoblar, jami_vaqt, jami_ball,
+        faol, yaratilgan_vaqt, yangilangan_vaqt
+    )
+    SELECT gen_random_uuid(), u.foydalanuvchi_id, CAST(:oy AS date), kk.asosiy_kategoriya_id, h.qiyinlik,
+           COUNT(*), COUNT(*) FILTER (WHERE u.togri),
+           COALESCE(SUM(u.sarflangan_vaqt), 0), COALESCE(SUM(u.olingan_ball), 0),
+           true, now(), now()
+    FROM {bolak} u
+    """ + _KATEGORIYA_JOIN + """
+    GROUP BY u.foydalanuvchi_id, kk.asosiy_kategoriya_id, h.qiyinlik
+    ON CONFLICT (foydalanuvchi_id, oy, asosiy_kategoriya_id, qiyinlik) DO UPDATE SET
+        jami_urinishlar = EXCLUDED.jami_urinishlar,
+        togri_javoblar = EXCLUDED.togri_javoblar,
+        jami_vaqt = EXCLUDED.jami_vaqt,
+        jami_ball = EXCLUDED.jami_ball,
+        yangilangan_vaqt = now()
+"""
+
+_YECHIMLAR_SOROVI = """
+    INSERT INTO arxivlangan_yechimlar (
+        id, foydalanuvchi_id, holat_id, togri, faol, yaratilgan_vaqt, yangilangan_vaqt
+    )
+    SELECT gen_random_uuid(), foydalanuvchi_id, holat_id, bool_or(togri), true, now(), now()
+    FROM {bolak}
+    GROUP BY foydalanuvchi_id, holat_id
+    ON CONFLICT (foydalanuvchi_id, holat_id) DO UPDATE SET
+        togri = arxivlangan_yechimlar.togri OR EXCLUDED.togri,
+        yangilangan_vaqt = now()
+"""
+
+# Arxivlangan oylar yig'indidan, qolgani xom urinishlardan - bir xil ko'rinishda
+_ARALASH_SOROVI = """
+    SELECT d.oy, a.nomi AS kategoriya, d.qiyinlik,
+           SUM(d.jami) AS jami, SUM(d.togri) AS togri,
+           SUM(d.vaqt) AS vaqt, SUM(d.ball) AS ball
+    FROM (
+        SELECT y.oy, y.asosiy_kategoriya_id, y.qiyinlik,
+               y.jami_urinishlar AS jami, y.togri_javoblar AS togri,
+               y.jami_vaqt AS vaqt, y.jami_ball AS ball
+        FROM urinish_oylik_yigindilari y
+        WHERE {yigindi_shart}
+        UNION ALL
+        SELECT CAST(date_trunc('month', u.yaratilgan_vaqt AT TIME ZONE 'UTC') AS date),
+               kk.asosiy_kategoriya_id, h.qiyinlik,
+               COUNT(*), COUNT(*) FILTER (WHERE u.togri),
+               COALESCE(SUM(u.sarflangan_vaqt), 0), COALESCE(SUM(u.olingan_ball), 0)
+        FROM holat_urinishlari u
+        """ + _KATEGORIYA_JOIN + """
+        WHERE {xom_shart}
+        GROUP BY 1, 2, 3
+    ) d
+    JOIN asosiy_kategoriyalar a ON a.id = d.asosiy_kategoriya_id
+    GROUP BY d.oy, a.nomi, d.qiyinlik
+    ORDER BY d.oy, a.nomi
+"""
+
+
+def _utc(vaqt: Optional[datetime]) -> Optional[datetime]:
+    if vaqt is not None and vaqt.tzinfo is None:
+        return vaqt.replace(tzinfo=timezone.utc)
+    return vaqt
+
+
+def _aniqlik(togri: int, jami: int) -> float:
+    return round(togri / jami * 100, 1) if jami else 0.0
+
+
+class ArxivServisi:
+    """
+    Urinishlar tarixi: saqlash oynasidan eski oylik bo'laklar yig'indiga
+    o'tkaziladi, xom qatorlar siqilgan faylga yoziladi va bo'lak o'chiriladi.
+    Statistika arxivlangan oylarni yig'indidan, qolganini xom qatorlardan oladi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def chegara(self) -> Optional[datetime]:
+        """Xom qatorlar boshlanadigan oy (shundan oldingisi faqat yig'indida)."""
+        oxirgi = await self.db.scalar(select(func.max(UrinishArxivi.oy)))
+        if oxirgi is None:
+            return None
+        return oy_boshi(-1, datetime(oxirgi.year, oxirgi.month, 1, tzinfo=timezone.utc))
+
+    async def nomzodlar(self, saqlash_oylari: int = None) -> List[Dict[str, Any]]:
+        """Saqlash oynasidan eski, hali arxivlanmagan oylik bo'laklar (eskisidan boshlab)."""
+        saqlash_oylari = saqlash_oylari or sozlamalar.urinish_saqlash_oylari
+        chegara = oy_boshi(saqlash_oylari).date()
+        # Ajratilgan, lekin hali o'chirilmagan bo'laklar ham (to'xtab qolgan arxivlashni davom ettirish)
+        natija = await self.db.execute(text("""
+            SELECT c.relname FROM pg_class c
+            WHERE c.relkind = 'r' AND pg_table_is_visible(c.oid)
+              AND c.relname ~ '^holat_urinishlari_[0-9]{4}_[0-9]{2}$'
+        """))
+        nomzodlar = []
+        for (nom,) in natija.all():
+            moslik = BOLAK_NOMI.match(nom)
+            if moslik:
+                oy = date(int(moslik.group(1)), int(moslik.group(2)), 1)
+                if oy < chegara:
+                    nomzodlar.append({"bolak": nom, "oy": oy})
+        return sorted(nomzodlar, key=lambda n: n["oy"])
+
+    async def _faylga_yozish(self, bolak: str, fayl: Path) -> Dict[str, Any]:
+        """Bo'lak qatorlarini COPY orqali gzip CSV ga yozadi (avval vaqtinchalik faylga)."""
+        fayl.parent.mkdir(parents=True, exist_ok=True)
+        vaqtinchalik = fayl.with_name(fayl.name + ".tmp")
+        siquvchi = zlib.compressobj(wbits=31)  # 31 - gzip formati
+        xesh = hashlib.sha256()
+
+        ulanish = await self.db.connection()
+        xom = await ulanish.get_raw_connection()
+
+        with open(vaqtinchalik, "wb") as chiqish:
+            async def _yozish(blok: bytes) -> None:
+                siqilgan = siquvchi.compress(blok)
+                xesh.update(siqilgan)
+                chiqish.write(siqilgan)
+
+            holat = await xom.driver_connection.copy_from_table(
+                bolak, output=_yozish, format="csv", header=True
+            )
+            oxirgi = siquvchi.flush()
+            xesh.update(oxirgi)
+            chiqish.write(oxirgi)
+            chiqish.flush()
+            os.fsync(chiqish.fileno())
+
+        os.replace(vaqtinchalik, fayl)
+        return {
+            "qatorlar": int(holat.split()[-1]),
+            "hajm": fayl.stat().st_size,
+            "sha256": xesh.hexdigest(),
+        }
+
+    async def _bolakni_ajratish(self, bolak: str) -> None:
+        """
+        Bo'lakni ota jadvaldan DETACH ... CONCURRENTLY bilan ajratadi: ota jadvalga
+        ACCESS EXCLUSIVE qulf olinmaydi, urinishlar yozilishi to'xtamaydi.
+        Tranzaksiya ichida ishlamaydi - alohida autocommit ulanishda.
+        Oldingi urinishda yarim qolgan ajratish FINALIZE bilan yakunlanadi.
+        """
+        # DETACH eski tranzaksiyalar tugashini kutadi - sessiyaniki ochiq qolmasin
+        await self.db.commit()
+        engine = self.db.bind.execution_options(isolation_level="AUTOCOMMIT")
+        async with engine.connect() as ulanish:
+            kutilmoqda = await ulanish.scalar(text("""
+                SELECT i.inhdetachpending FROM pg_inherits i
+                WHERE i.inhrelid = to_regclass(:bolak)
+                  AND i.inhparent = 'holat_urinishlari'::regclass
+            """), {"bolak": bolak})
+            if kutilmoqda is None:
+                return
+            usul = "FINALIZE" if kutilmoqda else "CONCURRENTLY"
+            await ulanish.execute(text(f"ALTER TABLE holat_urinishlari DETACH PARTITION {bolak} {usul}"))
+
+    async def oyni_arxivlash(self, bolak: str, oy: date) -> Dict[str, Any]:
+        """
+        Bitta oylik bo'lak: ajratish -> fayl -> yig'indi -> yechimlar -> reyestr -> o'chirish.
+        Avval bo'lak ota jadvaldan ajratiladi; qolgan baza qadamlari bitta tranzaksiyada
+        va DROP faqat ajratilgan jadvalni qulflaydi. Biror qadam xato bersa ajratilgan
+        jadval qoladi va keyingi ishga tushirishda shu yerdan davom etiladi.
+        Eski bo'lakka yangi urinish tushmaydi (yaratilgan_vaqt = now()).
+        """
+        await self._bolakni_ajratish(bolak)
+
+        fayl = Path(sozlamalar.urinish_arxiv_papkasi) / f"{bolak}.csv.gz"
+        malumot = await self._faylga_yozish(bolak, fayl)
+
+        jami = await self.db.scalar(text(f"SELECT count(*) FROM {bolak}"))
+        if jami != malumot["qatorlar"]:
+            raise RuntimeError(f"{bolak}: arxivda {malumot['qatorlar']} qator, bo'lakda {jami}")
+
+        await self.db.execute(text(_YIGINDI_SOROVI.format(bolak=bolak)), {"oy": oy})
+        await self.db.execute(text(_YECHIMLAR_SOROVI.format(bolak=bolak)))
+        self.db.add(UrinishArxivi(oy=oy, fayl=str(fayl), **malumot))
+        await self.db.execute(text(f"DROP TABLE {bolak}"))
+        await self.db.commit()
+
+        logger.info(
+            f"{bolak} arxivlandi: {malumot['qatorlar']} qator, {malumot['hajm']} bayt -> {fayl}"
+        )
+        return {"bolak": bolak, "oy": oy.isoformat(), "fayl": str(fayl), **malumot}
+
+    async def hammasini_arxivlash(self, saqlash_oylari: int = None) -> List[Dict[str, Any]]:
+        """Saqlash oynasidan eski barcha bo'laklarni ketma-ket (eskisidan) arxivlaydi."""
+        natijalar = []
+        for nomzod in await self.nomzodlar(saqlash_oylari):
+            natijalar.append(await self.oyni_arxivlash(nomzod["bolak"], nomzod["oy"]))
+        return natijalar
+
+    async def statistika(
+        self,
+        foydalanuvchi_id: UUID,
+        boshlangich_sana: datetime = None,
+        tugash_sana: datetime = None
+    ) -> Dict[str, Any]:
+        """
+        Davr statistikasi: jami, qiyinlik, kategoriya va oylar bo'yicha.
+        Arxivlangan oylar yig'indidan (oylik aniqlikda - davrga kesishgan oy
+        to'liq kiradi), qolgani xom urinishlardan; xom qism bo'laklar bo'yicha kesiladi.
+        """
+        boshlangich_sana, tugash_sana = _utc(boshlangich_sana), _utc(tugash_sana)
+        chegara = await self.chegara()
+        parametrlar: Dict[str, Any] = {"fid": foydalanuvchi_id}
+
+        yigindi_shart = ["y.foydalanuvchi_id = :fid"]
+        if chegara is None:
+            yigindi_shart.append("false")
+        if boshlangich_sana:
+            yigindi_shart.append("y.oy >= :dan_oy")
+            parametrlar["dan_oy"] = date(boshlangich_sana.year, boshlangich_sana.month, 1)
+        if tugash_sana:
+            yigindi_shart.append("y.oy <= :gacha_sana")
+            parametrlar["gacha_sana"] = tugash_sana.date()
+
+        xom_shart = ["u.foydalanuvchi_id = :fid"]
+        xom_dan = max(filter(None, (chegara, boshlangich_sana)), default=None)
+        if xom_dan:
+            xom_shart.append("u.yaratilgan_vaqt >= :xom_dan")
+            parametrlar["xom_dan"] = xom_dan
+        if tugash_sana:
+            xom_shart.append("u.yaratilgan_vaqt <= :gacha")
+            parametrlar["gacha"] = tugash_sana
+
+        natija = await self.db.execute(
+            text(_ARALASH_SOROVI.format(
+                yigindi_shart=" AND ".join(yigindi_shart),
+                xom_shart=" AND ".join(xom_shart)
+            )),
+            parametrlar
+        )
+
+        jami = {"jami": 0, "togri": 0, "vaqt": 0, "ball": 0}
+        qiyinliklar: Dict[str, Dict[str, int]] = {}
+        kategoriyalar: Dict[str, Dict[str, int]] = {}
+        oylar: Dict[str, Dict[str, int]] = {}
+        for qator in natija.all():
+            qiyinlik = getattr(qator.qiyinlik, "value", qator.qiyinlik)
+            for guruh in (
+                jami,
+                qiyinliklar.setdefault(qiyinlik, {"jami": 0, "togri": 0}),
+                kategoriyalar.setdefault(qator.kategoriya, {"jami": 0, "togri": 0, "vaqt": 0}),
+                oylar.setdefault(qator.oy.isoformat(), {"jami": 0, "togri": 0, "vaqt": 0}),
+            ):
+                for kalit in guruh:
+                    guruh[kalit] += int(getattr(qator, kalit))
+
+        return {
+            **jami,
+            "aniqlik": _aniqlik(jami["togri"], jami["jami"]),
+            "arxiv_chegarasi": chegara.date().isoformat() if chegara else None,
+            "qiyinlik": {
+                nom: {**q, "aniqlik": _aniqlik(q["togri"], q["jami"])}
+                for nom, q in qiyinliklar.items()
+            },
+            "kategoriyalar": [
+                {"nomi": nom, **k, "aniqlik": _aniqlik(k["togri"], k["jami"])}
+                for nom, k in sorted(kategoriyalar.items())
+            ],
+            "oylar": [
+                {"oy": oy, **o, "aniqlik": _aniqlik(o["togri"], o["jami"])}
+                for oy, o in sorted(oylar.items())
+            ],
+        }
@@ -4,7 +4,7 @@
 from typing import Optional, List, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, update
+from sqlalchemy import select, func, and_, update, insert
 from datetime import datetime
 
 from modellar.bildirishnoma import (
@@ -190,6 +190,23 @@ class BildirishnomServisi:
             havola="/mashq"
         )
     
+    async def takrorlash_eslatmalari(self, foydalanuvchi_idlar: List[UUID]) -> int:
+        """Muddati kelgan kartasi bor foydalanuvchilarga eslatma (bitta multi-row INSERT)."""
+        if not foydalanuvchi_idlar:
+            return 0
+        await self.db.execute(insert(Bildirishnoma), [
+            {
+                "foydalanuvchi_id": foyd_id,
+                "turi": BildirishnomaTuri.ESLATMA,
+                "sarlavha": "Takrorlash vaqti keldi 🧠",
+                "matn": "Bugun takrorlash kerak bo'lgan kartalaringiz bor.",
+                "havola": "/takrorlash",
+                "qoshimcha_malumot": {}
+            }
+            for foyd_id in foydalanuvchi_idlar
+        ])
+        return len(foydalanuvchi_idlar)
+    
     # ============== Sozlamalar ==============
     
     async def sozlamalar_olish(
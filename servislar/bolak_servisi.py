@@ -0,0 +1,83 @@
+# MedCase Pro Platform - Urinish Bo'laklari Servisi
+# holat_urinishlari oylik bo'laklarini (partition) yuritish va bo'lak kesishini hisobga oluvchi so'rovlar
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+import logging
+
+from modellar.rivojlanish import HolatUrinishi
+
+logger = logging.getLogger(__name__)
+
+# Shuncha oy oldinga bo'laklar tayyor turadi (kunlik vazifa bilan to'ldiriladi)
+OLDINGA_OYLAR = 3
+
+# Oxirgi urinishlar avval joriy va o'tgan oy bo'laklaridan qidiriladi
+OXIRGI_OYNA_OYLARI = 1
+
+
+def oy_boshi(oylar_oldin: int = 0, hozir: datetime = None) -> datetime:
+    """UTC oy boshi - bo'lak chegaralari bilan bir xil."""
+    hozir = hozir or datetime.now(timezone.utc)
+    yil, oy = divmod(hozir.year * 12 + hozir.month - 1 - oylar_oldin, 12)
+    return datetime(yil, oy + 1, 1, tzinfo=timezone.utc)
+
+
+async def oxirgi_urinishlar(
+    db: AsyncSession,
+    foydalanuvchi_id: UUID,
+    limit: int,
+    offset: int = 0
+) -> List[HolatUrinishi]:
+    """
+    Foydalanuvchining eng so'nggi urinishlari (yaratilgan_vaqt DESC).
+    Avval oxirgi oylar bo'laklari bilan cheklangan so'rov (rejalashtirishda qolgan
+    bo'laklar kesiladi); yetarli qator bo'lmasa - butun tarix bo'yicha.
+    """
+    sorov = select(HolatUrinishi).where(
+        HolatUrinishi.foydalanuvchi_id == foydalanuvchi_id
+    ).order_by(HolatUrinishi.yaratilgan_vaqt.desc()).offset(offset).limit(limit)
+
+    natija = await db.execute(
+        sorov.where(HolatUrinishi.yaratilgan_vaqt >= oy_boshi(OXIRGI_OYNA_OYLARI))
+    )
+    urinishlar = natija.scalars().all()
+    if len(urinishlar) == limit:
+        return urinishlar
+
+    natija = await db.execute(sorov)
+    return natija.scalars().all()
+
+
+class BolakServisi:
+    """holat_urinishlari bo'laklari: kelgusi oylarni yaratish va ko'rish."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def kelgusi_bolaklar(self, oldinga: int = OLDINGA_OYLAR) -> int:
+        """Joriy oydan oldinga oylargacha yetishmayotgan bo'laklarni yaratadi."""
+        yaratildi = await self.db.scalar(
+            text("SELECT urinish_bolaklarini_yaratish(:oldinga)"), {"oldinga": oldinga}
+        )
+        await self.db.commit()
+        if yaratildi:
+            logger.info(f"holat_urinishlari: {yaratildi} ta yangi bo'lak yaratildi")
+        return yaratildi
+
+    async def royxat(self) -> List[Dict[str, Any]]:
+        """Bo'laklar, ularning chegaralari va taxminiy hajmi."""
+        natija = await self.db.execute(text("""
+            SELECT c.relname AS nomi,
+                   pg_get_expr(c.relpartbound, c.oid) AS chegara,
+                   c.reltuples::bigint AS qatorlar,
+                   pg_total_relation_size(c.oid) AS hajm
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'holat_urinishlari'::regclass
+            ORDER BY c.relname
+        """))
+        return [dict(qator._mapping) for qator in natija.all()]
@@ -0,0 +1,145 @@
+# MedCase Pro Platform - Daraja Servisi
+# DarajaKonfiguratsiyasi asosida ball -> daraja hisoblash
+
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import logging
+import time
+
+from modellar.gamifikatsiya import DarajaKonfiguratsiyasi
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+
+logger = logging.getLogger(__name__)
+
+# Konfiguratsiya jadvali bo'sh bo'lganda ishlatiladigan standart chegaralar: (ball, daraja)
+STANDART_DARAJALAR: Tuple[Tuple[int, int], ...] = (
+    (0, 1), (100, 2), (300, 3), (600, 4), (1000, 5),
+    (1500, 6), (2200, 7), (3000, 8), (4000, 9), (5000, 10),
+    (6500, 11), (8000, 12), (10000, 13), (12500, 14), (15000, 15)
+)
+
+# Worker versiyani Redisdan shu oraliqda bir marta tekshiradi
+VERSIYA_TEKSHIRISH_ORALIGI = 30
+
+VERSIYA_KALITI = f"{KeshKalitlari.YUTUQLAR}:darajalar:versiya"
+
+# Barcha foydalanuvchilar darajasini bitta UPDATE bilan qayta hisoblash.
+# width_bucket(ball, chegaralar) = chegara <= ball bo'lganlar soni (bisect_right bilan bir xil).
+_QAYTA_HISOBLASH_SOROVI = text("""
+    UPDATE foydalanuvchi_rivojlanishi AS r SET
+        daraja = y.daraja,
+        yangilangan_vaqt = now()
+    FROM (
+        SELECT id, COALESCE(
+            (CAST(:darajalar AS int[]))[width_bucket(jami_ball, CAST(:chegaralar AS int[]))], 1
+        ) AS daraja
+        FROM foydalanuvchi_rivojlanishi
+    ) AS y
+    WHERE r.id = y.id AND r.daraja IS DISTINCT FROM y.daraja
+""")
+
+
+class DarajaJadvali:
+    """Saralangan o'zgarmas chegaralar; ball bo'yicha daraja O(log n) topiladi."""
+
+    __slots__ = ("versiya", "chegaralar", "darajalar", "tekshirilgan")
+
+    def __init__(self, versiya: int, qatorlar: Sequence[Tuple[int, int]]):
+        qatorlar = sorted(qatorlar)
+        self.versiya = versiya
+        self.chegaralar: Tuple[int, ...] = tuple(ball for ball, _ in qatorlar)
+        self.darajalar: Tuple[int, ...] = tuple(daraja for _, daraja in qatorlar)
+        self.tekshirilgan = time.monotonic()
+
+    def daraja(self, ball: int) -> int:
+        indeks = bisect_right(self.chegaralar, ball or 0) - 1
+        return self.darajalar[indeks] if indeks >= 0 else 1
+
+
+_jadval: Optional[DarajaJadvali] = None
+
+
+class DarajaServisi:
+    """
+    Daraja hisoblash.
+    Har bir worker konfiguratsiyani xotirada saqlaydi; admin chegaralarni
+    o'zgartirganda Redisdagi versiya oshiriladi va workerlar qayta yuklaydi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def jadval(self) -> DarajaJadvali:
+        """Joriy daraja jadvali (versiya o'zgargan bo'lsa qayta yuklanadi)."""
+        global _jadval
+        hozir = time.monotonic()
+        if _jadval is not None and hozir - _jadval.tekshirilgan < VERSIYA_TEKSHIRISH_ORALIGI:
+            return _jadval
+
+        versiya = int(await redis_kesh.olish(VERSIYA_KALITI) or 0)
+        if _jadval is not None and _jadval.versiya == versiya:
+            _jadval.tekshirilgan = hozir
+            return _jadval
+
+        natija = await self.db.execute(
+            select(DarajaKonfiguratsiyasi.kerakli_ball, DarajaKonfiguratsiyasi.daraja)
+        )
+        qatorlar = [tuple(qator) for qator in natija.all()] or STANDART_DARAJALAR
+        _jadval = DarajaJadvali(versiya, qatorlar)
+        logger.debug(f"Daraja jadvali yuklandi (versiya {versiya})")
+        return _jadval
+
+    async def daraja_hisoblash(self, ball: int) -> int:
+        """Ball asosida darajani hisoblaydi."""
+        return (await self.jadval()).daraja(ball)
+
+    async def konfiguratsiya_saqlash(self, darajalar: List[Dict[str, Any]]) -> None:
+        """
+        Daraja konfiguratsiyasini to'liq almashtiradi (daraja raqami bo'yicha upsert,
+        ro'yxatda yo'qlari o'chiriladi). Commitdan keyin versiyani_oshirish() chaqiriladi.
+        """
+        await self.db.execute(
+            delete(DarajaKonfiguratsiyasi).where(
+                DarajaKonfiguratsiyasi.daraja.not_in([d["daraja"] for d in darajalar])
+            )
+        )
+        sorov = pg_insert(DarajaKonfiguratsiyasi).values(darajalar)
+        await self.db.execute(
+            sorov.on_conflict_do_update(
+                index_elements=["daraja"],
+                set_={
+                    "nom": sorov.excluded.nom,
+                    "kerakli_ball": sorov.excluded.kerakli_ball,
+                    "ikonka_url": sorov.excluded.ikonka_url,
+                    "rang": sorov.excluded.rang,
+                    "imkoniyatlar": sorov.excluded.imkoniyatlar,
+                    "yangilangan_vaqt": text("now()")
+                }
+            )
+        )
+        await self.db.flush()
+
+    @staticmethod
+    async def versiyani_oshirish() -> int:
+        """Barcha workerlarga jadvalni qayta yuklashni bildiradi."""
+        global _jadval
+        _jadval = None
+        return await redis_kesh.oshirish(VERSIYA_KALITI)
+
+    async def hammasini_qayta_hisoblash(self) -> int:
+        """Barcha foydalanuvchilar darajasini set-based qayta hisoblaydi; o'zgarganlar soni."""
+        global _jadval
+        _jadval = None
+        jadval = await self.jadval()
+
+        natija = await self.db.execute(
+            _QAYTA_HISOBLASH_SOROVI,
+            {"chegaralar": list(jadval.chegaralar), "darajalar": list(jadval.darajalar)}
+        )
+        if natija.rowcount:
+            await redis_kesh.shablon_ochirish(f"{KeshKalitlari.DASHBOARD}:*")
+        logger.info(f"Darajalar qayta hisoblandi: {natija.rowcount} foydalanuvchi")
+        return natija.rowcount
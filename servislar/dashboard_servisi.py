@@ -0,0 +1,196 @@
+# MedCase Pro Platform - Dashboard Servisi
+# Foydalanuvchi dashboardi uchun Redis'dagi tayyor snapshot (read model)
+
+from typing import Any, Dict, Optional
+from uuid import UUID
+from datetime import date, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func
+import logging
+
+from modellar.rivojlanish import HolatUrinishi, FoydalanuvchiRivojlanishi, KunlikStatistika
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+from sxemalar.rivojlanish import UrinishJavob
+from servislar.kategoriya_rivojlanishi_servisi import KategoriyaRivojlanishiServisi
+from servislar.bolak_servisi import oxirgi_urinishlar
+
+logger = logging.getLogger(__name__)
+
+# Faol bo'lmagan foydalanuvchi snapshoti shu muddatdan keyin o'chadi
+DASHBOARD_MUDDATI = 7 * 24 * 3600
+OXIRGI_URINISHLAR_SONI = 5
+
+
+def _hafta_boshi(bugun: date) -> date:
+    return bugun - timedelta(days=bugun.weekday())
+
+
+class DashboardServisi:
+    """
+    Dashboard read modeli.
+    Snapshot har bir urinishda delta bilan yangilanadi, o'qish bitta kalitdan iborat.
+    Snapshot yo'q bo'lsa (sovuq foydalanuvchi) manba jadvallardan qayta quriladi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def kalit(foydalanuvchi_id: UUID) -> str:
+        return f"{KeshKalitlari.DASHBOARD}:{foydalanuvchi_id}"
+
+    async def olish(self, foydalanuvchi_id: UUID) -> Dict[str, Any]:
+        """Snapshotni oladi, yo'q bo'lsa qayta quradi."""
+        snapshot = await redis_kesh.olish(self.kalit(foydalanuvchi_id))
+        if snapshot is None:
+            snapshot = await self.qayta_qurish(foydalanuvchi_id)
+        else:
+            await self._daraja_va_streak(foydalanuvchi_id, snapshot)
+        return self._korinish(snapshot)
+
+    async def _daraja_va_streak(self, foydalanuvchi_id: UUID, snapshot: Dict[str, Any]) -> None:
+        """
+        Daraja va streak urinishdan tashqari ham o'zgaradi (nishon ballari, daraja
+        chegaralarini qayta hisoblash) - ular o'qishda bitta indeksli qatordan olinadi.
+        """
+        natija = await self.db.execute(
+            select(
+                FoydalanuvchiRivojlanishi.daraja,
+                FoydalanuvchiRivojlanishi.joriy_streak
+            ).where(FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id)
+        )
+        qator = natija.one_or_none()
+        if qator:
+            snapshot["daraja"] = qator.daraja or 1
+            snapshot["joriy_streak"] = qator.joriy_streak or 0
+
+    @staticmethod
+    def _korinish(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Snapshotdan javob maydonlarini hosil qiladi (sanaga bog'liq maydonlar shu yerda eskiradi)."""
+        bugun = date.today()
+        bugungi = snapshot["bugungi_holatlar"] if snapshot.get("sana") == bugun.isoformat() else 0
+        haftalik = (
+            snapshot["hafta_vaqt"]
+            if snapshot.get("hafta_boshi") == _hafta_boshi(bugun).isoformat() else 0
+        )
+
+        kategoriyalar = sorted(
+            snapshot.get("kategoriyalar", {}).items(), key=lambda k: k[1], reverse=True
+        )
+
+        return {
+            "jami_holatlar": snapshot["jami_urinishlar"],
+            "aniqlik_foizi": snapshot["aniqlik_foizi"],
+            "bu_hafta_vaqt": haftalik // 60,  # daqiqaga
+            "daraja": snapshot["daraja"],
+            "joriy_streak": snapshot["joriy_streak"],
+            "bugungi_holatlar": bugungi,
+            "oxirgi_urinishlar": snapshot["oxirgi_urinishlar"],
+            "jami_yechilgan_holatlar": snapshot["jami_urinishlar"],
+            "ortacha_aniqlik": snapshot["aniqlik_foizi"],
+            "eng_kop_yechilgan_kategoriya": kategoriyalar[0][0] if kategoriyalar else None,
+            "eng_kam_yechilgan_kategoriya": kategoriyalar[-1][0] if kategoriyalar else None,
+        }
+
+    async def qayta_qurish(self, foydalanuvchi_id: UUID) -> Dict[str, Any]:
+        """Snapshotni manba jadvallardan to'liq quradi va saqlaydi."""
+        bugun = date.today()
+        hafta_boshi = _hafta_boshi(bugun)
+
+        natija = await self.db.execute(
+            select(FoydalanuvchiRivojlanishi).where(
+                FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id
+            )
+        )
+        rivojlanish = natija.scalar_one_or_none()
+
+        natija = await self.db.execute(
+            select(
+                func.coalesce(func.sum(KunlikStatistika.jami_vaqt), 0),
+                func.coalesce(func.sum(KunlikStatistika.yechilgan_holatlar).filter(
+                    KunlikStatistika.sana == bugun
+                ), 0)
+            ).where(
+                and_(
+                    KunlikStatistika.foydalanuvchi_id == foydalanuvchi_id,
+                    KunlikStatistika.sana >= hafta_boshi
+                )
+            )
+        )
+        hafta_vaqt, bugungi = natija.one()
+
+        oxirgilar = await oxirgi_urinishlar(self.db, foydalanuvchi_id, OXIRGI_URINISHLAR_SONI)
+
+        kategoriyalar = {
+            k["kategoriya"]: k["jami_urinishlar"]
+            for k in await KategoriyaRivojlanishiServisi(self.db).royxat(foydalanuvchi_id)
+        }
+
+        snapshot = {
+            "jami_urinishlar": (rivojlanish.jami_urinishlar or 0) if rivojlanish else 0,
+            "aniqlik_foizi": (rivojlanish.aniqlik_foizi or 0.0) if rivojlanish else 0.0,
+            "daraja": (rivojlanish.daraja or 1) if rivojlanish else 1,
+            "joriy_streak": (rivojlanish.joriy_streak or 0) if rivojlanish else 0,
+            "sana": bugun.isoformat(),
+            "bugungi_holatlar": int(bugungi),
+            "hafta_boshi": hafta_boshi.isoformat(),
+            "hafta_vaqt": int(hafta_vaqt),
+            "kategoriyalar": kategoriyalar,
+            "oxirgi_urinishlar": [
+                UrinishJavob.model_validate(u).model_dump(mode="json") for u in oxirgilar
+            ],
+        }
+        await redis_kesh.saqlash(self.kalit(foydalanuvchi_id), snapshot, DASHBOARD_MUDDATI)
+        return snapshot
+
+    @classmethod
+    async def urinish_qollash(
+        cls,
+        urinish: HolatUrinishi,
+        kategoriya: Optional[str],
+        rivojlanish_ozgarish: Dict[str, Any]
+    ) -> None:
+        """
+        Yangi urinishni snapshotga delta sifatida qo'llaydi (urinish commit
+        qilingandan keyin - bazaga murojaat qilmaydi).
+        Snapshot yo'q bo'lsa hech narsa qilinmaydi - keyingi o'qish uni quradi.
+        Urinishlar soni kutilganidan farq qilsa (o'tkazib yuborilgan yoki bekor
+        qilingan urinish) snapshot o'chiriladi va qayta quriladi.
+        """
+        kalit = cls.kalit(urinish.foydalanuvchi_id)
+        snapshot = await redis_kesh.olish(kalit)
+        if snapshot is None:
+            return
+
+        if snapshot["jami_urinishlar"] + 1 != rivojlanish_ozgarish["jami_urinishlar"]:
+            await redis_kesh.ochirish(kalit)
+            return
+
+        bugun = date.today()
+        hafta_boshi = _hafta_boshi(bugun)
+
+        snapshot["jami_urinishlar"] = rivojlanish_ozgarish["jami_urinishlar"]
+        snapshot["aniqlik_foizi"] = rivojlanish_ozgarish["aniqlik_foizi"]
+        snapshot["daraja"] = rivojlanish_ozgarish["new_daraja"]
+        snapshot["joriy_streak"] = rivojlanish_ozgarish["new_joriy_streak"]
+
+        if snapshot.get("sana") != bugun.isoformat():
+            snapshot["sana"] = bugun.isoformat()
+            snapshot["bugungi_holatlar"] = 0
+        snapshot["bugungi_holatlar"] += 1
+
+        if snapshot.get("hafta_boshi") != hafta_boshi.isoformat():
+            snapshot["hafta_boshi"] = hafta_boshi.isoformat()
+            snapshot["hafta_vaqt"] = 0
+        snapshot["hafta_vaqt"] += urinish.sarflangan_vaqt or 0
+
+        if kategoriya:
+            kategoriyalar = snapshot.setdefault("kategoriyalar", {})
+            kategoriyalar[kategoriya] = kategoriyalar.get(kategoriya, 0) + 1
+
+        snapshot["oxirgi_urinishlar"] = [
+            UrinishJavob.model_validate(urinish).model_dump(mode="json"),
+            *snapshot["oxirgi_urinishlar"]
+        ][:OXIRGI_URINISHLAR_SONI]
+
+        await redis_kesh.saqlash(kalit, snapshot, DASHBOARD_MUDDATI)
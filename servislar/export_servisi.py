@@ -1,13 +1,19 @@
 # MedCase Pro Platform - Export Servisi
 # PDF va Excel export funksiyalari
 
-from typing import List, Dict, Any, Optional
-from uuid import UUID
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, AsyncIterator
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, Integer
+from sqlalchemy import select, and_
+import base64
+import csv
+import hashlib
 import io
 import json
+import logging
+import zipfile
+import zlib
 
 # PDF uchun (shartli import)
 PDF_MAVJUD = False
@@ -31,9 +37,315 @@ except ImportError:
     pass
 
 from modellar.rivojlanish import FoydalanuvchiRivojlanishi, HolatUrinishi, KunlikStatistika
-from modellar.foydalanuvchi import Foydalanuvchi
+from modellar.foydalanuvchi import Foydalanuvchi, FoydalanuvchiProfili
 from modellar.holat import Holat
-from modellar.kategoriya import Bolim, KichikKategoriya, AsosiyKategoriya
+from servislar.arxiv_servisi import ArxivServisi
+from servislar.kategoriya_rivojlanishi_servisi import KategoriyaRivojlanishiServisi
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+from vositalar.jarayon_hovuzi import jarayonda_bajarish
+
+logger = logging.getLogger(__name__)
+
+# Artefaktlar va vazifalar Redisda saqlanadigan muddat (soniya)
+EKSPORT_MUDDATI = 24 * 3600
+
+# Oqimli eksport: server-side cursor partiyasi va chiqishga yoziladigan qatorlar soni
+OQIM_PARTIYA_HAJMI = 2000
+OQIM_BLOK_QATORLARI = 500
+
+# Hisobot sanasi formati (ma'lumotlar versiyasi vaqti, UTC)
+HISOBOT_SANA_FORMATI = "%Y-%m-%d %H:%M"
+
+# Urinishlar eksporti ustunlari
+URINISH_USTUNLARI = [
+    "id", "foydalanuvchi_id", "holat_id", "bolim_id", "qiyinlik",
+    "tanlangan_javob", "togri", "sarflangan_vaqt", "olingan_ball",
+    "boshlangan_vaqt", "tugallangan_vaqt", "yaratilgan_vaqt"
+]
+
+
+def rivojlanish_pdf_yaratish(malumotlar: Dict[str, Any]) -> bytes:
+    """
+    Rivojlanish hisobotini PDF ga render qiladi.
+    Sof funksiya - jarayonlar hovuzida bajariladi. Bir xil ma'lumot bir xil
+    baytlarni beradi (invariant: sana va hujjat ID si metadata ga yozilmaydi).
+    """
+    if not PDF_MAVJUD:
+        raise Exception("reportlab kutubxonasi o'rnatilmagan. pip install reportlab")
+
+    # PDF yaratish
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=2*cm,
+        leftMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm,
+        invariant=True
+    )
+
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Sarlavha
+    sarlavha_style = ParagraphStyle(
+        'Sarlavha',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=20
+    )
+    story.append(Paragraph("MedCase Pro - Rivojlanish Hisoboti", sarlavha_style))
+    story.append(Spacer(1, 0.5*cm))
+
+    # Foydalanuvchi ma'lumotlari
+    foyd = malumotlar.get('foydalanuvchi', {})
+    info_text = f"""
+    <b>Foydalanuvchi:</b> {foyd.get('toliq_ism', 'N/A')}<br/>
+    <b>Hisobot sanasi:</b> {malumotlar.get('hisobot_sanasi', 'N/A')}<br/>
+    <b>Davr:</b> {malumotlar.get('davr', 'Barcha vaqt')}
+    """
+    story.append(Paragraph(info_text, styles['Normal']))
+    story.append(Spacer(1, 1*cm))
+
+    # Umumiy statistika
+    story.append(Paragraph("<b>Umumiy Statistika</b>", styles['Heading2']))
+
+    statistika = malumotlar.get('statistika', {})
+    stat_data = [
+        ['Ko\'rsatkich', 'Qiymat'],
+        ['Jami yechilgan', str(statistika.get('jami_yechilgan', 0))],
+        ['To\'g\'ri javoblar', str(statistika.get('togri_javoblar', 0))],
+        ['Aniqlik', f"{statistika.get('aniqlik', 0):.1f}%"],
+        ['Joriy streak', f"{statistika.get('joriy_streak', 0)} kun"],
+        ['Maksimal streak', f"{statistika.get('maksimal_streak', 0)} kun"],
+        ['Jami ball', str(statistika.get('jami_ball', 0))],
+        ['Daraja', str(statistika.get('daraja', 1))],
+    ]
+
+    stat_table = Table(stat_data, colWidths=[8*cm, 4*cm])
+    stat_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F1F5F9')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CBD5E1')),
+    ]))
+    story.append(stat_table)
+    story.append(Spacer(1, 1*cm))
+
+    # Kategoriya bo'yicha statistika
+    if malumotlar.get('kategoriya_statistika'):
+        story.append(Paragraph("<b>Kategoriya Bo'yicha</b>", styles['Heading2']))
+
+        kat_data = [['Kategoriya', 'Yechilgan', 'To\'g\'ri', 'Aniqlik']]
+        for kat in malumotlar['kategoriya_statistika']:
+            kat_data.append([
+                kat['nomi'],
+                str(kat['yechilgan']),
+                str(kat['togri']),
+                f"{kat['aniqlik']:.1f}%"
+            ])
+
+        kat_table = Table(kat_data, colWidths=[6*cm, 3*cm, 3*cm, 3*cm])
+        kat_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CBD5E1')),
+        ]))
+        story.append(kat_table)
+
+    # PDF yaratish
+    doc.build(story)
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def rivojlanish_excel_yaratish(malumotlar: Dict[str, Any]) -> bytes:
+    """
+    Rivojlanish hisobotini Excel ga render qiladi.
+    Sof funksiya - jarayonlar hovuzida bajariladi. Hujjat xossalari va zip
+    yozuvlari vaqti hisobot sanasiga qotiriladi - bir xil ma'lumot bir xil baytlar.
+    """
+    if not EXCEL_MAVJUD:
+        raise Exception("openpyxl kutubxonasi o'rnatilmagan")
+
+    # Excel yaratish
+    wb = openpyxl.Workbook()
+
+    # ============== Umumiy sahifa ==============
+    ws = wb.active
+    ws.title = "Umumiy"
+
+    # Sarlavha
+    ws['A1'] = "MedCase Pro - Rivojlanish Hisoboti"
+    ws['A1'].font = Font(size=16, bold=True)
+    ws.merge_cells('A1:D1')
+
+    foyd = malumotlar.get('foydalanuvchi', {})
+    ws['A3'] = f"Foydalanuvchi: {foyd.get('toliq_ism', 'N/A')}"
+    ws['A4'] = f"Hisobot sanasi: {malumotlar.get('hisobot_sanasi', 'N/A')}"
+
+    # Statistika jadvali
+    statistika = malumotlar.get('statistika', {})
+    headers = ['Ko\'rsatkich', 'Qiymat']
+    data = [
+        ['Jami yechilgan', statistika.get('jami_yechilgan', 0)],
+        ['To\'g\'ri javoblar', statistika.get('togri_javoblar', 0)],
+        ['Aniqlik (%)', round(statistika.get('aniqlik', 0), 1)],
+        ['Joriy streak (kun)', statistika.get('joriy_streak', 0)],
+        ['Maksimal streak (kun)', statistika.get('maksimal_streak', 0)],
+        ['Jami ball', statistika.get('jami_ball', 0)],
+        ['Daraja', statistika.get('daraja', 1)],
+    ]
+
+    # Header
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=6, column=col, value=header)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
+        cell.alignment = Alignment(horizontal="center")
+
+    # Data
+    for row_idx, row_data in enumerate(data, 7):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws.cell(row=row_idx, column=col_idx, value=value)
+            cell.alignment = Alignment(horizontal="center")
+
+    # ============== Kategoriya sahifasi ==============
+    if malumotlar.get('kategoriya_statistika'):
+        ws2 = wb.create_sheet("Kategoriya bo'yicha")
+
+        kat_headers = ['Kategoriya', 'Yechilgan', 'To\'g\'ri', 'Aniqlik (%)']
+        for col, header in enumerate(kat_headers, 1):
+            cell = ws2.cell(row=1, column=col, value=header)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color="10B981", end_color="10B981", fill_type="solid")
+
+        for row_idx, kat in enumerate(malumotlar['kategoriya_statistika'], 2):
+            ws2.cell(row=row_idx, column=1, value=kat['nomi'])
+            ws2.cell(row=row_idx, column=2, value=kat['yechilgan'])
+            ws2.cell(row=row_idx, column=3, value=kat['togri'])
+            ws2.cell(row=row_idx, column=4, value=round(kat['aniqlik'], 1))
+
+    # ============== Kunlik statistika ==============
+    if malumotlar.get('kunlik_statistika'):
+        ws3 = wb.create_sheet("Kunlik")
+
+        kun_headers = ['Sana', 'Yechilgan', 'To\'g\'ri', 'Aniqlik (%)']
+        for col, header in enumerate(kun_headers, 1):
+            cell = ws3.cell(row=1, column=col, value=header)
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color="8B5CF6", end_color="8B5CF6", fill_type="solid")
+
+        for row_idx, kun in enumerate(malumotlar['kunlik_statistika'], 2):
+            ws3.cell(row=row_idx, column=1, value=kun['sana'])
+            ws3.cell(row=row_idx, column=2, value=kun['yechilgan'])
+            ws3.cell(row=row_idx, column=3, value=kun['togri'])
+            ws3.cell(row=row_idx, column=4, value=round(kun['aniqlik'], 1))
+
+    # Column widths
+    for ws in wb.worksheets:
+        for col in ws.columns:
+            ws.column_dimensions[col[0].column_letter].width = 15
+
+    # Excel saqlash
+    sana = _hisobot_vaqti(malumotlar)
+    wb.properties.created = sana
+    wb.properties.modified = sana
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return _zip_vaqtini_qotirish(buffer.getvalue(), sana)
+
+
+def _hisobot_vaqti(malumotlar: Dict[str, Any]) -> datetime:
+    """Hisobot sanasi (ma'lumotlar versiyasidan) - render vaqtiga bog'liq emas."""
+    try:
+        return datetime.strptime(malumotlar.get('hisobot_sanasi', ''), HISOBOT_SANA_FORMATI)
+    except ValueError:
+        return datetime(1980, 1, 1)
+
+
+def _zip_vaqtini_qotirish(kontent: bytes, vaqt: datetime) -> bytes:
+    """Zip (xlsx) yozuvlarini berilgan vaqt bilan qayta yozadi."""
+    kirish = zipfile.ZipFile(io.BytesIO(kontent))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as chiqish:
+        for yozuv in kirish.infolist():
+            yangi = zipfile.ZipInfo(yozuv.filename, date_time=vaqt.timetuple()[:6])
+            yangi.compress_type = zipfile.ZIP_DEFLATED
+            chiqish.writestr(yangi, kirish.read(yozuv.filename))
+    return buffer.getvalue()
+
+
+# format -> (render funksiyasi, media turi, fayl kengaytmasi)
+FORMATLAR = {
+    "pdf": (rivojlanish_pdf_yaratish, "application/pdf", "pdf"),
+    "excel": (
+        rivojlanish_excel_yaratish,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx"
+    ),
+}
+
+
+def _artefakt_kaliti(sha256: str) -> str:
+    return f"{KeshKalitlari.EKSPORT}:artefakt:{sha256}"
+
+
+def _kesh_kaliti(kesh_kalit: str) -> str:
+    return f"{KeshKalitlari.EKSPORT}:kesh:{kesh_kalit}"
+
+
+async def artefakt_saqlash(
+    kesh_kalit: str,
+    kontent: bytes,
+    media_turi: str,
+    kengaytma: str,
+    hisobot_sanasi: str = None
+) -> Dict[str, Any]:
+    """
+    Artefaktni kontent manzili (sha256) bo'yicha saqlaydi va
+    kesh kalitini unga bog'laydi. Bir xil kontent bir marta saqlanadi.
+    """
+    sha256 = hashlib.sha256(kontent).hexdigest()
+    if not await redis_kesh.mavjud(_artefakt_kaliti(sha256)):
+        await redis_kesh.saqlash(
+            _artefakt_kaliti(sha256),
+            base64.b64encode(kontent).decode("ascii"),
+            EKSPORT_MUDDATI
+        )
+    meta = {
+        "sha256": sha256,
+        "fayl_nomi": f"rivojlanish_hisoboti_{(hisobot_sanasi or '')[:10].replace('-', '')}.{kengaytma}",
+        "media_turi": media_turi,
+        "hajm": len(kontent)
+    }
+    await redis_kesh.saqlash(_kesh_kaliti(kesh_kalit), meta, EKSPORT_MUDDATI)
+    return {**meta, "kontent": kontent}
+
+
+async def artefakt_olish(sha256: str) -> Optional[bytes]:
+    """Artefakt kontentini sha256 bo'yicha oladi."""
+    kodlangan = await redis_kesh.olish(_artefakt_kaliti(sha256))
+    if not kodlangan:
+        return None
+    return base64.b64decode(kodlangan)
+
+
+async def artefakt_keshdan_olish(kesh_kalit: str) -> Optional[Dict[str, Any]]:
+    """Kesh kaliti bo'yicha tayyor artefaktni qaytaradi (bo'lmasa None)."""
+    meta = await redis_kesh.olish(_kesh_kaliti(kesh_kalit))
+    if not meta:
+        return None
+    kontent = await artefakt_olish(meta["sha256"])
+    if kontent is None:
+        return None
+    return {**meta, "kontent": kontent}
 
 
 class ExportServisi:
@@ -49,204 +361,93 @@ class ExportServisi:
         tugash_sana: datetime = None
     ) -> bytes:
         """Foydalanuvchi rivojlanish hisobotini PDF formatda yaratadi."""
-
-        if not PDF_MAVJUD:
-            raise Exception("reportlab kutubxonasi o'rnatilmagan. pip install reportlab")
-
-        # Ma'lumotlarni olish
-        malumotlar = await self._rivojlanish_malumotlari_olish(
-            foydalanuvchi_id, boshlangich_sana, tugash_sana
+        artefakt = await self.hisobot_olish(
+            foydalanuvchi_id, "pdf", boshlangich_sana, tugash_sana
         )
+        return artefakt["kontent"]
 
-        # PDF yaratish
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
+    async def rivojlanish_excel(
+        self,
+        foydalanuvchi_id: UUID,
+        boshlangich_sana: datetime = None,
+        tugash_sana: datetime = None
+    ) -> bytes:
+        """Foydalanuvchi rivojlanish hisobotini Excel formatda yaratadi."""
+        artefakt = await self.hisobot_olish(
+            foydalanuvchi_id, "excel", boshlangich_sana, tugash_sana
         )
+        return artefakt["kontent"]
 
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Sarlavha
-        sarlavha_style = ParagraphStyle(
-            'Sarlavha',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=20
-        )
-        story.append(Paragraph("MedCase Pro - Rivojlanish Hisoboti", sarlavha_style))
-        story.append(Spacer(1, 0.5*cm))
-
-        # Foydalanuvchi ma'lumotlari
-        foyd = malumotlar.get('foydalanuvchi', {})
-        info_text = f"""
-        <b>Foydalanuvchi:</b> {foyd.get('toliq_ism', 'N/A')}<br/>
-        <b>Hisobot sanasi:</b> {datetime.now().strftime('%Y-%m-%d %H:%M')}<br/>
-        <b>Davr:</b> {malumotlar.get('davr', 'Barcha vaqt')}
+    async def malumot_versiyasi(self, foydalanuvchi_id: UUID) -> str:
         """
-        story.append(Paragraph(info_text, styles['Normal']))
-        story.append(Spacer(1, 1*cm))
-
-        # Umumiy statistika
-        story.append(Paragraph("<b>Umumiy Statistika</b>", styles['Heading2']))
-
-        statistika = malumotlar.get('statistika', {})
-        stat_data = [
-            ['Ko\'rsatkich', 'Qiymat'],
-            ['Jami yechilgan', str(statistika.get('jami_yechilgan', 0))],
-            ['To\'g\'ri javoblar', str(statistika.get('togri_javoblar', 0))],
-            ['Aniqlik', f"{statistika.get('aniqlik', 0):.1f}%"],
-            ['Joriy streak', f"{statistika.get('joriy_streak', 0)} kun"],
-            ['Maksimal streak', f"{statistika.get('maksimal_streak', 0)} kun"],
-            ['Jami ball', str(statistika.get('jami_ball', 0))],
-            ['Daraja', str(statistika.get('daraja', 1))],
-        ]
-
-        stat_table = Table(stat_data, colWidths=[8*cm, 4*cm])
-        stat_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F1F5F9')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CBD5E1')),
-        ]))
-        story.append(stat_table)
-        story.append(Spacer(1, 1*cm))
-
-        # Kategoriya bo'yicha statistika
-        if malumotlar.get('kategoriya_statistika'):
-            story.append(Paragraph("<b>Kategoriya Bo'yicha</b>", styles['Heading2']))
-
-            kat_data = [['Kategoriya', 'Yechilgan', 'To\'g\'ri', 'Aniqlik']]
-            for kat in malumotlar['kategoriya_statistika']:
-                kat_data.append([
-                    kat['nomi'],
-                    str(kat['yechilgan']),
-                    str(kat['togri']),
-                    f"{kat['aniqlik']:.1f}%"
-                ])
-
-            kat_table = Table(kat_data, colWidths=[6*cm, 3*cm, 3*cm, 3*cm])
-            kat_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CBD5E1')),
-            ]))
-            story.append(kat_table)
-
-        # PDF yaratish
-        doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
+        Foydalanuvchi ma'lumotlari versiyasi.
+        Har bir urinish rivojlanish yozuvini yangilaydi - shu bilan versiya o'zgaradi.
+        """
+        natija = await self.db.execute(
+            select(
+                FoydalanuvchiRivojlanishi.jami_urinishlar,
+                FoydalanuvchiRivojlanishi.jami_ball,
+                FoydalanuvchiRivojlanishi.yangilangan_vaqt
+            ).where(FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id)
+        )
+        qator = natija.one_or_none()
+        if not qator:
+            return "0"
+        jami, ball, vaqt = qator
+        return f"{jami}:{ball}:{vaqt.timestamp() if vaqt else 0}"
 
-    async def rivojlanish_excel(
+    async def kesh_kaliti(
         self,
         foydalanuvchi_id: UUID,
+        formati: str,
         boshlangich_sana: datetime = None,
         tugash_sana: datetime = None
-    ) -> bytes:
-        """Foydalanuvchi rivojlanish hisobotini Excel formatda yaratadi."""
+    ) -> str:
+        """(foydalanuvchi, davr, ma'lumot versiyasi, format) bo'yicha kesh kaliti."""
+        versiya = await self.malumot_versiyasi(foydalanuvchi_id)
+        xom = ":".join([
+            str(foydalanuvchi_id),
+            formati,
+            boshlangich_sana.isoformat() if boshlangich_sana else "-",
+            tugash_sana.isoformat() if tugash_sana else "-",
+            versiya
+        ])
+        return hashlib.sha256(xom.encode()).hexdigest()
+
+    async def hisobot_olish(
+        self,
+        foydalanuvchi_id: UUID,
+        formati: str,
+        boshlangich_sana: datetime = None,
+        tugash_sana: datetime = None,
+        kesh_kalit: str = None,
+        jarayonda: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Hisobotni keshdan oladi yoki render qiladi: web workerda jarayonlar
+        hovuzida, Celery workerda (jarayonda=False) shu jarayonning o'zida.
+        Qaytaradi: {"kontent", "sha256", "fayl_nomi", "media_turi", "kesh"}.
+        """
+        if formati not in FORMATLAR:
+            raise ValueError(f"Noma'lum format: {formati}")
 
-        if not EXCEL_MAVJUD:
-            raise Exception("openpyxl kutubxonasi o'rnatilmagan")
+        kesh_kalit = kesh_kalit or await self.kesh_kaliti(
+            foydalanuvchi_id, formati, boshlangich_sana, tugash_sana
+        )
+        artefakt = await artefakt_keshdan_olish(kesh_kalit)
+        if artefakt:
+            return {**artefakt, "kesh": True}
 
         malumotlar = await self._rivojlanish_malumotlari_olish(
             foydalanuvchi_id, boshlangich_sana, tugash_sana
         )
+        render, media_turi, kengaytma = FORMATLAR[formati]
+        kontent = await jarayonda_bajarish(render, malumotlar) if jarayonda else render(malumotlar)
 
-        # Excel yaratish
-        wb = openpyxl.Workbook()
-
-        # ============== Umumiy sahifa ==============
-        ws = wb.active
-        ws.title = "Umumiy"
-
-        # Sarlavha
-        ws['A1'] = "MedCase Pro - Rivojlanish Hisoboti"
-        ws['A1'].font = Font(size=16, bold=True)
-        ws.merge_cells('A1:D1')
-
-        foyd = malumotlar.get('foydalanuvchi', {})
-        ws['A3'] = f"Foydalanuvchi: {foyd.get('toliq_ism', 'N/A')}"
-        ws['A4'] = f"Hisobot sanasi: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-
-        # Statistika jadvali
-        statistika = malumotlar.get('statistika', {})
-        headers = ['Ko\'rsatkich', 'Qiymat']
-        data = [
-            ['Jami yechilgan', statistika.get('jami_yechilgan', 0)],
-            ['To\'g\'ri javoblar', statistika.get('togri_javoblar', 0)],
-            ['Aniqlik (%)', round(statistika.get('aniqlik', 0), 1)],
-            ['Joriy streak (kun)', statistika.get('joriy_streak', 0)],
-            ['Maksimal streak (kun)', statistika.get('maksimal_streak', 0)],
-            ['Jami ball', statistika.get('jami_ball', 0)],
-            ['Daraja', statistika.get('daraja', 1)],
-        ]
-
-        # Header
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=6, column=col, value=header)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-
-        # Data
-        for row_idx, row_data in enumerate(data, 7):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.alignment = Alignment(horizontal="center")
-
-        # ============== Kategoriya sahifasi ==============
-        if malumotlar.get('kategoriya_statistika'):
-            ws2 = wb.create_sheet("Kategoriya bo'yicha")
-
-            kat_headers = ['Kategoriya', 'Yechilgan', 'To\'g\'ri', 'Aniqlik (%)']
-            for col, header in enumerate(kat_headers, 1):
-                cell = ws2.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="10B981", end_color="10B981", fill_type="solid")
-
-            for row_idx, kat in enumerate(malumotlar['kategoriya_statistika'], 2):
-                ws2.cell(row=row_idx, column=1, value=kat['nomi'])
-                ws2.cell(row=row_idx, column=2, value=kat['yechilgan'])
-                ws2.cell(row=row_idx, column=3, value=kat['togri'])
-                ws2.cell(row=row_idx, column=4, value=round(kat['aniqlik'], 1))
-
-        # ============== Kunlik statistika ==============
-        if malumotlar.get('kunlik_statistika'):
-            ws3 = wb.create_sheet("Kunlik")
-
-            kun_headers = ['Sana', 'Yechilgan', 'To\'g\'ri', 'Aniqlik (%)']
-            for col, header in enumerate(kun_headers, 1):
-                cell = ws3.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="8B5CF6", end_color="8B5CF6", fill_type="solid")
-
-            for row_idx, kun in enumerate(malumotlar['kunlik_statistika'], 2):
-                ws3.cell(row=row_idx, column=1, value=kun['sana'])
-                ws3.cell(row=row_idx, column=2, value=kun['yechilgan'])
-                ws3.cell(row=row_idx, column=3, value=kun['togri'])
-                ws3.cell(row=row_idx, column=4, value=round(kun['aniqlik'], 1))
-
-        # Column widths
-        for ws in wb.worksheets:
-            for col in ws.columns:
-                ws.column_dimensions[col[0].column_letter].width = 15
-
-        # Excel saqlash
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
+        artefakt = await artefakt_saqlash(
+            kesh_kalit, kontent, media_turi, kengaytma, malumotlar.get('hisobot_sanasi')
+        )
+        return {**artefakt, "kesh": False}
 
     async def _rivojlanish_malumotlari_olish(
         self,
@@ -270,6 +471,15 @@ class ExportServisi:
 
         rivojlanish = foydalanuvchi.rivojlanish
 
+        # Hisobot sanasi - ma'lumotlar versiyasi (kesh kaliti) vaqti, render vaqti emas:
+        # kontent manzili barqaror, keshdagi artefakt sanasi eskirmaydi
+        versiya_vaqti = (
+            rivojlanish.yangilangan_vaqt if rivojlanish and rivojlanish.yangilangan_vaqt
+            else foydalanuvchi.yaratilgan_vaqt
+        )
+        if versiya_vaqti.tzinfo:
+            versiya_vaqti = versiya_vaqti.astimezone(timezone.utc)
+
         # Davr
         davr = "Barcha vaqt"
         if boshlangich_sana and tugash_sana:
@@ -285,48 +495,36 @@ class ExportServisi:
                 'togri_javoblar': togri,
                 'aniqlik': (togri / jami * 100) if jami > 0 else 0,
                 'joriy_streak': rivojlanish.joriy_streak or 0,
-                'maksimal_streak': rivojlanish.maksimal_streak or 0,
+                'maksimal_streak': rivojlanish.eng_uzun_streak or 0,
                 'jami_ball': rivojlanish.jami_ball or 0,
                 'daraja': rivojlanish.daraja or 1,
             }
 
-        # Kategoriya bo'yicha statistika
-        kategoriya_filtrlar = [HolatUrinishi.foydalanuvchi_id == foydalanuvchi_id]
-        if boshlangich_sana:
-            kategoriya_filtrlar.append(HolatUrinishi.yaratilgan_vaqt >= boshlangich_sana)
-        if tugash_sana:
-            kategoriya_filtrlar.append(HolatUrinishi.yaratilgan_vaqt <= tugash_sana)
-
-        kat_sorov = select(
-            AsosiyKategoriya.nomi.label("nomi"),
-            func.count(HolatUrinishi.id).label("jami"),
-            func.sum(func.cast(HolatUrinishi.togri, Integer)).label("togri")
-        ).select_from(HolatUrinishi).join(
-            Holat, HolatUrinishi.holat_id == Holat.id
-        ).join(
-            Bolim, Holat.bolim_id == Bolim.id
-        ).join(
-            KichikKategoriya, Bolim.kichik_kategoriya_id == KichikKategoriya.id
-        ).join(
-            AsosiyKategoriya, KichikKategoriya.asosiy_kategoriya_id == AsosiyKategoriya.id
-        ).where(
-            and_(*kategoriya_filtrlar)
-        ).group_by(
-            AsosiyKategoriya.nomi
-        ).order_by(AsosiyKategoriya.nomi)
-
-        kat_natija = await self.db.execute(kat_sorov)
-        kategoriya_statistika = []
-        for row in kat_natija.all():
-            jami = row.jami or 0
-            togri = row.togri or 0
-            aniqlik = (togri / jami * 100) if jami > 0 else 0
-            kategoriya_statistika.append({
-                "nomi": row.nomi,
-                "yechilgan": jami,
-                "togri": togri,
-                "aniqlik": round(aniqlik, 1)
-            })
+        # Kategoriya bo'yicha statistika - davr berilmasa agregat jadvaldan
+        if not boshlangich_sana and not tugash_sana:
+            kategoriya_statistika = [
+                {
+                    "nomi": kat["kategoriya"],
+                    "yechilgan": kat["jami_urinishlar"],
+                    "togri": kat["togri_javoblar"],
+                    "aniqlik": kat["aniqlik"]
+                }
+                for kat in await KategoriyaRivojlanishiServisi(self.db).royxat(foydalanuvchi_id)
+            ]
+        else:
+            # Davr uchun: arxivlangan oylar yig'indidan, yangi oylar xom urinishlardan
+            davr_statistikasi = await ArxivServisi(self.db).statistika(
+                foydalanuvchi_id, boshlangich_sana, tugash_sana
+            )
+            kategoriya_statistika = [
+                {
+                    "nomi": kat["nomi"],
+                    "yechilgan": kat["jami"],
+                    "togri": kat["togri"],
+                    "aniqlik": kat["aniqlik"]
+                }
+                for kat in davr_statistikasi["kategoriyalar"]
+            ]
 
         # Kunlik statistika
         kunlik_filtrlar = [KunlikStatistika.foydalanuvchi_id == foydalanuvchi_id]
@@ -357,8 +555,245 @@ class ExportServisi:
                 'toliq_ism': foydalanuvchi.toliq_ism,
                 'email': foydalanuvchi.email
             },
+            'hisobot_sanasi': versiya_vaqti.strftime(HISOBOT_SANA_FORMATI),
             'davr': davr,
             'statistika': statistika,
             'kategoriya_statistika': kategoriya_statistika,
             'kunlik_statistika': kunlik_statistika
         }
+
+
+# ============== Eksport vazifalari ==============
+
+class EksportVazifasi:
+    """
+    Hisobot eksporti fon vazifasi (holati Redisda).
+    Render Celery workerda bajariladi - web worker qayta ishga tushsa ham vazifa
+    yo'qolmaydi. Tayyor bo'lganda foydalanuvchiga bildirishnoma yoziladi,
+    holatni so'rab turish ham mumkin.
+    """
+
+    NAVBATDA = "navbatda"
+    ISHLANMOQDA = "ishlanmoqda"
+    TUGADI = "tugadi"
+    XATO = "xato"
+
+    @staticmethod
+    def _kalit(vazifa_id: str) -> str:
+        return f"{KeshKalitlari.EKSPORT}:vazifa:{vazifa_id}"
+
+    @classmethod
+    async def olish(cls, vazifa_id: str) -> Optional[Dict[str, Any]]:
+        """Vazifa holatini qaytaradi."""
+        return await redis_kesh.olish(cls._kalit(vazifa_id))
+
+    @classmethod
+    async def _saqlash(cls, vazifa: Dict[str, Any]) -> Dict[str, Any]:
+        vazifa["yangilangan_vaqt"] = datetime.utcnow().isoformat()
+        await redis_kesh.saqlash(cls._kalit(vazifa["vazifa_id"]), vazifa, EKSPORT_MUDDATI)
+        return vazifa
+
+    @classmethod
+    async def yangilash(cls, vazifa_id: str, **maydonlar) -> Optional[Dict[str, Any]]:
+        """Vazifa holatining berilgan maydonlarini yangilaydi."""
+        vazifa = await cls.olish(vazifa_id)
+        if vazifa is None:
+            return None
+        vazifa.update(maydonlar)
+        return await cls._saqlash(vazifa)
+
+    @classmethod
+    async def boshlash(
+        cls,
+        db: AsyncSession,
+        foydalanuvchi_id: UUID,
+        formati: str,
+        boshlangich_sana: datetime = None,
+        tugash_sana: datetime = None
+    ) -> Dict[str, Any]:
+        """
+        Eksport vazifasini yaratadi va Celery navbatiga qo'yadi.
+        O'zgarmagan hisobot uchun darhol tayyor (kesh) vazifa qaytariladi.
+        """
+        if formati not in FORMATLAR:
+            raise ValueError(f"Noma'lum format: {formati}")
+
+        kesh_kalit = await ExportServisi(db).kesh_kaliti(
+            foydalanuvchi_id, formati, boshlangich_sana, tugash_sana
+        )
+        meta = await redis_kesh.olish(_kesh_kaliti(kesh_kalit))
+
+        vazifa = {
+            "vazifa_id": str(uuid4()),
+            "foydalanuvchi_id": str(foydalanuvchi_id),
+            "format": formati,
+            "holat": cls.TUGADI if meta else cls.NAVBATDA,
+            "kesh": bool(meta),
+            "yaratilgan_vaqt": datetime.utcnow().isoformat()
+        }
+        if meta:
+            vazifa.update(meta)
+        else:
+            # Worker vazifani shu parametrlar bo'yicha Redisdan tiklaydi
+            vazifa.update({
+                "kesh_kalit": kesh_kalit,
+                "boshlangich_sana": boshlangich_sana.isoformat() if boshlangich_sana else None,
+                "tugash_sana": tugash_sana.isoformat() if tugash_sana else None
+            })
+        await cls._saqlash(vazifa)
+
+        if not meta:
+            from vositalar.tasks import eksport_vazifasi
+            eksport_vazifasi.delay(vazifa["vazifa_id"])
+
+        return vazifa
+
+    @classmethod
+    async def bajarish(cls, vazifa_id: str, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Hisobotni render qiladi va natijani vazifaga yozadi.
+        Celery worker jarayonida chaqiriladi.
+        """
+        from modellar.bildirishnoma import BildirishnomaTuri
+        from servislar.bildirishnoma_servisi import BildirishnomServisi
+
+        vazifa = await cls.olish(vazifa_id)
+        if vazifa is None:
+            return {"muvaffaqiyat": False, "xato": "Vazifa topilmadi"}
+        if vazifa["holat"] == cls.TUGADI:
+            return {"muvaffaqiyat": True, "sha256": vazifa.get("sha256")}
+
+        vazifa = await cls.yangilash(vazifa_id, holat=cls.ISHLANMOQDA)
+        foydalanuvchi_id = UUID(vazifa["foydalanuvchi_id"])
+
+        def _sana(qiymat: Optional[str]) -> Optional[datetime]:
+            return datetime.fromisoformat(qiymat) if qiymat else None
+
+        artefakt = await ExportServisi(db).hisobot_olish(
+            foydalanuvchi_id,
+            vazifa["format"],
+            _sana(vazifa.get("boshlangich_sana")),
+            _sana(vazifa.get("tugash_sana")),
+            kesh_kalit=vazifa["kesh_kalit"],
+            jarayonda=False
+        )
+        artefakt.pop("kontent", None)
+        await cls.yangilash(vazifa_id, holat=cls.TUGADI, **artefakt)
+
+        # Worker jarayonida WebSocket ulanishlari yo'q - bildirishnoma bazaga yoziladi
+        await BildirishnomServisi(db).yaratish(
+            foydalanuvchi_id,
+            BildirishnomaTuri.TIZIM,
+            sarlavha="Hisobot tayyor",
+            matn="Rivojlanish hisobotingiz yuklab olishga tayyor.",
+            havola=f"/export/vazifa/{vazifa_id}/yuklab-olish",
+            qoshimcha={"vazifa_id": vazifa_id}
+        )
+        return {"muvaffaqiyat": True, "sha256": artefakt["sha256"]}
+
+
+# ============== Oqimli urinishlar eksporti ==============
+
+def _urinishlar_sorovi(
+    foydalanuvchi_idlari: Optional[List[UUID]] = None,
+    muassasa: Optional[str] = None,
+    kurs_yili: Optional[int] = None,
+    boshlangich_sana: Optional[datetime] = None,
+    tugash_sana: Optional[datetime] = None
+):
+    """Urinishlar eksporti uchun SELECT (faqat kerakli ustunlar, ORM ob'ektlarsiz)."""
+    sorov = select(
+        HolatUrinishi.id,
+        HolatUrinishi.foydalanuvchi_id,
+        HolatUrinishi.holat_id,
+        Holat.bolim_id,
+        Holat.qiyinlik,
+        HolatUrinishi.tanlangan_javob,
+        HolatUrinishi.togri,
+        HolatUrinishi.sarflangan_vaqt,
+        HolatUrinishi.olingan_ball,
+        HolatUrinishi.boshlangan_vaqt,
+        HolatUrinishi.tugallangan_vaqt,
+        HolatUrinishi.yaratilgan_vaqt
+    ).join(Holat, HolatUrinishi.holat_id == Holat.id)
+
+    if foydalanuvchi_idlari:
+        sorov = sorov.where(HolatUrinishi.foydalanuvchi_id.in_(foydalanuvchi_idlari))
+    if muassasa or kurs_yili:
+        sorov = sorov.join(
+            FoydalanuvchiProfili,
+            FoydalanuvchiProfili.foydalanuvchi_id == HolatUrinishi.foydalanuvchi_id
+        )
+        if muassasa:
+            sorov = sorov.where(FoydalanuvchiProfili.muassasa == muassasa)
+        if kurs_yili:
+            sorov = sorov.where(FoydalanuvchiProfili.kurs_yili == kurs_yili)
+    if boshlangich_sana:
+        sorov = sorov.where(HolatUrinishi.yaratilgan_vaqt >= boshlangich_sana)
+    if tugash_sana:
+        sorov = sorov.where(HolatUrinishi.yaratilgan_vaqt <= tugash_sana)
+
+    return sorov.order_by(HolatUrinishi.yaratilgan_vaqt)
+
+
+def _qiymat(qiymat: Any) -> Any:
+    """Qatordagi qiymatni CSV/JSON uchun oddiy turga o'tkazadi."""
+    if qiymat is None or isinstance(qiymat, (bool, int, float, str)):
+        return qiymat
+    if isinstance(qiymat, datetime):
+        return qiymat.isoformat()
+    return getattr(qiymat, "value", None) or str(qiymat)
+
+
+async def urinishlar_oqimi(
+    formati: str = "csv",
+    siqish: bool = False,
+    **filtrlar
+) -> AsyncIterator[bytes]:
+    """
+    Urinishlar tarixini server-side cursor orqali o'qib, CSV yoki NDJSON
+    bloklarini ketma-ket qaytaradi. Xotira qatorlar soniga bog'liq emas.
+
+    Oqim javob yuborilayotganda o'qiladi, shuning uchun so'rov sessiyasi
+    emas, o'z sessiyasi ishlatiladi. Arxivlangan oylar xom qatorlari bu
+    oqimda yo'q - ular URINISH_ARXIV_PAPKASI dagi gzip CSV fayllarda.
+    """
+    from sozlamalar.malumotlar_bazasi import malumotlar_bazasi
+
+    siquvchi = zlib.compressobj(wbits=31) if siqish else None  # 31 - gzip formati
+
+    def _chiqarish(matn: str) -> bytes:
+        blok = matn.encode("utf-8")
+        return siquvchi.compress(blok) if siquvchi else blok
+
+    buffer = io.StringIO()
+    yozuvchi = csv.writer(buffer) if formati == "csv" else None
+    if yozuvchi:
+        yozuvchi.writerow(URINISH_USTUNLARI)
+
+    sorov = _urinishlar_sorovi(**filtrlar).execution_options(yield_per=OQIM_PARTIYA_HAJMI)
+    qatorlar_soni = 0
+
+    async with malumotlar_bazasi.sessiya() as db:
+        natija = await db.stream(sorov)
+        async for qator in natija:
+            qiymatlar = [_qiymat(q) for q in qator]
+            if yozuvchi:
+                yozuvchi.writerow(qiymatlar)
+            else:
+                buffer.write(json.dumps(dict(zip(URINISH_USTUNLARI, qiymatlar)), ensure_ascii=False))
+                buffer.write("\n")
+
+            qatorlar_soni += 1
+            if qatorlar_soni % OQIM_BLOK_QATORLARI == 0:
+                blok = _chiqarish(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if blok:
+                    yield blok
+
+    oxirgi = _chiqarish(buffer.getvalue())
+    if siquvchi:
+        oxirgi += siquvchi.flush()
+    if oxirgi:
+        yield oxirgi
@@ -1,11 +1,15 @@
 # MedCase Pro Platform - Gamifikatsiya Servisi
 # Nishonlar, ballar va reytinglar boshqaruvi
 
-from typing import Optional, List, Tuple
+from typing import Dict, NamedTuple, Optional, List, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, desc
-from datetime import datetime, date, timedelta
+from sqlalchemy import select, func, and_, desc, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, date, timedelta, timezone
+from bisect import bisect_right
+import logging
+import time
 
 from modellar.gamifikatsiya import (
     Nishon, FoydalanuvchiNishoni, Ball, Reyting,
@@ -14,6 +18,95 @@ from modellar.gamifikatsiya import (
 from modellar.rivojlanish import FoydalanuvchiRivojlanishi
 from modellar.foydalanuvchi import Foydalanuvchi
 
+logger = logging.getLogger(__name__)
+
+# Nishon qoidalari jarayon ichida keshlanadi (nishonlar kamdan-kam o'zgaradi)
+NISHON_KESH_MUDDATI = 300
+
+
+class NishonQoidasi(NamedTuple):
+    """Bitta nishon sharti - keshlanadigan yengil nusxa (ORM obyekti emas)."""
+    chegara: float
+    id: UUID
+    nom: str
+    ikonka_url: Optional[str]
+    ball_qiymati: int
+
+
+def nishon_hisoblagichlari(rivojlanish: FoydalanuvchiRivojlanishi) -> Dict[str, float]:
+    """Shart turi -> rivojlanishdagi joriy qiymat (vaqt soatda)."""
+    return {
+        "holatlar_soni": rivojlanish.jami_urinishlar or 0,
+        "togri_javoblar": rivojlanish.togri_javoblar or 0,
+        "streak": rivojlanish.joriy_streak or 0,
+        "aniqlik": rivojlanish.aniqlik_foizi or 0.0,
+        "daraja": rivojlanish.daraja or 1,
+        "ball": rivojlanish.jami_ball or 0,
+        "vaqt": (rivojlanish.jami_vaqt or 0) / 3600,
+    }
+
+
+class NishonQoidalari:
+    """
+    Nishonlar shart turi bo'yicha indekslangan, har bir tur ichida chegara
+    bo'yicha saralangan. Hisoblagich oldingi -> yangi qiymatga o'zgarganda
+    faqat shu oraliqdagi chegaralar bisect bilan topiladi.
+    """
+
+    def __init__(self, nishonlar: List[Nishon]):
+        turlar: Dict[str, List[NishonQoidasi]] = {}
+        for nishon in nishonlar:
+            shartlar = nishon.ochish_shartlari or {}
+            turi = shartlar.get("turi")
+            if not turi:
+                continue
+            turlar.setdefault(turi, []).append(NishonQoidasi(
+                float(shartlar.get("qiymat", 0)),
+                nishon.id,
+                nishon.nom,
+                nishon.ikonka_url,
+                nishon.ball_qiymati
+            ))
+        self._qoidalar = {turi: sorted(q) for turi, q in turlar.items()}
+        self._chegaralar = {
+            turi: [q.chegara for q in qoidalar] for turi, qoidalar in self._qoidalar.items()
+        }
+        self.yuklangan = time.monotonic()
+
+    def nomzodlar(self, ozgarishlar: Dict[str, Tuple[float, float]]) -> List[NishonQoidasi]:
+        """oldingi < chegara <= yangi bo'lgan nishonlar."""
+        natija = []
+        for turi, (oldingi, yangi) in ozgarishlar.items():
+            if yangi <= oldingi or turi not in self._chegaralar:
+                continue
+            chegaralar = self._chegaralar[turi]
+            natija.extend(
+                self._qoidalar[turi][bisect_right(chegaralar, oldingi):bisect_right(chegaralar, yangi)]
+            )
+        return natija
+
+
+_nishon_qoidalari: Optional[NishonQoidalari] = None
+
+
+async def nishon_qoidalari(db: AsyncSession) -> NishonQoidalari:
+    """Keshlangan qoidalar indeksi; muddati o'tgan bo'lsa qayta yuklanadi."""
+    global _nishon_qoidalari
+    if (
+        _nishon_qoidalari is None
+        or time.monotonic() - _nishon_qoidalari.yuklangan > NISHON_KESH_MUDDATI
+    ):
+        natija = await db.execute(select(Nishon).where(Nishon.faol == True))
+        _nishon_qoidalari = NishonQoidalari(natija.scalars().all())
+        logger.debug("Nishon qoidalari yuklandi")
+    return _nishon_qoidalari
+
+
+def nishon_keshini_tozalash() -> None:
+    """Nishonlar o'zgarganda qoidalar keshini bekor qiladi."""
+    global _nishon_qoidalari
+    _nishon_qoidalari = None
+
 
 class GamifikatsiyaServisi:
     """Gamifikatsiya servisi."""
@@ -42,89 +135,106 @@ class GamifikatsiyaServisi:
     
     async def nishon_tekshirish_va_berish(
         self,
-        foydalanuvchi_id: UUID
-    ) -> List[Nishon]:
-        """Foydalanuvchi yangi nishonlarga ega bo'lishi mumkinligini tekshiradi."""
-        yangi_nishonlar = []
-        
-        # Rivojlanishni olish
-        riv_sorov = select(FoydalanuvchiRivojlanishi).where(
-            FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id
+        foydalanuvchi_id: UUID,
+        ozgarishlar: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> List[NishonQoidasi]:
+        """
+        Foydalanuvchi yangi nishonlarga ega bo'lishi mumkinligini tekshiradi.
+        ozgarishlar: shart turi -> (oldingi, yangi) qiymat; faqat shu oraliqda
+        kesib o'tilgan chegaralar tekshiriladi. Berilmasa joriy qiymatlar bo'yicha
+        to'liq tekshiruv (qayta tiklash uchun).
+        """
+        qoidalar = await nishon_qoidalari(self.db)
+
+        if ozgarishlar is None:
+            riv_natija = await self.db.execute(
+                select(FoydalanuvchiRivojlanishi).where(
+                    FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id
+                )
+            )
+            rivojlanish = riv_natija.scalar_one_or_none()
+            if not rivojlanish:
+                return []
+            ozgarishlar = {
+                turi: (float("-inf"), qiymat)
+                for turi, qiymat in nishon_hisoblagichlari(rivojlanish).items()
+            }
+
+        nomzodlar = qoidalar.nomzodlar(ozgarishlar)
+        if not nomzodlar:
+            return []
+
+        yangi_nishonlar = await self._nishonlar_berish(foydalanuvchi_id, nomzodlar)
+
+        # Nishon ballari "ball" shartli nishonlar chegarasini kesib o'tishi mumkin
+        oldingi_ball = ozgarishlar.get("ball", (0, 0))[1]
+        qoshilgan = sum(n.ball_qiymati for n in yangi_nishonlar)
+        while qoshilgan:
+            nomzodlar = qoidalar.nomzodlar(
+                {"ball": (oldingi_ball, oldingi_ball + qoshilgan)}
+            )
+            oldingi_ball += qoshilgan
+            qoshimcha = await self._nishonlar_berish(foydalanuvchi_id, nomzodlar) if nomzodlar else []
+            yangi_nishonlar.extend(qoshimcha)
+            qoshilgan = sum(n.ball_qiymati for n in qoshimcha)
+
+        return yangi_nishonlar
+
+    async def _nishonlar_berish(
+        self,
+        foydalanuvchi_id: UUID,
+        nomzodlar: List[NishonQoidasi]
+    ) -> List[NishonQoidasi]:
+        """
+        Nomzod nishonlarni bitta INSERT ... ON CONFLICT DO NOTHING bilan beradi
+        (mavjudlari unique indeks bo'yicha tushib qoladi), so'ng ballar va
+        hisoblagichlar bitta so'rovdan yangilanadi.
+        """
+        hozir = datetime.now(timezone.utc)
+        natija = await self.db.execute(
+            pg_insert(FoydalanuvchiNishoni).values([
+                {
+                    "foydalanuvchi_id": foydalanuvchi_id,
+                    "nishon_id": nishon.id,
+                    "qolga_kiritilgan_vaqt": hozir,
+                    "profilda_korsatish": True
+                }
+                for nishon in nomzodlar
+            ]).on_conflict_do_nothing(
+                index_elements=["foydalanuvchi_id", "nishon_id"]
+            ).returning(FoydalanuvchiNishoni.nishon_id)
         )
-        riv_natija = await self.db.execute(riv_sorov)
-        rivojlanish = riv_natija.scalar_one_or_none()
-        
-        if not rivojlanish:
+        berilgan_idlar = set(natija.scalars().all())
+        if not berilgan_idlar:
             return []
-        
-        # Mavjud nishonlar
-        mavjud_sorov = select(FoydalanuvchiNishoni.nishon_id).where(
-            FoydalanuvchiNishoni.foydalanuvchi_id == foydalanuvchi_id
+
+        yangi_nishonlar = [n for n in nomzodlar if n.id in berilgan_idlar]
+
+        await self.db.execute(insert(Ball), [
+            {
+                "foydalanuvchi_id": foydalanuvchi_id,
+                "miqdor": nishon.ball_qiymati,
+                "sabab": "nishon",
+                "tavsif": f"Nishon: {nishon.nom}",
+                "nishon_id": nishon.id
+            }
+            for nishon in yangi_nishonlar
+        ])
+        await self.db.execute(
+            update(FoydalanuvchiRivojlanishi).where(
+                FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id
+            ).values(
+                jami_ball=FoydalanuvchiRivojlanishi.jami_ball
+                + sum(n.ball_qiymati for n in yangi_nishonlar)
+            )
+        )
+        await self.db.execute(
+            update(Nishon).where(Nishon.id.in_(berilgan_idlar)).values(
+                ega_bolganlar_soni=Nishon.ega_bolganlar_soni + 1
+            ).execution_options(synchronize_session=False)
         )
-        mavjud_natija = await self.db.execute(mavjud_sorov)
-        mavjud_idlar = set(mavjud_natija.scalars().all())
-        
-        # Barcha nishonlarni tekshirish
-        nishonlar = await self.nishonlar_olish()
-        
-        for nishon in nishonlar:
-            if nishon.id in mavjud_idlar:
-                continue
-            
-            # Shartlarni tekshirish
-            if await self._shartlar_bajarilgan(rivojlanish, nishon):
-                # Nishon berish
-                foyd_nishon = FoydalanuvchiNishoni(
-                    foydalanuvchi_id=foydalanuvchi_id,
-                    nishon_id=nishon.id,
-                    qolga_kiritilgan_vaqt=datetime.utcnow()
-                )
-                self.db.add(foyd_nishon)
-                
-                # Ball berish
-                await self.ball_qoshish(
-                    foydalanuvchi_id,
-                    nishon.ball_qiymati,
-                    "nishon",
-                    f"Nishon: {nishon.nom}",
-                    nishon_id=nishon.id
-                )
-                
-                # Nishon statistikasini yangilash
-                nishon.ega_bolganlar_soni += 1
-                
-                yangi_nishonlar.append(nishon)
-        
-        await self.db.flush()
         return yangi_nishonlar
     
-    async def _shartlar_bajarilgan(
-        self,
-        rivojlanish: FoydalanuvchiRivojlanishi,
-        nishon: Nishon
-    ) -> bool:
-        """Nishon shartlari bajarilganligini tekshiradi."""
-        shartlar = nishon.ochish_shartlari
-        shart_turi = shartlar.get("turi")
-        qiymat = shartlar.get("qiymat", 0)
-        
-        if shart_turi == "holatlar_soni":
-            return rivojlanish.jami_urinishlar >= qiymat
-        elif shart_turi == "togri_javoblar":
-            return rivojlanish.togri_javoblar >= qiymat
-        elif shart_turi == "streak":
-            return rivojlanish.joriy_streak >= qiymat
-        elif shart_turi == "aniqlik":
-            return rivojlanish.aniqlik_foizi >= qiymat
-        elif shart_turi == "daraja":
-            return rivojlanish.daraja >= qiymat
-        elif shart_turi == "ball":
-            return rivojlanish.jami_ball >= qiymat
-        elif shart_turi == "vaqt":
-            return rivojlanish.jami_vaqt >= qiymat * 3600  # soatda
-        
-        return False
-    
     # ============== Ballar ==============
     
     async def ball_qoshish(
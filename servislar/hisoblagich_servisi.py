@@ -0,0 +1,266 @@
+# MedCase Pro Platform - Kategoriya Hisoblagichlari Servisi
+# Bo'lim -> kichik -> asosiy kategoriya holatlar sonini delta bilan yuritish
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+import logging
+
+from modellar.holat import Holat, QiyinlikDarajasi
+
+logger = logging.getLogger(__name__)
+
+# Holatning hisoblagichlarga qo'shadigan hissasi: (bo'lim ID, qiyinlik)
+Hissa = Tuple[UUID, QiyinlikDarajasi]
+
+# Bitta bo'lim uchun deltani daraxt bo'ylab yuqoriga bitta so'rovda qo'llash.
+# Ota tugunlar faqat bola tugun faol bo'lsa yangilanadi (qayta hisoblash bilan bir xil ma'no).
+_DELTA_SOROVI = text("""
+    WITH b AS (
+        UPDATE bolimlar SET
+            holatlar_soni = holatlar_soni + :jami,
+            oson_holatlar = oson_holatlar + :oson,
+            ortacha_holatlar = ortacha_holatlar + :ortacha,
+            qiyin_holatlar = qiyin_holatlar + :qiyin
+        WHERE id = :bolim_id
+        RETURNING kichik_kategoriya_id, faol
+    ), k AS (
+        UPDATE kichik_kategoriyalar SET holatlar_soni = holatlar_soni + :jami
+        FROM b
+        WHERE kichik_kategoriyalar.id = b.kichik_kategoriya_id AND b.faol = true
+        RETURNING kichik_kategoriyalar.asosiy_kategoriya_id, kichik_kategoriyalar.faol
+    )
+    UPDATE asosiy_kategoriyalar SET holatlar_soni = holatlar_soni + :jami
+    FROM k
+    WHERE asosiy_kategoriyalar.id = k.asosiy_kategoriya_id AND k.faol = true
+""")
+
+# Bo'lim faolligi yoki kichik kategoriyasi o'zgarganda: kichik kategoriya va
+# (u faol bo'lsa) asosiy kategoriyaga bo'lim holatlar sonini qo'shish/ayirish
+_KICHIK_DELTA_SOROVI = text("""
+    WITH k AS (
+        UPDATE kichik_kategoriyalar SET holatlar_soni = holatlar_soni + :jami
+        WHERE id = :kichik_id
+        RETURNING asosiy_kategoriya_id, faol
+    )
+    UPDATE asosiy_kategoriyalar SET holatlar_soni = holatlar_soni + :jami
+    FROM k
+    WHERE asosiy_kategoriyalar.id = k.asosiy_kategoriya_id AND k.faol = true
+""")
+
+_ASOSIY_DELTA_SOROVI = text("""
+    UPDATE asosiy_kategoriyalar SET holatlar_soni = holatlar_soni + :jami
+    WHERE id = :asosiy_id
+""")
+
+# Saqlangan va haqiqiy qiymatlarni solishtirish
+_BOLIM_NOMUVOFIQLIK = text("""
+    SELECT b.id, b.holatlar_soni, b.oson_holatlar, b.ortacha_holatlar, b.qiyin_holatlar,
+           COALESCE(h.jami, 0), COALESCE(h.oson, 0), COALESCE(h.ortacha, 0), COALESCE(h.qiyin, 0)
+    FROM bolimlar b
+    LEFT JOIN (
+        SELECT bolim_id,
+               COUNT(*) AS jami,
+               COUNT(*) FILTER (WHERE lower(qiyinlik::text) = 'oson') AS oson,
+               COUNT(*) FILTER (WHERE lower(qiyinlik::text) = 'ortacha') AS ortacha,
+               COUNT(*) FILTER (WHERE lower(qiyinlik::text) = 'qiyin') AS qiyin
+        FROM holatlar
+        WHERE faol = true AND chop_etilgan = true
+        GROUP BY bolim_id
+    ) h ON h.bolim_id = b.id
+    WHERE b.holatlar_soni <> COALESCE(h.jami, 0)
+       OR b.oson_holatlar <> COALESCE(h.oson, 0)
+       OR b.ortacha_holatlar <> COALESCE(h.ortacha, 0)
+       OR b.qiyin_holatlar <> COALESCE(h.qiyin, 0)
+""")
+
+_KICHIK_NOMUVOFIQLIK = text("""
+    SELECT k.id, k.holatlar_soni, COALESCE(s.jami, 0)
+    FROM kichik_kategoriyalar k
+    LEFT JOIN (
+        SELECT kichik_kategoriya_id, SUM(holatlar_soni) AS jami
+        FROM bolimlar WHERE faol = true
+        GROUP BY kichik_kategoriya_id
+    ) s ON s.kichik_kategoriya_id = k.id
+    WHERE k.holatlar_soni <> COALESCE(s.jami, 0)
+""")
+
+_ASOSIY_NOMUVOFIQLIK = text("""
+    SELECT a.id, a.holatlar_soni, COALESCE(s.jami, 0)
+    FROM asosiy_kategoriyalar a
+    LEFT JOIN (
+        SELECT asosiy_kategoriya_id, SUM(holatlar_soni) AS jami
+        FROM kichik_kategoriyalar WHERE faol = true
+        GROUP BY asosiy_kategoriya_id
+    ) s ON s.asosiy_kategoriya_id = a.id
+    WHERE a.holatlar_soni <> COALESCE(s.jami, 0)
+""")
+
+
+class HisoblagichServisi:
+    """
+    Kategoriya daraxti hisoblagichlari servisi.
+    Holat yaratilganda, chop etilganda, o'chirilganda, ko'chirilganda va
+    import qilinganda faqat ta'sirlangan tugunlarga delta qo'llaydi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def hissa(
+        bolim_id: Optional[UUID],
+        qiyinlik: Optional[QiyinlikDarajasi],
+        faol: bool,
+        chop_etilgan: bool
+    ) -> Optional[Hissa]:
+        """Holat hisoblagichlarga kiradimi - faqat faol va chop etilganlar sanaladi."""
+        if not (bolim_id and faol and chop_etilgan):
+            return None
+        return (bolim_id, qiyinlik or QiyinlikDarajasi.ORTACHA)
+
+    @classmethod
+    def holat_hissasi(cls, holat: Holat) -> Optional[Hissa]:
+        """Holat ob'ektining hissasini qaytaradi."""
+        return cls.hissa(holat.bolim_id, holat.qiyinlik, holat.faol, holat.chop_etilgan)
+
+    async def hissa_olish(self, holat_id: UUID) -> Optional[Hissa]:
+        """Bazadagi holatning joriy hissasini oladi (o'zgartirishdan oldin)."""
+        natija = await self.db.execute(
+            select(Holat.bolim_id, Holat.qiyinlik, Holat.faol, Holat.chop_etilgan)
+            .where(Holat.id == holat_id)
+        )
+        qator = natija.one_or_none()
+        if not qator:
+            return None
+        return self.hissa(*qator)
+
+    async def qollash(
+        self,
+        qoshilgan: Iterable[Hissa] = (),
+        ayirilgan: Iterable[Hissa] = ()
+    ) -> None:
+        """Hissalarni bo'lim bo'yicha yig'ib, har bir bo'lim uchun bitta delta qo'llaydi."""
+        deltalar: Dict[UUID, Dict[str, int]] = {}
+
+        for belgi, hissalar in ((1, qoshilgan), (-1, ayirilgan)):
+            for bolim_id, qiyinlik in hissalar:
+                delta = deltalar.setdefault(
+                    bolim_id, {"jami": 0, "oson": 0, "ortacha": 0, "qiyin": 0}
+                )
+                delta["jami"] += belgi
+                kalit = qiyinlik.value if isinstance(qiyinlik, QiyinlikDarajasi) else str(qiyinlik)
+                if kalit in delta:
+                    delta[kalit] += belgi
+
+        parametrlar = [
+            {"bolim_id": bolim_id, **delta}
+            for bolim_id, delta in deltalar.items()
+            if any(delta.values())
+        ]
+        if parametrlar:
+            await self.db.execute(_DELTA_SOROVI, parametrlar)
+
+    async def ozgarishni_qollash(
+        self,
+        eski: Optional[Hissa],
+        yangi: Optional[Hissa]
+    ) -> None:
+        """Bitta holat o'zgarishi (chop etish, o'chirish, ko'chirish) deltasini qo'llaydi."""
+        if eski == yangi:
+            return
+        await self.qollash(
+            qoshilgan=[yangi] if yangi else [],
+            ayirilgan=[eski] if eski else []
+        )
+
+    @staticmethod
+    def _kochish_parametrlari(
+        kalit: str,
+        soni: int,
+        eski: Optional[UUID],
+        yangi: Optional[UUID]
+    ) -> List[dict]:
+        if eski == yangi or not soni:
+            return []
+        parametrlar = []
+        if eski:
+            parametrlar.append({kalit: eski, "jami": -soni})
+        if yangi:
+            parametrlar.append({kalit: yangi, "jami": soni})
+        return parametrlar
+
+    async def bolim_kochishi(
+        self,
+        soni: int,
+        eski: Optional[UUID],
+        yangi: Optional[UUID]
+    ) -> None:
+        """
+        Bo'lim faolsizlantirilganda, faollashtirilganda yoki boshqa kichik
+        kategoriyaga ko'chirilganda uning holatlar sonini ota zanjirlar orasida
+        ko'chiradi. eski/yangi - bo'lim faol bo'lsa kichik kategoriya ID, aks holda None.
+        """
+        parametrlar = self._kochish_parametrlari("kichik_id", soni, eski, yangi)
+        if parametrlar:
+            await self.db.execute(_KICHIK_DELTA_SOROVI, parametrlar)
+
+    async def kichik_kochishi(
+        self,
+        soni: int,
+        eski: Optional[UUID],
+        yangi: Optional[UUID]
+    ) -> None:
+        """Kichik kategoriya uchun xuddi shunday - eski/yangi faol bo'lsa asosiy kategoriya ID."""
+        parametrlar = self._kochish_parametrlari("asosiy_id", soni, eski, yangi)
+        if parametrlar:
+            await self.db.execute(_ASOSIY_DELTA_SOROVI, parametrlar)
+
+    async def nomuvofiqliklarni_aniqlash(self, tuzatish: bool = False) -> Dict[str, List[dict]]:
+        """
+        Saqlangan hisoblagichlarni haqiqiy qiymatlar bilan solishtiradi.
+        tuzatish=True bo'lsa faqat farq qilgan tugunlar qayta yoziladi
+        (bo'limlar avval, keyin ota tugunlar - yig'indilar to'g'ri chiqishi uchun).
+        """
+        hisobot: Dict[str, List[dict]] = {"bolimlar": [], "kichik_kategoriyalar": [], "asosiy_kategoriyalar": []}
+
+        natija = await self.db.execute(_BOLIM_NOMUVOFIQLIK)
+        for qator in natija.all():
+            hisobot["bolimlar"].append({
+                "id": str(qator[0]),
+                "saqlangan": list(qator[1:5]),
+                "haqiqiy": list(qator[5:9])
+            })
+            if tuzatish:
+                await self.db.execute(
+                    text("""
+                        UPDATE bolimlar SET holatlar_soni = :jami, oson_holatlar = :oson,
+                            ortacha_holatlar = :ortacha, qiyin_holatlar = :qiyin
+                        WHERE id = :id
+                    """),
+                    {"id": qator[0], "jami": qator[5], "oson": qator[6], "ortacha": qator[7], "qiyin": qator[8]}
+                )
+
+        for kalit, sorov, jadval in (
+            ("kichik_kategoriyalar", _KICHIK_NOMUVOFIQLIK, "kichik_kategoriyalar"),
+            ("asosiy_kategoriyalar", _ASOSIY_NOMUVOFIQLIK, "asosiy_kategoriyalar"),
+        ):
+            natija = await self.db.execute(sorov)
+            for tugun_id, saqlangan, haqiqiy in natija.all():
+                hisobot[kalit].append({
+                    "id": str(tugun_id),
+                    "saqlangan": saqlangan,
+                    "haqiqiy": int(haqiqiy)
+                })
+                if tuzatish:
+                    await self.db.execute(
+                        text(f"UPDATE {jadval} SET holatlar_soni = :jami WHERE id = :id"),
+                        {"id": tugun_id, "jami": int(haqiqiy)}
+                    )
+
+        jami = sum(len(v) for v in hisobot.values())
+        if jami:
+            logger.warning(f"Kategoriya hisoblagichlarida {jami} ta nomuvofiqlik topildi")
+
+        return hisobot
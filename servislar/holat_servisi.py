@@ -1,23 +1,33 @@
 # MedCase Pro Platform - Holat Servisi
 # Klinik holatlar boshqaruvi
 
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, update
-from sqlalchemy.orm import selectinload, joinedload, load_only
+from sqlalchemy import select, func, and_, or_, update, union
+from sqlalchemy.orm import selectinload, joinedload
 
 from servislar.asosiy_servis import AsosiyServis
 from modellar.holat import (
     Holat, HolatVarianti, HolatMedia, HolatTegi,
     HolatTuri, QiyinlikDarajasi, MediaTuri
 )
-from modellar.rivojlanish import HolatUrinishi
+from modellar.rivojlanish import HolatUrinishi, ArxivlanganYechim
 from sxemalar.holat import (
     HolatYaratish, HolatYangilash, HolatQidirish,
-    VariantYaratish, MediaYaratish
+    VariantYaratish, MediaYaratish, HolatJavob, HolatToliqJavob
 )
 from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+from servislar.hisoblagich_servisi import HisoblagichServisi
+from servislar.kunlik_holat_servisi import KunlikHolatServisi
+
+# Kontent (holat_id, versiya) bo'yicha o'zgarmas; muddat faqat statistika
+# maydonlari (urinishlar soni, kategoriya nomlari) yangilanib turishi uchun
+KONTENT_KESH_MUDDATI = 3600
+
+
+def _kontent_kaliti(holat_id: UUID, versiya: int, toliq: bool) -> str:
+    return f"{KeshKalitlari.HOLAT_KONTENT}:{holat_id}:{versiya}:{'toliq' if toliq else 'savol'}"
 
 
 class HolatServisi:
@@ -26,6 +36,7 @@ class HolatServisi:
     def __init__(self, db: AsyncSession):
         self.db = db
         self._holat = AsosiyServis(Holat, db)
+        self._hisoblagich = HisoblagichServisi(db)
     
     async def yaratish(self, malumot: HolatYaratish) -> Holat:
         """Yangi holat yaratadi."""
@@ -63,6 +74,11 @@ class HolatServisi:
         await self.db.flush()
         await self.db.refresh(holat)
         
+        # Kategoriya hisoblagichlari (faqat chop etilgan bo'lsa)
+        hissa = self._hisoblagich.holat_hissasi(holat)
+        if hissa:
+            await self._hisoblagich.qollash(qoshilgan=[hissa])
+        
         # Keshni tozalash
         await redis_kesh.shablon_ochirish(f"{KeshKalitlari.HOLAT}:*")
         
@@ -93,54 +109,114 @@ class HolatServisi:
         
         return holat
     
+    # ============== Kontent keshi ==============
+    
+    async def kontent_holati(self, holat_id: UUID) -> Optional[Tuple[int, bool]]:
+        """(kontent versiyasi, chop etilganmi) - PK bo'yicha bitta yengil so'rov."""
+        natija = await self.db.execute(
+            select(Holat.kontent_versiyasi, Holat.chop_etilgan).where(Holat.id == holat_id)
+        )
+        qator = natija.one_or_none()
+        return tuple(qator) if qator else None
+    
+    async def korinishlar(
+        self,
+        versiyalar: Dict[UUID, int],
+        toliq: bool = False
+    ) -> Dict[UUID, bytes]:
+        """
+        Holatlarning tayyor JSON baytlari (savol yoki to'liq javobli ko'rinish).
+        Kesh (holat_id, versiya) bo'yicha bitta MGET bilan o'qiladi; yo'qlari
+        bitta so'rovda yuklanib ikkala ko'rinish ham render qilinadi.
+        """
+        kalitlar = {
+            holat_id: _kontent_kaliti(holat_id, versiya, toliq)
+            for holat_id, versiya in versiyalar.items()
+        }
+        qiymatlar = await redis_kesh.xom_kop_olish(list(kalitlar.values()))
+        
+        tayyor: Dict[UUID, bytes] = {}
+        yoqlar = []
+        for holat_id, qiymat in zip(kalitlar, qiymatlar):
+            if qiymat is None:
+                yoqlar.append(holat_id)
+            else:
+                tayyor[holat_id] = qiymat.encode()
+        
+        if yoqlar:
+            yozish = {}
+            for holat in await self._kontent_yuklash(yoqlar):
+                savol = HolatJavob.model_validate(holat).model_dump_json()
+                toliq_json = HolatToliqJavob.model_validate(holat).model_dump_json()
+                yozish[_kontent_kaliti(holat.id, holat.kontent_versiyasi, False)] = savol
+                yozish[_kontent_kaliti(holat.id, holat.kontent_versiyasi, True)] = toliq_json
+                tayyor[holat.id] = (toliq_json if toliq else savol).encode()
+            await redis_kesh.xom_kop_saqlash(yozish, KONTENT_KESH_MUDDATI)
+        
+        return tayyor
+    
+    async def _kontent_yuklash(self, holat_idlar: List[UUID]) -> List[Holat]:
+        """Render uchun holatlarni barcha bog'lanishlari bilan bitta so'rovda yuklaydi."""
+        from modellar.kategoriya import Bolim, KichikKategoriya
+        natija = await self.db.execute(
+            select(Holat).where(Holat.id.in_(holat_idlar)).options(
+                selectinload(Holat.variantlar),
+                selectinload(Holat.media),
+                selectinload(Holat.teglar),
+                joinedload(Holat.bolim).joinedload(
+                    Bolim.kichik_kategoriya
+                ).joinedload(
+                    KichikKategoriya.asosiy_kategoriya
+                )
+            )
+        )
+        holatlar = natija.scalars().unique().all()
+        for holat in holatlar:
+            if holat.bolim:
+                holat.bolim_nomi = holat.bolim.nomi
+                if holat.bolim.kichik_kategoriya:
+                    holat.kichik_kategoriya_nomi = holat.bolim.kichik_kategoriya.nomi
+                    if holat.bolim.kichik_kategoriya.asosiy_kategoriya:
+                        holat.asosiy_kategoriya_nomi = holat.bolim.kichik_kategoriya.asosiy_kategoriya.nomi
+        return holatlar
+    
+    async def _tartibli_korinishlar(self, sorov) -> List[bytes]:
+        """(id, versiya) so'rovi natijasini o'sha tartibda tayyor baytlarga aylantiradi."""
+        qatorlar = (await self.db.execute(sorov)).all()
+        tayyor = await self.korinishlar({holat_id: versiya for holat_id, versiya in qatorlar})
+        return [tayyor[holat_id] for holat_id, _ in qatorlar if holat_id in tayyor]
+    
+    async def versiyani_oshirish(self, holat_id: UUID) -> None:
+        """Kontent versiyasini oshiradi - eski kesh yozuvlari o'z-o'zidan eskiradi."""
+        await self.db.execute(
+            update(Holat).where(Holat.id == holat_id).values(
+                kontent_versiyasi=Holat.kontent_versiyasi + 1
+            )
+        )
+    
     async def yangilash(
         self,
         id: UUID,
         malumot: HolatYangilash
     ) -> Optional[Holat]:
         """Holatni yangilaydi."""
+        eski_hissa = await self._hisoblagich.hissa_olish(id)
         holat = await self._holat.yangilash(
             id,
             **malumot.model_dump(exclude_unset=True)
         )
+        if holat:
+            await self.versiyani_oshirish(id)
+            # Chop etish, faolsizlantirish yoki ko'chirish deltasi
+            await self._hisoblagich.ozgarishni_qollash(
+                eski_hissa, self._hisoblagich.holat_hissasi(holat)
+            )
+            KunlikHolatServisi(self.db).holat_ozgardi(id)
         await redis_kesh.shablon_ochirish(f"{KeshKalitlari.HOLAT}:*")
         return holat
     
-    async def qidirish(
-        self,
-        malumot: HolatQidirish,
-        foydalanuvchi_id: UUID = None
-    ) -> Tuple[List[Holat], int]:
-        """Holatlarni qidiradi va filtrlay."""
-        from modellar.kategoriya import Bolim, KichikKategoriya, AsosiyKategoriya
-        
-        # Optimallashtirish: joinedload va load_only ishlatish
-        sorov = select(Holat).options(
-            selectinload(Holat.variantlar).load_only(
-                HolatVarianti.id, HolatVarianti.belgi, 
-                HolatVarianti.matn, HolatVarianti.togri,
-                HolatVarianti.holat_id, HolatVarianti.tushuntirish
-            ),
-            selectinload(Holat.media).load_only(
-                HolatMedia.id, HolatMedia.holat_id, HolatMedia.turi,
-                HolatMedia.url, HolatMedia.nom, HolatMedia.tavsif,
-                HolatMedia.tartib, HolatMedia.cloudinary_id,
-                HolatMedia.fayl_hajmi, HolatMedia.kenglik,
-                HolatMedia.balandlik, HolatMedia.davomiylik
-            ),
-            selectinload(Holat.teglar).load_only(
-                HolatTegi.id, HolatTegi.nom, HolatTegi.slug, HolatTegi.rang
-            ),
-            joinedload(Holat.bolim).load_only(
-                Bolim.id, Bolim.nomi
-            ).joinedload(Bolim.kichik_kategoriya).load_only(
-                KichikKategoriya.id, KichikKategoriya.nomi
-            ).joinedload(KichikKategoriya.asosiy_kategoriya).load_only(
-                AsosiyKategoriya.id, AsosiyKategoriya.nomi
-            )
-        )
-        hisob_sorov = select(func.count(Holat.id))
-        
+    def _qidiruv_filtrlari(self, malumot: HolatQidirish, foydalanuvchi_id: UUID = None) -> list:
+        """Qidiruv filtrlari (ro'yxat so'rovi va sahifa hisobi uchun umumiy)."""
         # Filtrlar
         filtrlar = [Holat.faol == True]
         
@@ -170,78 +246,56 @@ class HolatServisi:
         
         # Foydalanuvchi yechgan/yechmagan
         if foydalanuvchi_id and malumot.yechilgan is not None:
-            yechilgan_subsorov = select(HolatUrinishi.holat_id).where(
-                HolatUrinishi.foydalanuvchi_id == foydalanuvchi_id
-            ).distinct()
+            # Arxivlangan oylardagi yechimlar alohida jadvalda saqlanadi
+            yechilgan_subsorov = union(
+                select(HolatUrinishi.holat_id).where(
+                    HolatUrinishi.foydalanuvchi_id == foydalanuvchi_id
+                ),
+                select(ArxivlanganYechim.holat_id).where(
+                    ArxivlanganYechim.foydalanuvchi_id == foydalanuvchi_id
+                )
+            )
             
             if malumot.yechilgan:
                 filtrlar.append(Holat.id.in_(yechilgan_subsorov))
             else:
                 filtrlar.append(Holat.id.notin_(yechilgan_subsorov))
         
-        sorov = sorov.where(and_(*filtrlar))
-        hisob_sorov = hisob_sorov.where(and_(*filtrlar))
-        
-        # Saralash
+        return filtrlar
+    
+    async def qidirish_korinishlar(
+        self,
+        malumot: HolatQidirish,
+        foydalanuvchi_id: UUID = None
+    ) -> Tuple[List[bytes], int]:
+        """Holatlarni qidiradi va filtrlaydi: faqat (id, versiya) o'qiladi - kontent keshdan."""
+        filtrlar = self._qidiruv_filtrlari(malumot, foydalanuvchi_id)
         saralash_maydoni = getattr(Holat, malumot.saralash, Holat.yaratilgan_vaqt)
-        if malumot.tartib == "desc":
-            sorov = sorov.order_by(saralash_maydoni.desc())
-        else:
-            sorov = sorov.order_by(saralash_maydoni.asc())
-        
-        # Sahifalash
-        offset = (malumot.sahifa - 1) * malumot.hajm
-        sorov = sorov.offset(offset).limit(malumot.hajm)
-        
-        natija = await self.db.execute(sorov)
-        jami = await self.db.execute(hisob_sorov)
-        
-        holatlar = natija.scalars().all()
-        # Kategoriya nomlarini qo'shish
-        for holat in holatlar:
-            if holat.bolim:
-                holat.bolim_nomi = holat.bolim.nomi
-                if holat.bolim.kichik_kategoriya:
-                    holat.kichik_kategoriya_nomi = holat.bolim.kichik_kategoriya.nomi
-                    if holat.bolim.kichik_kategoriya.asosiy_kategoriya:
-                        holat.asosiy_kategoriya_nomi = holat.bolim.kichik_kategoriya.asosiy_kategoriya.nomi
+        sorov = select(Holat.id, Holat.kontent_versiyasi).where(and_(*filtrlar)).order_by(
+            saralash_maydoni.desc() if malumot.tartib == "desc" else saralash_maydoni.asc()
+        ).offset((malumot.sahifa - 1) * malumot.hajm).limit(malumot.hajm)
         
-        return holatlar, jami.scalar()
+        jami = await self.db.execute(select(func.count(Holat.id)).where(and_(*filtrlar)))
+        return await self._tartibli_korinishlar(sorov), jami.scalar()
     
-    async def bolim_boyicha(
+    async def bolim_korinishlar(
         self,
         bolim_id: UUID,
         sahifa: int = 1,
         hajm: int = 20
-    ) -> Tuple[List[Holat], int]:
-        """Bo'lim bo'yicha holatlarni oladi."""
-        sorov = select(Holat).where(
-            and_(
-                Holat.bolim_id == bolim_id,
-                Holat.faol == True,
-                Holat.chop_etilgan == True
-            )
-        ).options(
-            selectinload(Holat.variantlar),
-            selectinload(Holat.media),
-            selectinload(Holat.teglar)
-        ).order_by(Holat.yaratilgan_vaqt.desc())
-        
-        hisob_sorov = select(func.count(Holat.id)).where(
-            and_(
-                Holat.bolim_id == bolim_id,
-                Holat.faol == True,
-                Holat.chop_etilgan == True
-            )
+    ) -> Tuple[List[bytes], int]:
+        """Bo'lim bo'yicha holatlar, kontent keshdan."""
+        shart = and_(
+            Holat.bolim_id == bolim_id,
+            Holat.faol == True,
+            Holat.chop_etilgan == True
         )
+        sorov = select(Holat.id, Holat.kontent_versiyasi).where(shart).order_by(
+            Holat.yaratilgan_vaqt.desc()
+        ).offset((sahifa - 1) * hajm).limit(hajm)
         
-        offset = (sahifa - 1) * hajm
-        sorov = sorov.offset(offset).limit(hajm)
-        
-        natija = await self.db.execute(sorov)
-        jami = await self.db.execute(hisob_sorov)
-        
-        return natija.scalars().all(), jami.scalar()
+        jami = await self.db.execute(select(func.count(Holat.id)).where(shart))
+        return await self._tartibli_korinishlar(sorov), jami.scalar()
     
     async def tasodifiy_olish(
         self,
@@ -322,6 +376,7 @@ class HolatServisi:
         media = HolatMedia(holat_id=holat_id, **malumot.model_dump())
         self.db.add(media)
         await self.db.flush()
+        await self.versiyani_oshirish(holat_id)
         return media
     
     async def media_ochirish(self, media_id: UUID) -> bool:
@@ -330,6 +385,7 @@ class HolatServisi:
         if media:
             await self.db.delete(media)
             await self.db.flush()
+            await self.versiyani_oshirish(media.holat_id)
             return True
         return False
 
@@ -350,7 +406,10 @@ class HolatServisi:
         """Holatni o'chiradi."""
         holat = await self.db.get(Holat, holat_id)
         if holat:
+            hissa = self._hisoblagich.holat_hissasi(holat)
             await self.db.delete(holat)
             await self.db.flush()
+            if hissa:
+                await self._hisoblagich.qollash(ayirilgan=[hissa])
             return True
         return False
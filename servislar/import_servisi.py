@@ -1,12 +1,15 @@
 # MedCase Pro Platform - Import Servisi
 # Excel va CSV dan ma'lumotlarni import qilish
 
-from typing import List, Dict, Any, Tuple, Optional
-from uuid import uuid4, UUID
+from typing import List, Dict, Any, Tuple, Optional, Callable, Awaitable
+from uuid import uuid4, uuid5, UUID, NAMESPACE_URL
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import base64
 import io
+import logging
 import re
 import unicodedata
 
@@ -20,6 +23,39 @@ except ImportError:
 
 from modellar.kategoriya import AsosiyKategoriya, KichikKategoriya, Bolim
 from modellar.holat import Holat, HolatVarianti, HolatMedia, QiyinlikDarajasi, HolatTuri, MediaTuri
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+from servislar.hisoblagich_servisi import HisoblagichServisi
+from vositalar.jarayon_hovuzi import jarayonda_bajarish
+
+logger = logging.getLogger(__name__)
+
+# Bitta tranzaksiyada yoziladigan holatlar soni (checkpoint qadami)
+BATCH_SIZE = 500
+
+# Fon import vazifasi holati Redisda saqlanadigan muddat (soniya)
+VAZIFA_MUDDATI = 24 * 3600
+
+# Qiyinlik darajasini mapping
+QIYINLIK_MAP = {
+    'basic': QiyinlikDarajasi.OSON,
+    'oson': QiyinlikDarajasi.OSON,
+    'easy': QiyinlikDarajasi.OSON,
+    'intermediate': QiyinlikDarajasi.ORTACHA,
+    'ortacha': QiyinlikDarajasi.ORTACHA,
+    'orta': QiyinlikDarajasi.ORTACHA,
+    'medium': QiyinlikDarajasi.ORTACHA,
+    'advanced': QiyinlikDarajasi.QIYIN,
+    'qiyin': QiyinlikDarajasi.QIYIN,
+    'hard': QiyinlikDarajasi.QIYIN,
+}
+
+KERAKLI_USTUNLAR = [
+    'section', 'main_category', 'sub_category',
+    'case', 'question', 'opt_a', 'opt_b', 'opt_c', 'opt_d',
+    'correct'
+]
+
+VIDEO_KENGAYTMALARI = ['.mp4', '.mov', '.avi', '.webm', '.mkv']
 
 
 def slugify(text: str) -> str:
@@ -50,166 +86,116 @@ def title_case(text: str) -> str:
     return text.strip().title()
 
 
-class ImportServisi:
+def variantlarni_aralashtirish(holat_data: Dict[str, Any]) -> None:
     """
-    Excel va CSV dan ma'lumotlarni import qilish servisi.
+    Agar to'g'ri javob doim B bo'lsa, variantlarni deterministik aylantiradi.
+    Shu bilan to'g'ri javob har doim bir xil harfda qolib ketmaydi.
     """
-    
-    def __init__(self, db: AsyncSession):
-        self.db = db
-        self.xatolar: List[Dict] = []
-        self.ogohlantirishlar: List[Dict] = []
-    
-    # Qiyinlik darajasini mapping
-    QIYINLIK_MAP = {
-        'basic': QiyinlikDarajasi.OSON,
-        'oson': QiyinlikDarajasi.OSON,
-        'easy': QiyinlikDarajasi.OSON,
-        'intermediate': QiyinlikDarajasi.ORTACHA,
-        'ortacha': QiyinlikDarajasi.ORTACHA,
-        'orta': QiyinlikDarajasi.ORTACHA,
-        'medium': QiyinlikDarajasi.ORTACHA,
-        'advanced': QiyinlikDarajasi.QIYIN,
-        'qiyin': QiyinlikDarajasi.QIYIN,
-        'hard': QiyinlikDarajasi.QIYIN,
-    }
+    if holat_data.get("correct") != "B":
+        return
 
-    def _variantlarni_aralashtirish(self, holat_data: Dict[str, Any]) -> None:
-        """
-        Agar to'g'ri javob doim B bo'lsa, variantlarni deterministik aylantiradi.
-        Shu bilan to'g'ri javob har doim bir xil harfda qolib ketmaydi.
-        """
-        if holat_data.get("correct") != "B":
-            return
-
-        qator = holat_data.get("qator") or 0
-        offset = qator % 4
-        if offset == 0:
-            offset = 1
-
-        options = [
-            holat_data.get("opt_a"),
-            holat_data.get("opt_b"),
-            holat_data.get("opt_c"),
-            holat_data.get("opt_d"),
-        ]
-        expls = [
-            holat_data.get("expl_a"),
-            holat_data.get("expl_b"),
-            holat_data.get("expl_c"),
-            holat_data.get("expl_d"),
-        ]
+    qator = holat_data.get("qator") or 0
+    offset = qator % 4
+    if offset == 0:
+        offset = 1
 
-        options = options[offset:] + options[:offset]
-        expls = expls[offset:] + expls[:offset]
+    options = [
+        holat_data.get("opt_a"),
+        holat_data.get("opt_b"),
+        holat_data.get("opt_c"),
+        holat_data.get("opt_d"),
+    ]
+    expls = [
+        holat_data.get("expl_a"),
+        holat_data.get("expl_b"),
+        holat_data.get("expl_c"),
+        holat_data.get("expl_d"),
+    ]
 
-        letters = ["A", "B", "C", "D"]
-        holat_data["correct"] = letters[(1 - offset) % 4]
-        holat_data["opt_a"], holat_data["opt_b"], holat_data["opt_c"], holat_data["opt_d"] = options
-        holat_data["expl_a"], holat_data["expl_b"], holat_data["expl_c"], holat_data["expl_d"] = expls
-    
-    async def excel_tahlil_qilish(self, fayl_content: bytes) -> Dict[str, Any]:
-        """
-        Excel faylni tahlil qiladi va xatoliklarni tekshiradi.
-        Import qilmasdan oldin faylni validatsiya qilish uchun.
-        """
-        if not EXCEL_MAVJUD:
-            return {
-                "muvaffaqiyat": False,
-                "xato": "openpyxl kutubxonasi o'rnatilmagan. pip install openpyxl"
-            }
-        
-        self.xatolar = []
-        self.ogohlantirishlar = []
-        
+    options = options[offset:] + options[:offset]
+    expls = expls[offset:] + expls[:offset]
+
+    letters = ["A", "B", "C", "D"]
+    holat_data["correct"] = letters[(1 - offset) % 4]
+    holat_data["opt_a"], holat_data["opt_b"], holat_data["opt_c"], holat_data["opt_d"] = options
+    holat_data["expl_a"], holat_data["expl_b"], holat_data["expl_c"], holat_data["expl_d"] = expls
+
+
+def _matn(qiymat: Any) -> Optional[str]:
+    """Katak qiymatini tozalangan matnga o'tkazadi."""
+    return str(qiymat).strip() if qiymat else None
+
+
+def excel_faylni_tahlil_qilish(fayl_content: bytes) -> Dict[str, Any]:
+    """
+    Excel faylni oqim (read_only) rejimida tahlil qiladi.
+    Sof funksiya - alohida jarayonda (process pool, Celery worker) ishlatiladi.
+    """
+    if not EXCEL_MAVJUD:
+        return {
+            "muvaffaqiyat": False,
+            "xato": "openpyxl kutubxonasi o'rnatilmagan. pip install openpyxl"
+        }
+
+    xatolar: List[Dict] = []
+    ogohlantirishlar: List[Dict] = []
+
+    try:
+        # read_only - varaq butunlay xotiraga yuklanmaydi, qatorlar oqim bilan o'qiladi
+        workbook = load_workbook(io.BytesIO(fayl_content), read_only=True, data_only=True)
         try:
-            # Excel faylni o'qish
-            workbook = load_workbook(io.BytesIO(fayl_content), data_only=True)
             sheet = workbook.active
-            
+            qatorlar = sheet.iter_rows(values_only=True)
+
             # Ustun nomlarini olish (birinchi qator)
+            sarlavha_qatori = next(qatorlar, None) or ()
             ustunlar = {}
-            for col_idx, cell in enumerate(sheet[1], 1):
-                if cell.value:
-                    ustunlar[cell.value.lower().strip().replace('-', '_')] = col_idx
-            
+            for col_idx, qiymat in enumerate(sarlavha_qatori):
+                if qiymat:
+                    ustunlar[str(qiymat).lower().strip().replace('-', '_')] = col_idx
+
             # Kerakli ustunlarni tekshirish (id va diff ixtiyoriy)
-            kerakli_ustunlar = [
-                'section', 'main_category', 'sub_category',
-                'case', 'question', 'opt_a', 'opt_b', 'opt_c', 'opt_d',
-                'correct'
-            ]
-            
-            yetishmagan = []
-            for ustun in kerakli_ustunlar:
-                if ustun not in ustunlar:
-                    yetishmagan.append(ustun)
-            
+            yetishmagan = [u for u in KERAKLI_USTUNLAR if u not in ustunlar]
+
             if yetishmagan:
                 return {
                     "muvaffaqiyat": False,
                     "xato": f"Kerakli ustunlar topilmadi: {', '.join(yetishmagan)}",
                     "mavjud_ustunlar": list(ustunlar.keys())
                 }
-            
+
             # Qatorlarni tahlil qilish
             holatlar = []
             kategoriyalar = set()
             kichik_kategoriyalar = set()
             bolimlar = set()
-            
-            for row_idx, row in enumerate(sheet.iter_rows(min_row=2), 2):
+
+            for row_idx, row in enumerate(qatorlar, 2):
                 # Bo'sh qatorni o'tkazib yuborish
-                if not any(cell.value for cell in row):
+                if not row or not any(row):
                     continue
-                
+
                 def get_cell(ustun_nomi):
                     col_idx = ustunlar.get(ustun_nomi)
-                    if col_idx and col_idx <= len(row):
-                        return row[col_idx - 1].value
+                    if col_idx is not None and col_idx < len(row):
+                        return row[col_idx]
                     return None
-                
+
                 # Ma'lumotlarni olish
                 holat_id = get_cell('id')
                 main_category = get_cell('main_category')
                 sub_category = get_cell('sub_category')
                 section = get_cell('section')
-                case_text = get_cell('case')
-                question = get_cell('question')
-                opt_a = get_cell('opt_a')
-                opt_b = get_cell('opt_b')
-                opt_c = get_cell('opt_c')
-                opt_d = get_cell('opt_d')
                 correct = get_cell('correct')
-                expl_a = get_cell('expl_a')
-                expl_b = get_cell('expl_b')
-                expl_c = get_cell('expl_c')
-                expl_d = get_cell('expl_d')
                 diff = get_cell('diff')
-                link = get_cell('link')
-                
+
                 # Validatsiya
                 qator_xatolari = []
-                
-                if not main_category:
-                    qator_xatolari.append("main_category bo'sh")
-                if not sub_category:
-                    qator_xatolari.append("sub_category bo'sh")
-                if not section:
-                    qator_xatolari.append("section bo'sh")
-                if not case_text:
-                    qator_xatolari.append("case bo'sh")
-                if not question:
-                    qator_xatolari.append("question bo'sh")
-                if not opt_a:
-                    qator_xatolari.append("opt_a bo'sh")
-                if not opt_b:
-                    qator_xatolari.append("opt_b bo'sh")
-                if not opt_c:
-                    qator_xatolari.append("opt_c bo'sh")
-                if not opt_d:
-                    qator_xatolari.append("opt_d bo'sh")
-                
+
+                for ustun in KERAKLI_USTUNLAR[:-1]:
+                    if not get_cell(ustun):
+                        qator_xatolari.append(f"{ustun} bo'sh")
+
                 # To'g'ri javobni tekshirish
                 if correct:
                     correct = str(correct).upper().strip()
@@ -217,452 +203,542 @@ class ImportServisi:
                         qator_xatolari.append(f"correct noto'g'ri: '{correct}' (A, B, C, D bo'lishi kerak)")
                 else:
                     qator_xatolari.append("correct bo'sh")
-                
+
                 # Qiyinlik darajasini tekshirish (string sifatida saqlash - JSON uchun)
                 qiyinlik = "ortacha"
                 if diff:
-                    diff_lower = str(diff).lower().strip()
-                    diff_key = re.sub(r"[^a-z]", "", diff_lower)
-                    if diff_key in self.QIYINLIK_MAP:
-                        qiyinlik = self.QIYINLIK_MAP[diff_key].value  # Enum value (string)
+                    diff_key = re.sub(r"[^a-z]", "", str(diff).lower().strip())
+                    if diff_key in QIYINLIK_MAP:
+                        qiyinlik = QIYINLIK_MAP[diff_key].value  # Enum value (string)
                     else:
-                        self.ogohlantirishlar.append({
+                        ogohlantirishlar.append({
                             "qator": row_idx,
                             "xabar": f"Noma'lum qiyinlik: '{diff}', 'ortacha' sifatida belgilandi"
                         })
-                
+
                 if qator_xatolari:
-                    self.xatolar.append({
+                    xatolar.append({
                         "qator": row_idx,
                         "id": holat_id,
                         "xatolar": qator_xatolari
                     })
-                else:
-                    # Kategoriyalarni to'plash
-                    if main_category:
-                        kategoriyalar.add(str(main_category).strip().lower())
-                    if sub_category and main_category:
-                        kichik_kategoriyalar.add((
-                            str(main_category).strip().lower(),
-                            str(sub_category).strip().lower()
-                        ))
-                    if section and sub_category:
-                        bolimlar.add((
-                            str(main_category).strip().lower(),
-                            str(sub_category).strip().lower(),
-                            str(section).strip().lower()
-                        ))
-                    
-                    holatlar.append({
-                        "qator": row_idx,
-                        "id": holat_id,
-                        "main_category": str(main_category).strip() if main_category else None,
-                        "sub_category": str(sub_category).strip() if sub_category else None,
-                        "section": str(section).strip() if section else None,
-                        "case": str(case_text).strip() if case_text else None,
-                        "question": str(question).strip() if question else None,
-                        "opt_a": str(opt_a).strip() if opt_a else None,
-                        "opt_b": str(opt_b).strip() if opt_b else None,
-                        "opt_c": str(opt_c).strip() if opt_c else None,
-                        "opt_d": str(opt_d).strip() if opt_d else None,
-                        "correct": correct,
-                        "expl_a": str(expl_a).strip() if expl_a else None,
-                        "expl_b": str(expl_b).strip() if expl_b else None,
-                        "expl_c": str(expl_c).strip() if expl_c else None,
-                        "expl_d": str(expl_d).strip() if expl_d else None,
-                        "qiyinlik": qiyinlik,
-                        "link": str(link).strip() if link else None
-                    })
+                    continue
 
-                    # Agar barcha to'g'ri javoblar B bo'lsa, variantlarni aylantirish
-                    self._variantlarni_aralashtirish(holatlar[-1])
-            
-            return {
-                "muvaffaqiyat": len(self.xatolar) == 0,
-                "jami_qatorlar": len(holatlar) + len(self.xatolar),
-                "yaroqli_holatlar": len(holatlar),
-                "xatoli_qatorlar": len(self.xatolar),
-                "xatolar": self.xatolar,
-                "ogohlantirishlar": self.ogohlantirishlar,
-                "kategoriyalar": list(kategoriyalar),
-                "kichik_kategoriyalar": len(kichik_kategoriyalar),
-                "bolimlar": len(bolimlar),
-                "holatlar": holatlar  # Import uchun tayyorlangan ma'lumotlar
+                # Kategoriyalarni to'plash
+                asosiy_kalit = str(main_category).strip().lower()
+                kichik_kalit = str(sub_category).strip().lower()
+                kategoriyalar.add(asosiy_kalit)
+                kichik_kategoriyalar.add((asosiy_kalit, kichik_kalit))
+                bolimlar.add((asosiy_kalit, kichik_kalit, str(section).strip().lower()))
+
+                holat_data = {
+                    "qator": row_idx,
+                    "id": holat_id,
+                    "main_category": _matn(main_category),
+                    "sub_category": _matn(sub_category),
+                    "section": _matn(section),
+                    "case": _matn(get_cell('case')),
+                    "question": _matn(get_cell('question')),
+                    "opt_a": _matn(get_cell('opt_a')),
+                    "opt_b": _matn(get_cell('opt_b')),
+                    "opt_c": _matn(get_cell('opt_c')),
+                    "opt_d": _matn(get_cell('opt_d')),
+                    "correct": correct,
+                    "expl_a": _matn(get_cell('expl_a')),
+                    "expl_b": _matn(get_cell('expl_b')),
+                    "expl_c": _matn(get_cell('expl_c')),
+                    "expl_d": _matn(get_cell('expl_d')),
+                    "qiyinlik": qiyinlik,
+                    "link": _matn(get_cell('link'))
+                }
+
+                # Agar barcha to'g'ri javoblar B bo'lsa, variantlarni aylantirish
+                variantlarni_aralashtirish(holat_data)
+                holatlar.append(holat_data)
+        finally:
+            workbook.close()
+
+        return {
+            "muvaffaqiyat": len(xatolar) == 0,
+            "jami_qatorlar": len(holatlar) + len(xatolar),
+            "yaroqli_holatlar": len(holatlar),
+            "xatoli_qatorlar": len(xatolar),
+            "xatolar": xatolar,
+            "ogohlantirishlar": ogohlantirishlar,
+            "kategoriyalar": list(kategoriyalar),
+            "kichik_kategoriyalar": len(kichik_kategoriyalar),
+            "bolimlar": len(bolimlar),
+            "holatlar": holatlar  # Import uchun tayyorlangan ma'lumotlar
+        }
+
+    except Exception as e:
+        return {
+            "muvaffaqiyat": False,
+            "xato": f"Excel faylni o'qishda xatolik: {str(e)}"
+        }
+
+
+class ImportServisi:
+    """
+    Excel va CSV dan ma'lumotlarni import qilish servisi.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.xatolar: List[Dict] = []
+        self.ogohlantirishlar: List[Dict] = []
+    
+    QIYINLIK_MAP = QIYINLIK_MAP
+
+    def _variantlarni_aralashtirish(self, holat_data: Dict[str, Any]) -> None:
+        """Variantlarni deterministik aylantiradi (qarang: variantlarni_aralashtirish)."""
+        variantlarni_aralashtirish(holat_data)
+    
+    async def excel_tahlil_qilish(self, fayl_content: bytes) -> Dict[str, Any]:
+        """
+        Excel faylni tahlil qiladi va xatoliklarni tekshiradi.
+        Import qilmasdan oldin faylni validatsiya qilish uchun.
+        Tahlil alohida jarayonda bajariladi - event loop bloklanmaydi.
+        """
+        natija = await jarayonda_bajarish(excel_faylni_tahlil_qilish, fayl_content)
+        self.xatolar = natija.get("xatolar", [])
+        self.ogohlantirishlar = natija.get("ogohlantirishlar", [])
+        return natija
+
+    async def _taksonomiyani_tayyorlash(
+        self,
+        holatlar: List[Dict]
+    ) -> Dict[Tuple[str, str, str], UUID]:
+        """
+        Kategoriya daraxtini bitta xaritaga oldindan yuklaydi va
+        yetishmagan tugunlarni bitta flush bilan yaratadi.
+        (asosiy, kichik, bo'lim) normallashtirilgan kaliti -> bo'lim ID.
+        """
+        asosiy_nom: Dict[str, UUID] = {}
+        asosiy_slug: Dict[str, UUID] = {}
+        kichik_nom: Dict[Tuple[UUID, str], UUID] = {}
+        kichik_slug: Dict[Tuple[UUID, str], UUID] = {}
+        bolim_nom: Dict[Tuple[UUID, str], UUID] = {}
+        bolim_slug: Dict[Tuple[UUID, str], UUID] = {}
+
+        natija = await self.db.execute(
+            select(AsosiyKategoriya.id, AsosiyKategoriya.nomi, AsosiyKategoriya.slug)
+        )
+        for kat_id, nomi, slug in natija.all():
+            asosiy_nom[normalize_text(nomi)] = kat_id
+            asosiy_slug[slug] = kat_id
+
+        natija = await self.db.execute(
+            select(
+                KichikKategoriya.id,
+                KichikKategoriya.asosiy_kategoriya_id,
+                KichikKategoriya.nomi,
+                KichikKategoriya.slug
+            )
+        )
+        for kkat_id, ota_id, nomi, slug in natija.all():
+            kichik_nom[(ota_id, normalize_text(nomi))] = kkat_id
+            kichik_slug[(ota_id, slug)] = kkat_id
+
+        natija = await self.db.execute(
+            select(Bolim.id, Bolim.kichik_kategoriya_id, Bolim.nomi, Bolim.slug)
+        )
+        for bolim_id, ota_id, nomi, slug in natija.all():
+            bolim_nom[(ota_id, normalize_text(nomi))] = bolim_id
+            bolim_slug[(ota_id, slug)] = bolim_id
+
+        xarita: Dict[Tuple[str, str, str], UUID] = {}
+        yangi_tugunlar = []
+
+        for holat_data in holatlar:
+            main_raw = holat_data.get('main_category')
+            sub_raw = holat_data.get('sub_category')
+            section_raw = holat_data.get('section')
+            if not (main_raw and sub_raw and section_raw):
+                continue
+
+            kalit = (normalize_text(main_raw), normalize_text(sub_raw), normalize_text(section_raw))
+            if kalit in xarita:
+                continue
+
+            # 1. Asosiy kategoriya
+            main_slug = slugify(main_raw)
+            kategoriya_id = asosiy_nom.get(kalit[0]) or asosiy_slug.get(main_slug)
+            if not kategoriya_id:
+                kategoriya_id = uuid4()
+                yangi_tugunlar.append(AsosiyKategoriya(
+                    id=kategoriya_id,
+                    nomi=title_case(main_raw),
+                    slug=main_slug,
+                    tavsif=f"{title_case(main_raw)} kategoriyasi",
+                    rang="#3B82F6",
+                    tartib=0
+                ))
+                asosiy_nom[kalit[0]] = asosiy_slug[main_slug] = kategoriya_id
+
+            # 2. Kichik kategoriya
+            sub_slug = slugify(sub_raw)
+            kichik_id = (
+                kichik_nom.get((kategoriya_id, kalit[1]))
+                or kichik_slug.get((kategoriya_id, sub_slug))
+            )
+            if not kichik_id:
+                kichik_id = uuid4()
+                yangi_tugunlar.append(KichikKategoriya(
+                    id=kichik_id,
+                    asosiy_kategoriya_id=kategoriya_id,
+                    nomi=title_case(sub_raw),
+                    slug=sub_slug,
+                    tavsif=f"{title_case(sub_raw)} bo'limi",
+                    tartib=0
+                ))
+                kichik_nom[(kategoriya_id, kalit[1])] = kichik_id
+                kichik_slug[(kategoriya_id, sub_slug)] = kichik_id
+
+            # 3. Bo'lim
+            section_slug = slugify(section_raw)
+            bolim_id = (
+                bolim_nom.get((kichik_id, kalit[2]))
+                or bolim_slug.get((kichik_id, section_slug))
+            )
+            if not bolim_id:
+                bolim_id = uuid4()
+                yangi_tugunlar.append(Bolim(
+                    id=bolim_id,
+                    kichik_kategoriya_id=kichik_id,
+                    nomi=title_case(section_raw),
+                    slug=section_slug,
+                    tavsif=f"{title_case(section_raw)} mavzusi",
+                    tartib=0
+                ))
+                bolim_nom[(kichik_id, kalit[2])] = bolim_id
+                bolim_slug[(kichik_id, section_slug)] = bolim_id
+
+            xarita[kalit] = bolim_id
+
+        if yangi_tugunlar:
+            self.db.add_all(yangi_tugunlar)
+            await self.db.flush()
+            # Resume paytida tugunlar qayta yaratilmasligi uchun darhol commit
+            await self.db.commit()
+
+        return xarita
+
+    def _holat_qatorlari(
+        self,
+        holat_data: Dict[str, Any],
+        bolim_id: UUID,
+        holat_id: UUID
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Bitta holat uchun holat, variant va media qatorlarini tayyorlaydi."""
+        sarlavha = holat_data['question'][:100]
+        if sarlavha:
+            sarlavha = sarlavha[0].upper() + sarlavha[1:] if len(sarlavha) > 1 else sarlavha.upper()
+
+        # Qiyinlik darajasini to'g'ri formatga o'tkazish
+        qiyinlik = holat_data.get('qiyinlik', 'ortacha')
+        if isinstance(qiyinlik, str):
+            qiyinlik = QIYINLIK_MAP.get(qiyinlik.lower(), QiyinlikDarajasi.ORTACHA)
+        elif not isinstance(qiyinlik, QiyinlikDarajasi):
+            qiyinlik = QiyinlikDarajasi.ORTACHA
+
+        # Ball hisoblash
+        if qiyinlik == QiyinlikDarajasi.OSON:
+            ball = 10
+        elif qiyinlik == QiyinlikDarajasi.QIYIN:
+            ball = 30
+        else:
+            ball = 20
+
+        holat = {
+            "id": holat_id,
+            "bolim_id": bolim_id,
+            "sarlavha": sarlavha,
+            "klinik_stsenariy": holat_data['case'],
+            "savol": holat_data['question'],
+            "togri_javob": holat_data['correct'],
+            "qiyinlik": qiyinlik,
+            "turi": HolatTuri.MCQ,
+            "ball": ball,
+            "chop_etilgan": True,
+            "tekshirilgan": True
+        }
+
+        variantlar = [
+            {
+                "holat_id": holat_id,
+                "belgi": belgi,
+                "matn": holat_data[f'opt_{belgi.lower()}'],
+                "tushuntirish": holat_data.get(f'expl_{belgi.lower()}'),
+                "togri": belgi == holat_data['correct']
             }
-            
-        except Exception as e:
-            return {
-                "muvaffaqiyat": False,
-                "xato": f"Excel faylni o'qishda xatolik: {str(e)}"
+            for belgi in ('A', 'B', 'C', 'D')
+        ]
+
+        # Media (default: RASM)
+        media = None
+        link = holat_data.get('link')
+        if link:
+            media_turi = MediaTuri.RASM
+            if any(ext in link.lower() for ext in VIDEO_KENGAYTMALARI):
+                media_turi = MediaTuri.VIDEO
+            media_nom = holat_data.get('id')
+            media = {
+                "id": uuid5(holat_id, "media"),
+                "holat_id": holat_id,
+                "turi": media_turi,
+                "url": link,
+                "nom": str(media_nom) if media_nom is not None else 'media',
+                "tartib": 0
             }
+
+        return holat, variantlar, media
     
-    async def excel_import_qilish(self, holatlar: List[Dict]) -> Dict[str, Any]:
+    async def excel_import_qilish(
+        self,
+        holatlar: List[Dict],
+        boshlash: int = 0,
+        vazifa_id: Optional[str] = None,
+        jarayon_callback: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
         """
         Tahlil qilingan holatlarni bazaga import qiladi.
-        Optimallashtirilgan: batch insert va kamroq flush.
+
+        Kategoriya daraxti bitta xaritaga oldindan yuklanadi, holatlar,
+        variantlar va media ko'p qatorli INSERT lar bilan BATCH_SIZE
+        bo'yicha yoziladi. Har bir batch alohida commit qilinadi va
+        jarayon_callback ga checkpoint (keyingi indeks) beriladi.
+
+        vazifa_id berilsa holat ID lari deterministik (uuid5) bo'ladi va
+        ON CONFLICT DO NOTHING tufayli checkpoint dan davom ettirish xavfsiz.
         """
         yaratilgan = 0
         yangilangan = 0
         xatolar = []
-        yaratilgan_idlar = []  # Yaratilgan holat ID larini saqlash
-        
-        # Kategoriyalar keshi
-        kategoriya_kesh: Dict[str, UUID] = {}
-        kichik_kat_kesh: Dict[Tuple[str, str], UUID] = {}
-        bolim_kesh: Dict[Tuple[str, str, str], UUID] = {}
-        
-        # Avval barcha kategoriyalarni bazadan yuklash (bir marta so'rov)
+        jami = len(holatlar)
+
         try:
-            # Asosiy kategoriyalarni yuklash
-            result = await self.db.execute(select(AsosiyKategoriya))
-            for kat in result.scalars().all():
-                kategoriya_kesh[normalize_text(kat.nomi)] = kat.id
-            
-            # Kichik kategoriyalarni yuklash
-            result = await self.db.execute(select(KichikKategoriya))
-            for kkat in result.scalars().all():
-                # Asosiy kategoriya nomini topish
-                for main_key, main_id in kategoriya_kesh.items():
-                    if main_id == kkat.asosiy_kategoriya_id:
-                        kichik_kat_kesh[(main_key, normalize_text(kkat.nomi))] = kkat.id
-                        break
-            
-            # Bo'limlarni yuklash
-            result = await self.db.execute(select(Bolim))
-            for bolim in result.scalars().all():
-                # Kichik kategoriya kalitini topish
-                for (main_key, sub_key), sub_id in kichik_kat_kesh.items():
-                    if sub_id == bolim.kichik_kategoriya_id:
-                        bolim_kesh[(main_key, sub_key, normalize_text(bolim.nomi))] = bolim.id
-                        break
+            bolim_xaritasi = await self._taksonomiyani_tayyorlash(holatlar[boshlash:])
         except Exception as e:
-            pass  # Kesh yuklash xatosi bo'lsa, davom etamiz
-        
-        # Holatlarni batch bo'yicha qayta ishlash
-        BATCH_SIZE = 50
-        pending_holatlar = []  # Flush kutayotgan holatlar
-        
-        for idx, holat_data in enumerate(holatlar):
-            try:
-                # Import vaqtida ham variantlarni tekshirish (xavfsizlik uchun)
-                self._variantlarni_aralashtirish(holat_data)
-                # Ma'lumotlarni normallashtirish
-                main_cat_raw = holat_data['main_category']
-                sub_cat_raw = holat_data['sub_category']
-                section_raw = holat_data['section']
-                
-                main_cat_key = normalize_text(main_cat_raw)
-                sub_cat_key_str = normalize_text(sub_cat_raw)
-                section_key_str = normalize_text(section_raw)
-                
-                # 1. Asosiy kategoriyani topish/yaratish
-                if main_cat_key not in kategoriya_kesh:
-                    main_cat_slug = slugify(main_cat_raw)
-                    result = await self.db.execute(
-                        select(AsosiyKategoriya).where(
-                            (func.lower(AsosiyKategoriya.nomi) == main_cat_key) |
-                            (AsosiyKategoriya.slug == main_cat_slug)
-                        )
+            await self.db.rollback()
+            return {
+                "muvaffaqiyat": False,
+                "yaratilgan": 0,
+                "yangilangan": 0,
+                "checkpoint": boshlash,
+                "xatolar": [{"xato": f"Kategoriyalarni tayyorlashda xato: {str(e)}"}]
+            }
+
+        vazifa_nomlar_fazosi = uuid5(NAMESPACE_URL, f"medcase-import:{vazifa_id}") if vazifa_id else None
+        checkpoint = boshlash
+
+        for batch_boshi in range(boshlash, jami, BATCH_SIZE):
+            batch = holatlar[batch_boshi:batch_boshi + BATCH_SIZE]
+            holat_qatorlari = []
+            variant_qatorlari = []
+            media_qatorlari = []
+
+            for idx, holat_data in enumerate(batch, batch_boshi):
+                try:
+                    # Import vaqtida ham variantlarni tekshirish (xavfsizlik uchun)
+                    variantlarni_aralashtirish(holat_data)
+                    kalit = (
+                        normalize_text(holat_data['main_category']),
+                        normalize_text(holat_data['sub_category']),
+                        normalize_text(holat_data['section'])
                     )
-                    kategoriya = result.scalar_one_or_none()
-                    
-                    if not kategoriya:
-                        kategoriya = AsosiyKategoriya(
-                            nomi=title_case(main_cat_raw),
-                            slug=main_cat_slug,
-                            tavsif=f"{title_case(main_cat_raw)} kategoriyasi",
-                            rang="#3B82F6",
-                            tartib=0
-                        )
-                        self.db.add(kategoriya)
-                        await self.db.flush()
-                    
-                    kategoriya_kesh[main_cat_key] = kategoriya.id
-                
-                kategoriya_id = kategoriya_kesh[main_cat_key]
-                
-                # 2. Kichik kategoriyani topish/yaratish
-                sub_cat_key = (main_cat_key, sub_cat_key_str)
-                
-                if sub_cat_key not in kichik_kat_kesh:
-                    sub_cat_slug = slugify(sub_cat_raw)
-                    result = await self.db.execute(
-                        select(KichikKategoriya).where(
-                            KichikKategoriya.asosiy_kategoriya_id == kategoriya_id,
-                            (func.lower(KichikKategoriya.nomi) == sub_cat_key_str) |
-                            (KichikKategoriya.slug == sub_cat_slug)
-                        )
+                    holat_id = (
+                        uuid5(vazifa_nomlar_fazosi, str(idx)) if vazifa_nomlar_fazosi else uuid4()
                     )
-                    kichik_kat = result.scalar_one_or_none()
-                    
-                    if not kichik_kat:
-                        kichik_kat = KichikKategoriya(
-                            asosiy_kategoriya_id=kategoriya_id,
-                            nomi=title_case(sub_cat_raw),
-                            slug=sub_cat_slug,
-                            tavsif=f"{title_case(sub_cat_raw)} bo'limi",
-                            tartib=0
-                        )
-                        self.db.add(kichik_kat)
-                        await self.db.flush()
-                    
-                    kichik_kat_kesh[sub_cat_key] = kichik_kat.id
-                
-                kichik_kat_id = kichik_kat_kesh[sub_cat_key]
-                
-                # 3. Bo'limni topish/yaratish
-                bolim_key = (main_cat_key, sub_cat_key_str, section_key_str)
-                
-                if bolim_key not in bolim_kesh:
-                    section_slug = slugify(section_raw)
-                    result = await self.db.execute(
-                        select(Bolim).where(
-                            Bolim.kichik_kategoriya_id == kichik_kat_id,
-                            (func.lower(Bolim.nomi) == section_key_str) |
-                            (Bolim.slug == section_slug)
-                        )
+                    holat, variantlar, media = self._holat_qatorlari(
+                        holat_data, bolim_xaritasi[kalit], holat_id
                     )
-                    bolim = result.scalar_one_or_none()
-                    
-                    if not bolim:
-                        bolim = Bolim(
-                            kichik_kategoriya_id=kichik_kat_id,
-                            nomi=title_case(section_raw),
-                            slug=section_slug,
-                            tavsif=f"{title_case(section_raw)} mavzusi",
-                            tartib=0
-                        )
-                        self.db.add(bolim)
-                        await self.db.flush()
-                    
-                    bolim_kesh[bolim_key] = bolim.id
-                
-                bolim_id = bolim_kesh[bolim_key]
-                
-                # 4. Holatni yaratish (yangilashni o'tkazib yuboramiz - tezroq)
-                sarlavha = holat_data['question'][:100] if len(holat_data['question']) > 100 else holat_data['question']
-                if sarlavha:
-                    sarlavha = sarlavha[0].upper() + sarlavha[1:] if len(sarlavha) > 1 else sarlavha.upper()
-                
-                # Qiyinlik darajasini to'g'ri formatga o'tkazish
-                qiyinlik = holat_data.get('qiyinlik', 'ortacha')
-                if isinstance(qiyinlik, str):
-                    qiyinlik = self.QIYINLIK_MAP.get(qiyinlik.lower(), QiyinlikDarajasi.ORTACHA)
-                elif not isinstance(qiyinlik, QiyinlikDarajasi):
-                    qiyinlik = QiyinlikDarajasi.ORTACHA
-                
-                # Ball hisoblash
-                if qiyinlik == QiyinlikDarajasi.OSON:
-                    ball = 10
-                elif qiyinlik == QiyinlikDarajasi.QIYIN:
-                    ball = 30
-                else:
-                    ball = 20
-                
-                holat = Holat(
-                    bolim_id=bolim_id,
-                    sarlavha=sarlavha,
-                    klinik_stsenariy=holat_data['case'],
-                    savol=holat_data['question'],
-                    togri_javob=holat_data['correct'],
-                    qiyinlik=qiyinlik,
-                    turi=HolatTuri.MCQ,
-                    ball=ball,
-                    chop_etilgan=True,
-                    tekshirilgan=True
-                )
-                self.db.add(holat)
-                pending_holatlar.append((holat, holat_data))
-                
-                # Batch flush - har BATCH_SIZE holatdan keyin
-                if len(pending_holatlar) >= BATCH_SIZE:
-                    await self.db.flush()
-                    
-                    # Variantlar va media qo'shish
-                    for h, h_data in pending_holatlar:
-                        # Variantlar
-                        for belgi, matn, tushuntirish in [
-                            ('A', h_data['opt_a'], h_data.get('expl_a')),
-                            ('B', h_data['opt_b'], h_data.get('expl_b')),
-                            ('C', h_data['opt_c'], h_data.get('expl_c')),
-                            ('D', h_data['opt_d'], h_data.get('expl_d')),
-                        ]:
-                            variant = HolatVarianti(
-                                holat_id=h.id,
-                                belgi=belgi,
-                                matn=matn,
-                                tushuntirish=tushuntirish,
-                                togri=(belgi == h_data['correct'])
-                            )
-                            self.db.add(variant)
-                        
-                        # Media (default: RASM)
-                        if h_data.get('link'):
-                            link = h_data['link']
-                            media_turi = MediaTuri.RASM  # Default rasm
-                            if any(ext in link.lower() for ext in ['.mp4', '.mov', '.avi', '.webm', '.mkv']):
-                                media_turi = MediaTuri.VIDEO
-                            
-                            # nom maydonini string formatga o'tkazish
-                            media_nom = h_data.get('id')
-                            if media_nom is not None:
-                                media_nom = str(media_nom)
-                            else:
-                                media_nom = 'media'
-                            
-                            media = HolatMedia(
-                                holat_id=h.id,
-                                turi=media_turi,
-                                url=link,
-                                nom=media_nom,
-                                tartib=0
-                            )
-                            self.db.add(media)
-                        
-                        yaratilgan_idlar.append(h.id)
-                        yaratilgan += 1
-                    
-                    pending_holatlar = []
-                
-            except Exception as e:
-                xatolar.append({
-                    "qator": holat_data.get('qator'),
-                    "id": holat_data.get('id'),
-                    "xato": str(e)
-                })
-        
-        # Qolgan holatlarni flush qilish
-        if pending_holatlar:
+                    holat_qatorlari.append(holat)
+                    variant_qatorlari.extend(variantlar)
+                    if media:
+                        media_qatorlari.append(media)
+                except Exception as e:
+                    xatolar.append({
+                        "qator": holat_data.get('qator'),
+                        "id": holat_data.get('id'),
+                        "xato": str(e)
+                    })
+
             try:
-                await self.db.flush()
-                
-                for h, h_data in pending_holatlar:
-                    # Variantlar
-                    for belgi, matn, tushuntirish in [
-                        ('A', h_data['opt_a'], h_data.get('expl_a')),
-                        ('B', h_data['opt_b'], h_data.get('expl_b')),
-                        ('C', h_data['opt_c'], h_data.get('expl_c')),
-                        ('D', h_data['opt_d'], h_data.get('expl_d')),
-                    ]:
-                        variant = HolatVarianti(
-                            holat_id=h.id,
-                            belgi=belgi,
-                            matn=matn,
-                            tushuntirish=tushuntirish,
-                            togri=(belgi == h_data['correct'])
-                        )
-                        self.db.add(variant)
-                    
-                    # Media (default: RASM)
-                    if h_data.get('link'):
-                        link = h_data['link']
-                        media_turi = MediaTuri.RASM  # Default rasm
-                        if any(ext in link.lower() for ext in ['.mp4', '.mov', '.avi', '.webm', '.mkv']):
-                            media_turi = MediaTuri.VIDEO
-                        
-                        # nom maydonini string formatga o'tkazish
-                        media_nom = h_data.get('id')
-                        if media_nom is not None:
-                            media_nom = str(media_nom)
-                        else:
-                            media_nom = 'media'
-                        
-                        media = HolatMedia(
-                            holat_id=h.id,
-                            turi=media_turi,
-                            url=link,
-                            nom=media_nom,
-                            tartib=0
+                if holat_qatorlari:
+                    natija = await self.db.execute(
+                        pg_insert(Holat).on_conflict_do_nothing().returning(Holat.id),
+                        holat_qatorlari
+                    )
+                    yangi_idlar = set(natija.scalars().all())
+                    yaratilgan += len(yangi_idlar)
+                    await self.db.execute(
+                        pg_insert(HolatVarianti).on_conflict_do_nothing(),
+                        variant_qatorlari
+                    )
+                    if media_qatorlari:
+                        await self.db.execute(
+                            pg_insert(HolatMedia).on_conflict_do_nothing(),
+                            media_qatorlari
                         )
-                        self.db.add(media)
-                    
-                    yaratilgan_idlar.append(h.id)
-                    yaratilgan += 1
+                    # Kategoriya hisoblagichlari - faqat haqiqatan qo'shilganlar uchun,
+                    # shu batch tranzaksiyasida (resume paytida ikki marta sanalmaydi)
+                    await HisoblagichServisi(self.db).qollash(qoshilgan=[
+                        (h["bolim_id"], h["qiyinlik"])
+                        for h in holat_qatorlari if h["id"] in yangi_idlar
+                    ])
+                await self.db.commit()
             except Exception as e:
-                xatolar.append({"xato": f"Qolgan holatlarni saqlashda xato: {str(e)}"})
-        
-        # Oxirgi commit
-        try:
-            await self.db.commit()
-        except Exception as e:
-            await self.db.rollback()
-            return {
-                "muvaffaqiyat": False,
-                "yaratilgan": yaratilgan,
-                "yangilangan": yangilangan,
-                "xatolar": xatolar + [{"xato": f"Oxirgi commit xatosi: {str(e)}"}]
-            }
-        
-        # Kategoriyalar statistikasini yangilash
-        try:
-            await self._kategoriya_statistikalarini_yangilash()
-        except Exception as e:
-            xatolar.append({"xato": f"Statistika yangilashda xato: {str(e)}"})
+                await self.db.rollback()
+                logger.error(f"Import batch xatosi ({batch_boshi}): {e}")
+                return {
+                    "muvaffaqiyat": False,
+                    "yaratilgan": yaratilgan,
+                    "yangilangan": yangilangan,
+                    "checkpoint": checkpoint,
+                    "xatolar": xatolar + [{
+                        "qator": batch[0].get('qator') if batch else None,
+                        "xato": f"Batch saqlashda xato: {str(e)}"
+                    }]
+                }
+
+            checkpoint = batch_boshi + len(batch)
+            if jarayon_callback:
+                await jarayon_callback({
+                    "checkpoint": checkpoint,
+                    "jami": jami,
+                    "yaratilgan": yaratilgan,
+                    "xatolar_soni": len(xatolar)
+                })
         
         return {
             "muvaffaqiyat": len(xatolar) == 0,
             "yaratilgan": yaratilgan,
             "yangilangan": yangilangan,
+            "checkpoint": checkpoint,
             "xatolar": xatolar
         }
-    
-    async def _kategoriya_statistikalarini_yangilash(self) -> None:
-        """Import tugagandan keyin kategoriyalar statistikasini yangilaydi."""
-        # Bo'limlar holatlar sonini yangilash
-        bolimlar_sorov = """
-            UPDATE bolimlar SET 
-                holatlar_soni = (
-                    SELECT COUNT(*) FROM holatlar 
-                    WHERE holatlar.bolim_id = bolimlar.id 
-                    AND holatlar.faol = true 
-                    AND holatlar.chop_etilgan = true
-                ),
-                oson_holatlar = (
-                    SELECT COUNT(*) FROM holatlar 
-                    WHERE holatlar.bolim_id = bolimlar.id 
-                    AND holatlar.faol = true 
-                    AND holatlar.chop_etilgan = true
-                    AND lower(holatlar.qiyinlik::text) = 'oson'
-                ),
-                ortacha_holatlar = (
-                    SELECT COUNT(*) FROM holatlar 
-                    WHERE holatlar.bolim_id = bolimlar.id 
-                    AND holatlar.faol = true 
-                    AND holatlar.chop_etilgan = true
-                    AND lower(holatlar.qiyinlik::text) = 'ortacha'
-                ),
-                qiyin_holatlar = (
-                    SELECT COUNT(*) FROM holatlar 
-                    WHERE holatlar.bolim_id = bolimlar.id 
-                    AND holatlar.faol = true 
-                    AND holatlar.chop_etilgan = true
-                    AND lower(holatlar.qiyinlik::text) = 'qiyin'
-                )
-        """
-        await self.db.execute(text(bolimlar_sorov))
-        
-        # Kichik kategoriyalar holatlar sonini yangilash
-        kichik_kat_sorov = """
-            UPDATE kichik_kategoriyalar SET 
-                holatlar_soni = (
-                    SELECT COALESCE(SUM(bolimlar.holatlar_soni), 0) 
-                    FROM bolimlar 
-                    WHERE bolimlar.kichik_kategoriya_id = kichik_kategoriyalar.id
-                    AND bolimlar.faol = true
-                )
+
+
+# ============== Fon import vazifasi ==============
+
+class ImportVazifasi:
+    """
+    Excel importning fon vazifasi holati (Redisda).
+    Holat: navbatda -> ishlanmoqda -> tugadi | xato.
+    checkpoint - keyingi import qilinadigan holat indeksi.
+    """
+
+    NAVBATDA = "navbatda"
+    ISHLANMOQDA = "ishlanmoqda"
+    TUGADI = "tugadi"
+    XATO = "xato"
+
+    @staticmethod
+    def _kalit(vazifa_id: str) -> str:
+        return f"{KeshKalitlari.IMPORT}:{vazifa_id}"
+
+    @classmethod
+    async def yaratish(cls, fayl_content: bytes, yaratuvchi_id: str) -> Dict[str, Any]:
+        """Yangi vazifa yaratadi va faylni worker uchun saqlaydi."""
+        vazifa_id = str(uuid4())
+        await redis_kesh.saqlash(
+            f"{cls._kalit(vazifa_id)}:fayl",
+            base64.b64encode(fayl_content).decode("ascii"),
+            VAZIFA_MUDDATI
+        )
+        holat = {
+            "vazifa_id": vazifa_id,
+            "holat": cls.NAVBATDA,
+            "yaratuvchi_id": yaratuvchi_id,
+            "jami": 0,
+            "checkpoint": 0,
+            "yaratilgan": 0,
+            "xatolar": [],
+            "yaratilgan_vaqt": datetime.utcnow().isoformat(),
+            "yangilangan_vaqt": datetime.utcnow().isoformat()
+        }
+        await redis_kesh.saqlash(cls._kalit(vazifa_id), holat, VAZIFA_MUDDATI)
+        return holat
+
+    @classmethod
+    async def olish(cls, vazifa_id: str) -> Optional[Dict[str, Any]]:
+        """Vazifa holatini qaytaradi."""
+        return await redis_kesh.olish(cls._kalit(vazifa_id))
+
+    @classmethod
+    async def yangilash(cls, vazifa_id: str, **maydonlar) -> Optional[Dict[str, Any]]:
+        """Vazifa holatining berilgan maydonlarini yangilaydi."""
+        holat = await cls.olish(vazifa_id)
+        if holat is None:
+            return None
+        holat.update(maydonlar)
+        holat["yangilangan_vaqt"] = datetime.utcnow().isoformat()
+        await redis_kesh.saqlash(cls._kalit(vazifa_id), holat, VAZIFA_MUDDATI)
+        return holat
+
+    @classmethod
+    async def fayl_olish(cls, vazifa_id: str) -> Optional[bytes]:
+        """Vazifaga biriktirilgan Excel faylni qaytaradi."""
+        kodlangan = await redis_kesh.olish(f"{cls._kalit(vazifa_id)}:fayl")
+        if not kodlangan:
+            return None
+        return base64.b64decode(kodlangan)
+
+    @classmethod
+    async def bajarish(cls, vazifa_id: str, db: AsyncSession) -> Dict[str, Any]:
         """
-        await self.db.execute(text(kichik_kat_sorov))
-        
-        # Asosiy kategoriyalar holatlar sonini yangilash
-        asosiy_kat_sorov = """
-            UPDATE asosiy_kategoriyalar SET 
-                holatlar_soni = (
-                    SELECT COALESCE(SUM(kichik_kategoriyalar.holatlar_soni), 0) 
-                    FROM kichik_kategoriyalar 
-                    WHERE kichik_kategoriyalar.asosiy_kategoriya_id = asosiy_kategoriyalar.id
-                    AND kichik_kategoriyalar.faol = true
-                )
+        Vazifani checkpoint dan boshlab bajaradi.
+        Worker jarayonida chaqiriladi: tahlil ham shu jarayonda bo'ladi.
         """
-        await self.db.execute(text(asosiy_kat_sorov))
-        
-        await self.db.commit()
+        holat = await cls.olish(vazifa_id)
+        if holat is None:
+            return {"muvaffaqiyat": False, "xato": "Vazifa topilmadi"}
+
+        fayl = await cls.fayl_olish(vazifa_id)
+        if fayl is None:
+            await cls.yangilash(vazifa_id, holat=cls.XATO, xato="Fayl muddati tugagan")
+            return {"muvaffaqiyat": False, "xato": "Fayl muddati tugagan"}
+
+        await cls.yangilash(vazifa_id, holat=cls.ISHLANMOQDA)
+
+        tahlil = excel_faylni_tahlil_qilish(fayl)
+        holatlar = tahlil.get("holatlar", [])
+        if not holatlar:
+            await cls.yangilash(
+                vazifa_id,
+                holat=cls.XATO,
+                xato=tahlil.get("xato") or "Import qilish uchun yaroqli holatlar topilmadi",
+                tahlil_xatolari=tahlil.get("xatolar", [])
+            )
+            return tahlil
+
+        await cls.yangilash(
+            vazifa_id,
+            jami=len(holatlar),
+            tahlil_xatolari=tahlil.get("xatolar", [])
+        )
+
+        async def _jarayon(malumot: Dict[str, Any]) -> None:
+            await cls.yangilash(
+                vazifa_id,
+                checkpoint=malumot["checkpoint"],
+                yaratilgan=holat.get("yaratilgan", 0) + malumot["yaratilgan"]
+            )
+
+        servis = ImportServisi(db)
+        natija = await servis.excel_import_qilish(
+            holatlar,
+            boshlash=holat.get("checkpoint", 0),
+            vazifa_id=vazifa_id,
+            jarayon_callback=_jarayon
+        )
+
+        await cls.yangilash(
+            vazifa_id,
+            holat=cls.TUGADI if natija["checkpoint"] >= len(holatlar) else cls.XATO,
+            checkpoint=natija["checkpoint"],
+            yaratilgan=holat.get("yaratilgan", 0) + natija["yaratilgan"],
+            xatolar=natija["xatolar"]
+        )
+        return natija
@@ -0,0 +1,167 @@
+# MedCase Pro Platform - Kategoriya Rivojlanishi Servisi
+# Foydalanuvchi x asosiy kategoriya agregatini urinishlar bo'yicha yuritish
+
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+import logging
+
+from modellar.kategoriya import AsosiyKategoriya
+from modellar.rivojlanish import KategoriyaRivojlanishi
+
+logger = logging.getLogger(__name__)
+
+# Bitta urinishni agregatga qo'shish: bo'lim -> asosiy kategoriya aniqlanadi,
+# qator bo'lmasa yaratiladi, bo'lsa delta qo'shiladi. Kategoriya nomi qaytariladi.
+_URINISH_SOROVI = text("""
+    WITH k AS (
+        SELECT kk.asosiy_kategoriya_id AS id
+        FROM bolimlar b
+        JOIN kichik_kategoriyalar kk ON kk.id = b.kichik_kategoriya_id
+        WHERE b.id = :bolim_id
+    ), u AS (
+        INSERT INTO kategoriya_rivojlanishi (
+            id, foydalanuvchi_id, asosiy_kategoriya_id, jami_urinishlar,
+            togri_javoblar, aniqlik_foizi, jami_vaqt, faol, yaratilgan_vaqt, yangilangan_vaqt
+        )
+        SELECT :id, :foydalanuvchi_id, k.id, 1, CAST(:togri AS integer),
+               CAST(:togri AS integer) * 100.0, CAST(:vaqt AS integer), true, now(), now()
+        FROM k
+        ON CONFLICT (foydalanuvchi_id, asosiy_kategoriya_id) DO UPDATE SET
+            jami_urinishlar = kategoriya_rivojlanishi.jami_urinishlar + 1,
+            togri_javoblar = kategoriya_rivojlanishi.togri_javoblar + EXCLUDED.togri_javoblar,
+            aniqlik_foizi = (kategoriya_rivojlanishi.togri_javoblar + EXCLUDED.togri_javoblar)
+                * 100.0 / (kategoriya_rivojlanishi.jami_urinishlar + 1),
+            jami_vaqt = kategoriya_rivojlanishi.jami_vaqt + EXCLUDED.jami_vaqt,
+            yangilangan_vaqt = now()
+        RETURNING asosiy_kategoriya_id
+    )
+    SELECT a.nomi FROM u JOIN asosiy_kategoriyalar a ON a.id = u.asosiy_kategoriya_id
+""")
+
+# Agregatni urinishlar tarixidan qayta hisoblash (sovuq foydalanuvchilar va tekshiruv uchun).
+# Arxivlangan oylar xom jadvalda yo'q - ular oylik yig'indidan qo'shiladi.
+_QAYTA_HISOBLASH_SOROVI = """
+    INSERT INTO kategoriya_rivojlanishi (
+        id, foydalanuvchi_id, asosiy_kategoriya_id, jami_urinishlar,
+        togri_javoblar, aniqlik_foizi, jami_vaqt, faol, yaratilgan_vaqt, yangilangan_vaqt
+    )
+    SELECT gen_random_uuid(), s.foydalanuvchi_id, s.asosiy_kategoriya_id,
+           SUM(s.jami),
+           SUM(s.togri),
+           SUM(s.togri) * 100.0 / SUM(s.jami),
+           SUM(s.vaqt),
+           true, now(), now()
+    FROM (
+        SELECT u.foydalanuvchi_id, kk.asosiy_kategoriya_id,
+               COUNT(*) AS jami,
+               COUNT(*) FILTER (WHERE u.togri) AS togri,
+               COALESCE(SUM(u.sarflangan_vaqt), 0) AS vaqt
+        FROM holat_urinishlari u
+        JOIN holatlar h ON h.id = u.holat_id
+        JOIN bolimlar b ON b.id = h.bolim_id
+        JOIN kichik_kategoriyalar kk ON kk.id = b.kichik_kategoriya_id
+        {shart}
+        GROUP BY u.foydalanuvchi_id, kk.asosiy_kategoriya_id
+        UNION ALL
+        SELECT y.foydalanuvchi_id, y.asosiy_kategoriya_id,
+               y.jami_urinishlar, y.togri_javoblar, y.jami_vaqt
+        FROM urinish_oylik_yigindilari y
+        {yigindi_shart}
+    ) s
+    GROUP BY s.foydalanuvchi_id, s.asosiy_kategoriya_id
+"""
+
+
+class KategoriyaRivojlanishiServisi:
+    """
+    Foydalanuvchi x asosiy kategoriya agregati.
+    Zaif/kuchli tomonlar, dashboard va eksport shu jadvaldan o'qiydi -
+    O(urinishlar) join o'rniga O(kategoriyalar) qidiruv.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def urinish_qoshish(
+        self,
+        foydalanuvchi_id: UUID,
+        bolim_id: UUID,
+        togri: bool,
+        vaqt: int
+    ) -> Optional[str]:
+        """Urinishni agregatga qo'shadi va asosiy kategoriya nomini qaytaradi."""
+        natija = await self.db.execute(
+            _URINISH_SOROVI,
+            {
+                "id": uuid4(),
+                "foydalanuvchi_id": foydalanuvchi_id,
+                "bolim_id": bolim_id,
+                "togri": 1 if togri else 0,
+                "vaqt": vaqt or 0
+            }
+        )
+        return natija.scalar_one_or_none()
+
+    async def royxat(
+        self,
+        foydalanuvchi_id: UUID,
+        minimal_urinish: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Foydalanuvchining kategoriyalar bo'yicha statistikasi (nom bo'yicha saralangan)."""
+        natija = await self.db.execute(
+            select(
+                AsosiyKategoriya.id,
+                AsosiyKategoriya.nomi,
+                AsosiyKategoriya.rang,
+                KategoriyaRivojlanishi.jami_urinishlar,
+                KategoriyaRivojlanishi.togri_javoblar
+            ).join(
+                AsosiyKategoriya,
+                KategoriyaRivojlanishi.asosiy_kategoriya_id == AsosiyKategoriya.id
+            ).where(
+                KategoriyaRivojlanishi.foydalanuvchi_id == foydalanuvchi_id,
+                KategoriyaRivojlanishi.jami_urinishlar >= minimal_urinish
+            ).order_by(AsosiyKategoriya.nomi)
+        )
+
+        statistika = []
+        for row in natija.all():
+            jami = row.jami_urinishlar or 0
+            togri = row.togri_javoblar or 0
+            aniqlik = (togri / jami * 100) if jami > 0 else 0
+            statistika.append({
+                "kategoriya_id": str(row.id),
+                "kategoriya": row.nomi,
+                "rang": row.rang,
+                "jami_urinishlar": jami,
+                "togri_javoblar": togri,
+                "aniqlik": round(aniqlik, 1)
+            })
+        return statistika
+
+    async def qayta_hisoblash(self, foydalanuvchi_id: Optional[UUID] = None) -> int:
+        """
+        Agregatni urinishlar tarixidan qayta quradi (bitta yoki barcha foydalanuvchi).
+        Jadval paydo bo'lishidan oldingi tarixni to'ldirish uchun ishlatiladi.
+        """
+        parametrlar: Dict[str, Any] = {}
+        if foydalanuvchi_id:
+            await self.db.execute(
+                text("DELETE FROM kategoriya_rivojlanishi WHERE foydalanuvchi_id = :fid"),
+                {"fid": foydalanuvchi_id}
+            )
+            shart = "WHERE u.foydalanuvchi_id = :fid"
+            yigindi_shart = "WHERE y.foydalanuvchi_id = :fid"
+            parametrlar["fid"] = foydalanuvchi_id
+        else:
+            await self.db.execute(text("DELETE FROM kategoriya_rivojlanishi"))
+            shart = yigindi_shart = ""
+
+        natija = await self.db.execute(
+            text(_QAYTA_HISOBLASH_SOROVI.format(shart=shart, yigindi_shart=yigindi_shart)),
+            parametrlar
+        )
+        logger.info(f"Kategoriya rivojlanishi qayta hisoblandi: {natija.rowcount} qator")
+        return natija.rowcount
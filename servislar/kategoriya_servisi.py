@@ -14,6 +14,7 @@ from sxemalar.kategoriya import (
     KichikKategoriyaYaratish,
     BolimYaratish
 )
+from servislar.hisoblagich_servisi import HisoblagichServisi
 from sozlamalar.redis_kesh import redis_kesh, kesh_dekoratori, KeshKalitlari
 from vositalar.umumiy import slug_yaratish
 
@@ -256,61 +257,6 @@ class KategoriyaServisi:
     
     # ============== Statistika ==============
     
-    async def holatlar_sonini_yangilash(self, bolim_id: UUID) -> None:
-        """Bo'limdagi holatlar sonini yangilaydi."""
-        from modellar.holat import Holat, QiyinlikDarajasi
-        
-        # Jami holatlar
-        jami_sorov = select(func.count(Holat.id)).where(
-            and_(
-                Holat.bolim_id == bolim_id,
-                Holat.faol == True,
-                Holat.chop_etilgan == True
-            )
-        )
-        jami = await self.db.execute(jami_sorov)
-        jami_soni = jami.scalar()
-        
-        # Qiyinlik bo'yicha
-        oson_sorov = select(func.count(Holat.id)).where(
-            and_(
-                Holat.bolim_id == bolim_id,
-                Holat.faol == True,
-                Holat.chop_etilgan == True,
-                Holat.qiyinlik == QiyinlikDarajasi.OSON
-            )
-        )
-        oson = await self.db.execute(oson_sorov)
-        
-        ortacha_sorov = select(func.count(Holat.id)).where(
-            and_(
-                Holat.bolim_id == bolim_id,
-                Holat.faol == True,
-                Holat.chop_etilgan == True,
-                Holat.qiyinlik == QiyinlikDarajasi.ORTACHA
-            )
-        )
-        ortacha = await self.db.execute(ortacha_sorov)
-        
-        qiyin_sorov = select(func.count(Holat.id)).where(
-            and_(
-                Holat.bolim_id == bolim_id,
-                Holat.faol == True,
-                Holat.chop_etilgan == True,
-                Holat.qiyinlik == QiyinlikDarajasi.QIYIN
-            )
-        )
-        qiyin = await self.db.execute(qiyin_sorov)
-        
-        # Bo'limni yangilash
-        bolim = await self.bolim_olish(bolim_id)
-        if bolim:
-            bolim.holatlar_soni = jami_soni
-            bolim.oson_holatlar = oson.scalar()
-            bolim.ortacha_holatlar = ortacha.scalar()
-            bolim.qiyin_holatlar = qiyin.scalar()
-            await self.db.flush()
-    
     async def toliq_statistika(self) -> dict:
         """Barcha kategoriyalar statistikasi."""
         asosiy_soni = await self._asosiy.soni()
@@ -395,12 +341,19 @@ class KategoriyaServisi:
         kategoriya = await self.kichik_kategoriya_olish(id)
         if not kategoriya:
             return None
+        eski_ota = kategoriya.asosiy_kategoriya_id if kategoriya.faol else None
         
         for kalit, qiymat in malumot.items():
             if hasattr(kategoriya, kalit) and qiymat is not None:
                 setattr(kategoriya, kalit, qiymat)
         
         await self.db.flush()
+        # Faollik yoki asosiy kategoriya o'zgarsa ota hisoblagichlari ham o'zgaradi
+        await HisoblagichServisi(self.db).kichik_kochishi(
+            kategoriya.holatlar_soni,
+            eski_ota,
+            kategoriya.asosiy_kategoriya_id if kategoriya.faol else None
+        )
         await redis_kesh.shablon_ochirish(f"{KeshKalitlari.KATEGORIYA}:*")
         return kategoriya
     
@@ -412,6 +365,11 @@ class KategoriyaServisi:
         
         await self.db.delete(kategoriya)
         await self.db.flush()
+        await HisoblagichServisi(self.db).kichik_kochishi(
+            kategoriya.holatlar_soni,
+            kategoriya.asosiy_kategoriya_id if kategoriya.faol else None,
+            None
+        )
         await redis_kesh.shablon_ochirish(f"{KeshKalitlari.KATEGORIYA}:*")
         return True
     
@@ -424,12 +382,19 @@ class KategoriyaServisi:
         bolim = await self.bolim_olish(id)
         if not bolim:
             return None
+        eski_ota = bolim.kichik_kategoriya_id if bolim.faol else None
         
         for kalit, qiymat in malumot.items():
             if hasattr(bolim, kalit) and qiymat is not None:
                 setattr(bolim, kalit, qiymat)
         
         await self.db.flush()
+        # Faollik yoki kichik kategoriya o'zgarsa ota zanjirlari hisoblagichlari ham o'zgaradi
+        await HisoblagichServisi(self.db).bolim_kochishi(
+            bolim.holatlar_soni,
+            eski_ota,
+            bolim.kichik_kategoriya_id if bolim.faol else None
+        )
         await redis_kesh.shablon_ochirish(f"{KeshKalitlari.KATEGORIYA}:*")
         return bolim
     
@@ -441,5 +406,10 @@ class KategoriyaServisi:
         
         await self.db.delete(bolim)
         await self.db.flush()
+        await HisoblagichServisi(self.db).bolim_kochishi(
+            bolim.holatlar_soni,
+            bolim.kichik_kategoriya_id if bolim.faol else None,
+            None
+        )
         await redis_kesh.shablon_ochirish(f"{KeshKalitlari.KATEGORIYA}:*")
         return True
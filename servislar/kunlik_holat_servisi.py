@@ -0,0 +1,169 @@
+# MedCase Pro Platform - Kunlik Holat Servisi
+# Daily challenge: oldindan tanlangan va tayyor baytlarga render qilingan javob
+
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from datetime import date, timedelta
+from functools import partial
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func
+import hashlib
+import logging
+import time
+
+from modellar.holat import Holat
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+from sozlamalar.malumotlar_bazasi import commitdan_keyin
+
+logger = logging.getLogger(__name__)
+
+# Tanlov va tayyor javob ertangi kun tayyorlanganda ham kerak - 3 kun saqlanadi
+KUNLIK_MUDDATI = 3 * 24 * 3600
+
+# Jarayon ichidagi kesh Redisni shu oraliqda qayta tekshiradi (holat tahrirlansa)
+YAQIN_KESH_MUDDATI = 60
+
+# sana -> (o'qilgan vaqt, tayyor javob)
+_yaqin_kesh: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def _kalit(sana: date, qism: str) -> str:
+    return f"{KeshKalitlari.KUNLIK}:{sana.isoformat()}:{qism}"
+
+
+class KunlikHolatServisi:
+    """
+    Kunlik holat (daily challenge).
+    Holat yarim tundan oldin fon vazifasida bir marta tanlanadi, HolatJavob
+    JSON baytlariga render qilinadi va Redisda saqlanadi. So'rov jarayon
+    ichidagi keshdan ETag bilan xizmat qiladi - baza va Pydantic chetlab o'tiladi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def olish(self, sana: date = None) -> Optional[Dict[str, Any]]:
+        """Tayyor javob: {"holat_id", "etag", "tana"} (tana - JSON bayt)."""
+        sana = sana or date.today()
+        kalit = sana.isoformat()
+
+        yozuv = _yaqin_kesh.get(kalit)
+        if yozuv and time.monotonic() - yozuv[0] < YAQIN_KESH_MUDDATI:
+            return yozuv[1]
+
+        tayyor = await redis_kesh.olish(_kalit(sana, "javob"))
+        if tayyor is None:
+            # Fon vazifasi ishlamagan bo'lsa - so'rov ichida tayyorlash
+            tayyor = await self.tayyorlash(sana)
+        if tayyor is None:
+            return None
+
+        javob = {**tayyor, "tana": tayyor["tana"].encode()}
+        _yaqin_kesh.clear()
+        _yaqin_kesh[kalit] = (time.monotonic(), javob)
+        return javob
+
+    async def tayyorlash(self, sana: date = None) -> Optional[Dict[str, Any]]:
+        """Kun holatini tanlaydi (bir marta), render qiladi va Redisga yozadi."""
+        from servislar.holat_servisi import HolatServisi
+
+        sana = sana or date.today()
+        holat_id = await self._tanlash(sana)
+        if holat_id is None:
+            return None
+
+        holat_servis = HolatServisi(self.db)
+        holat_holati = await holat_servis.kontent_holati(holat_id)
+        if holat_holati is None:
+            return None
+
+        # Holat kontent keshidagi savol ko'rinishi qayta ishlatiladi
+        korinishlar = await holat_servis.korinishlar({holat_id: holat_holati[0]})
+        if holat_id not in korinishlar:
+            return None
+        tana = korinishlar[holat_id].decode()
+        tayyor = {
+            "holat_id": str(holat_id),
+            "etag": f'"{hashlib.sha256(tana.encode()).hexdigest()[:32]}"',
+            "tana": tana
+        }
+        await redis_kesh.saqlash(_kalit(sana, "javob"), tayyor, KUNLIK_MUDDATI)
+        logger.info(f"Kunlik holat tayyorlandi: {sana} -> {holat_id}")
+        return tayyor
+
+    async def _tanlash(self, sana: date) -> Optional[UUID]:
+        """
+        Sana bo'yicha deterministik tanlov (ORDER BY random() o'rniga sana xeshi
+        bo'yicha offset). SET NX bilan yozilgani uchun parallel tanlovchilar
+        bitta holatga keladi.
+        """
+        tanlov_kaliti = _kalit(sana, "holat")
+        tanlangan = await redis_kesh.olish(tanlov_kaliti)
+        if tanlangan:
+            return UUID(tanlangan)
+
+        shart = and_(Holat.faol == True, Holat.chop_etilgan == True)
+        soni = (await self.db.execute(select(func.count()).select_from(Holat).where(shart))).scalar()
+        if not soni:
+            return None
+
+        orni = int(hashlib.sha256(sana.isoformat().encode()).hexdigest(), 16) % soni
+        natija = await self.db.execute(
+            select(Holat.id).where(shart).order_by(Holat.id).offset(orni).limit(1)
+        )
+        holat_id = natija.scalar_one_or_none()
+        if holat_id is None:
+            return None
+
+        await redis_kesh.yoq_bolsa_saqlash(tanlov_kaliti, str(holat_id), KUNLIK_MUDDATI)
+        tanlangan = await redis_kesh.olish(tanlov_kaliti)
+        return UUID(tanlangan) if tanlangan else holat_id
+
+    def holat_ozgardi(self, holat_id: UUID) -> None:
+        """
+        Tahrirlangan holat bugungi yoki ertangi challenge bo'lsa tahrir commit
+        qilingandan keyin qayta render qilinadi (rollbackda eski javob qoladi).
+        """
+        commitdan_keyin(self.db, partial(self._qayta_render, holat_id))
+
+    async def _qayta_render(self, holat_id: UUID) -> None:
+        bugun = date.today()
+        for sana in (bugun, bugun + timedelta(days=1)):
+            if await redis_kesh.olish(_kalit(sana, "holat")) == str(holat_id):
+                await self.tayyorlash(sana)
+
+    # ============== Statistika ==============
+
+    @staticmethod
+    async def urinish_qayd_etish(holat_id: UUID, togri: bool, vaqt: int) -> None:
+        """Urinish bugungi challenge holatiga bo'lsa alohida hisoblagichlarga qo'shiladi."""
+        sana = date.today()
+        yozuv = _yaqin_kesh.get(sana.isoformat())
+        if yozuv:
+            bugungi_id = yozuv[1]["holat_id"]
+        else:
+            bugungi_id = await redis_kesh.olish(_kalit(sana, "holat"))
+        if bugungi_id != str(holat_id):
+            return
+
+        await redis_kesh.oshirish_va_muddat(_kalit(sana, "urinishlar"), KUNLIK_MUDDATI)
+        await redis_kesh.oshirish_va_muddat(_kalit(sana, "vaqt"), KUNLIK_MUDDATI, vaqt or 0)
+        if togri:
+            await redis_kesh.oshirish_va_muddat(_kalit(sana, "togri"), KUNLIK_MUDDATI)
+
+    @staticmethod
+    async def statistika(sana: date = None) -> Dict[str, Any]:
+        """Kunlik challenge urinishlari statistikasi."""
+        sana = sana or date.today()
+        holat_id = await redis_kesh.olish(_kalit(sana, "holat"))
+        urinishlar = int(await redis_kesh.olish(_kalit(sana, "urinishlar")) or 0)
+        togri = int(await redis_kesh.olish(_kalit(sana, "togri")) or 0)
+        vaqt = int(await redis_kesh.olish(_kalit(sana, "vaqt")) or 0)
+        return {
+            "sana": sana.isoformat(),
+            "holat_id": holat_id,
+            "urinishlar": urinishlar,
+            "togri_javoblar": togri,
+            "aniqlik": round(togri / urinishlar * 100, 1) if urinishlar else 0.0,
+            "ortacha_vaqt": round(vaqt / urinishlar, 1) if urinishlar else 0.0
+        }
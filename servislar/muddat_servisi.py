@@ -0,0 +1,137 @@
+# MedCase Pro Platform - Takrorlash Muddatlari Servisi
+# Foydalanuvchi bo'yicha kunlik "muddati kelgan kartalar" soni (Redis hash)
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func
+import logging
+
+from modellar.takrorlash import TakrorlashKartasi
+from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+
+logger = logging.getLogger(__name__)
+
+# O'tgan sanalar qayta qurishda bitta maydonga yig'iladi
+KECHIKKAN = date.min.isoformat()
+
+# Muddatli kartalar sharti - idx_takrorlash_muddatli partial indeksi bilan bir xil
+MUDDATLI = and_(TakrorlashKartasi.oqilgan == False, TakrorlashKartasi.faol == True)
+
+
+def kalit(foydalanuvchi_id: UUID) -> str:
+    return f"{KeshKalitlari.TAKRORLASH}:muddat:{foydalanuvchi_id}"
+
+
+def bugungi_soni(maydonlar: Dict[str, str], bugun: date = None) -> int:
+    """Bugun va undan oldingi sanalar yig'indisi (ISO sanalar satr sifatida solishtiriladi)."""
+    chegara = (bugun or date.today()).isoformat()
+    return sum(int(soni) for sana, soni in maydonlar.items() if sana <= chegara)
+
+
+class MuddatServisi:
+    """
+    Takrorlash muddatlari indeksi.
+    Har bir foydalanuvchi uchun Redis hash: sana -> shu kuni muddati keladigan kartalar soni.
+    Karta yaratilganda, baholanganda va o'qilgan deb belgilanganda delta bilan yangilanadi;
+    hash yo'q bo'lsa partial indeks orqali bazadan quriladi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    async def kochirish(
+        foydalanuvchi_id: UUID,
+        kochishlar: Iterable[Tuple[Optional[date], Optional[date]]]
+    ) -> None:
+        """Kartalarni eski sanadan yangi sanaga ko'chiradi (None - indeksda yo'q)."""
+        deltalar: Counter = Counter()
+        for eski, yangi in kochishlar:
+            if eski == yangi:
+                continue
+            if eski:
+                deltalar[eski.isoformat()] -= 1
+            if yangi:
+                deltalar[yangi.isoformat()] += 1
+        await redis_kesh.hash_oshirish(kalit(foydalanuvchi_id), dict(deltalar))
+
+    async def bugun_soni(self, foydalanuvchi_id: UUID) -> int:
+        """Bugun takrorlash kerak bo'lgan kartalar soni - bitta Redis o'qish."""
+        maydonlar = await redis_kesh.hash_olish(kalit(foydalanuvchi_id))
+        if not maydonlar:
+            maydonlar = await self.qayta_qurish(foydalanuvchi_id)
+        return bugungi_soni(maydonlar)
+
+    async def qayta_qurish(self, foydalanuvchi_id: UUID) -> Dict[str, str]:
+        """Bitta foydalanuvchi hashini partial indeks bo'yicha qayta quradi."""
+        natija = await self.db.execute(
+            select(
+                TakrorlashKartasi.keyingi_takrorlash,
+                func.count()
+            ).where(
+                and_(TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id, MUDDATLI)
+            ).group_by(TakrorlashKartasi.keyingi_takrorlash)
+        )
+        maydonlar = self._maydonlar(natija.all())
+        await redis_kesh.hash_saqlash(kalit(foydalanuvchi_id), maydonlar)
+        return maydonlar
+
+    async def hammasini_qayta_qurish(self) -> int:
+        """
+        Barcha foydalanuvchilar hashlarini qayta quradi (kunlik vazifa).
+        O'tgan sanalar bitta maydonga yig'iladi va to'plangan drift tuzatiladi.
+        """
+        # Kartasi qolmagan foydalanuvchilar hashlari ham eskirgan bo'lishi mumkin
+        await redis_kesh.shablon_ochirish(kalit("*"))
+
+        natija = await self.db.stream(
+            select(
+                TakrorlashKartasi.foydalanuvchi_id,
+                TakrorlashKartasi.keyingi_takrorlash,
+                func.count()
+            ).where(MUDDATLI).group_by(
+                TakrorlashKartasi.foydalanuvchi_id,
+                TakrorlashKartasi.keyingi_takrorlash
+            ).order_by(TakrorlashKartasi.foydalanuvchi_id).execution_options(yield_per=5000)
+        )
+
+        soni = 0
+        joriy, qatorlar = None, []
+        async for foydalanuvchi_id, sana, miqdor in natija:
+            if joriy is not None and foydalanuvchi_id != joriy:
+                await redis_kesh.hash_saqlash(kalit(joriy), self._maydonlar(qatorlar))
+                soni += 1
+                qatorlar = []
+            joriy = foydalanuvchi_id
+            qatorlar.append((sana, miqdor))
+        if joriy is not None:
+            await redis_kesh.hash_saqlash(kalit(joriy), self._maydonlar(qatorlar))
+            soni += 1
+
+        logger.info(f"Takrorlash muddatlari qayta qurildi: {soni} foydalanuvchi")
+        return soni
+
+    @staticmethod
+    def _maydonlar(qatorlar: Iterable[Tuple[date, int]]) -> Dict[str, str]:
+        bugun = date.today()
+        maydonlar: Counter = Counter()
+        for sana, miqdor in qatorlar:
+            maydonlar[KECHIKKAN if sana < bugun else sana.isoformat()] += miqdor
+        # Bo'sh hash Redisda saqlanmaydi - belgi maydon kalit mavjudligini ta'minlaydi
+        maydonlar.setdefault(KECHIKKAN, 0)
+        return {sana: str(miqdor) for sana, miqdor in maydonlar.items()}
+
+    async def muddatli_foydalanuvchilar(self, sana: date = None) -> List[UUID]:
+        """
+        Berilgan sanagacha muddati kelgan kartasi bor foydalanuvchilar
+        (eslatmalar uchun) - idx_takrorlash_muddat_global bo'yicha index-only scan.
+        """
+        natija = await self.db.execute(
+            select(TakrorlashKartasi.foydalanuvchi_id).where(
+                and_(TakrorlashKartasi.keyingi_takrorlash <= (sana or date.today()), MUDDATLI)
+            ).distinct()
+        )
+        return natija.scalars().all()
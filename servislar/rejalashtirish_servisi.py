@@ -0,0 +1,255 @@
+# MedCase Pro Platform - Takrorlash Rejalashtirish Servisi
+# Kartalarni NumPy massivlarida vektorlashtirilgan qayta rejalashtirish
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, text
+import logging
+import time
+
+import numpy as np
+
+from modellar.takrorlash import TakrorlashKartasi
+
+logger = logging.getLogger(__name__)
+
+# Bir bo'lakda yuklanadigan kartalar soni (keyset pagination)
+BOLAK_HAJMI = 50_000
+
+# O'zgargan qatorlarni bitta set-based UPDATE bilan yozish
+_YOZISH_SOROVI = text("""
+    UPDATE takrorlash_kartalari AS k SET
+        easiness_factor = v.ef,
+        "interval" = v.ivl,
+        keyingi_takrorlash = v.keyingi,
+        yangilangan_vaqt = now()
+    FROM unnest(
+        CAST(:idlar AS uuid[]),
+        CAST(:ef AS float8[]),
+        CAST(:interval AS int[]),
+        CAST(:keyingi AS date[])
+    ) AS v(id, ef, ivl, keyingi)
+    WHERE k.id = v.id
+""")
+
+Massivlar = Dict[str, np.ndarray]
+
+
+def sm2_vektor(
+    ef: np.ndarray,
+    interval: np.ndarray,
+    repetition: np.ndarray,
+    sifat: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    sm2_qadam ning vektorlashtirilgan varianti (bir xil natija).
+    Qaytaradi: (EF, interval, repetition, to'g'ri maskasi).
+    """
+    q = 5 - sifat
+    ef_yangi = np.maximum(1.3, ef + (0.1 - q * (0.08 + q * 0.02)))
+    togri = sifat >= 3
+
+    # np.rint ham Python round() kabi juftga yaxlitlaydi
+    interval_yangi = np.where(
+        repetition == 0, 1,
+        np.where(repetition == 1, 6, np.rint(interval * ef_yangi))
+    )
+    interval_yangi = np.where(togri, interval_yangi, 1).astype(np.int32)
+    repetition_yangi = np.where(togri, repetition + 1, 0).astype(np.int32)
+    return ef_yangi, interval_yangi, repetition_yangi, togri
+
+
+# ============== Siyosatlar ==============
+# Har bir siyosat massivlarni oladi va yangi (ef, interval, keyingi) qaytaradi.
+# Sanalar proleptik ordinal (date.toordinal) sifatida int32 massivda.
+
+def _asos_sana(m: Massivlar) -> np.ndarray:
+    """Intervalni hisoblash boshlanadigan sana - oxirgi takrorlash yoki (keyingi - interval)."""
+    return np.where(m["oxirgi"] > 0, m["oxirgi"], m["keyingi"] - m["interval"])
+
+
+def tatil_siyosati(m: Massivlar, bugun: int, kunlar: int) -> Tuple[np.ndarray, ...]:
+    """Ta'til rejimi: muddati kelgan va yaqin kunlardagi kartalarni kunlar soniga suradi."""
+    keyingi = np.where(m["keyingi"] < bugun + kunlar, m["keyingi"] + kunlar, m["keyingi"])
+    return m["ef"], m["interval"], keyingi
+
+
+def yuklamani_tekislash(m: Massivlar, bugun: int, kunlar: int) -> Tuple[np.ndarray, ...]:
+    """
+    Kechikkan kartalarni keyingi `kunlar` kunga teng taqsimlaydi.
+    Eng ko'p kechikkanlar birinchi kunlarga tushadi.
+    """
+    keyingi = m["keyingi"].copy()
+    kechikkan = np.flatnonzero(keyingi < bugun)
+    if kechikkan.size:
+        tartib = kechikkan[np.argsort(keyingi[kechikkan], kind="stable")]
+        keyingi[tartib] = bugun + (np.arange(tartib.size) * kunlar) // tartib.size
+    return m["ef"], m["interval"], keyingi
+
+
+def ef_kalibrlash(
+    m: Massivlar,
+    bugun: int,
+    koeffitsient: float,
+    minimal: float = 1.3,
+    maksimal: float = 3.0
+) -> Tuple[np.ndarray, ...]:
+    """EF ni koeffitsientga ko'paytiradi; yetilgan kartalar intervali mutanosib o'zgaradi."""
+    ef = np.clip(m["ef"] * koeffitsient, minimal, maksimal)
+    yetilgan = m["repetition"] >= 2
+    interval = np.where(
+        yetilgan,
+        np.maximum(1, np.rint(m["interval"] * ef / m["ef"])),
+        m["interval"]
+    ).astype(np.int32)
+    keyingi = np.where(yetilgan, _asos_sana(m) + interval, m["keyingi"])
+    return ef, interval, keyingi
+
+
+def interval_siyosati(m: Massivlar, bugun: int, maksimal_interval: int) -> Tuple[np.ndarray, ...]:
+    """Intervalni yuqoridan cheklaydi va keyingi sanani qayta hisoblaydi."""
+    interval = np.minimum(m["interval"], maksimal_interval).astype(np.int32)
+    keyingi = np.where(
+        interval < m["interval"], _asos_sana(m) + interval, m["keyingi"]
+    )
+    return m["ef"], interval, keyingi
+
+
+SIYOSATLAR: Dict[str, Callable[..., Tuple[np.ndarray, ...]]] = {
+    "tatil": tatil_siyosati,
+    "tekislash": yuklamani_tekislash,
+    "ef_kalibrlash": ef_kalibrlash,
+    "interval": interval_siyosati,
+}
+
+
+def siyosatni_qollash(
+    m: Massivlar,
+    siyosat: str,
+    bugun: int,
+    **parametrlar
+) -> Tuple[np.ndarray, Massivlar]:
+    """Siyosatni qo'llaydi va (o'zgargan indekslar, yangi qiymatlar) qaytaradi."""
+    if siyosat not in SIYOSATLAR:
+        raise ValueError(f"Noma'lum siyosat: {siyosat}")
+
+    ef, interval, keyingi = SIYOSATLAR[siyosat](m, bugun, **parametrlar)
+    interval = np.asarray(interval).astype(np.int32)
+    keyingi = np.asarray(keyingi).astype(np.int32)
+    ozgargan = np.flatnonzero(
+        (ef != m["ef"]) | (interval != m["interval"]) | (keyingi != m["keyingi"])
+    )
+    return ozgargan, {
+        "ef": ef[ozgargan],
+        "interval": interval[ozgargan],
+        "keyingi": keyingi[ozgargan],
+    }
+
+
+def yozish_parametrlari(idlar: List[UUID], ozgargan: np.ndarray, yangi: Massivlar) -> Dict[str, list]:
+    """UPDATE ... FROM unnest uchun massiv parametrlari."""
+    return {
+        "idlar": [idlar[i] for i in ozgargan.tolist()],
+        "ef": yangi["ef"].astype(float).tolist(),
+        "interval": yangi["interval"].astype(int).tolist(),
+        "keyingi": [date.fromordinal(k) for k in yangi["keyingi"].tolist()],
+    }
+
+
+class RejalashtirishServisi:
+    """
+    Takrorlash kartalarini ommaviy qayta rejalashtirish.
+    Kartalar bo'laklab NumPy massivlariga yuklanadi, siyosat vektorlashtirilgan
+    hisoblanadi va faqat o'zgargan qatorlar bitta set-based UPDATE bilan yoziladi.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _bolak_yuklash(
+        self,
+        oxirgi_id: Optional[UUID],
+        foydalanuvchi_id: Optional[UUID]
+    ) -> Tuple[List[UUID], Massivlar]:
+        """Keyingi bo'lakni id bo'yicha keyset pagination bilan yuklaydi."""
+        filtrlar = [
+            TakrorlashKartasi.faol == True,
+            TakrorlashKartasi.oqilgan == False
+        ]
+        if oxirgi_id:
+            filtrlar.append(TakrorlashKartasi.id > oxirgi_id)
+        if foydalanuvchi_id:
+            filtrlar.append(TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id)
+
+        natija = await self.db.execute(
+            select(
+                TakrorlashKartasi.id,
+                TakrorlashKartasi.easiness_factor,
+                TakrorlashKartasi.interval,
+                TakrorlashKartasi.repetition,
+                TakrorlashKartasi.keyingi_takrorlash,
+                TakrorlashKartasi.oxirgi_takrorlash
+            ).where(and_(*filtrlar)).order_by(TakrorlashKartasi.id).limit(BOLAK_HAJMI)
+        )
+        qatorlar = natija.all()
+        if not qatorlar:
+            return [], {}
+
+        idlar, ef, interval, repetition, keyingi, oxirgi = zip(*qatorlar)
+        n = len(idlar)
+        return list(idlar), {
+            "ef": np.fromiter(ef, dtype=np.float64, count=n),
+            "interval": np.fromiter(interval, dtype=np.int32, count=n),
+            "repetition": np.fromiter(repetition, dtype=np.int32, count=n),
+            "keyingi": np.fromiter((k.toordinal() for k in keyingi), dtype=np.int32, count=n),
+            "oxirgi": np.fromiter(
+                (o.date().toordinal() if o else 0 for o in oxirgi), dtype=np.int32, count=n
+            ),
+        }
+
+    async def qayta_rejalashtirish(
+        self,
+        siyosat: str,
+        parametrlar: Dict[str, Any] = None,
+        foydalanuvchi_id: Optional[UUID] = None,
+        sinov: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Siyosatni barcha (yoki bitta foydalanuvchi) kartalariga qo'llaydi.
+        sinov=True bo'lsa hech narsa yozilmaydi, faqat hisobot qaytadi.
+        Har bir bo'lak alohida commit qilinadi - uzun tranzaksiya va qulflar bo'lmaydi.
+        """
+        if siyosat not in SIYOSATLAR:
+            raise ValueError(f"Noma'lum siyosat: {siyosat}")
+
+        parametrlar = parametrlar or {}
+        bugun = date.today().toordinal()
+        hisobot = {"siyosat": siyosat, "korilgan": 0, "ozgargan": 0, "bolaklar": 0, "soniya": 0.0}
+        boshlanish = time.perf_counter()
+
+        oxirgi_id = None
+        while True:
+            idlar, massivlar = await self._bolak_yuklash(oxirgi_id, foydalanuvchi_id)
+            if not idlar:
+                break
+            oxirgi_id = idlar[-1]
+
+            ozgargan, yangi = siyosatni_qollash(massivlar, siyosat, bugun, **parametrlar)
+            hisobot["korilgan"] += len(idlar)
+            hisobot["ozgargan"] += int(ozgargan.size)
+            hisobot["bolaklar"] += 1
+
+            if ozgargan.size and not sinov:
+                await self.db.execute(
+                    _YOZISH_SOROVI, yozish_parametrlari(idlar, ozgargan, yangi)
+                )
+                await self.db.commit()
+
+            if len(idlar) < BOLAK_HAJMI:
+                break
+
+        hisobot["soniya"] = round(time.perf_counter() - boshlanish, 3)
+        logger.info(f"Qayta rejalashtirish: {hisobot}")
+        return hisobot
@@ -7,14 +7,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, update
 from sqlalchemy.orm import selectinload
 from datetime import datetime, date, timedelta
+from functools import partial
 
 from modellar.rivojlanish import (
     HolatUrinishi, OqishSessiyasi,
     KunlikStatistika, FoydalanuvchiRivojlanishi,
-    BolimRivojlanishi
+    BolimRivojlanishi, UrinishOylikYigindisi
 )
 from modellar.holat import Holat, QiyinlikDarajasi
 from sxemalar.rivojlanish import UrinishYaratish
+from servislar.kategoriya_rivojlanishi_servisi import KategoriyaRivojlanishiServisi
+from servislar.arxiv_servisi import ArxivServisi
+from servislar.bolak_servisi import oxirgi_urinishlar
+from servislar.gamifikatsiya_servisi import nishon_hisoblagichlari
+from servislar.daraja_servisi import DarajaServisi
+from servislar.dashboard_servisi import DashboardServisi
+from servislar.kunlik_holat_servisi import KunlikHolatServisi
+from sozlamalar.malumotlar_bazasi import commitdan_keyin
 
 
 class RivojlanishServisi:
@@ -68,6 +77,10 @@ class RivojlanishServisi:
             foydalanuvchi_id, holat.bolim_id, togri,
             malumot.sarflangan_vaqt
         )
+        kategoriya_nomi = await KategoriyaRivojlanishiServisi(self.db).urinish_qoshish(
+            foydalanuvchi_id, holat.bolim_id, togri,
+            malumot.sarflangan_vaqt
+        )
         
         # Sessiyani yangilash
         if malumot.sessiya_id:
@@ -77,6 +90,16 @@ class RivojlanishServisi:
         
         await self.db.flush()
         await self.db.refresh(urinish)
+
+        # Dashboard snapshoti va kunlik challenge hisoblagichlari faqat urinish commit
+        # qilingandan keyin yangilanadi - bekor qilingan urinish ularda qolmaydi
+        commitdan_keyin(self.db, partial(
+            DashboardServisi.urinish_qollash, urinish, kategoriya_nomi, rivojlanish_ozgarish
+        ))
+        commitdan_keyin(self.db, partial(
+            KunlikHolatServisi.urinish_qayd_etish,
+            malumot.holat_id, togri, malumot.sarflangan_vaqt
+        ))
         
         # Nishonlarni tekshirish va berish
         yangi_nishon_nomlari = []
@@ -85,7 +108,7 @@ class RivojlanishServisi:
             from servislar.gamifikatsiya_servisi import GamifikatsiyaServisi
             gamifikatsiya_servis = GamifikatsiyaServisi(self.db)
             yangi_nishonlar = await gamifikatsiya_servis.nishon_tekshirish_va_berish(
-                foydalanuvchi_id
+                foydalanuvchi_id, rivojlanish_ozgarish["hisoblagichlar"]
             )
             if yangi_nishonlar:
                 yangi_nishon_nomlari = [n.nom for n in yangi_nishonlar]
@@ -119,7 +142,7 @@ class RivojlanishServisi:
                 await nishon_yuborish(
                     str(foydalanuvchi_id),
                     nishon.nom,
-                    nishon.rasm_url,
+                    nishon.ikonka_url,
                     nishon.ball_qiymati
                 )
         except Exception:
@@ -169,6 +192,7 @@ class RivojlanishServisi:
             self.db.add(rivojlanish)
             await self.db.flush()
         
+        oldingi_hisoblagichlar = nishon_hisoblagichlari(rivojlanish)
         old_joriy_streak = rivojlanish.joriy_streak or 0
         old_eng_uzun_streak = rivojlanish.eng_uzun_streak or 0
         old_daraja = rivojlanish.daraja or 1
@@ -226,7 +250,8 @@ class RivojlanishServisi:
         rivojlanish.oxirgi_faollik = bugun
         
         # Daraja hisoblash
-        rivojlanish.daraja = self._daraja_hisoblash(rivojlanish.jami_ball)
+        rivojlanish.daraja = await DarajaServisi(self.db).daraja_hisoblash(rivojlanish.jami_ball)
+        yangi_hisoblagichlar = nishon_hisoblagichlari(rivojlanish)
 
         return {
             "old_joriy_streak": old_joriy_streak,
@@ -234,22 +259,16 @@ class RivojlanishServisi:
             "old_daraja": old_daraja,
             "new_joriy_streak": rivojlanish.joriy_streak or 0,
             "new_eng_uzun_streak": rivojlanish.eng_uzun_streak or 0,
-            "new_daraja": rivojlanish.daraja or 1
+            "new_daraja": rivojlanish.daraja or 1,
+            "jami_urinishlar": rivojlanish.jami_urinishlar,
+            "aniqlik_foizi": rivojlanish.aniqlik_foizi or 0.0,
+            # Nishon qoidalari uchun: shart turi -> (oldingi, yangi)
+            "hisoblagichlar": {
+                turi: (oldingi_hisoblagichlar[turi], yangi_hisoblagichlar[turi])
+                for turi in yangi_hisoblagichlar
+            }
         }
     
-    def _daraja_hisoblash(self, ball: int) -> int:
-        """Ball asosida darajani hisoblaydi."""
-        darajalar = [
-            (0, 1), (100, 2), (300, 3), (600, 4), (1000, 5),
-            (1500, 6), (2200, 7), (3000, 8), (4000, 9), (5000, 10),
-            (6500, 11), (8000, 12), (10000, 13), (12500, 14), (15000, 15)
-        ]
-        daraja = 1
-        for kerakli_ball, dar in darajalar:
-            if ball >= kerakli_ball:
-                daraja = dar
-        return daraja
-    
     async def _kunlik_statistika_yangilash(
         self,
         foydalanuvchi_id: UUID,
@@ -388,24 +407,31 @@ class RivojlanishServisi:
         sahifa: int = 1,
         hajm: int = 20
     ) -> Tuple[List[HolatUrinishi], int]:
-        """Foydalanuvchi urinishlarini oladi."""
-        sorov = select(HolatUrinishi).where(
-            HolatUrinishi.foydalanuvchi_id == foydalanuvchi_id
-        ).order_by(
-            HolatUrinishi.yaratilgan_vaqt.desc()
-        )
-        
-        hisob = select(func.count(HolatUrinishi.id)).where(
-            HolatUrinishi.foydalanuvchi_id == foydalanuvchi_id
+        """
+        Foydalanuvchi urinishlarini oladi.
+        Jami son agregatdan - COUNT barcha oylik bo'laklarni aylanib chiqmaydi.
+        Arxivlangan oylar qatorlari sahifalarda yo'q, shuning uchun ularning
+        yig'indisi ayiriladi: jami faqat ArxivServisi.chegara() dan keyingi qatorlar.
+        """
+        urinishlar = await oxirgi_urinishlar(
+            self.db, foydalanuvchi_id, hajm, (sahifa - 1) * hajm
         )
-        
-        offset = (sahifa - 1) * hajm
-        sorov = sorov.offset(offset).limit(hajm)
-        
-        natija = await self.db.execute(sorov)
-        jami = await self.db.execute(hisob)
-        
-        return natija.scalars().all(), jami.scalar()
+        jami = await self.db.scalar(
+            select(FoydalanuvchiRivojlanishi.jami_urinishlar).where(
+                FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id
+            )
+        ) or 0
+        
+        chegara = await ArxivServisi(self.db).chegara()
+        if chegara is not None and jami:
+            arxivda = await self.db.scalar(
+                select(func.coalesce(func.sum(UrinishOylikYigindisi.jami_urinishlar), 0)).where(
+                    UrinishOylikYigindisi.foydalanuvchi_id == foydalanuvchi_id,
+                    UrinishOylikYigindisi.oy < chegara.date()
+                )
+            )
+            jami = max(jami - (arxivda or 0), 0)
+        return urinishlar, jami
     
     async def sessiya_boshlash(
         self,
@@ -4,14 +4,19 @@
 from typing import Optional, List, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, case, update, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import selectinload
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
+from functools import partial
 
-from modellar.takrorlash import TakrorlashKartasi, TakrorlashTarixi, TakrorlashSessiyasi
-from modellar.holat import Holat
+from modellar.takrorlash import TakrorlashKartasi, TakrorlashTarixi, TakrorlashSessiyasi, sm2_qadam
+from modellar.holat import Holat, HolatVarianti
+from modellar.rivojlanish import FoydalanuvchiRivojlanishi
 from modellar.kategoriya import Bolim, KichikKategoriya
-from sxemalar.takrorlash import TakrorlashBaholash
+from sxemalar.takrorlash import TakrorlashBaholash, PaketBaho
+from servislar.muddat_servisi import MuddatServisi
+from sozlamalar.malumotlar_bazasi import commitdan_keyin
 
 
 class TakrorlashServisi:
@@ -44,6 +49,9 @@ class TakrorlashServisi:
             self.db.add(karta)
             await self.db.flush()
             await self.db.refresh(karta)
+            commitdan_keyin(self.db, partial(
+                MuddatServisi.kochirish, foydalanuvchi_id, [(None, karta.keyingi_takrorlash)]
+            ))
         
         return karta
     
@@ -59,9 +67,14 @@ class TakrorlashServisi:
         # Tarix uchun eski qiymatlar
         ef_oldin = karta.easiness_factor
         interval_oldin = karta.interval
+        keyingi_oldin = karta.keyingi_takrorlash
         
         # SM-2 hisoblash
         karta.sm2_hisoblash(malumot.sifat)
+        if not karta.oqilgan and karta.faol:
+            commitdan_keyin(self.db, partial(
+                MuddatServisi.kochirish, foydalanuvchi_id, [(keyingi_oldin, karta.keyingi_takrorlash)]
+            ))
         
         # Tarix yaratish
         tarix = TakrorlashTarixi(
@@ -75,6 +88,7 @@ class TakrorlashServisi:
             interval_keyin=karta.interval
         )
         self.db.add(tarix)
+        await self._streak_yangilash(foydalanuvchi_id)
         
         await self.db.flush()
         await self.db.refresh(karta)
@@ -113,6 +127,229 @@ class TakrorlashServisi:
         
         return kartalar
     
+    async def navbat_olish(
+        self,
+        foydalanuvchi_id: UUID,
+        limit: int = 50,
+        faqat_bugungi: bool = True
+    ) -> List[dict]:
+        """
+        Oflayn baholash uchun ixcham navbat: karta holati va holat mazmuni.
+        ORM ob'ektlarisiz ikki so'rov - kartalar+holat+bo'lim va variantlar.
+        """
+        filtrlar = [
+            TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id,
+            TakrorlashKartasi.oqilgan == False,
+            TakrorlashKartasi.faol == True
+        ]
+        if faqat_bugungi:
+            filtrlar.append(TakrorlashKartasi.keyingi_takrorlash <= date.today())
+
+        sorov = select(
+            TakrorlashKartasi.id.label("karta_id"),
+            TakrorlashKartasi.holat_id,
+            TakrorlashKartasi.easiness_factor,
+            TakrorlashKartasi.interval,
+            TakrorlashKartasi.repetition,
+            TakrorlashKartasi.keyingi_takrorlash,
+            Holat.sarlavha,
+            Holat.qiyinlik,
+            Holat.klinik_stsenariy,
+            Holat.savol,
+            Holat.togri_javob,
+            Holat.umumiy_tushuntirish,
+            Bolim.nomi.label("kategoriya_nomi")
+        ).join(
+            Holat, TakrorlashKartasi.holat_id == Holat.id
+        ).outerjoin(
+            Bolim, Holat.bolim_id == Bolim.id
+        ).where(
+            and_(*filtrlar)
+        ).order_by(
+            TakrorlashKartasi.keyingi_takrorlash.asc()
+        ).limit(limit)
+
+        natija = await self.db.execute(sorov)
+        kartalar = []
+        for qator in natija.mappings().all():
+            karta = dict(qator)
+            karta["qiyinlik"] = karta["qiyinlik"].value if karta["qiyinlik"] else None
+            karta["variantlar"] = []
+            kartalar.append(karta)
+
+        if kartalar:
+            holatlar = {k["holat_id"]: k for k in kartalar}
+            var_natija = await self.db.execute(
+                select(
+                    HolatVarianti.holat_id,
+                    HolatVarianti.belgi,
+                    HolatVarianti.matn,
+                    HolatVarianti.togri,
+                    HolatVarianti.tushuntirish
+                ).where(
+                    HolatVarianti.holat_id.in_(list(holatlar))
+                ).order_by(HolatVarianti.holat_id, HolatVarianti.belgi)
+            )
+            for holat_id, belgi, matn, togri, tushuntirish in var_natija.all():
+                holatlar[holat_id]["variantlar"].append({
+                    "belgi": belgi,
+                    "matn": matn,
+                    "togri": togri,
+                    "tushuntirish": tushuntirish
+                })
+
+        return kartalar
+
+    async def paket_baholash(
+        self,
+        foydalanuvchi_id: UUID,
+        baholar: List[PaketBaho],
+        sessiya_id: Optional[UUID] = None
+    ) -> dict:
+        """
+        Oflayn baholangan kartalar paketini qo'llaydi.
+        Kartalar bitta SELECT ... FOR UPDATE bilan olinadi, SM-2 xotirada hisoblanadi,
+        so'ng bitta bulk UPDATE va bitta ko'p qatorli tarix INSERT bajariladi.
+        Bir karta paketda bir necha marta kelsa baholar tartib bilan qo'llanadi.
+        """
+        karta_idlari = list({b.karta_id for b in baholar})
+        natija = await self.db.execute(
+            select(
+                TakrorlashKartasi.id,
+                TakrorlashKartasi.easiness_factor,
+                TakrorlashKartasi.interval,
+                TakrorlashKartasi.repetition,
+                TakrorlashKartasi.jami_takrorlashlar,
+                TakrorlashKartasi.togri_javoblar,
+                TakrorlashKartasi.keyingi_takrorlash,
+                TakrorlashKartasi.oqilgan,
+                TakrorlashKartasi.faol
+            ).where(
+                and_(
+                    TakrorlashKartasi.id.in_(karta_idlari),
+                    TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id
+                )
+            ).with_for_update()
+        )
+        holatlar = {}
+        muddatli_oldin = {}  # Muddatlar indeksidagi kartalarning eski sanasi
+        for qator in natija.all():
+            karta = qator._asdict()
+            oqilgan, faol = karta.pop("oqilgan"), karta.pop("faol")
+            if not oqilgan and faol:
+                muddatli_oldin[karta["id"]] = karta["keyingi_takrorlash"]
+            holatlar[karta["id"]] = karta
+
+        hozir = datetime.now(timezone.utc)
+        tarix_qatorlari = []
+        togri_soni = 0
+        for baho in baholar:
+            karta = holatlar.get(baho.karta_id)
+            if karta is None:
+                continue
+
+            ef_oldin, interval_oldin = karta["easiness_factor"], karta["interval"]
+            ef, interval, repetition, togri = sm2_qadam(
+                ef_oldin, interval_oldin, karta["repetition"], baho.sifat
+            )
+            # Oflayn baho vaqti - kelajakdagi vaqtga ruxsat yo'q
+            vaqt = baho.baholangan_vaqt or hozir
+            if vaqt.tzinfo is None:
+                vaqt = vaqt.replace(tzinfo=timezone.utc)
+            vaqt = min(vaqt, hozir)
+
+            karta.update(
+                easiness_factor=ef,
+                interval=interval,
+                repetition=repetition,
+                jami_takrorlashlar=karta["jami_takrorlashlar"] + 1,
+                togri_javoblar=karta["togri_javoblar"] + (1 if togri else 0),
+                oxirgi_takrorlash=vaqt,
+                # Sana manbai date.today() bilan bir xil (server mahalliy kuni) -
+                # aks holda yarim tun atrofidagi baholar boshqa kunga tushadi
+                keyingi_takrorlash=vaqt.astimezone().date() + timedelta(days=interval)
+            )
+            togri_soni += 1 if togri else 0
+            tarix_qatorlari.append({
+                "karta_id": baho.karta_id,
+                "sifat": baho.sifat,
+                "togri": togri,
+                "sarflangan_vaqt": baho.sarflangan_vaqt,
+                "ef_oldin": ef_oldin,
+                "ef_keyin": ef,
+                "interval_oldin": interval_oldin,
+                "interval_keyin": interval
+            })
+
+        yangilanganlar = [k for k in holatlar.values() if "oxirgi_takrorlash" in k]
+        if yangilanganlar:
+            await self.db.execute(update(TakrorlashKartasi), yangilanganlar)
+            await self.db.execute(insert(TakrorlashTarixi), tarix_qatorlari)
+            await self._streak_yangilash(foydalanuvchi_id)
+            commitdan_keyin(self.db, partial(MuddatServisi.kochirish, foydalanuvchi_id, [
+                (eski, holatlar[karta_id]["keyingi_takrorlash"])
+                for karta_id, eski in muddatli_oldin.items()
+            ]))
+
+            if sessiya_id:
+                await self.db.execute(
+                    update(TakrorlashSessiyasi).where(
+                        and_(
+                            TakrorlashSessiyasi.id == sessiya_id,
+                            TakrorlashSessiyasi.foydalanuvchi_id == foydalanuvchi_id
+                        )
+                    ).values(
+                        jami_kartalar=TakrorlashSessiyasi.jami_kartalar + len(tarix_qatorlari),
+                        togri_javoblar=TakrorlashSessiyasi.togri_javoblar + togri_soni,
+                        notogri_javoblar=TakrorlashSessiyasi.notogri_javoblar
+                        + len(tarix_qatorlari) - togri_soni
+                    )
+                )
+
+        return {
+            "qabul_qilingan": len(tarix_qatorlari),
+            "topilmagan": [k for k in karta_idlari if k not in holatlar],
+            "kartalar": [
+                {
+                    "karta_id": k["id"],
+                    "easiness_factor": round(k["easiness_factor"], 2),
+                    "interval": k["interval"],
+                    "repetition": k["repetition"],
+                    "keyingi_takrorlash": k["keyingi_takrorlash"]
+                }
+                for k in yangilanganlar
+            ]
+        }
+
+    async def sessiya_boshlash(
+        self,
+        foydalanuvchi_id: UUID,
+        reja_kartalar: int = 20
+    ) -> TakrorlashSessiyasi:
+        """Yangi takrorlash sessiyasini boshlaydi."""
+        sessiya = TakrorlashSessiyasi(
+            foydalanuvchi_id=foydalanuvchi_id,
+            reja_kartalar=reja_kartalar
+        )
+        self.db.add(sessiya)
+        await self.db.flush()
+        await self.db.refresh(sessiya)
+        return sessiya
+
+    async def sessiya_tugatish(
+        self,
+        foydalanuvchi_id: UUID,
+        sessiya_id: UUID
+    ) -> Optional[TakrorlashSessiyasi]:
+        """Takrorlash sessiyasini tugatadi."""
+        sessiya = await self.db.get(TakrorlashSessiyasi, sessiya_id)
+        if not sessiya or sessiya.foydalanuvchi_id != foydalanuvchi_id:
+            return None
+        if not sessiya.tugallangan_vaqt:
+            sessiya.tugallangan_vaqt = datetime.now(timezone.utc)
+            await self.db.flush()
+        return sessiya
+
     async def barcha_kartalar(
         self,
         foydalanuvchi_id: UUID,
@@ -147,59 +384,28 @@ class TakrorlashServisi:
         return natija.scalars().all(), jami.scalar()
     
     async def statistika(self, foydalanuvchi_id: UUID) -> dict:
-        """Takrorlash statistikasi."""
+        """
+        Takrorlash statistikasi.
+        Barcha hisoblagichlar bitta FILTER agregatida, streak esa
+        saqlangan maydondan olinadi - jami ikki indeksli so'rov.
+        """
         bugun = date.today()
         ertaga = bugun + timedelta(days=1)
         hafta = bugun + timedelta(days=7)
-        
-        # Jami kartalar
-        jami_sorov = select(func.count(TakrorlashKartasi.id)).where(
-            and_(
-                TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id,
-                TakrorlashKartasi.faol == True
-            )
-        )
-        
-        # Bugun takrorlash kerak
-        bugun_sorov = select(func.count(TakrorlashKartasi.id)).where(
-            and_(
-                TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id,
-                TakrorlashKartasi.keyingi_takrorlash <= bugun,
-                TakrorlashKartasi.oqilgan == False,
-                TakrorlashKartasi.faol == True
-            )
-        )
-        
-        # Ertaga takrorlash kerak
-        ertaga_sorov = select(func.count(TakrorlashKartasi.id)).where(
-            and_(
-                TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id,
-                TakrorlashKartasi.keyingi_takrorlash == ertaga,
-                TakrorlashKartasi.oqilgan == False,
-                TakrorlashKartasi.faol == True
-            )
-        )
-        
-        # Hafta ichida
-        hafta_sorov = select(func.count(TakrorlashKartasi.id)).where(
-            and_(
-                TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id,
-                TakrorlashKartasi.keyingi_takrorlash <= hafta,
-                TakrorlashKartasi.oqilgan == False,
-                TakrorlashKartasi.faol == True
-            )
-        )
-        
-        # O'rtacha EF
-        ef_sorov = select(func.avg(TakrorlashKartasi.easiness_factor)).where(
-            and_(
-                TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id,
-                TakrorlashKartasi.faol == True
-            )
-        )
-        
-        # Jami takrorlashlar va aniqlik
-        stat_sorov = select(
+
+        kutilmoqda = TakrorlashKartasi.oqilgan == False
+        sorov = select(
+            func.count(TakrorlashKartasi.id),
+            func.count(TakrorlashKartasi.id).filter(
+                and_(TakrorlashKartasi.keyingi_takrorlash <= bugun, kutilmoqda)
+            ),
+            func.count(TakrorlashKartasi.id).filter(
+                and_(TakrorlashKartasi.keyingi_takrorlash == ertaga, kutilmoqda)
+            ),
+            func.count(TakrorlashKartasi.id).filter(
+                and_(TakrorlashKartasi.keyingi_takrorlash <= hafta, kutilmoqda)
+            ),
+            func.avg(TakrorlashKartasi.easiness_factor),
             func.sum(TakrorlashKartasi.jami_takrorlashlar),
             func.sum(TakrorlashKartasi.togri_javoblar)
         ).where(
@@ -208,52 +414,59 @@ class TakrorlashServisi:
                 TakrorlashKartasi.faol == True
             )
         )
-        
-        jami = await self.db.execute(jami_sorov)
-        bugun_natija = await self.db.execute(bugun_sorov)
-        ertaga_natija = await self.db.execute(ertaga_sorov)
-        hafta_natija = await self.db.execute(hafta_sorov)
-        ef_natija = await self.db.execute(ef_sorov)
-        stat_natija = await self.db.execute(stat_sorov)
+        natija = await self.db.execute(sorov)
+        (
+            jami, bugun_soni, ertaga_soni, hafta_soni,
+            ortacha_ef, jami_takrorlashlar, togri_javoblar
+        ) = natija.one()
 
-        jami_takrorlashlar, togri_javoblar = stat_natija.one()
         jami_takrorlashlar = jami_takrorlashlar or 0
         togri_javoblar = togri_javoblar or 0
-        
         aniqlik = (togri_javoblar / jami_takrorlashlar * 100) if jami_takrorlashlar > 0 else 0
 
-        # Streak hisoblash (ketma-ket kunlar)
-        sana_sorov = select(
-            func.date(TakrorlashTarixi.yaratilgan_vaqt)
-        ).select_from(TakrorlashTarixi).join(
-            TakrorlashKartasi, TakrorlashTarixi.karta_id == TakrorlashKartasi.id
-        ).where(
-            TakrorlashKartasi.foydalanuvchi_id == foydalanuvchi_id
-        ).group_by(
-            func.date(TakrorlashTarixi.yaratilgan_vaqt)
-        ).order_by(
-            func.date(TakrorlashTarixi.yaratilgan_vaqt).desc()
-        ).limit(400)
-
-        sana_natija = await self.db.execute(sana_sorov)
-        sanalar = {row[0] for row in sana_natija.all() if row[0]}
-
+        # Streak - faqat bugun takrorlagan bo'lsa davom etmoqda
+        streak_natija = await self.db.execute(
+            select(
+                FoydalanuvchiRivojlanishi.takrorlash_streak,
+                FoydalanuvchiRivojlanishi.oxirgi_takrorlash_sanasi
+            ).where(FoydalanuvchiRivojlanishi.foydalanuvchi_id == foydalanuvchi_id)
+        )
+        streak_qator = streak_natija.one_or_none()
         streak_kunlar = 0
-        tekshir_sana = bugun
-        while tekshir_sana in sanalar:
-            streak_kunlar += 1
-            tekshir_sana = tekshir_sana - timedelta(days=1)
+        if streak_qator and streak_qator.oxirgi_takrorlash_sanasi == bugun:
+            streak_kunlar = streak_qator.takrorlash_streak or 0
 
         return {
-            "jami_kartalar": jami.scalar() or 0,
-            "bugun_takrorlash_kerak": bugun_natija.scalar() or 0,
-            "ertaga_takrorlash_kerak": ertaga_natija.scalar() or 0,
-            "hafta_ichida": hafta_natija.scalar() or 0,
-            "ortacha_ef": round(ef_natija.scalar() or 2.5, 2),
+            "jami_kartalar": jami or 0,
+            "bugun_takrorlash_kerak": bugun_soni or 0,
+            "ertaga_takrorlash_kerak": ertaga_soni or 0,
+            "hafta_ichida": hafta_soni or 0,
+            "ortacha_ef": round(ortacha_ef or 2.5, 2),
             "jami_takrorlashlar": jami_takrorlashlar,
             "umumiy_aniqlik": round(aniqlik, 1),
             "streak_kunlar": streak_kunlar
         }
+
+    async def _streak_yangilash(self, foydalanuvchi_id: UUID) -> None:
+        """Takrorlash streakini bitta upsert bilan yangilaydi (kuniga bir marta o'sadi)."""
+        bugun = date.today()
+        oxirgi = FoydalanuvchiRivojlanishi.oxirgi_takrorlash_sanasi
+        sorov = pg_insert(FoydalanuvchiRivojlanishi).values(
+            foydalanuvchi_id=foydalanuvchi_id,
+            takrorlash_streak=1,
+            oxirgi_takrorlash_sanasi=bugun
+        ).on_conflict_do_update(
+            index_elements=[FoydalanuvchiRivojlanishi.foydalanuvchi_id],
+            set_={
+                "takrorlash_streak": case(
+                    (oxirgi == bugun, FoydalanuvchiRivojlanishi.takrorlash_streak),
+                    (oxirgi == bugun - timedelta(days=1), FoydalanuvchiRivojlanishi.takrorlash_streak + 1),
+                    else_=1
+                ),
+                "oxirgi_takrorlash_sanasi": bugun
+            }
+        )
+        await self.db.execute(sorov)
     
     async def kartani_oqilgan_qilish(
         self,
@@ -272,6 +485,11 @@ class TakrorlashServisi:
         karta = natija.scalar_one_or_none()
         
         if karta:
+            if karta.faol and karta.oqilgan != oqilgan:
+                sana = karta.keyingi_takrorlash
+                commitdan_keyin(self.db, partial(
+                    MuddatServisi.kochirish, foydalanuvchi_id, [(sana, None) if oqilgan else (None, sana)]
+                ))
             karta.oqilgan = oqilgan
             await self.db.flush()
         
@@ -9,46 +9,219 @@ import json
 import asyncio
 import logging
 
+from sozlamalar.sozlamalar import sozlamalar
+from vositalar.metrikalar import WS_ULANISHLAR
+
 logger = logging.getLogger(__name__)
 
+# Sekin klientlar uchun siyosatlar
+SIYOSAT_TASHLASH = "tashlash"  # Eng eski xabarni tashlab, yangisini qo'yish
+SIYOSAT_UZISH = "uzish"  # Navbat to'lsa ulanishni yopish
+
+
+class WebSocketUlanishi:
+    """
+    Bitta WebSocket ulanishi.
+    Har bir ulanish o'z chegaralangan navbati va yozuvchi vazifasiga ega,
+    shuning uchun sekin klient boshqalarga yuborishni to'xtatib qo'ymaydi.
+    """
+
+    def __init__(self, websocket: WebSocket, foydalanuvchi_id: str, navbat_hajmi: int):
+        self.websocket = websocket
+        self.foydalanuvchi_id = foydalanuvchi_id
+        self.navbat: asyncio.Queue = asyncio.Queue(maxsize=navbat_hajmi)
+        self.yozuvchi: Optional[asyncio.Task] = None
+        self.ulangan_vaqt = datetime.utcnow()
+        self.yopilgan = False
+
+        # Metrikalar
+        self.yuborilgan = 0
+        self.tashlangan = 0
+        self.eng_katta_navbat = 0
+
+    def metrikalar(self) -> dict:
+        """Ulanish navbati metrikalarini qaytaradi."""
+        return {
+            "foydalanuvchi_id": self.foydalanuvchi_id,
+            "navbatda": self.navbat.qsize(),
+            "navbat_hajmi": self.navbat.maxsize,
+            "eng_katta_navbat": self.eng_katta_navbat,
+            "yuborilgan": self.yuborilgan,
+            "tashlangan": self.tashlangan,
+            "ulangan_vaqt": self.ulangan_vaqt.isoformat()
+        }
+
 
 class WebSocketManager:
     """
     WebSocket ulanishlarini boshqaruvchi sinf.
     Foydalanuvchilarga real-time xabarlar yuborish uchun.
+
+    Xabar bir marta JSON ga kodlanadi va har bir ulanish navbatiga
+    bloklanmasdan qo'yiladi; haqiqiy yuborishni ulanishning yozuvchi
+    vazifasi bajaradi.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        navbat_hajmi: int = None,
+        siyosat: str = None,
+        yuborish_timeout: float = None
+    ):
         # Foydalanuvchi ID -> WebSocket ulanishlari
-        self._ulanishlar: Dict[str, Set[WebSocket]] = {}
+        self._ulanishlar: Dict[str, Dict[WebSocket, WebSocketUlanishi]] = {}
         # Kanal obunalari (masalan: reyting, holat yangilanishlari)
         self._kanallar: Dict[str, Set[str]] = {}
         # Lock for thread safety
         self._lock = asyncio.Lock()
+
+        self._navbat_hajmi = navbat_hajmi or sozlamalar.ws_navbat_hajmi
+        self._siyosat = siyosat or sozlamalar.ws_sekin_siyosat
+        self._yuborish_timeout = yuborish_timeout or sozlamalar.ws_yuborish_timeout
+
+        # Fon yopish vazifalari - GC tomonidan yig'ib olinmasligi uchun havola saqlanadi
+        self._fon_vazifalari: Set[asyncio.Task] = set()
+
+        # Umumiy metrikalar
+        self._tashlangan_jami = 0
+        self._sekin_uzilganlar = 0
     
     async def ulash(self, websocket: WebSocket, foydalanuvchi_id: str) -> None:
         """Yangi WebSocket ulanishini qo'shadi."""
         await websocket.accept()
+
+        ulanish = WebSocketUlanishi(websocket, foydalanuvchi_id, self._navbat_hajmi)
+        ulanish.yozuvchi = asyncio.create_task(self._yozuvchi(ulanish))
         
         async with self._lock:
             if foydalanuvchi_id not in self._ulanishlar:
-                self._ulanishlar[foydalanuvchi_id] = set()
-            self._ulanishlar[foydalanuvchi_id].add(websocket)
+                self._ulanishlar[foydalanuvchi_id] = {}
+            self._ulanishlar[foydalanuvchi_id][websocket] = ulanish
+        WS_ULANISHLAR.inc()
         
         logger.info(f"WebSocket ulandi: {foydalanuvchi_id}")
     
     async def uzish(self, websocket: WebSocket, foydalanuvchi_id: str) -> None:
         """WebSocket ulanishini o'chiradi."""
         async with self._lock:
-            if foydalanuvchi_id in self._ulanishlar:
-                self._ulanishlar[foydalanuvchi_id].discard(websocket)
-                if not self._ulanishlar[foydalanuvchi_id]:
-                    del self._ulanishlar[foydalanuvchi_id]
-                    # Kanallardan ham o'chirish
-                    for kanal in self._kanallar.values():
-                        kanal.discard(foydalanuvchi_id)
+            ulanish = self._olib_tashlash(websocket, foydalanuvchi_id)
+
+        if ulanish:
+            self._toxtatish(ulanish)
         
         logger.info(f"WebSocket uzildi: {foydalanuvchi_id}")
+
+    def _olib_tashlash(
+        self,
+        websocket: WebSocket,
+        foydalanuvchi_id: str
+    ) -> Optional[WebSocketUlanishi]:
+        """Ulanishni ro'yxatdan olib tashlaydi (lock ostida chaqiriladi)."""
+        ulanishlar = self._ulanishlar.get(foydalanuvchi_id)
+        if not ulanishlar:
+            return None
+
+        ulanish = ulanishlar.pop(websocket, None)
+        if ulanish:
+            WS_ULANISHLAR.dec()
+        if not ulanishlar:
+            del self._ulanishlar[foydalanuvchi_id]
+            # Kanallardan ham o'chirish
+            for kanal in self._kanallar.values():
+                kanal.discard(foydalanuvchi_id)
+        return ulanish
+
+    def _toxtatish(self, ulanish: WebSocketUlanishi) -> None:
+        """Ulanish yozuvchi vazifasini to'xtatadi."""
+        ulanish.yopilgan = True
+        if ulanish.yozuvchi and ulanish.yozuvchi is not asyncio.current_task():
+            ulanish.yozuvchi.cancel()
+
+    async def _yozuvchi(self, ulanish: WebSocketUlanishi) -> None:
+        """Navbatdagi xabarlarni ketma-ket yuboruvchi vazifa."""
+        try:
+            while True:
+                matn = await ulanish.navbat.get()
+                await asyncio.wait_for(
+                    ulanish.websocket.send_text(matn),
+                    timeout=self._yuborish_timeout
+                )
+                ulanish.yuborilgan += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Xabar yuborishda xato: {e}")
+            await self._majburan_uzish(ulanish)
+
+    async def _majburan_uzish(self, ulanish: WebSocketUlanishi, kod: int = 1011) -> None:
+        """Ishlamayotgan yoki sekin ulanishni yopadi va ro'yxatdan chiqaradi."""
+        if ulanish.yopilgan:
+            return
+        ulanish.yopilgan = True
+        await self._yopish(ulanish, kod)
+
+    async def _yopish(self, ulanish: WebSocketUlanishi, kod: int) -> None:
+        """Yopilgan deb belgilangan ulanishni ro'yxatdan chiqaradi va socketni yopadi."""
+        async with self._lock:
+            self._olib_tashlash(ulanish.websocket, ulanish.foydalanuvchi_id)
+        self._toxtatish(ulanish)
+
+        try:
+            await ulanish.websocket.close(code=kod)
+        except Exception:
+            pass
+
+    def _navbatga_qoyish(self, ulanish: WebSocketUlanishi, matn: str) -> bool:
+        """
+        Kodlangan xabarni ulanish navbatiga bloklanmasdan qo'yadi.
+        Navbat to'lgan bo'lsa siyosat bo'yicha xabar tashlanadi yoki ulanish uziladi.
+        """
+        if ulanish.yopilgan:
+            return False
+
+        if ulanish.navbat.full():
+            if self._siyosat == SIYOSAT_UZISH:
+                self._sekin_uzilganlar += 1
+                logger.warning(
+                    f"Sekin WebSocket klient uzildi: {ulanish.foydalanuvchi_id}"
+                )
+                # Darhol yopilgan deb belgilanadi - keyingi xabarlar navbatga tushmaydi
+                # va yopish vazifasi qayta-qayta yaratilmaydi. 1013 - "Try Again Later"
+                ulanish.yopilgan = True
+                vazifa = asyncio.create_task(self._yopish(ulanish, kod=1013))
+                self._fon_vazifalari.add(vazifa)
+                vazifa.add_done_callback(self._fon_vazifalari.discard)
+                return False
+
+            # Eng eski xabarni tashlash - klient eng yangi holatni oladi
+            try:
+                ulanish.navbat.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            ulanish.tashlangan += 1
+            self._tashlangan_jami += 1
+
+        ulanish.navbat.put_nowait(matn)
+        ulanish.eng_katta_navbat = max(ulanish.eng_katta_navbat, ulanish.navbat.qsize())
+        return True
+
+    @staticmethod
+    def _kodlash(xabar: dict) -> str:
+        """Xabarni bir marta JSON ga kodlaydi."""
+        return json.dumps(xabar, ensure_ascii=False, default=str)
+
+    def _foydalanuvchiga_qoyish(self, foydalanuvchi_id: str, matn: str) -> bool:
+        """Kodlangan xabarni foydalanuvchining barcha ulanishlariga qo'yadi."""
+        ulanishlar = self._ulanishlar.get(foydalanuvchi_id)
+
+        if not ulanishlar:
+            return False
+
+        qoyildi = False
+        for ulanish in list(ulanishlar.values()):
+            if self._navbatga_qoyish(ulanish, matn):
+                qoyildi = True
+        return qoyildi
     
     async def kanalga_obuna(self, foydalanuvchi_id: str, kanal: str) -> None:
         """Foydalanuvchini kanalga obuna qiladi."""
@@ -69,46 +242,42 @@ class WebSocketManager:
         xabar: dict
     ) -> bool:
         """Bitta foydalanuvchiga xabar yuboradi."""
-        ulanishlar = self._ulanishlar.get(foydalanuvchi_id, set())
-        
-        if not ulanishlar:
+        return self._foydalanuvchiga_qoyish(foydalanuvchi_id, self._kodlash(xabar))
+
+    async def ulanishga_yuborish(
+        self,
+        websocket: WebSocket,
+        foydalanuvchi_id: str,
+        xabar: dict
+    ) -> bool:
+        """Aniq bitta ulanishga (masalan, so'rovga javob) xabar yuboradi."""
+        ulanish = self._ulanishlar.get(foydalanuvchi_id, {}).get(websocket)
+        if not ulanish:
             return False
-        
-        xabar_json = json.dumps(xabar, ensure_ascii=False, default=str)
-        uzilganlar = set()
-        
-        for ws in ulanishlar:
-            try:
-                await ws.send_text(xabar_json)
-            except Exception as e:
-                logger.warning(f"Xabar yuborishda xato: {e}")
-                uzilganlar.add(ws)
-        
-        # Uzilgan ulanishlarni tozalash
-        if uzilganlar:
-            async with self._lock:
-                for ws in uzilganlar:
-                    self._ulanishlar.get(foydalanuvchi_id, set()).discard(ws)
-        
-        return True
+        return self._navbatga_qoyish(ulanish, self._kodlash(xabar))
     
     async def kanalga_xabar(self, kanal: str, xabar: dict) -> int:
         """Kanal obunachilarga xabar yuboradi."""
-        obunchilar = self._kanallar.get(kanal, set())
+        obunchilar = self._kanallar.get(kanal)
+        if not obunchilar:
+            return 0
+
+        matn = self._kodlash(xabar)
         yuborildi = 0
         
-        for foydalanuvchi_id in obunchilar:
-            if await self.xabar_yuborish(foydalanuvchi_id, xabar):
+        for foydalanuvchi_id in list(obunchilar):
+            if self._foydalanuvchiga_qoyish(foydalanuvchi_id, matn):
                 yuborildi += 1
         
         return yuborildi
     
     async def hammaga_xabar(self, xabar: dict) -> int:
         """Barcha ulangan foydalanuvchilarga xabar yuboradi."""
+        matn = self._kodlash(xabar)
         yuborildi = 0
         
         for foydalanuvchi_id in list(self._ulanishlar.keys()):
-            if await self.xabar_yuborish(foydalanuvchi_id, xabar):
+            if self._foydalanuvchiga_qoyish(foydalanuvchi_id, matn):
                 yuborildi += 1
         
         return yuborildi
@@ -121,6 +290,31 @@ class WebSocketManager:
         """Foydalanuvchi ulanganligini tekshiradi."""
         return foydalanuvchi_id in self._ulanishlar
 
+    def ulanishlar_metrikalari(self) -> List[dict]:
+        """Har bir ulanish navbati bo'yicha metrikalar."""
+        return [
+            ulanish.metrikalar()
+            for ulanishlar in list(self._ulanishlar.values())
+            for ulanish in list(ulanishlar.values())
+        ]
+
+    def umumiy_metrikalar(self) -> dict:
+        """Barcha ulanishlar bo'yicha yig'ma metrikalar."""
+        navbatlar = [
+            ulanish.navbat.qsize()
+            for ulanishlar in list(self._ulanishlar.values())
+            for ulanish in list(ulanishlar.values())
+        ]
+        return {
+            "ulanishlar_soni": len(navbatlar),
+            "navbatda_jami": sum(navbatlar),
+            "eng_katta_navbat": max(navbatlar, default=0),
+            "tashlangan_jami": self._tashlangan_jami,
+            "sekin_uzilganlar": self._sekin_uzilganlar,
+            "siyosat": self._siyosat,
+            "navbat_hajmi": self._navbat_hajmi
+        }
+
 
 # Global WebSocket manager
 websocket_manager = WebSocketManager()
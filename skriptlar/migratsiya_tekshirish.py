@@ -6,6 +6,8 @@ import asyncio
 import sys
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
+from alembic.config import Config
+from alembic.script import ScriptDirectory
 import re
 
 from sozlamalar.sozlamalar import sozlamalar
@@ -19,6 +21,11 @@ def _db_url_tozalash(url: str) -> str:
     return url
 
 
+def head_versiyasi() -> str:
+    """migratsiyalar/versiyalar dagi eng so'nggi revision."""
+    return ScriptDirectory.from_config(Config("alembic.ini")).get_current_head()
+
+
 async def migratsiyalar_qollanganmi() -> bool:
     """
     Migratsiyalar allaqachon qo'llanganligini tekshiradi.
@@ -36,14 +43,9 @@ async def migratsiyalar_qollanganmi() -> bool:
                 )
                 version = result.scalar()
                 
-                if version:
-                    # Head versiyasini olish (alembic current bilan solishtirish kerak)
-                    # Agar versiya mavjud bo'lsa, migratsiyalar qo'llangan deb hisoblaymiz
-                    await engine.dispose()
-                    return True
-                else:
-                    await engine.dispose()
-                    return False
+                await engine.dispose()
+                # Yangi migratsiya qo'shilganda bazadagi versiya head dan orqada qoladi
+                return bool(version) and version == head_versiyasi()
             except Exception:
                 # Jadval mavjud emas - migratsiyalar qo'llanmagan
                 await engine.dispose()
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# MedCase Pro Platform - So'rov Rejalari Regressiya To'plami
+# Nomlangan servis so'rovlarining EXPLAIN rejalari va vaqtlarini bazaviy natija bilan solishtiradi
+#
+# Foydalanish:
+#   python -m skriptlar.reja_regressiyasi --yuklash 1m --yangilash     # bazaviy natija
+#   python -m skriptlar.reja_regressiyasi                               # tekshirish (xato -> exit 1)
+#   python -m skriptlar.reja_regressiyasi --faqat holat_qidirish_yechilmagan --json natija.json
+#
+# So'rovlar qo'lda yozilmaydi: katalogdagi servis metodi chaqiriladi va u
+# yuborgan statementlar ushlanadi - ORM yoki sxema o'zgarishi to'g'ridan-to'g'ri
+# tekshiriladigan rejaga tushadi. Har bir chaqiruv tranzaksiyada bajarilib,
+# oxirida rollback qilinadi.
+
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from modellar.holat import QiyinlikDarajasi
+from servislar.bildirishnoma_servisi import BildirishnomServisi
+from servislar.dashboard_servisi import DashboardServisi
+from servislar.holat_servisi import HolatServisi
+from servislar.imtihon_servisi import ImtihonServisi
+from servislar.izoh_servisi import IzohServisi
+from servislar.kategoriya_rivojlanishi_servisi import KategoriyaRivojlanishiServisi
+from servislar.rivojlanish_servisi import RivojlanishServisi
+from servislar.takrorlash_servisi import TakrorlashServisi
+from sozlamalar.malumotlar_bazasi import malumotlar_bazasi
+from sxemalar.holat import HolatQidirish
+
+# Shundan kichik jadvallarda Seq Scan rejalashtiruvchining to'g'ri tanlovi
+KICHIK_JADVAL = 10_000
+
+# Indeks orqali o'qish tugunlari (Bitmap Heap Scan - Bitmap Index Scan ustida)
+INDEKS_TUGUNLARI = ("Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+
+
+@dataclass
+class Sorov:
+    """Katalog yozuvi: servis chaqiruvi va ketma-ket skan qilinmasligi kerak bo'lgan jadvallar."""
+    chaqiruv: Callable[[AsyncSession, Dict[str, Any]], Awaitable[Any]]
+    seq_taqiqlangan: Tuple[str, ...] = ()
+    tavsif: str = ""
+
+
+KATALOG: Dict[str, Sorov] = {
+    "holat_qidirish_yechilmagan": Sorov(
+        lambda db, p: HolatServisi(db).qidirish_korinishlar(HolatQidirish(yechilgan=False), p["foydalanuvchi"]),
+        ("holat_urinishlari", "holatlar"),
+        "HolatUrinishi.holat_id NOT IN subso'rovi",
+    ),
+    "holat_qidirish_yechilgan": Sorov(
+        lambda db, p: HolatServisi(db).qidirish_korinishlar(HolatQidirish(yechilgan=True), p["foydalanuvchi"]),
+        ("holat_urinishlari",),
+    ),
+    "holat_filtr_bolim_qiyinlik": Sorov(
+        lambda db, p: HolatServisi(db).qidirish_korinishlar(
+            HolatQidirish(bolim_id=p["bolim"], qiyinlik=QiyinlikDarajasi.ORTACHA)
+        ),
+        ("holatlar",),
+        "Holat (faol, chop_etilgan, bolim_id, qiyinlik) filtrlari",
+    ),
+    "bolim_holatlari": Sorov(
+        lambda db, p: HolatServisi(db).bolim_korinishlar(p["bolim"]),
+        ("holatlar",),
+    ),
+    # Ro'yxatlar kontentni keshdan oladi - kesh o'tkazib yuborgan IN yuklash alohida o'lchanadi
+    "holat_kontent_yuklash": Sorov(
+        lambda db, p: HolatServisi(db)._kontent_yuklash(p["sahifa_holatlari"]),
+        ("holatlar", "holat_variantlari", "holat_media"),
+        "Holat.id IN (...) + selectinload variantlar/media",
+    ),
+    "urinishlar_tarixi": Sorov(
+        lambda db, p: RivojlanishServisi(db).urinishlar_olish(p["foydalanuvchi"]),
+        ("holat_urinishlari",),
+    ),
+    "zaif_tomonlar": Sorov(
+        lambda db, p: KategoriyaRivojlanishiServisi(db).royxat(p["foydalanuvchi"], minimal_urinish=3),
+        ("kategoriya_rivojlanishi",),
+    ),
+    "kategoriya_qayta_hisoblash": Sorov(
+        lambda db, p: KategoriyaRivojlanishiServisi(db).qayta_hisoblash(p["foydalanuvchi"]),
+        ("holat_urinishlari",),
+        "urinishlar -> holat -> bo'lim -> kichik kategoriya join",
+    ),
+    "dashboard_qayta_qurish": Sorov(
+        lambda db, p: DashboardServisi(db).qayta_qurish(p["foydalanuvchi"]),
+        ("holat_urinishlari",),
+    ),
+    "takrorlash_navbati": Sorov(
+        lambda db, p: TakrorlashServisi(db).navbat_olish(p["foydalanuvchi"], 50, True),
+        ("takrorlash_kartalari",),
+    ),
+    "takrorlash_statistikasi": Sorov(
+        lambda db, p: TakrorlashServisi(db).statistika(p["foydalanuvchi"]),
+        ("takrorlash_kartalari",),
+    ),
+    "holat_izohlari": Sorov(
+        lambda db, p: IzohServisi(db).holat_izohlari(p["holat"]),
+        ("holat_izohlari",),
+    ),
+    "bildirishnomalar_oqilmagan": Sorov(
+        lambda db, p: BildirishnomServisi(db).royxat_olish(p["foydalanuvchi"], oqilmagan_faqat=True),
+        ("bildirishnomalar",),
+    ),
+    "imtihonlar_tarixi": Sorov(
+        lambda db, p: ImtihonServisi(db).foydalanuvchi_imtihonlari(p["foydalanuvchi"]),
+        ("imtihonlar",),
+    ),
+}
+
+# Katalog parametrlari - ma'lumotlar to'plamidan deterministik tanlanadi
+PARAMETR_SOROVLARI = {
+    "foydalanuvchi": """
+        SELECT foydalanuvchi_id FROM foydalanuvchi_rivojlanishi
+        ORDER BY jami_urinishlar DESC, foydalanuvchi_id LIMIT 1
+    """,
+    "bolim": """
+        SELECT bolim_id FROM holatlar
+        GROUP BY bolim_id ORDER BY count(*) DESC, bolim_id LIMIT 1
+    """,
+    "holat": """
+        SELECT holat_id FROM holat_izohlari
+        GROUP BY holat_id ORDER BY count(*) DESC, holat_id LIMIT 1
+    """,
+    # bolim_holatlari birinchi sahifasi - kesh bo'sh bo'lganda _kontent_yuklash shu idlarni oladi
+    "sahifa_holatlari": """
+        SELECT array_agg(id) FROM (
+            SELECT id FROM holatlar
+            WHERE bolim_id = (
+                SELECT bolim_id FROM holatlar
+                GROUP BY bolim_id ORDER BY count(*) DESC, bolim_id LIMIT 1
+            ) AND faol = true AND chop_etilgan = true
+            ORDER BY yaratilgan_vaqt DESC LIMIT 20
+        ) s
+    """,
+}
+
+
+# ============== Statementlarni ushlash ==============
+
+_ushlangan: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("reja_ushlangan", default=None)
+
+
+def _ushlashni_ulash(engine) -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _boshlash(conn, cursor, statement, parameters, context, executemany):
+        if _ushlangan.get() is not None:
+            conn.info["reja_boshlanish"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _tugatish(conn, cursor, statement, parameters, context, executemany):
+        royxat = _ushlangan.get()
+        if royxat is None or executemany:
+            return
+        soniya = time.perf_counter() - conn.info.pop("reja_boshlanish", time.perf_counter())
+        royxat.append({"sql": statement, "parametrlar": parameters, "ms": soniya * 1000})
+
+
+def _sql_xeshi(sql: str) -> str:
+    return hashlib.sha1(" ".join(sql.split()).encode()).hexdigest()[:12]
+
+
+def _tugunlar(reja: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """EXPLAIN JSON daraxtidagi barcha tugunlar (chuqurlik bo'yicha)."""
+    natija = [reja]
+    for bola in reja.get("Plans", []):
+        natija.extend(_tugunlar(bola))
+    return natija
+
+
+@dataclass
+class Jadvallar:
+    """Fizik relyatsiyalar hajmi va bo'laklarning (partition) ota jadvali."""
+    hajmlar: Dict[str, float]
+    otalar: Dict[str, str]
+
+    def nomi(self, relyatsiya: str) -> str:
+        return self.otalar.get(relyatsiya, relyatsiya)
+
+    def katta(self) -> Dict[str, float]:
+        """Ota jadval bo'yicha jamlangan, KICHIK_JADVAL dan katta jadvallar."""
+        jami: Dict[str, float] = {}
+        for relyatsiya, qatorlar in self.hajmlar.items():
+            nom = self.nomi(relyatsiya)
+            jami[nom] = jami.get(nom, 0) + qatorlar
+        return {nom: qatorlar for nom, qatorlar in jami.items() if qatorlar >= KICHIK_JADVAL}
+
+
+def reja_xulosasi(reja: Dict[str, Any], jadvallar: Jadvallar) -> Dict[str, Any]:
+    """
+    Jadval bo'yicha kirish usuli (seq / indeks nomi) va umumiy ko'rsatkichlar.
+    Bo'laklar ota jadval nomiga yig'iladi; kichik relyatsiyadagi Seq Scan
+    "Seq Scan:kichik" deb belgilanadi va regressiya hisoblanmaydi.
+    """
+    kirish: Dict[str, List[str]] = {}
+    for tugun in _tugunlar(reja["Plan"]):
+        relyatsiya = tugun.get("Relation Name")
+        if not relyatsiya:
+            continue
+        turi = tugun["Node Type"]
+        if turi in INDEKS_TUGUNLARI:
+            # Bitmap Heap Scan indeks nomini ichki Bitmap Index Scan tugunida saqlaydi
+            indekslar = [t.get("Index Name") for t in _tugunlar(tugun) if t.get("Index Name")]
+            qiymat = f"{turi}:{','.join(indekslar)}"
+        elif turi == "Seq Scan" and jadvallar.hajmlar.get(relyatsiya, 0) < KICHIK_JADVAL:
+            qiymat = "Seq Scan:kichik"
+        else:
+            qiymat = turi
+        kirish.setdefault(jadvallar.nomi(relyatsiya), []).append(qiymat)
+    return {
+        "kirish": kirish,
+        "xarajat": reja["Plan"].get("Total Cost"),
+        "vaqt_ms": reja.get("Execution Time"),
+        "buferlar": reja["Plan"].get("Shared Hit Blocks", 0) + reja["Plan"].get("Shared Read Blocks", 0),
+    }
+
+
+# ============== Bajarish ==============
+
+async def _chaqirish(sorov: Sorov, parametrlar: Dict[str, Any], reja: bool) -> Dict[str, Any]:
+    """
+    Servis chaqiruvi tranzaksiyada; statementlar ushlanadi va (reja=True bo'lsa)
+    shu tranzaksiya ichida EXPLAIN qilinadi. Oxirida hammasi rollback.
+    """
+    async with malumotlar_bazasi.engine.connect() as conn:
+        tranzaksiya = await conn.begin()
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        statementlar: List[Dict[str, Any]] = []
+        belgi = _ushlangan.set(statementlar)
+        boshlanish = time.perf_counter()
+        try:
+            await sorov.chaqiruv(db, parametrlar)
+        finally:
+            _ushlangan.reset(belgi)
+        jami_ms = (time.perf_counter() - boshlanish) * 1000
+
+        if reja:
+            for s in statementlar:
+                # Faqat SELECT qayta bajariladi; yozuvlar uchun ANALYZE'siz reja
+                oqish = s["sql"].lstrip().upper().startswith("SELECT")
+                variant = "ANALYZE, BUFFERS, " if oqish else ""
+                natija = await conn.exec_driver_sql(
+                    f"EXPLAIN ({variant}FORMAT JSON) {s['sql']}", s["parametrlar"]
+                )
+                qiymat = natija.scalar()
+                s["reja"] = (json.loads(qiymat) if isinstance(qiymat, str) else qiymat)[0]
+
+        await db.close()
+        await tranzaksiya.rollback()
+    return {"statementlar": statementlar, "jami_ms": jami_ms}
+
+
+async def olchash(
+    nom: str,
+    sorov: Sorov,
+    parametrlar: Dict[str, Any],
+    jadvallar: Jadvallar,
+    takrorlar: int
+) -> Dict[str, Any]:
+    """Isitish, takrorlar bo'yicha median vaqt va har bir statement rejasi."""
+    await _chaqirish(sorov, parametrlar, reja=False)
+    vaqtlar = []
+    for _ in range(takrorlar):
+        vaqtlar.append((await _chaqirish(sorov, parametrlar, reja=False))["jami_ms"])
+    rejali = await _chaqirish(sorov, parametrlar, reja=True)
+
+    statementlar = []
+    for i, s in enumerate(rejali["statementlar"]):
+        statementlar.append({
+            "kalit": f"{nom}#{i}",
+            "xesh": _sql_xeshi(s["sql"]),
+            "sql": s["sql"],
+            **reja_xulosasi(s["reja"], jadvallar),
+        })
+    return {
+        "median_ms": round(statistics.median(vaqtlar), 2),
+        "p95_ms": round(sorted(vaqtlar)[int(len(vaqtlar) * 0.95)], 2),
+        "statementlar": statementlar,
+    }
+
+
+async def _jadvallar() -> Jadvallar:
+    async with malumotlar_bazasi.engine.connect() as conn:
+        natija = await conn.execute(text("""
+            SELECT c.relname, greatest(c.reltuples, 0), p.relname
+            FROM pg_class c
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+            LEFT JOIN pg_class p ON p.oid = i.inhparent
+            WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace
+        """))
+        qatorlar = natija.all()
+    return Jadvallar(
+        hajmlar={nom: hajm for nom, hajm, _ in qatorlar},
+        otalar={nom: ota for nom, _, ota in qatorlar if ota},
+    )
+
+
+async def _parametrlar() -> Dict[str, Any]:
+    parametrlar = {}
+    async with malumotlar_bazasi.engine.connect() as conn:
+        for nom, sql in PARAMETR_SOROVLARI.items():
+            parametrlar[nom] = await conn.scalar(text(sql))
+            if parametrlar[nom] is None:
+                raise SystemExit(f"'{nom}' parametri uchun ma'lumot yo'q - avval --yuklash bilan to'ldiring")
+    return parametrlar
+
+
+# ============== Solishtirish ==============
+
+def tekshirish(
+    natijalar: Dict[str, Any],
+    bazaviy: Optional[Dict[str, Any]],
+    tolerans: float,
+    minimal_ms: float
+) -> List[str]:
+    """Regressiyalar ro'yxati (bo'sh - hammasi joyida)."""
+    xatolar = []
+    bazaviy_sorovlar = (bazaviy or {}).get("sorovlar", {})
+
+    for nom, natija in natijalar.items():
+        # 1. Katta jadvalda ketma-ket skan taqiqlangan (kichik bo'laklar "Seq Scan:kichik")
+        for s in natija["statementlar"]:
+            for jadval, usullar in s["kirish"].items():
+                if jadval in KATALOG[nom].seq_taqiqlangan and "Seq Scan" in usullar:
+                    xatolar.append(f"{s['kalit']}: {jadval} da Seq Scan")
+
+        oldingi = bazaviy_sorovlar.get(nom)
+        if oldingi is None:
+            continue
+
+        # 2. Bazaviy rejada indeks bilan o'qilgan jadval endi indekssiz
+        oldingi_statementlar = {s["kalit"]: s for s in oldingi["statementlar"]}
+        for s in natija["statementlar"]:
+            eski = oldingi_statementlar.get(s["kalit"])
+            if eski is None:
+                continue
+            for jadval, usullar in eski["kirish"].items():
+                edi = any(u.split(":")[0] in INDEKS_TUGUNLARI for u in usullar)
+                hozir = s["kirish"].get(jadval, [])
+                if edi and "Seq Scan" in hozir:
+                    xatolar.append(
+                        f"{s['kalit']}: {jadval} indeks skanini yo'qotdi ({usullar} -> {hozir})"
+                    )
+
+        # 3. Vaqt regressiyasi
+        eski_ms, yangi_ms = oldingi["median_ms"], natija["median_ms"]
+        if yangi_ms > eski_ms * (1 + tolerans) and yangi_ms - eski_ms > minimal_ms:
+            xatolar.append(
+                f"{nom}: median {eski_ms:.1f} -> {yangi_ms:.1f} ms (+{(yangi_ms / eski_ms - 1):.0%})"
+            )
+    return xatolar
+
+
+async def _yuklash(hajm: str) -> None:
+    """Sintetik ma'lumotlar to'plamini yuklaydi va kategoriya agregatini quradi."""
+    from skriptlar import sintetik_malumotlar
+
+    # Bazaviy natija bilan solishtirish uchun sana va urug' qat'iy
+    yuklash_args = argparse.Namespace(
+        urugi=42, sana=date(2026, 1, 1), kunlar=180,
+        zipf_foydalanuvchi=0.8, zipf_holat=1.0, tozalash=True, indekslar_bilan=False,
+    )
+    await sintetik_malumotlar.asosiy_async(yuklash_args, dict(sintetik_malumotlar.HAJMLAR[hajm]))
+
+    await malumotlar_bazasi.ulanish()
+    try:
+        async with malumotlar_bazasi.sessiya() as db:
+            await KategoriyaRivojlanishiServisi(db).qayta_hisoblash()
+            await db.commit()
+    finally:
+        await malumotlar_bazasi.uzish()
+
+
+async def asosiy_async(args) -> Tuple[Dict[str, Any], Jadvallar]:
+    if args.yuklash:
+        await _yuklash(args.yuklash)
+
+    await malumotlar_bazasi.ulanish()
+    try:
+        _ushlashni_ulash(malumotlar_bazasi.engine)
+        jadvallar = await _jadvallar()
+        parametrlar = await _parametrlar()
+
+        natijalar = {}
+        for nom, sorov in KATALOG.items():
+            if args.faqat and nom not in args.faqat:
+                continue
+            natijalar[nom] = await olchash(nom, sorov, parametrlar, jadvallar, args.takrorlar)
+            print(f"  {nom:<30} median {natijalar[nom]['median_ms']:>9.2f} ms"
+                  f"   statementlar {len(natijalar[nom]['statementlar'])}")
+        return natijalar, jadvallar
+    finally:
+        await malumotlar_bazasi.uzish()
+
+
+def asosiy():
+    parser = argparse.ArgumentParser(description="So'rov rejalari regressiya to'plami")
+    parser.add_argument("--bazaviy", default="reja_bazaviy.json",
+                        help="Bazaviy natijalar fayli")
+    parser.add_argument("--yangilash", action="store_true",
+                        help="Joriy natijalarni bazaviy sifatida yozish")
+    parser.add_argument("--yuklash", choices=("10k", "100k", "1m", "10m"), default=None,
+                        help="Avval sintetik ma'lumotlarni shu hajmda yuklash")
+    parser.add_argument("--takrorlar", type=int, default=20)
+    parser.add_argument("--tolerans", type=float, default=0.25,
+                        help="Median vaqtning ruxsat etilgan nisbiy o'sishi")
+    parser.add_argument("--minimal-ms", type=float, default=2.0,
+                        help="Bundan kichik mutlaq o'sish e'tiborga olinmaydi")
+    parser.add_argument("--faqat", nargs="*", choices=KATALOG, default=None,
+                        help="Faqat shu katalog so'rovlari")
+    parser.add_argument("--json", dest="json_fayl", default=None,
+                        help="Joriy natijalarni JSON faylga yozish")
+    args = parser.parse_args()
+
+    natijalar, jadvallar = asyncio.run(asosiy_async(args))
+    hisobot = {
+        "vaqt": int(time.time()),
+        "jadvallar": jadvallar.katta(),
+        "sorovlar": natijalar,
+    }
+
+    if args.json_fayl:
+        with open(args.json_fayl, "w") as fayl:
+            json.dump(hisobot, fayl, indent=2, ensure_ascii=False)
+
+    if args.yangilash:
+        with open(args.bazaviy, "w") as fayl:
+            json.dump(hisobot, fayl, indent=2, ensure_ascii=False)
+        print(f"\nBazaviy natijalar yozildi: {args.bazaviy}")
+        return
+
+    try:
+        with open(args.bazaviy) as fayl:
+            bazaviy = json.load(fayl)
+    except FileNotFoundError:
+        print(f"\n{args.bazaviy} topilmadi - faqat Seq Scan qoidalari tekshirildi")
+        bazaviy = None
+
+    xatolar = tekshirish(natijalar, bazaviy, args.tolerans, args.minimal_ms)
+    if xatolar:
+        print(f"\n❌ {len(xatolar)} ta regressiya:")
+        for xato in xatolar:
+            print(f"  - {xato}")
+        sys.exit(1)
+    print("\n✅ Rejalar va vaqtlar bazaviy natija doirasida")
+
+
+if __name__ == "__main__":
+    asosiy()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# MedCase Pro Platform - Qayta Rejalashtirish Benchmarki
+# Sintetik kartalarda vektorlashtirilgan SM-2 va siyosatlarni o'lchaydi
+#
+# Foydalanish:
+#   python -m skriptlar.rejalashtirish_benchmark --kartalar 1000000
+
+import argparse
+import json
+import time
+import uuid
+from datetime import date
+
+import numpy as np
+
+from modellar.takrorlash import sm2_qadam
+from servislar.rejalashtirish_servisi import (
+    BOLAK_HAJMI,
+    SIYOSATLAR,
+    siyosatni_qollash,
+    sm2_vektor,
+    yozish_parametrlari,
+)
+
+# Har bir siyosat uchun benchmark parametrlari
+SIYOSAT_PARAMETRLARI = {
+    "tatil": {"kunlar": 7},
+    "tekislash": {"kunlar": 14},
+    "ef_kalibrlash": {"koeffitsient": 0.95},
+    "interval": {"maksimal_interval": 180},
+}
+
+
+def sintetik_kartalar(soni: int, urugi: int = 42) -> dict:
+    """Real taqsimotga yaqin sintetik karta holatlari."""
+    rng = np.random.default_rng(urugi)
+    bugun = date.today().toordinal()
+
+    repetition = rng.geometric(0.35, soni).astype(np.int32) - 1
+    ef = np.clip(rng.normal(2.4, 0.25, soni), 1.3, 2.8)
+    interval = np.where(
+        repetition == 0, 1,
+        np.where(repetition == 1, 6, np.rint(6 * ef ** (repetition - 1)))
+    )
+    interval = np.minimum(interval, 3650).astype(np.int32)
+    oxirgi = bugun - rng.integers(0, 120, soni).astype(np.int32)
+    keyingi = (oxirgi + interval).astype(np.int32)
+
+    return {
+        "ef": ef,
+        "interval": interval,
+        "repetition": repetition,
+        "keyingi": keyingi,
+        "oxirgi": oxirgi,
+        "sifat": rng.integers(0, 6, soni).astype(np.int32),
+    }
+
+
+def olchash(funksiya, *args, takror: int = 3, **kwargs):
+    """Eng yaxshi vaqtni (soniya) va natijani qaytaradi."""
+    eng_yaxshi, natija = float("inf"), None
+    for _ in range(takror):
+        boshlanish = time.perf_counter()
+        natija = funksiya(*args, **kwargs)
+        eng_yaxshi = min(eng_yaxshi, time.perf_counter() - boshlanish)
+    return eng_yaxshi, natija
+
+
+def sm2_tsikl(m: dict, soni: int):
+    """Taqqoslash uchun: har bir karta uchun skalyar sm2_qadam."""
+    ef, interval, repetition, sifat = (
+        m["ef"].tolist(), m["interval"].tolist(), m["repetition"].tolist(), m["sifat"].tolist()
+    )
+    return [sm2_qadam(ef[i], interval[i], repetition[i], sifat[i]) for i in range(soni)]
+
+
+def asosiy():
+    parser = argparse.ArgumentParser(description="Qayta rejalashtirish benchmarki")
+    parser.add_argument("--kartalar", type=int, default=1_000_000)
+    parser.add_argument("--tsikl-namunasi", type=int, default=200_000,
+                        help="Skalyar tsikl o'lchanadigan kartalar soni")
+    parser.add_argument("--json", dest="json_fayl", default=None,
+                        help="Natijalarni JSON faylga yozish")
+    args = parser.parse_args()
+
+    m = sintetik_kartalar(args.kartalar)
+    bugun = date.today().toordinal()
+    natijalar = {"kartalar": args.kartalar, "bolak_hajmi": BOLAK_HAJMI, "olchovlar": {}}
+
+    # SM-2: vektor va skalyar natijalar bir xilligini tekshirish
+    vaqt, (ef_v, int_v, rep_v, _) = olchash(
+        sm2_vektor, m["ef"], m["interval"], m["repetition"], m["sifat"]
+    )
+    natijalar["olchovlar"]["sm2_vektor"] = vaqt
+
+    namuna = min(args.tsikl_namunasi, args.kartalar)
+    tsikl_vaqti, skalyar = olchash(sm2_tsikl, m, namuna, takror=1)
+    natijalar["olchovlar"]["sm2_tsikl_1m_baho"] = tsikl_vaqti * args.kartalar / namuna
+    ef_s, int_s, rep_s, _ = map(np.array, zip(*skalyar))
+    assert np.allclose(ef_v[:namuna], ef_s), "EF farq qildi"
+    assert np.array_equal(int_v[:namuna], int_s), "Interval farq qildi"
+    assert np.array_equal(rep_v[:namuna], rep_s), "Repetition farq qildi"
+
+    # Siyosatlar va yozish parametrlarini tayyorlash
+    idlar = [uuid.uuid4() for _ in range(args.kartalar)]
+    for siyosat in SIYOSATLAR:
+        vaqt, (ozgargan, yangi) = olchash(
+            siyosatni_qollash, m, siyosat, bugun, **SIYOSAT_PARAMETRLARI[siyosat]
+        )
+        yozish_vaqti, _ = olchash(yozish_parametrlari, idlar, ozgargan, yangi, takror=1)
+        natijalar["olchovlar"][f"siyosat_{siyosat}"] = vaqt
+        natijalar["olchovlar"][f"yozish_param_{siyosat}"] = yozish_vaqti
+        natijalar[f"ozgargan_{siyosat}"] = int(ozgargan.size)
+
+    print(f"Kartalar: {args.kartalar:,}")
+    for nom, soniya in natijalar["olchovlar"].items():
+        print(f"  {nom:<28} {soniya * 1000:>10.1f} ms")
+    for siyosat in SIYOSATLAR:
+        print(f"  o'zgargan ({siyosat}): {natijalar[f'ozgargan_{siyosat}']:,}")
+
+    if args.json_fayl:
+        with open(args.json_fayl, "w") as fayl:
+            json.dump(natijalar, fayl, indent=2)
+
+
+if __name__ == "__main__":
+    asosiy()
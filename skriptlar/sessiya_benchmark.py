@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# MedCase Pro Platform - Sessiya Round-trip Benchmarki
+# Oddiy GET so'rovining eski (pre-ping + BEGIN/COMMIT) va yangi (autocommit) yo'lini o'lchaydi
+#
+# Foydalanish:
+#   python -m skriptlar.sessiya_benchmark --sorovlar 500
+#   python -m skriptlar.sessiya_benchmark --url postgresql+asyncpg://... --json natija.json
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from sozlamalar.malumotlar_bazasi import MalumotlarBazasi, yozuv_bor
+from sozlamalar.sozlamalar import sozlamalar
+
+# Handler ichidagi odatiy o'qish so'rovi o'rnida
+SOROV = text("SELECT 1")
+
+
+def round_trip_hisoblagich(engine: AsyncEngine, hisob: dict) -> None:
+    """
+    Har bir asyncpg ulanishiga query logger ulaydi - ping, BEGIN, COMMIT va
+    so'rovlar serverga yuborilgan har bir buyruq sifatida sanaladi.
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def _ulanganda(dbapi_ulanish, ulanish_yozuvi):
+        dbapi_ulanish._connection.add_query_logger(
+            lambda yozuv: hisob.__setitem__("buyruqlar", hisob["buyruqlar"] + 1)
+        )
+
+
+async def eski_sorov(fabrika: async_sessionmaker) -> None:
+    """Avvalgi sessiya_olish: tranzaksiya va har doim commit."""
+    sessiya = fabrika()
+    try:
+        await sessiya.execute(SOROV)
+        await sessiya.commit()
+    finally:
+        await sessiya.close()
+
+
+async def yangi_sorov(fabrika: async_sessionmaker) -> None:
+    """Joriy sessiya_olish GET yo'li: autocommit, yozuv bo'lmasa commit yo'q."""
+    sessiya = fabrika()
+    try:
+        await sessiya.execute(SOROV)
+        if yozuv_bor(sessiya):
+            await sessiya.commit()
+    finally:
+        await sessiya.close()
+
+
+async def olchash(funksiya, fabrika, hisob: dict, sorovlar: int) -> dict:
+    """Ketma-ket so'rovlar kechikishi va so'rov boshiga buyruqlar soni."""
+    await funksiya(fabrika)  # Pool isitish
+    hisob["buyruqlar"] = 0
+    vaqtlar = []
+    for _ in range(sorovlar):
+        boshlanish = time.perf_counter()
+        await funksiya(fabrika)
+        vaqtlar.append(time.perf_counter() - boshlanish)
+    vaqtlar.sort()
+    return {
+        "round_trip_sorov_boshiga": hisob["buyruqlar"] / sorovlar,
+        "ortacha_ms": statistics.mean(vaqtlar) * 1000,
+        "p50_ms": vaqtlar[len(vaqtlar) // 2] * 1000,
+        "p95_ms": vaqtlar[int(len(vaqtlar) * 0.95)] * 1000,
+    }
+
+
+async def asosiy_async(url: str, sorovlar: int) -> dict:
+    bazasi = MalumotlarBazasi()
+    natijalar = {"sorovlar": sorovlar, "rejimlar": {}}
+
+    # Eski yo'l: pool_pre_ping=True va tranzaksiyali sessiya
+    eski_engine = create_async_engine(
+        bazasi._db_url_tozalash(url),
+        pool_size=1,
+        pool_pre_ping=True,
+        connect_args={"ssl": bazasi._ssl_kontekst_yaratish()},
+    )
+    eski_hisob = {"buyruqlar": 0}
+    round_trip_hisoblagich(eski_engine, eski_hisob)
+
+    # Yangi yo'l: ilova engine sozlamalari va autocommit sessiya
+    yangi_engine = bazasi._engine_yaratish(url)
+    yangi_hisob = {"buyruqlar": 0}
+    round_trip_hisoblagich(yangi_engine, yangi_hisob)
+
+    try:
+        natijalar["rejimlar"]["eski"] = await olchash(
+            eski_sorov, MalumotlarBazasi._sessiya_fabrikasi(eski_engine), eski_hisob, sorovlar
+        )
+        natijalar["rejimlar"]["yangi"] = await olchash(
+            yangi_sorov,
+            MalumotlarBazasi._sessiya_fabrikasi(yangi_engine, autocommit=True),
+            yangi_hisob,
+            sorovlar
+        )
+    finally:
+        await eski_engine.dispose()
+        await yangi_engine.dispose()
+    return natijalar
+
+
+def asosiy():
+    parser = argparse.ArgumentParser(description="Sessiya round-trip benchmarki")
+    parser.add_argument("--url", default=sozlamalar.malumotlar_bazasi_url)
+    parser.add_argument("--sorovlar", type=int, default=500)
+    parser.add_argument("--json", dest="json_fayl", default=None,
+                        help="Natijalarni JSON faylga yozish")
+    args = parser.parse_args()
+
+    natijalar = asyncio.run(asosiy_async(args.url, args.sorovlar))
+
+    print(f"So'rovlar: {args.sorovlar:,}")
+    for rejim, olchov in natijalar["rejimlar"].items():
+        print(
+            f"  {rejim:<6} round-trip/so'rov {olchov['round_trip_sorov_boshiga']:>4.1f}"
+            f"   o'rtacha {olchov['ortacha_ms']:>7.2f} ms"
+            f"   p50 {olchov['p50_ms']:>7.2f} ms   p95 {olchov['p95_ms']:>7.2f} ms"
+        )
+
+    if args.json_fayl:
+        with open(args.json_fayl, "w") as fayl:
+            json.dump(natijalar, fayl, indent=2)
+
+
+if __name__ == "__main__":
+    asosiy()
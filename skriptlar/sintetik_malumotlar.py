@@ -0,0 +1,749 @@
+#!/usr/bin/env python3
+# MedCase Pro Platform - Sintetik Ma'lumotlar Generatori
+# Benchmark uchun deterministik, production hajmidagi ma'lumotlar (COPY orqali)
+#
+# Foydalanish:
+#   python -m skriptlar.sintetik_malumotlar --hajm 100k
+#   python -m skriptlar.sintetik_malumotlar --hajm 10m --urugi 7 --tozalash
+#   python -m skriptlar.sintetik_malumotlar --hajm 1m --urinishlar 3000000 --sana 2025-01-01
+#
+# Bir xil urug' va sana bilan har safar bir xil ma'lumotlar hosil bo'ladi.
+# Kategoriyalar daraxti, admin, nishonlar va darajalar boshlangich_malumotlar
+# orqali yaratiladi (mavjud bo'lsa o'tkazib yuboriladi).
+
+import argparse
+import asyncio
+import enum
+import json
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import JSON, Enum as SQLEnum, Table, select, text
+
+from modellar.bildirishnoma import Bildirishnoma, BildirishnomaTuri
+from modellar.foydalanuvchi import Foydalanuvchi, FoydalanuvchiProfili, FoydalanuvchiRoli
+from modellar.holat import Holat, HolatMedia, HolatTuri, HolatVarianti, MediaTuri, QiyinlikDarajasi
+from modellar.imtihon import Imtihon, ImtihonHolati, ImtihonJavobi, ImtihonTuri
+from modellar.izoh import HolatIzohi
+from modellar.kategoriya import Bolim
+from modellar.rivojlanish import FoydalanuvchiRivojlanishi, HolatUrinishi
+from modellar.takrorlash import TakrorlashKartasi, TakrorlashTarixi
+from servislar.bolak_servisi import OLDINGA_OYLAR
+from servislar.rejalashtirish_servisi import sm2_vektor
+from skriptlar import boshlangich_malumotlar
+from sozlamalar.malumotlar_bazasi import malumotlar_bazasi
+from yordamchilar.xavfsizlik import parol_hashlash
+
+# Hajm presetlari - nomi urinishlar soniga mos
+HAJMLAR: Dict[str, Dict[str, int]] = {
+    "10k": {
+        "foydalanuvchilar": 500, "holatlar": 1_000, "urinishlar": 10_000,
+        "imtihonlar": 200, "izohlar": 1_000, "bildirishnomalar": 2_000,
+    },
+    "100k": {
+        "foydalanuvchilar": 2_000, "holatlar": 3_000, "urinishlar": 100_000,
+        "imtihonlar": 2_000, "izohlar": 10_000, "bildirishnomalar": 20_000,
+    },
+    "1m": {
+        "foydalanuvchilar": 20_000, "holatlar": 10_000, "urinishlar": 1_000_000,
+        "imtihonlar": 20_000, "izohlar": 50_000, "bildirishnomalar": 200_000,
+    },
+    "10m": {
+        "foydalanuvchilar": 100_000, "holatlar": 30_000, "urinishlar": 10_000_000,
+        "imtihonlar": 100_000, "izohlar": 200_000, "bildirishnomalar": 1_000_000,
+    },
+}
+
+EMAIL_SHABLONI = "sintetik_{:07d}@example.com"
+SARLAVHA_PREFIKSI = "Sintetik holat #"
+PAROL = "Sintetik123!"
+
+# Urinishlar shu o'lchamdagi bo'laklarda yaratiladi va yoziladi (xotira chegarasi)
+BOLAK_HAJMI = 500_000
+
+# Urinilgan (foydalanuvchi, holat) juftlarining takrorlash kartasiga aylangan ulushi
+KARTA_ULUSHI = 0.3
+MAKSIMAL_TAKRORLASH = 12
+IMTIHON_SAVOLLARI = 20
+JAVOB_ULUSHI = 0.25
+
+# Indekslari COPY vaqtida o'chirilib, keyin qayta quriladigan jadvallar
+KATTA_JADVALLAR = (HolatUrinishi, TakrorlashTarixi, ImtihonJavobi, Bildirishnoma)
+
+QIYINLIK_EHTIMOLLARI = (0.3, 0.5, 0.2)
+TOGRI_EHTIMOLLARI = np.array([0.8, 0.6, 0.4])
+SIFAT_EHTIMOLLARI = (0.05, 0.07, 0.1, 0.25, 0.3, 0.23)
+
+SIMPTOMLAR = [
+    "ko'krak qafasida siquvchi og'riq", "hansirash", "isitma", "yo'tal", "bosh og'rig'i",
+    "qorin og'rig'i", "ko'ngil aynishi", "holsizlik", "yurak urishining tezlashishi",
+    "oyoqlarda shish", "bosh aylanishi", "ishtaha pasayishi", "vazn yo'qotish",
+]
+TOPILMALAR = [
+    "AQB 150/95 mm sim.ust.", "puls 112 marta/daq", "SpO2 91%", "harorat 38.7°C",
+    "o'pkada krepitatsiya eshitiladi", "qorin palpatsiyada og'riqli", "teri rangpar",
+    "bo'yin venalari bo'rtgan", "jigar qovurg'a ostidan 3 sm chiqqan",
+]
+TAHLILLAR = [
+    "leykotsitlar 14.2×10⁹/l", "gemoglobin 92 g/l", "glyukoza 11.4 mmol/l",
+    "kreatinin 210 mkmol/l", "troponin I musbat", "CRO 48 mg/l", "ALT 180 U/l",
+]
+IZOHLAR = [
+    "Yaxshi holat, tushuntirish juda foydali bo'ldi.",
+    "Nima uchun B varianti noto'g'ri? Menimcha u ham mos keladi.",
+    "Imtihonda xuddi shunday savol tushgan edi.",
+    "Differensial diagnostika qismini batafsilroq yozsangiz yaxshi bo'lardi.",
+    "Rahmat! Algoritm esda qolarli tarzda berilgan.",
+]
+BILDIRISHNOMALAR = {
+    BildirishnomaTuri.STREAK: ("Streakni saqlang!", "Bugun hali birorta holat yechmadingiz."),
+    BildirishnomaTuri.NISHON: ("Yangi nishon", "Siz yangi nishonga ega bo'ldingiz."),
+    BildirishnomaTuri.REYTING: ("Reyting o'zgardi", "Haftalik reytingda o'rningiz yangilandi."),
+    BildirishnomaTuri.YANGI_KONTENT: ("Yangi holatlar", "Sevimli bo'limingizga yangi holatlar qo'shildi."),
+    BildirishnomaTuri.ESLATMA: ("Takrorlash vaqti", "Bugun takrorlanadigan kartalaringiz bor."),
+}
+
+
+# ============== Yordamchi funksiyalar ==============
+
+def zipf_ehtimollari(soni: int, daraja: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Zipf taqsimoti bo'yicha ehtimollar (1/rank^daraja). Ranglar tasodifiy
+    almashtiriladi - eng faol foydalanuvchi/holat birinchi yaratilgan bo'lmaydi.
+    """
+    vaznlar = 1.0 / np.arange(1, soni + 1) ** daraja
+    return rng.permutation(vaznlar / vaznlar.sum())
+
+
+def uuidlar(soni: int, rng: np.random.Generator) -> List[uuid.UUID]:
+    """Urug'ga bog'liq (deterministik) UUID v4 lar."""
+    baytlar = rng.bytes(16 * soni)
+    return [uuid.UUID(bytes=baytlar[i:i + 16], version=4) for i in range(0, 16 * soni, 16)]
+
+
+def vaqtlar(langar: datetime, soniyalar: np.ndarray) -> List[datetime]:
+    """Langar vaqtidan oldingi soniyalar massivi -> timezone'li datetime ro'yxati."""
+    return [langar - timedelta(seconds=s) for s in soniyalar.tolist()]
+
+
+def _standart_qiymat(ustun, hozir: datetime) -> Any:
+    """Ustunning Python default qiymati COPY uchun tayyor ko'rinishda."""
+    standart = ustun.default
+    if standart.is_scalar:
+        qiymat = standart.arg
+    elif standart.is_callable:
+        qiymat = standart.arg(None)
+    else:
+        # func.now() kabi SQL ifodalar
+        qiymat = hozir
+    if isinstance(ustun.type, SQLEnum) and isinstance(qiymat, enum.Enum):
+        qiymat = qiymat.name
+    elif isinstance(ustun.type, JSON):
+        qiymat = json.dumps(qiymat)
+    return qiymat
+
+
+class Yozuvchi:
+    """
+    asyncpg COPY (copy_records_to_table) orqali yozish.
+    Berilmagan ustunlar model default qiymatlari bilan to'ldiriladi - COPY
+    SQLAlchemy Python defaultlarini qo'llamaydi.
+    """
+
+    def __init__(self, ulanish, hozir: datetime):
+        self.ulanish = ulanish
+        self.hozir = hozir
+        self.jami: Dict[str, int] = {}
+
+    def _toldiruvchi(self, jadval: Table, berilgan: Sequence[str]) -> Tuple[List[str], tuple]:
+        ustunlar, qiymatlar = [], []
+        for ustun in jadval.columns:
+            if ustun.name in berilgan or ustun.default is None:
+                # Default yo'q: NULL yoki server_default bazaning o'zida qo'llanadi
+                continue
+            ustunlar.append(ustun.name)
+            qiymatlar.append(_standart_qiymat(ustun, self.hozir))
+        return ustunlar, tuple(qiymatlar)
+
+    async def yozish(self, model, ustunlar: Dict[str, Sequence[Any]]) -> None:
+        jadval = model.__table__
+        nomlar = list(ustunlar)
+        qoshimcha, dum = self._toldiruvchi(jadval, nomlar)
+        qatorlar = [qator + dum for qator in zip(*ustunlar.values())]
+        if not qatorlar:
+            return
+        await self.ulanish.copy_records_to_table(
+            jadval.name, records=qatorlar, columns=nomlar + qoshimcha
+        )
+        self.jami[jadval.name] = self.jami.get(jadval.name, 0) + len(qatorlar)
+
+
+def _enum_nomlari(qiymatlar: Sequence[enum.Enum], indekslar: np.ndarray) -> List[str]:
+    """SQLEnum ustunlari enum nomini saqlaydi (qiymatini emas)."""
+    nomlar = [q.name for q in qiymatlar]
+    return [nomlar[i] for i in indekslar.tolist()]
+
+
+def _matn(rng: np.random.Generator, royxat: List[str], soni: int) -> str:
+    return ", ".join(royxat[i] for i in rng.choice(len(royxat), soni, replace=False))
+
+
+# ============== Generator ==============
+
+class SintetikGenerator:
+    """Barcha jadvallar uchun ma'lumotlarni FK tartibida yaratadi va yozadi."""
+
+    def __init__(self, parametrlar: Dict[str, int], urugi: int, sana: date, kunlar: int,
+                 zipf_foydalanuvchi: float, zipf_holat: float):
+        self.p = parametrlar
+        self.rng = np.random.default_rng(urugi)
+        self.sana = sana
+        self.langar = datetime.combine(sana, dt_time(20, 0), tzinfo=timezone.utc)
+        self.oyna = kunlar * 86400
+        self.zipf_foydalanuvchi = zipf_foydalanuvchi
+        self.zipf_holat = zipf_holat
+
+    # ---------- Foydalanuvchilar ----------
+
+    async def foydalanuvchilar(self, y: Yozuvchi) -> None:
+        n = self.p["foydalanuvchilar"]
+        self.foydalanuvchi_idlari = uuidlar(n, self.rng)
+        self.foydalanuvchi_p = zipf_ehtimollari(n, self.zipf_foydalanuvchi, self.rng)
+        royxatdan = vaqtlar(self.langar, self.rng.uniform(self.oyna, self.oyna * 2, n))
+        parol_hash = parol_hashlash(PAROL)
+
+        await y.yozish(Foydalanuvchi, {
+            "id": self.foydalanuvchi_idlari,
+            "email": [EMAIL_SHABLONI.format(i) for i in range(n)],
+            "foydalanuvchi_nomi": [f"sintetik_{i}" for i in range(n)],
+            "parol_hash": [parol_hash] * n,
+            "ism": [f"Talaba{i}" for i in range(n)],
+            "familiya": ["Sintetik"] * n,
+            "rol": [FoydalanuvchiRoli.TALABA.name] * n,
+            "email_tasdiqlangan": [True] * n,
+            "yaratilgan_vaqt": royxatdan,
+            "yangilangan_vaqt": royxatdan,
+        })
+        await y.yozish(FoydalanuvchiProfili, {
+            "id": uuidlar(n, self.rng),
+            "foydalanuvchi_id": self.foydalanuvchi_idlari,
+            "kurs_yili": self.rng.integers(1, 7, n).tolist(),
+        })
+
+    # ---------- Holatlar, variantlar, media ----------
+
+    async def holatlar(self, y: Yozuvchi, bolim_idlari: List[uuid.UUID]) -> None:
+        n = self.p["holatlar"]
+        rng = self.rng
+        self.holat_idlari = uuidlar(n, rng)
+        self.holat_p = zipf_ehtimollari(n, self.zipf_holat, rng)
+
+        # Bo'limlar bir tekis emas - ba'zi bo'limlarda kontent ko'p
+        bolim_p = zipf_ehtimollari(len(bolim_idlari), 0.6, rng)
+        bolimlar = rng.choice(len(bolim_idlari), n, p=bolim_p)
+        self.qiyinlik = rng.choice(3, n, p=QIYINLIK_EHTIMOLLARI)
+        turlar = rng.choice(len(HolatTuri), n, p=(0.6, 0.25, 0.1, 0.05))
+        self.togri_javob = rng.choice(4, n)
+        self.ball = np.array([5, 10, 15])[self.qiyinlik]
+        yaratilgan = vaqtlar(self.langar, rng.uniform(self.oyna, self.oyna * 2, n))
+
+        stsenariylar = []
+        for i in range(n):
+            yosh, jins = int(rng.integers(18, 85)), ("erkak", "ayol")[int(rng.integers(2))]
+            stsenariylar.append(
+                f"{yosh} yoshli {jins} {_matn(rng, SIMPTOMLAR, int(rng.integers(2, 5)))} "
+                f"shikoyatlari bilan murojaat qildi. Ko'rikda: {_matn(rng, TOPILMALAR, int(rng.integers(2, 5)))}. "
+                f"Tahlillar: {_matn(rng, TAHLILLAR, int(rng.integers(1, 4)))}."
+            )
+
+        await y.yozish(Holat, {
+            "id": self.holat_idlari,
+            "bolim_id": [bolim_idlari[i] for i in bolimlar.tolist()],
+            "sarlavha": [f"{SARLAVHA_PREFIKSI}{i}" for i in range(n)],
+            "klinik_stsenariy": stsenariylar,
+            "savol": ["Eng to'g'ri keyingi tashxis yoki davolash qadami qaysi?"] * n,
+            "togri_javob": ["ABCD"[i] for i in self.togri_javob.tolist()],
+            "umumiy_tushuntirish": ["Sintetik tushuntirish matni."] * n,
+            "turi": _enum_nomlari(list(HolatTuri), turlar),
+            "qiyinlik": _enum_nomlari(list(QiyinlikDarajasi), self.qiyinlik),
+            "ball": self.ball.tolist(),
+            "chop_etilgan": (rng.random(n) < 0.95).tolist(),
+            "tekshirilgan": [True] * n,
+            "yaratilgan_vaqt": yaratilgan,
+            "yangilangan_vaqt": yaratilgan,
+        })
+
+        # Har bir holatga 4 ta variant (A-D)
+        await y.yozish(HolatVarianti, {
+            "id": uuidlar(n * 4, rng),
+            "holat_id": [h for h in self.holat_idlari for _ in range(4)],
+            "belgi": list("ABCD") * n,
+            "matn": [f"Variant {b}" for b in "ABCD"] * n,
+            "togri": [t == j for t in self.togri_javob.tolist() for j in range(4)],
+        })
+
+        # Holatlarning ~30% ida 1-3 ta media
+        media_soni = np.where(rng.random(n) < 0.3, rng.integers(1, 4, n), 0)
+        egalar = np.repeat(np.arange(n), media_soni)
+        m = len(egalar)
+        media_idlari = uuidlar(m, rng)
+        await y.yozish(HolatMedia, {
+            "id": media_idlari,
+            "holat_id": [self.holat_idlari[i] for i in egalar.tolist()],
+            "turi": _enum_nomlari(list(MediaTuri), rng.choice(len(MediaTuri), m)),
+            "url": [f"https://res.cloudinary.com/medcase/image/upload/sintetik/{i}.jpg" for i in media_idlari],
+            "fayl_hajmi": rng.integers(50_000, 3_000_000, m).tolist(),
+            "kenglik": [1024] * m,
+            "balandlik": [768] * m,
+        })
+
+    # ---------- Urinishlar ----------
+
+    async def urinishlar(self, y: Yozuvchi) -> None:
+        """Zipf bo'yicha foydalanuvchi va holat tanlanadi; natija qiyinlikka bog'liq."""
+        rng = self.rng
+        nf, nh = self.p["foydalanuvchilar"], self.p["holatlar"]
+        self.f_urinish = np.zeros(nf, np.int64)
+        self.f_togri = np.zeros(nf, np.int64)
+        self.f_vaqt = np.zeros(nf, np.int64)
+        self.f_ball = np.zeros(nf, np.int64)
+        self.f_oxirgi = np.full(nf, self.oyna, np.float64)
+        self.f_qiyinlik = np.zeros((nf, 3), np.int64)
+        juftlar = []
+
+        qoldi = self.p["urinishlar"]
+        while qoldi > 0:
+            k = min(BOLAK_HAJMI, qoldi)
+            qoldi -= k
+            f = rng.choice(nf, k, p=self.foydalanuvchi_p)
+            h = rng.choice(nh, k, p=self.holat_p)
+            qiyinlik = self.qiyinlik[h]
+            togri = rng.random(k) < TOGRI_EHTIMOLLARI[qiyinlik]
+            sarflangan = np.clip(rng.lognormal(4.0, 0.6, k), 5, 1800).astype(np.int64)
+            oldin = rng.uniform(0, self.oyna, k)
+            ball = np.where(togri, self.ball[h], 0)
+            tanlangan = np.where(togri, self.togri_javob[h], (self.togri_javob[h] + rng.integers(1, 4, k)) % 4)
+
+            tugallangan = vaqtlar(self.langar, oldin)
+            boshlangan = [t - timedelta(seconds=s) for t, s in zip(tugallangan, sarflangan.tolist())]
+            await y.yozish(HolatUrinishi, {
+                "id": uuidlar(k, rng),
+                "foydalanuvchi_id": [self.foydalanuvchi_idlari[i] for i in f.tolist()],
+                "holat_id": [self.holat_idlari[i] for i in h.tolist()],
+                "tanlangan_javob": ["ABCD"[i] for i in tanlangan.tolist()],
+                "togri": togri.tolist(),
+                "sarflangan_vaqt": sarflangan.tolist(),
+                "boshlangan_vaqt": boshlangan,
+                "tugallangan_vaqt": tugallangan,
+                "olingan_ball": ball.tolist(),
+                "yaratilgan_vaqt": tugallangan,
+                "yangilangan_vaqt": tugallangan,
+            })
+
+            self.f_urinish += np.bincount(f, minlength=nf)
+            self.f_togri += np.bincount(f[togri], minlength=nf)
+            self.f_vaqt += np.bincount(f, weights=sarflangan, minlength=nf).astype(np.int64)
+            self.f_ball += np.bincount(f, weights=ball, minlength=nf).astype(np.int64)
+            np.minimum.at(self.f_oxirgi, f, oldin)
+            for d in range(3):
+                tanlov = togri & (qiyinlik == d)
+                self.f_qiyinlik[:, d] += np.bincount(f[tanlov], minlength=nf)
+            juftlar.append(np.unique(f.astype(np.int64) * nh + h))
+            print(f"  urinishlar: {self.p['urinishlar'] - qoldi:,}/{self.p['urinishlar']:,}")
+
+        self.juftlar = np.unique(np.concatenate(juftlar)) if juftlar else np.zeros(0, np.int64)
+
+    async def rivojlanish(self, y: Yozuvchi) -> None:
+        """Foydalanuvchi agregatlari urinishlardan hisoblanadi (qayta hisoblash vazifasisiz)."""
+        n = self.p["foydalanuvchilar"]
+        urinish = self.f_urinish
+        aniqlik = np.where(urinish > 0, self.f_togri / np.maximum(urinish, 1) * 100, 0.0)
+        ortacha = np.where(urinish > 0, self.f_vaqt / np.maximum(urinish, 1), 0.0)
+        oxirgi = [
+            (self.langar - timedelta(seconds=s)).date() if u else None
+            for s, u in zip(self.f_oxirgi.tolist(), urinish.tolist())
+        ]
+        await y.yozish(FoydalanuvchiRivojlanishi, {
+            "id": uuidlar(n, self.rng),
+            "foydalanuvchi_id": self.foydalanuvchi_idlari,
+            "jami_urinishlar": urinish.tolist(),
+            "togri_javoblar": self.f_togri.tolist(),
+            "notogri_javoblar": (urinish - self.f_togri).tolist(),
+            "aniqlik_foizi": np.round(aniqlik, 2).tolist(),
+            "jami_vaqt": self.f_vaqt.tolist(),
+            "ortacha_vaqt": np.round(ortacha, 2).tolist(),
+            "jami_ball": self.f_ball.tolist(),
+            "oxirgi_faollik": oxirgi,
+            "oson_yechilgan": self.f_qiyinlik[:, 0].tolist(),
+            "ortacha_yechilgan": self.f_qiyinlik[:, 1].tolist(),
+            "qiyin_yechilgan": self.f_qiyinlik[:, 2].tolist(),
+        })
+
+    # ---------- Takrorlash kartalari va tarix ----------
+
+    async def takrorlash(self, y: Yozuvchi) -> None:
+        """
+        Urinilgan juftlarning bir qismi kartaga aylanadi. Tarix SM-2 bo'yicha
+        vektorlashtirilgan holda o'ynaladi - yakuniy karta holati tarixga mos.
+        """
+        rng = self.rng
+        nh = self.p["holatlar"]
+        juftlar = self.juftlar[rng.random(len(self.juftlar)) < KARTA_ULUSHI]
+        n = len(juftlar)
+        karta_idlari = uuidlar(n, rng)
+        bugun = self.sana.toordinal()
+
+        # Har bir kartaning tarixi oyna ichida boshlanadi
+        sana = bugun - rng.integers(1, self.oyna // 86400, n)
+        takrorlashlar = np.minimum(rng.geometric(0.3, n), MAKSIMAL_TAKRORLASH)
+        ef = np.full(n, 2.5)
+        interval = np.ones(n, np.int32)
+        repetition = np.zeros(n, np.int32)
+        jami = np.zeros(n, np.int32)
+        togri_soni = np.zeros(n, np.int32)
+        oxirgi = np.zeros(n, np.int64)
+
+        tarix: Dict[str, list] = {k: [] for k in (
+            "karta_id", "sifat", "togri", "sarflangan_vaqt", "ef_oldin", "ef_keyin",
+            "interval_oldin", "interval_keyin", "yaratilgan_vaqt"
+        )}
+        for qadam in range(MAKSIMAL_TAKRORLASH):
+            faol = np.flatnonzero((takrorlashlar > qadam) & (sana <= bugun))
+            if not len(faol):
+                break
+            sifat = rng.choice(6, len(faol), p=SIFAT_EHTIMOLLARI)
+            ef_yangi, interval_yangi, repetition_yangi, togri = sm2_vektor(
+                ef[faol], interval[faol], repetition[faol], sifat
+            )
+            vaqt = [
+                datetime.fromordinal(int(s)).replace(tzinfo=timezone.utc) + timedelta(seconds=int(t))
+                for s, t in zip(sana[faol], rng.integers(8 * 3600, 23 * 3600, len(faol)))
+            ]
+            tarix["karta_id"] += [karta_idlari[i] for i in faol.tolist()]
+            tarix["sifat"] += sifat.tolist()
+            tarix["togri"] += togri.tolist()
+            tarix["sarflangan_vaqt"] += rng.integers(3, 90, len(faol)).tolist()
+            tarix["ef_oldin"] += np.round(ef[faol], 3).tolist()
+            tarix["ef_keyin"] += np.round(ef_yangi, 3).tolist()
+            tarix["interval_oldin"] += interval[faol].tolist()
+            tarix["interval_keyin"] += interval_yangi.tolist()
+            tarix["yaratilgan_vaqt"] += vaqt
+
+            ef[faol], interval[faol], repetition[faol] = ef_yangi, interval_yangi, repetition_yangi
+            jami[faol] += 1
+            togri_soni[faol] += togri
+            oxirgi[faol] = sana[faol]
+            # Keyingi takrorlash biroz kechikishi mumkin (real foydalanuvchilar kabi)
+            sana[faol] += interval_yangi + rng.poisson(1.0, len(faol))
+
+        keyingi = np.where(jami > 0, oxirgi + interval, bugun)
+        oxirgi_vaqt = [
+            datetime.fromordinal(int(o)).replace(tzinfo=timezone.utc) if o else None
+            for o in oxirgi.tolist()
+        ]
+        await y.yozish(TakrorlashKartasi, {
+            "id": karta_idlari,
+            "foydalanuvchi_id": [self.foydalanuvchi_idlari[i] for i in (juftlar // nh).tolist()],
+            "holat_id": [self.holat_idlari[i] for i in (juftlar % nh).tolist()],
+            "easiness_factor": np.round(ef, 3).tolist(),
+            "interval": interval.tolist(),
+            "repetition": repetition.tolist(),
+            "oxirgi_takrorlash": oxirgi_vaqt,
+            "keyingi_takrorlash": [date.fromordinal(int(k)) for k in keyingi.tolist()],
+            "jami_takrorlashlar": jami.tolist(),
+            "togri_javoblar": togri_soni.tolist(),
+        })
+        await y.yozish(TakrorlashTarixi, {
+            "id": uuidlar(len(tarix["karta_id"]), rng),
+            **tarix,
+            "yangilangan_vaqt": tarix["yaratilgan_vaqt"],
+        })
+
+    # ---------- Imtihonlar ----------
+
+    async def imtihonlar(self, y: Yozuvchi) -> None:
+        rng = self.rng
+        n, s = self.p["imtihonlar"], IMTIHON_SAVOLLARI
+        imtihon_idlari = uuidlar(n, rng)
+        f = rng.choice(self.p["foydalanuvchilar"], n, p=self.foydalanuvchi_p)
+        h = rng.choice(self.p["holatlar"], (n, s), p=self.holat_p)
+        tugallangan = rng.random(n) < 0.9
+        # Tugallanmagan imtihonlarda savollarning bir qismiga javob berilgan
+        javoblar_soni = np.where(tugallangan, s, rng.integers(0, s, n))
+        javob_berilgan = np.arange(s)[None, :] < javoblar_soni[:, None]
+        togri = javob_berilgan & (rng.random((n, s)) < TOGRI_EHTIMOLLARI[self.qiyinlik[h]])
+        sarflangan = rng.integers(20, 90, (n, s))
+
+        boshlangan_s = rng.uniform(3600, self.oyna, n)
+        boshlangan = vaqtlar(self.langar, boshlangan_s)
+        tugash = vaqtlar(self.langar, boshlangan_s - sarflangan.sum(axis=1))
+        togri_jami = togri.sum(axis=1)
+        ball_foizi = np.round(togri_jami / s * 100).astype(int)
+
+        await y.yozish(Imtihon, {
+            "id": imtihon_idlari,
+            "foydalanuvchi_id": [self.foydalanuvchi_idlari[i] for i in f.tolist()],
+            "nom": ["Sintetik imtihon"] * n,
+            "turi": [ImtihonTuri.VAQTLI.name] * n,
+            "holat": [
+                (ImtihonHolati.TUGALLANGAN if t else ImtihonHolati.JARAYONDA).name
+                for t in tugallangan.tolist()
+            ],
+            "umumiy_vaqt": [1800] * n,
+            "boshlangan_vaqt": boshlangan,
+            "tugallangan_vaqt": [v if t else None for v, t in zip(tugash, tugallangan.tolist())],
+            "savollar": [[self.holat_idlari[i] for i in qator] for qator in h.tolist()],
+            "joriy_savol_indeksi": np.minimum(javoblar_soni, s - 1).tolist(),
+            "javob_berilgan": javoblar_soni.tolist(),
+            "togri_javoblar": togri_jami.tolist(),
+            "notogri_javoblar": (javoblar_soni - togri_jami).tolist(),
+            "ball_foizi": [b if t else None for b, t in zip(ball_foizi.tolist(), tugallangan.tolist())],
+            "otgan": [b >= 60 if t else None for b, t in zip(ball_foizi.tolist(), tugallangan.tolist())],
+            "yaratilgan_vaqt": boshlangan,
+            "yangilangan_vaqt": boshlangan,
+        })
+
+        tj = self.togri_javob[h]
+        tanlangan = np.where(togri, tj, (tj + rng.integers(1, 4, (n, s))) % 4).ravel().tolist()
+        berilgan = javob_berilgan.ravel().tolist()
+        await y.yozish(ImtihonJavobi, {
+            "id": uuidlar(n * s, rng),
+            "imtihon_id": [i for i in imtihon_idlari for _ in range(s)],
+            "holat_id": [self.holat_idlari[i] for i in h.ravel().tolist()],
+            "savol_indeksi": list(range(s)) * n,
+            "tanlangan_javob": ["ABCD"[t] if b else None for t, b in zip(tanlangan, berilgan)],
+            "togri_javob": ["ABCD"[i] for i in tj.ravel().tolist()],
+            "togri": [t if b else None for t, b in zip(togri.ravel().tolist(), berilgan)],
+            "sarflangan_vaqt": [v if b else None for v, b in zip(sarflangan.ravel().tolist(), berilgan)],
+        })
+
+    # ---------- Izohlar va bildirishnomalar ----------
+
+    async def izohlar(self, y: Yozuvchi) -> None:
+        """Mashhur holatlarda izoh ko'p; izohlarning bir qismi boshqa izohga javob."""
+        rng = self.rng
+        n = self.p["izohlar"]
+        idlar = uuidlar(n, rng)
+        holat = rng.choice(self.p["holatlar"], n, p=self.holat_p)
+        ota = np.full(n, -1)
+        javob = rng.random(n) < JAVOB_ULUSHI
+        # Javob undan oldingi ildiz izohga yoziladi va shu holatga tegishli bo'ladi
+        ildizlar = np.flatnonzero(~javob)
+        javoblar = np.flatnonzero(javob)
+        oldingilar = np.searchsorted(ildizlar, javoblar)
+        javoblar, oldingilar = javoblar[oldingilar > 0], oldingilar[oldingilar > 0]
+        ota[javoblar] = ildizlar[(rng.random(len(javoblar)) * oldingilar).astype(np.int64)]
+        holat[javoblar] = holat[ota[javoblar]]
+        javoblar_soni = np.bincount(ota[ota >= 0], minlength=n)
+        yaratilgan = vaqtlar(self.langar, np.sort(rng.uniform(0, self.oyna, n))[::-1])
+
+        await y.yozish(HolatIzohi, {
+            "id": idlar,
+            "holat_id": [self.holat_idlari[i] for i in holat.tolist()],
+            "foydalanuvchi_id": [
+                self.foydalanuvchi_idlari[i]
+                for i in rng.choice(self.p["foydalanuvchilar"], n, p=self.foydalanuvchi_p).tolist()
+            ],
+            "ota_izoh_id": [idlar[o] if o >= 0 else None for o in ota.tolist()],
+            "matn": [IZOHLAR[i] for i in rng.integers(len(IZOHLAR), size=n).tolist()],
+            "javoblar_soni": javoblar_soni.tolist(),
+            "yaratilgan_vaqt": yaratilgan,
+            "yangilangan_vaqt": yaratilgan,
+        })
+
+    async def bildirishnomalar(self, y: Yozuvchi) -> None:
+        rng = self.rng
+        n = self.p["bildirishnomalar"]
+        turlar = list(BILDIRISHNOMALAR)
+        tur = rng.integers(len(turlar), size=n).tolist()
+        oldin = rng.uniform(0, self.oyna / 3, n)
+        oqilgan = (rng.random(n) < np.where(oldin > 3 * 86400, 0.9, 0.4)).tolist()
+        yaratilgan = vaqtlar(self.langar, oldin)
+
+        await y.yozish(Bildirishnoma, {
+            "id": uuidlar(n, rng),
+            "foydalanuvchi_id": [
+                self.foydalanuvchi_idlari[i]
+                for i in rng.choice(self.p["foydalanuvchilar"], n, p=self.foydalanuvchi_p).tolist()
+            ],
+            "turi": [turlar[t].name for t in tur],
+            "sarlavha": [BILDIRISHNOMALAR[turlar[t]][0] for t in tur],
+            "matn": [BILDIRISHNOMALAR[turlar[t]][1] for t in tur],
+            "oqilgan": oqilgan,
+            "oqilgan_vaqt": [v + timedelta(hours=2) if o else None for v, o in zip(yaratilgan, oqilgan)],
+            "yaratilgan_vaqt": yaratilgan,
+            "yangilangan_vaqt": yaratilgan,
+        })
+
+
+# ============== Baza amallari ==============
+
+# Sintetik yozuvlarni o'chirish (bog'liq jadvallardan boshlab)
+_FOYDALANUVCHILAR = "SELECT id FROM foydalanuvchilar WHERE email LIKE 'sintetik\\_%@example.com'"
+_HOLATLAR = f"SELECT id FROM holatlar WHERE sarlavha LIKE '{SARLAVHA_PREFIKSI}%'"
+TOZALASH_SQL = [
+    f"DELETE FROM imtihon_javoblari WHERE imtihon_id IN (SELECT id FROM imtihonlar WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR}))",
+    f"DELETE FROM imtihonlar WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM takrorlash_tarixi WHERE karta_id IN (SELECT id FROM takrorlash_kartalari WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR}))",
+    f"DELETE FROM takrorlash_kartalari WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM holat_izohlari WHERE ota_izoh_id IS NOT NULL AND holat_id IN ({_HOLATLAR})",
+    f"DELETE FROM holat_izohlari WHERE holat_id IN ({_HOLATLAR})",
+    f"DELETE FROM bildirishnomalar WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM holat_urinishlari WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM foydalanuvchi_rivojlanishi WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM foydalanuvchi_profillari WHERE foydalanuvchi_id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM foydalanuvchilar WHERE id IN ({_FOYDALANUVCHILAR})",
+    f"DELETE FROM holat_media WHERE holat_id IN ({_HOLATLAR})",
+    f"DELETE FROM holat_variantlari WHERE holat_id IN ({_HOLATLAR})",
+    f"DELETE FROM holatlar WHERE id IN ({_HOLATLAR})",
+]
+
+# Denormalizatsiya qilingan holat hisoblagichlari urinishlardan
+HISOBLAGICHLAR_SQL = f"""
+UPDATE holatlar h
+SET urinishlar_soni = s.soni, togri_javoblar = s.togri
+FROM (
+    SELECT holat_id, count(*) AS soni, count(*) FILTER (WHERE togri) AS togri
+    FROM holat_urinishlari
+    WHERE holat_id IN ({_HOLATLAR})
+    GROUP BY holat_id
+) s
+WHERE h.id = s.holat_id
+"""
+
+
+async def _tayyorgarlik() -> List[uuid.UUID]:
+    """Kategoriyalar daraxti va boshlang'ich ma'lumotlar; bo'lim IDlari (tartiblangan)."""
+    async with malumotlar_bazasi.sessiya() as db:
+        await boshlangich_malumotlar.admin_yaratish(db)
+        await boshlangich_malumotlar.kategoriyalar_yaratish(db)
+        await boshlangich_malumotlar.nishonlar_yaratish(db)
+        await boshlangich_malumotlar.darajalar_yaratish(db)
+        await db.commit()
+        natija = await db.execute(select(Bolim.id).order_by(Bolim.slug, Bolim.id))
+        return list(natija.scalars().all())
+
+
+async def _indekslar(amal: str) -> None:
+    """Katta jadvallarning ikkilamchi indekslarini o'chiradi yoki qayta quradi."""
+    async with malumotlar_bazasi.engine.begin() as conn:
+        for model in KATTA_JADVALLAR:
+            for indeks in model.__table__.indexes:
+                if amal == "ochirish":
+                    await conn.run_sync(lambda c, i=indeks: i.drop(c, checkfirst=True))
+                else:
+                    await conn.run_sync(lambda c, i=indeks: i.create(c, checkfirst=True))
+
+
+async def asosiy_async(args, parametrlar: Dict[str, int]) -> Dict[str, int]:
+    await malumotlar_bazasi.ulanish()
+    try:
+        async with malumotlar_bazasi.engine.begin() as conn:
+            mavjud = await conn.scalar(text(f"SELECT count(*) FROM ({_FOYDALANUVCHILAR}) s"))
+            if mavjud and not args.tozalash:
+                raise SystemExit(
+                    f"Bazada {mavjud:,} ta sintetik foydalanuvchi bor - --tozalash bilan qayta ishga tushiring"
+                )
+            if args.tozalash:
+                print("Oldingi sintetik ma'lumotlar o'chirilmoqda...")
+                for sql in TOZALASH_SQL:
+                    await conn.execute(text(sql))
+
+        bolim_idlari = await _tayyorgarlik()
+        if not bolim_idlari:
+            raise SystemExit("Bo'limlar topilmadi")
+
+        # Tarix oynasi uchun oylik bo'laklar - aks holda COPY mos bo'lak topmay xato beradi
+        async with malumotlar_bazasi.engine.begin() as conn:
+            await conn.execute(
+                text("SELECT urinish_bolaklarini_yaratish(:oldinga, :boshlanish)"),
+                {"oldinga": OLDINGA_OYLAR, "boshlanish": args.sana - timedelta(days=args.kunlar)}
+            )
+
+        generator = SintetikGenerator(
+            parametrlar, args.urugi, args.sana, args.kunlar,
+            args.zipf_foydalanuvchi, args.zipf_holat
+        )
+
+        if not args.indekslar_bilan:
+            await _indekslar("ochirish")
+        try:
+            async with malumotlar_bazasi.engine.connect() as conn:
+                xom = await conn.get_raw_connection()
+                yozuvchi = Yozuvchi(xom.driver_connection, generator.langar)
+                bosqichlar = [
+                    ("foydalanuvchilar", generator.foydalanuvchilar(yozuvchi)),
+                    ("holatlar", generator.holatlar(yozuvchi, bolim_idlari)),
+                    ("urinishlar", generator.urinishlar(yozuvchi)),
+                    ("rivojlanish", generator.rivojlanish(yozuvchi)),
+                    ("takrorlash", generator.takrorlash(yozuvchi)),
+                    ("imtihonlar", generator.imtihonlar(yozuvchi)),
+                    ("izohlar", generator.izohlar(yozuvchi)),
+                    ("bildirishnomalar", generator.bildirishnomalar(yozuvchi)),
+                ]
+                for nom, bosqich in bosqichlar:
+                    boshlanish = time.perf_counter()
+                    await bosqich
+                    print(f"✓ {nom} ({time.perf_counter() - boshlanish:.1f}s)")
+        finally:
+            if not args.indekslar_bilan:
+                print("Indekslar qayta qurilmoqda...")
+                await _indekslar("yaratish")
+
+        async with malumotlar_bazasi.engine.begin() as conn:
+            await conn.execute(text(HISOBLAGICHLAR_SQL))
+        # ANALYZE tranzaksiyadan tashqarida - yangi statistika bilan rejalar real bo'ladi
+        async with malumotlar_bazasi.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for jadval in yozuvchi.jami:
+                await conn.execute(text(f"ANALYZE {jadval}"))
+        return yozuvchi.jami
+    finally:
+        await malumotlar_bazasi.uzish()
+
+
+def asosiy():
+    parser = argparse.ArgumentParser(description="Deterministik sintetik ma'lumotlar generatori")
+    parser.add_argument("--hajm", choices=HAJMLAR, default="100k",
+                        help="Preset (urinishlar soni bo'yicha)")
+    parser.add_argument("--urugi", type=int, default=42, help="Tasodifiylik urug'i")
+    parser.add_argument("--sana", type=date.fromisoformat, default=date.today(),
+                        help="Ma'lumotlar shu sanagacha tarqatiladi (YYYY-MM-DD)")
+    parser.add_argument("--kunlar", type=int, default=180, help="Faollik tarixi oynasi (kun)")
+    parser.add_argument("--zipf-foydalanuvchi", type=float, default=0.8,
+                        help="Foydalanuvchi faolligi Zipf darajasi")
+    parser.add_argument("--zipf-holat", type=float, default=1.0,
+                        help="Holat mashhurligi Zipf darajasi")
+    for kalit in HAJMLAR["10k"]:
+        parser.add_argument(f"--{kalit}", type=int, default=None, help="Preset qiymatini almashtirish")
+    parser.add_argument("--tozalash", action="store_true",
+                        help="Oldingi sintetik ma'lumotlarni o'chirib, qaytadan yaratish")
+    parser.add_argument("--indekslar-bilan", action="store_true",
+                        help="Katta jadvallar indekslarini COPY vaqtida o'chirmaslik")
+    args = parser.parse_args()
+
+    parametrlar = dict(HAJMLAR[args.hajm])
+    for kalit in parametrlar:
+        if getattr(args, kalit) is not None:
+            parametrlar[kalit] = getattr(args, kalit)
+
+    print("=" * 50)
+    print(f"Sintetik ma'lumotlar: {args.hajm} (urug' {args.urugi}, {args.sana})")
+    for kalit, qiymat in parametrlar.items():
+        print(f"  {kalit:<18} {qiymat:>12,}")
+    print("=" * 50)
+
+    boshlanish = time.perf_counter()
+    jami = asyncio.run(asosiy_async(args, parametrlar))
+
+    print("\nYozilgan qatorlar:")
+    for jadval, soni in jami.items():
+        print(f"  {jadval:<28} {soni:>12,}")
+    print(f"\n✅ {time.perf_counter() - boshlanish:.0f}s")
+
+
+if __name__ == "__main__":
+    asosiy()
@@ -8,16 +8,20 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     AsyncEngine
 )
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, Session
 from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import DisconnectionError
 from sqlalchemy import event, text
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Awaitable, Callable, Optional
 from contextlib import asynccontextmanager
+from fastapi import Request
 import logging
 import ssl
 import re
+import time
 
 from sozlamalar.sozlamalar import sozlamalar
+from vositalar.metrikalar import pool_kuzatish
 
 # Logger sozlash
 logger = logging.getLogger(__name__)
@@ -25,6 +29,95 @@ logger = logging.getLogger(__name__)
 # Base model barcha modellar uchun
 Base = declarative_base()
 
+# Tranzaksiyasiz (autocommit) ishlaydigan so'rov metodlari
+OQISH_METODLARI = frozenset({"GET", "HEAD"})
+
+# Replika kechikishi (soniya). Replika asosiy bazaga yetib olgan bo'lsa
+# oxirgi tranzaksiya vaqti eskirib qoladi - shuning uchun LSN teng bo'lsa 0.
+_REPLIKA_KECHIKISHI = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class KuzatiluvchiPool(AsyncAdaptedQueuePool):
+    """Ulanish olish uchun kutish vaqtini metrikaga yozadigan pool."""
+
+    kutish_metrikasi = None
+
+    def _do_get(self):
+        boshlanish = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.kutish_metrikasi is not None:
+                self.kutish_metrikasi.observe(time.perf_counter() - boshlanish)
+
+
+def _yopilgan_ulanishni_rad_etish(dbapi_ulanish, ulanish_yozuvi, proksi) -> None:
+    """
+    Pool checkout: pre-ping o'rniga mahalliy yopilgan ulanishni round-tripsiz
+    aniqlaydi - pool yangi ulanish oladi. Server tomonda uzilgan ulanish birinchi
+    so'rovda xato beradi, pool invalidatsiya qilinadi va GET qayta uriniladi.
+    """
+    asyncpg_ulanish = getattr(dbapi_ulanish, "_connection", None)
+    if asyncpg_ulanish is not None and asyncpg_ulanish.is_closed():
+        raise DisconnectionError("Ulanish yopilgan")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _yozuvni_qayd_etish(holat) -> None:
+    """SELECT bo'lmagan har bir so'rov sessiyani "yozgan" deb belgilaydi."""
+    if not holat.is_select:
+        holat.session.info["yozuv"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _flushni_qayd_etish(sessiya, kontekst) -> None:
+    sessiya.info["yozuv"] = True
+
+
+def yozuv_bor(sessiya: AsyncSession) -> bool:
+    """Sessiyada commit qilinishi kerak bo'lgan o'zgarish bormi."""
+    return bool(sessiya.info.get("yozuv") or sessiya.new or sessiya.dirty or sessiya.deleted)
+
+
+# ============== Commitdan keyingi amallar ==============
+
+def commitdan_keyin(sessiya: AsyncSession, amal: Callable[[], Awaitable[None]]) -> None:
+    """
+    Tranzaksiya muvaffaqiyatli commit bo'lgandan keyin bajariladigan amal
+    (Redis read modellari, hisoblagichlar). Rollback bo'lsa amal tashlab yuboriladi.
+    """
+    sessiya.info.setdefault("commitdan_keyin", []).append(amal)
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_amallarini_tayyorlash(sessiya) -> None:
+    if sessiya.in_nested_transaction():
+        return
+    kutilayotgan = sessiya.info.pop("commitdan_keyin", None)
+    if kutilayotgan:
+        sessiya.info.setdefault("commit_qilingan", []).extend(kutilayotgan)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _commit_amallarini_bekor_qilish(sessiya, oldingi_tranzaksiya) -> None:
+    if oldingi_tranzaksiya.parent is None:
+        sessiya.info.pop("commitdan_keyin", None)
+
+
+async def commitdan_keyingi_amallar(sessiya: AsyncSession) -> None:
+    """Commit qilingan tranzaksiyalarning amallarini bajaradi; xato javobga ta'sir qilmaydi."""
+    for amal in sessiya.info.pop("commit_qilingan", []):
+        try:
+            await amal()
+        except Exception as xato:
+            logger.warning(f"Commitdan keyingi amal xatosi ({getattr(amal, '__name__', amal)}): {xato}")
+
 
 class MalumotlarBazasi:
     """
@@ -41,7 +134,14 @@ class MalumotlarBazasi:
     def __init__(self):
         self._engine: Optional[AsyncEngine] = None
         self._sessiya_ishlab_chiqaruvchi: Optional[async_sessionmaker] = None
+        # GET/HEAD uchun autocommit sessiyalar (BEGIN/COMMIT round-tripsiz)
+        self._oqish_ishlab_chiqaruvchi: Optional[async_sessionmaker] = None
         self._ssl_context: Optional[ssl.SSLContext] = None
+        # O'qish replikasi (MALUMOTLAR_BAZASI_REPLIKA_URL berilgan bo'lsa)
+        self._replika_engine: Optional[AsyncEngine] = None
+        self._replika_ishlab_chiqaruvchi: Optional[async_sessionmaker] = None
+        self._replika_soglom: bool = False
+        self._replika_tekshirilgan: float = 0.0
 
     def _ssl_kontekst_yaratish(self) -> ssl.SSLContext:
         """SSL kontekstini yaratadi va keshlaydi."""
@@ -59,7 +159,7 @@ class MalumotlarBazasi:
         url = url.replace('?&', '?').rstrip('?')
         return url
 
-    def _engine_yaratish(self) -> AsyncEngine:
+    def _engine_yaratish(self, url: str = None, baza: str = "asosiy") -> AsyncEngine:
         """
         Async engine yaratadi yuqori darajada optimallashtirilgan sozlamalar bilan.
 
@@ -67,9 +167,10 @@ class MalumotlarBazasi:
         - Connection pool: 10-50 ulanish
         - Statement cache: 1000 ta so'rov
         - Connection recycling: 30 daqiqa
-        - Pool pre-ping: o'chirilgan (tezlik uchun)
+        - Pool pre-ping: o'chirilgan - har checkout da ping o'rniga
+          xato bo'yicha qayta ulanish (_yopilgan_ulanishni_rad_etish)
         """
-        db_url = self._db_url_tozalash(sozlamalar.malumotlar_bazasi_url)
+        db_url = self._db_url_tozalash(url or sozlamalar.malumotlar_bazasi_url)
         ssl_context = self._ssl_kontekst_yaratish()
 
         # Ishlab chiqarish vs development sozlamalari
@@ -85,11 +186,11 @@ class MalumotlarBazasi:
         engine = create_async_engine(
             db_url,
             # === Connection Pool Sozlamalari ===
-            poolclass=AsyncAdaptedQueuePool,
+            poolclass=KuzatiluvchiPool,
             pool_size=pool_size,
             max_overflow=max_overflow,
             pool_recycle=pool_recycle,
-            pool_pre_ping=True,  # FIX: Stale connectionlarni aniqlash uchun yoqildi
+            pool_pre_ping=False,  # Uzilgan ulanishlar xato bo'yicha almashtiriladi
             pool_timeout=10,  # 10 soniya kutish
 
             # === Performance Sozlamalari ===
@@ -104,9 +205,27 @@ class MalumotlarBazasi:
                 "prepared_statement_cache_size": 500,  # Prepared statements
             },
         )
+        event.listen(engine.sync_engine, "checkout", _yopilgan_ulanishni_rad_etish)
+        pool_kuzatish(engine, baza)
 
         return engine
 
+    @staticmethod
+    def _sessiya_fabrikasi(engine: AsyncEngine, autocommit: bool = False) -> async_sessionmaker:
+        """
+        Optimallashtirilgan sessiya factory.
+        autocommit=True - ulanish tranzaksiyasiz ishlaydi (asyncpg BEGIN/COMMIT yubormaydi).
+        """
+        if autocommit:
+            engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+        return async_sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            expire_on_commit=False,  # Commit'dan keyin ob'ektlarni expire qilmaslik
+            autocommit=False,
+            autoflush=False,  # Avtomatik flush o'chirilgan - manual control
+        )
+
     async def ulanish(self) -> None:
         """
         Ma'lumotlar bazasiga ulanadi va engine yaratadi.
@@ -117,14 +236,8 @@ class MalumotlarBazasi:
 
             self._engine = self._engine_yaratish()
 
-            # Optimallashtirilgan sessiya factory
-            self._sessiya_ishlab_chiqaruvchi = async_sessionmaker(
-                bind=self._engine,
-                class_=AsyncSession,
-                expire_on_commit=False,  # Commit'dan keyin ob'ektlarni expire qilmaslik
-                autocommit=False,
-                autoflush=False,  # Avtomatik flush o'chirilgan - manual control
-            )
+            self._sessiya_ishlab_chiqaruvchi = self._sessiya_fabrikasi(self._engine)
+            self._oqish_ishlab_chiqaruvchi = self._sessiya_fabrikasi(self._engine, autocommit=True)
 
             # Pool'ni isitish - bir nechta ulanish yaratish
             async with self._engine.begin() as conn:
@@ -132,15 +245,66 @@ class MalumotlarBazasi:
 
             logger.info("Ma'lumotlar bazasiga muvaffaqiyatli ulandi")
 
+            if sozlamalar.malumotlar_bazasi_replika_url:
+                self._replika_engine = self._engine_yaratish(
+                    sozlamalar.malumotlar_bazasi_replika_url, baza="replika"
+                )
+                self._replika_ishlab_chiqaruvchi = self._sessiya_fabrikasi(
+                    self._replika_engine, autocommit=True
+                )
+                # Replika ishlamasa ham ilova asosiy baza bilan ishga tushadi
+                await self._replika_tekshirish()
+
+    async def _replika_tekshirish(self) -> None:
+        """Replika mavjudligi va kechikishini tekshiradi."""
+        # Vaqt birinchi awaitdan oldin belgilanadi - parallel so'rovlar takror tekshirmaydi
+        self._replika_tekshirilgan = time.monotonic()
+        try:
+            async with self._replika_engine.connect() as conn:
+                kechikish = float(await conn.scalar(_REPLIKA_KECHIKISHI))
+            soglom = kechikish <= sozlamalar.replika_maksimal_kechikish
+            if not soglom:
+                logger.warning(f"Replika kechikmoqda: {kechikish:.1f}s")
+        except Exception as xato:
+            logger.warning(f"Replika mavjud emas: {xato}")
+            soglom = False
+
+        if soglom and not self._replika_soglom:
+            logger.info("Replika o'qish so'rovlari uchun yoqildi")
+        self._replika_soglom = soglom
+
+    def replika_nosoglom(self) -> None:
+        """Ulanish xatosidan keyin replikani keyingi tekshiruvgacha o'chiradi."""
+        self._replika_soglom = False
+        self._replika_tekshirilgan = time.monotonic()
+
+    async def replika_fabrikasi(self) -> Optional[async_sessionmaker]:
+        """
+        Sog'lom replika sessiya factory si yoki None (asosiy bazaga qaytish).
+        Holat har replika_tekshirish_oraligi soniyada bir marta yangilanadi.
+        """
+        if self._replika_ishlab_chiqaruvchi is None:
+            return None
+        if time.monotonic() - self._replika_tekshirilgan >= sozlamalar.replika_tekshirish_oraligi:
+            await self._replika_tekshirish()
+        return self._replika_ishlab_chiqaruvchi if self._replika_soglom else None
+
     async def uzish(self) -> None:
         """
         Ma'lumotlar bazasi ulanishini yopadi.
         """
+        if self._replika_engine is not None:
+            await self._replika_engine.dispose()
+            self._replika_engine = None
+            self._replika_ishlab_chiqaruvchi = None
+            self._replika_soglom = False
+
         if self._engine is not None:
             logger.info("Ma'lumotlar bazasi ulanishi yopilmoqda...")
             await self._engine.dispose()
             self._engine = None
             self._sessiya_ishlab_chiqaruvchi = None
+            self._oqish_ishlab_chiqaruvchi = None
             logger.info("Ma'lumotlar bazasi ulanishi yopildi")
 
     @asynccontextmanager
@@ -155,13 +319,14 @@ class MalumotlarBazasi:
         sessiya = self._sessiya_ishlab_chiqaruvchi()
         try:
             yield sessiya
-            # Har doim commit - flush() dan keyin new/dirty bo'sh bo'ladi
-            await sessiya.commit()
+            if yozuv_bor(sessiya):
+                await sessiya.commit()
         except Exception as xato:
             await sessiya.rollback()
             logger.error(f"Sessiya xatosi: {xato}")
             raise
         finally:
+            await commitdan_keyingi_amallar(sessiya)
             await sessiya.close()
 
     async def jadvallar_yaratish(self) -> None:
@@ -199,15 +364,31 @@ class MalumotlarBazasi:
         """Ulanish holatini tekshiradi."""
         return self._engine is not None
 
+    @property
+    def pool_sigimi(self) -> int:
+        """Asosiy pooldagi maksimal ulanishlar soni (pool_size + max_overflow)."""
+        if self._engine is None:
+            return 0
+        pool = self._engine.sync_engine.pool
+        return pool.size() + max(pool._max_overflow, 0)
+
+    @property
+    def replika_holati(self) -> str:
+        """Replika holati: "o'chirilgan", "soglom" yoki "nosoglom"."""
+        if self._replika_ishlab_chiqaruvchi is None:
+            return "o'chirilgan"
+        return "soglom" if self._replika_soglom else "nosoglom"
+
 
 # Global ma'lumotlar bazasi ob'ekti
 malumotlar_bazasi = MalumotlarBazasi()
 
 
-async def sessiya_olish() -> AsyncGenerator[AsyncSession, None]:
+async def sessiya_olish(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI Dependency Injection uchun sessiya olish.
-    OPTIMIZED: Minimal overhead
+    GET/HEAD so'rovlari autocommit ulanishda ishlaydi (BEGIN/COMMIT yo'q);
+    boshqa so'rovlar faqat yozuv bo'lgandagina commit qilinadi.
 
     Foydalanish:
         @router.get("/")
@@ -217,28 +398,90 @@ async def sessiya_olish() -> AsyncGenerator[AsyncSession, None]:
     if malumotlar_bazasi._sessiya_ishlab_chiqaruvchi is None:
         await malumotlar_bazasi.ulanish()
 
-    sessiya = malumotlar_bazasi._sessiya_ishlab_chiqaruvchi()
+    if request.method in OQISH_METODLARI:
+        sessiya = malumotlar_bazasi._oqish_ishlab_chiqaruvchi()
+    else:
+        sessiya = malumotlar_bazasi._sessiya_ishlab_chiqaruvchi()
     try:
         yield sessiya
-        # Har doim commit qilish - flush() dan keyin new/dirty bo'sh bo'ladi
-        # lekin tranzaksiya hali ham ochiq bo'ladi
-        await sessiya.commit()
+        # flush() new/dirty ni bo'shatadi - bajarilgan yozuvlar info["yozuv"] da qayd etiladi
+        if yozuv_bor(sessiya):
+            await sessiya.commit()
     except Exception:
         await sessiya.rollback()
         raise
     finally:
+        await commitdan_keyingi_amallar(sessiya)
         await sessiya.close()
 
 
-async def faqat_oqish_sessiyasi() -> AsyncGenerator[AsyncSession, None]:
+def _yopishqoqlik_kaliti(foydalanuvchi_id: str) -> str:
+    from sozlamalar.redis_kesh import KeshKalitlari
+    return f"{KeshKalitlari.REPLIKA}:yozgan:{foydalanuvchi_id}"
+
+
+def _sorov_foydalanuvchisi(request: Request) -> Optional[str]:
+    """Authorization sarlavhasidagi token egasi (bazaga murojaatsiz)."""
+    auth = request.headers.get("Authorization")
+    if not auth or not auth.startswith("Bearer "):
+        return None
+    from yordamchilar.xavfsizlik import token_dekodlash
+    payload = token_dekodlash(auth[7:])
+    return payload.get("foydalanuvchi_id") if payload else None
+
+
+async def yozuvni_belgilash(request: Request) -> None:
+    """
+    Foydalanuvchi yozgandan keyin uning o'qishlari replika_yopishqoqlik_soniya
+    davomida asosiy bazaga yo'naltiriladi (read-your-writes).
+    """
+    if malumotlar_bazasi._replika_ishlab_chiqaruvchi is None:
+        return
+    foydalanuvchi_id = _sorov_foydalanuvchisi(request)
+    if foydalanuvchi_id:
+        from sozlamalar.redis_kesh import redis_kesh
+        await redis_kesh.saqlash(
+            _yopishqoqlik_kaliti(foydalanuvchi_id), 1, sozlamalar.replika_yopishqoqlik_soniya
+        )
+
+
+async def _oqish_fabrikasi(request: Request) -> Optional[async_sessionmaker]:
+    """Replika ishlatish mumkin bo'lsa uning factory si, aks holda None."""
+    fabrika = await malumotlar_bazasi.replika_fabrikasi()
+    if fabrika is None:
+        return None
+    foydalanuvchi_id = _sorov_foydalanuvchisi(request)
+    if foydalanuvchi_id:
+        from sozlamalar.redis_kesh import redis_kesh
+        if await redis_kesh.mavjud(_yopishqoqlik_kaliti(foydalanuvchi_id)):
+            return None
+    return fabrika
+
+
+async def faqat_oqish_sessiyasi(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Faqat o'qish uchun optimallashtirilgan sessiya.
-    SELECT so'rovlari uchun ishlatiladi - commit kerak emas.
+    Faqat o'qish uchun autocommit sessiya - tranzaksiya ochilmaydi.
+    Replika sozlangan va sog'lom bo'lsa so'rov replikaga yuboriladi;
+    yaqinda yozgan foydalanuvchi yoki replika xatosida asosiy baza ishlatiladi.
     """
     if malumotlar_bazasi._sessiya_ishlab_chiqaruvchi is None:
         await malumotlar_bazasi.ulanish()
 
-    sessiya = malumotlar_bazasi._sessiya_ishlab_chiqaruvchi()
+    sessiya = None
+    fabrika = await _oqish_fabrikasi(request)
+    if fabrika is not None:
+        sessiya = fabrika()
+        try:
+            # Ulanish shu yerda olinadi - xato bo'lsa asosiy bazaga qaytish mumkin
+            await sessiya.connection()
+        except Exception as xato:
+            logger.warning(f"Replikaga ulanib bo'lmadi, asosiy bazaga qaytildi: {xato}")
+            malumotlar_bazasi.replika_nosoglom()
+            await sessiya.close()
+            sessiya = None
+
+    if sessiya is None:
+        sessiya = malumotlar_bazasi._oqish_ishlab_chiqaruvchi()
     try:
         yield sessiya
     finally:
@@ -2,17 +2,33 @@
 # 2000-5000 foydalanuvchi uchun optimallashtirilgan keshlash
 
 import redis.asyncio as redis
-from typing import Optional, Any, Union
+from typing import Optional, Any, Union, Dict, List
 import json
 import logging
 from functools import wraps
 import hashlib
+import time
 
 from sozlamalar.sozlamalar import sozlamalar
+from vositalar.metrikalar import REDIS_KECHIKISH, kesh_murojaati
 
 logger = logging.getLogger(__name__)
 
 
+def _olchangan(func):
+    """Amal davomiyligini medcase_redis_buyruq_soniya gistogrammasiga yozadi."""
+    gistogramma = REDIS_KECHIKISH.labels(func.__name__)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        boshlanish = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            gistogramma.observe(time.perf_counter() - boshlanish)
+    return wrapper
+
+
 class RedisKesh:
     """
     Redis bilan keshlash operatsiyalari.
@@ -55,6 +71,7 @@ class RedisKesh:
             self._pool = None
             logger.info("Redis ulanishi yopildi")
     
+    @_olchangan
     async def olish(self, kalit: str) -> Optional[Any]:
         """Keshdan qiymat oladi."""
         if self._redis is None:
@@ -62,6 +79,7 @@ class RedisKesh:
         
         try:
             qiymat = await self._redis.get(kalit)
+            kesh_murojaati(kalit, qiymat is not None)
             if qiymat:
                 return json.loads(qiymat)
             return None
@@ -69,6 +87,7 @@ class RedisKesh:
             logger.error(f"Redis olish xatosi: {xato}")
             return None
     
+    @_olchangan
     async def saqlash(
         self,
         kalit: str,
@@ -91,6 +110,29 @@ class RedisKesh:
             logger.error(f"Redis saqlash xatosi: {xato}")
             return False
     
+    @_olchangan
+    async def yoq_bolsa_saqlash(
+        self,
+        kalit: str,
+        qiymat: Any,
+        muddati: int = None
+    ) -> bool:
+        """Kalit mavjud bo'lmasa saqlaydi (SET NX) - faqat birinchi yozuvchi yutadi."""
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            return bool(await self._redis.set(
+                kalit,
+                json.dumps(qiymat, ensure_ascii=False, default=str),
+                ex=muddati or sozlamalar.kesh_ttl,
+                nx=True
+            ))
+        except Exception as xato:
+            logger.error(f"Redis NX saqlash xatosi: {xato}")
+            return False
+    
+    @_olchangan
     async def ochirish(self, kalit: str) -> bool:
         """Keshdan qiymatni o'chiradi."""
         if self._redis is None:
@@ -103,6 +145,7 @@ class RedisKesh:
             logger.error(f"Redis ochirish xatosi: {xato}")
             return False
     
+    @_olchangan
     async def shablon_ochirish(self, shablon: str) -> int:
         """Shablon bo'yicha kalitlarni o'chiradi."""
         if self._redis is None:
@@ -120,6 +163,7 @@ class RedisKesh:
             logger.error(f"Shablon ochirish xatosi: {xato}")
             return 0
     
+    @_olchangan
     async def oshirish(self, kalit: str, qiymat: int = 1) -> int:
         """Raqamli qiymatni oshiradi."""
         if self._redis is None:
@@ -131,6 +175,7 @@ class RedisKesh:
             logger.error(f"Redis oshirish xatosi: {xato}")
             return 0
 
+    @_olchangan
     async def oshirish_va_muddat(
         self,
         kalit: str,
@@ -150,6 +195,147 @@ class RedisKesh:
             logger.error(f"Redis oshirish/muddat xatosi: {xato}")
             return 0
     
+    @_olchangan
+    async def hash_olish(self, kalit: str) -> Dict[str, str]:
+        """Hashning barcha maydonlarini oladi (kalit yo'q bo'lsa bo'sh)."""
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            maydonlar = await self._redis.hgetall(kalit)
+            kesh_murojaati(kalit, bool(maydonlar))
+            return maydonlar
+        except Exception as xato:
+            logger.error(f"Redis hash olish xatosi: {xato}")
+            return {}
+    
+    @_olchangan
+    async def hash_saqlash(self, kalit: str, maydonlar: Dict[str, Any]) -> bool:
+        """Hashni to'liq almashtiradi (bitta MULTI/EXEC tranzaksiyada)."""
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(kalit)
+                if maydonlar:
+                    pipe.hset(kalit, mapping=maydonlar)
+                await pipe.execute()
+            return True
+        except Exception as xato:
+            logger.error(f"Redis hash saqlash xatosi: {xato}")
+            return False
+    
+    @_olchangan
+    async def hash_oshirish(self, kalit: str, deltalar: Dict[str, int]) -> bool:
+        """
+        Mavjud hash maydonlarini delta bilan oshiradi.
+        Kalit yo'q bo'lsa hech narsa qilmaydi - qisman hash yaratilmasligi uchun.
+        """
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            if not deltalar or not await self._redis.exists(kalit):
+                return False
+            async with self._redis.pipeline(transaction=True) as pipe:
+                for maydon, delta in deltalar.items():
+                    if delta:
+                        pipe.hincrby(kalit, maydon, delta)
+                await pipe.execute()
+            return True
+        except Exception as xato:
+            logger.error(f"Redis hash oshirish xatosi: {xato}")
+            return False
+    
+    @_olchangan
+    async def xom_kop_olish(self, kalitlar: List[str]) -> List[Optional[str]]:
+        """Bir nechta kalitni bitta MGET bilan oladi (xom satr, JSON dekodlanmaydi)."""
+        if not kalitlar:
+            return []
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            qiymatlar = await self._redis.mget(kalitlar)
+            for kalit, qiymat in zip(kalitlar, qiymatlar):
+                kesh_murojaati(kalit, qiymat is not None)
+            return qiymatlar
+        except Exception as xato:
+            logger.error(f"Redis MGET xatosi: {xato}")
+            return [None] * len(kalitlar)
+    
+    @_olchangan
+    async def xom_kop_saqlash(self, qiymatlar: Dict[str, str], muddati: int = None) -> bool:
+        """Tayyor satrlarni bitta pipeline bilan saqlaydi (JSON kodlanmaydi)."""
+        if not qiymatlar:
+            return True
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            muddati = muddati or sozlamalar.kesh_ttl
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for kalit, qiymat in qiymatlar.items():
+                    pipe.setex(kalit, muddati, qiymat)
+                await pipe.execute()
+            return True
+        except Exception as xato:
+            logger.error(f"Redis pipeline saqlash xatosi: {xato}")
+            return False
+    
+    @_olchangan
+    async def hash_qoshish(self, kalit: str, deltalar: Dict[str, int]) -> bool:
+        """Hash maydonlarini delta bilan oshiradi (kalit yo'q bo'lsa yaratiladi)."""
+        if not deltalar:
+            return True
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for maydon, delta in deltalar.items():
+                    if delta:
+                        pipe.hincrby(kalit, maydon, delta)
+                await pipe.execute()
+            return True
+        except Exception as xato:
+            logger.error(f"Redis hash qo'shish xatosi: {xato}")
+            return False
+    
+    @_olchangan
+    async def royxatga_qoshish(self, kalit: str, qiymatlar: List[Any], maksimal: int) -> bool:
+        """Qiymatlarni ro'yxat boshiga qo'shadi va ro'yxatni maksimal uzunlikda saqlaydi."""
+        if not qiymatlar:
+            return True
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.lpush(kalit, *[
+                    json.dumps(q, ensure_ascii=False, default=str) for q in qiymatlar
+                ])
+                pipe.ltrim(kalit, 0, maksimal - 1)
+                await pipe.execute()
+            return True
+        except Exception as xato:
+            logger.error(f"Redis ro'yxat qo'shish xatosi: {xato}")
+            return False
+    
+    @_olchangan
+    async def royxat_olish(self, kalit: str, soni: int = 100) -> List[Any]:
+        """Ro'yxatning birinchi elementlari (eng yangilari)."""
+        if self._redis is None:
+            await self.ulanish()
+        
+        try:
+            return [json.loads(q) for q in await self._redis.lrange(kalit, 0, soni - 1)]
+        except Exception as xato:
+            logger.error(f"Redis ro'yxat olish xatosi: {xato}")
+            return []
+    
+    @_olchangan
     async def mavjud(self, kalit: str) -> bool:
         """Kalit mavjudligini tekshiradi."""
         if self._redis is None:
@@ -161,6 +347,7 @@ class RedisKesh:
             logger.error(f"Redis mavjud xatosi: {xato}")
             return False
     
+    @_olchangan
     async def muddatni_ozgartirish(self, kalit: str, muddati: int) -> bool:
         """Kalitning amal qilish muddatini o'zgartiradi."""
         if self._redis is None:
@@ -231,3 +418,11 @@ class KeshKalitlari:
     SESSIYA = "sessiya"
     REYTING = "reyting"
     YUTUQLAR = "yutuqlar"
+    IMPORT = "import"
+    EKSPORT = "eksport"
+    DASHBOARD = "dashboard"
+    TAKRORLASH = "takrorlash"
+    KUNLIK = "kunlik"
+    HOLAT_KONTENT = "holat_kontent"
+    REPLIKA = "replika"
+    SQL = "sql"
@@ -33,6 +33,27 @@ class Sozlamalar(BaseSettings):
         default="postgresql+asyncpg://localhost/medcase",
         alias="MALUMOTLAR_BAZASI_URL"
     )
+    # O'qish replikasi (ixtiyoriy) - bo'sh bo'lsa barcha so'rovlar asosiy bazaga
+    malumotlar_bazasi_replika_url: Optional[str] = Field(
+        default=None,
+        alias="MALUMOTLAR_BAZASI_REPLIKA_URL"
+    )
+    replika_yopishqoqlik_soniya: int = Field(default=5, alias="REPLIKA_YOPISHQOQLIK_SONIYA")
+    replika_maksimal_kechikish: float = Field(default=2.0, alias="REPLIKA_MAKSIMAL_KECHIKISH")
+    replika_tekshirish_oraligi: int = Field(default=5, alias="REPLIKA_TEKSHIRISH_ORALIGI")
+    # SQL kuzatuvi: so'rov bo'yicha statementlar soni, vaqti va N+1 nomzodlari
+    sql_kuzatuv: bool = Field(default=True, alias="SQL_KUZATUV")
+    sql_sekin_chegara_ms: int = Field(default=200, alias="SQL_SEKIN_CHEGARA_MS")
+    sql_n1_chegara: int = Field(default=5, alias="SQL_N1_CHEGARA")
+    # /metrics uchun Bearer token (bo'sh bo'lsa ochiq - tarmoq darajasida cheklang)
+    metrikalar_token: Optional[str] = Field(default=None, alias="METRIKALAR_TOKEN")
+    # Qabul nazorati: marshrut sinflari bo'yicha moslashuvchan parallellik limiti
+    qabul_nazorati: bool = Field(default=True, alias="QABUL_NAZORATI")
+    qabul_umumiy_limit: int = Field(default=0, alias="QABUL_UMUMIY_LIMIT")  # 0 - DB pool sig'imi
+    qabul_imtihon_zaxirasi: float = Field(default=0.2, alias="QABUL_IMTIHON_ZAXIRASI")
+    # Urinishlar arxivi: shundan eski oylar oylik yig'indiga, xom qatorlar gzip CSV faylga
+    urinish_saqlash_oylari: int = Field(default=6, alias="URINISH_SAQLASH_OYLARI")
+    urinish_arxiv_papkasi: str = Field(default="arxiv/urinishlar", alias="URINISH_ARXIV_PAPKASI")
     
     # =====================================================
     # REDIS
@@ -113,6 +134,13 @@ class Sozlamalar(BaseSettings):
     vapid_private_key: Optional[str] = Field(default=None, alias="VAPID_PRIVATE_KEY")
     vapid_subject: str = Field(default="mailto:admin@medcasepro.uz", alias="VAPID_SUBJECT")
     
+    # =====================================================
+    # WEBSOCKET
+    # =====================================================
+    ws_navbat_hajmi: int = Field(default=100, alias="WS_NAVBAT_HAJMI")
+    ws_sekin_siyosat: str = Field(default="tashlash", alias="WS_SEKIN_SIYOSAT")  # tashlash | uzish
+    ws_yuborish_timeout: float = Field(default=5.0, alias="WS_YUBORISH_TIMEOUT")  # soniyalar
+
     # =====================================================
     # SENTRY
     # =====================================================
@@ -119,6 +119,16 @@ class ReytingSorov(AsosiySchema):
 
 # ============== Daraja ==============
 
+class DarajaYaratish(AsosiySchema):
+    """Daraja konfiguratsiyasi (admin)."""
+    daraja: int = Field(..., ge=1, description="Daraja raqami")
+    nom: str = Field(..., min_length=2, max_length=100)
+    kerakli_ball: int = Field(..., ge=0, description="Kerakli ball")
+    ikonka_url: Optional[str] = Field(None, max_length=500)
+    rang: str = Field(default="#3B82F6", max_length=7)
+    imkoniyatlar: Dict[str, Any] = {}
+
+
 class DarajaJavob(IDliSchema):
     """Daraja javobi."""
     daraja: int
@@ -147,6 +147,7 @@ class HolatYaratish(AsosiySchema):
 
 class HolatYangilash(AsosiySchema):
     """Holat yangilash."""
+    bolim_id: Optional[UUID] = Field(None, description="Boshqa bo'limga ko'chirish")
     sarlavha: Optional[str] = Field(None, min_length=5, max_length=500)
     klinik_stsenariy: Optional[str] = Field(None, min_length=50)
     savol: Optional[str] = Field(None, min_length=10)
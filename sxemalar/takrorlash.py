@@ -1,8 +1,8 @@
 # MedCase Pro Platform - Takrorlash (Spaced Repetition) Sxemalari
 # SM-2 algoritmi uchun Pydantic sxemalari
 
-from pydantic import Field, field_validator
-from typing import Optional, List
+from pydantic import ConfigDict, Field, field_validator
+from typing import Dict, Optional, List, Type
 from uuid import UUID
 from datetime import datetime, date
 
@@ -106,3 +106,117 @@ class TakrorlashSessiyasiBoshlash(AsosiySchema):
     """Takrorlash sessiyasini boshlash."""
     reja_kartalar: int = Field(default=20, ge=1, le=100, description="Rejadagi kartalar soni")
     faqat_bugungi: bool = Field(default=True, description="Faqat bugungi kartalar")
+
+
+# ============== Takrorlash navbati va paketli baholash ==============
+
+class NavbatVarianti(AsosiySchema):
+    """Navbatdagi holat varianti (ixcham)."""
+    belgi: str
+    matn: str
+    togri: bool = False
+    tushuntirish: Optional[str] = None
+
+
+class NavbatKartasi(AsosiySchema):
+    """Oflayn baholash uchun karta va holat mazmuni."""
+    karta_id: UUID
+    holat_id: UUID
+    easiness_factor: float
+    interval: int
+    repetition: int
+    keyingi_takrorlash: date
+    sarlavha: str
+    qiyinlik: Optional[str] = None
+    kategoriya_nomi: Optional[str] = None
+    klinik_stsenariy: Optional[str] = None
+    savol: Optional[str] = None
+    togri_javob: Optional[str] = None
+    umumiy_tushuntirish: Optional[str] = None
+    variantlar: List[NavbatVarianti] = []
+
+
+class TakrorlashNavbati(AsosiySchema):
+    """Oldindan yuklangan takrorlash navbati."""
+    kartalar: List[NavbatKartasi] = []
+    jami: int = 0
+
+
+class PaketBaho(AsosiySchema):
+    """Paketdagi bitta baho."""
+    karta_id: UUID = Field(..., description="Karta ID")
+    sifat: int = Field(..., ge=0, le=5, description="Sifat bahosi (0-5)")
+    sarflangan_vaqt: Optional[int] = Field(None, ge=0, description="Sarflangan vaqt")
+    baholangan_vaqt: Optional[datetime] = Field(None, description="Oflayn baholangan vaqt")
+
+
+class TakrorlashPaketi(AsosiySchema):
+    """Paketli baholash so'rovi."""
+    baholar: List[PaketBaho] = Field(..., min_length=1, max_length=200)
+    sessiya_id: Optional[UUID] = Field(None, description="Takrorlash sessiyasi ID")
+
+
+class PaketKartaHolati(AsosiySchema):
+    """Baholashdan keyingi karta holati."""
+    karta_id: UUID
+    easiness_factor: float
+    interval: int
+    repetition: int
+    keyingi_takrorlash: date
+
+
+class TakrorlashPaketNatijasi(AsosiySchema):
+    """Paketli baholash natijasi."""
+    qabul_qilingan: int = 0
+    topilmagan: List[UUID] = []
+    kartalar: List[PaketKartaHolati] = []
+
+
+class TakrorlashSessiyasiNavbati(AsosiySchema):
+    """Yangi sessiya va uning oldindan yuklangan navbati."""
+    sessiya: TakrorlashSessiyasiJavob
+    navbat: TakrorlashNavbati
+
+
+# ============== Qayta rejalashtirish siyosatlari parametrlari ==============
+
+class SiyosatParametrlari(AsosiySchema):
+    """Siyosat parametrlari uchun asos - noma'lum kalitlar rad etiladi."""
+    model_config = ConfigDict(extra="forbid")
+
+
+class TatilParametrlari(SiyosatParametrlari):
+    """Ta'til: kartalarni necha kunga surish."""
+    kunlar: int = Field(..., ge=1, le=365, description="Ta'til kunlari")
+
+
+class TekislashParametrlari(SiyosatParametrlari):
+    """Yuklamani tekislash: kechikkan kartalar taqsimlanadigan kunlar."""
+    kunlar: int = Field(..., ge=1, le=365, description="Taqsimlash kunlari")
+
+
+class EfKalibrlashParametrlari(SiyosatParametrlari):
+    """EF kalibrlash: koeffitsient va EF chegaralari."""
+    koeffitsient: float = Field(..., gt=0, le=5, description="EF ko'paytuvchisi")
+    minimal: float = Field(default=1.3, ge=1.0, description="Minimal EF")
+    maksimal: float = Field(default=3.0, le=5.0, description="Maksimal EF")
+
+    @field_validator("maksimal")
+    @classmethod
+    def chegaralar_tekshirish(cls, v: float, info) -> float:
+        if v < info.data.get("minimal", 1.3):
+            raise ValueError("maksimal minimaldan kichik bo'lmasligi kerak")
+        return v
+
+
+class IntervalParametrlari(SiyosatParametrlari):
+    """Interval: maksimal interval (kun)."""
+    maksimal_interval: int = Field(..., ge=1, le=3650, description="Maksimal interval (kun)")
+
+
+SIYOSAT_PARAMETRLARI: Dict[str, Type[SiyosatParametrlari]] = {
+    "tatil": TatilParametrlari,
+    "tekislash": TekislashParametrlari,
+    "ef_kalibrlash": EfKalibrlashParametrlari,
+    "interval": IntervalParametrlari,
+}
@@ -0,0 +1,172 @@
+# MedCase Pro Platform - Kategoriya Hisoblagichlari Testlari
+
+import pytest
+from uuid import uuid4
+
+from modellar.holat import QiyinlikDarajasi
+from servislar.hisoblagich_servisi import HisoblagichServisi
+
+
+class _YozuvchiSessiya:
+    """Delta so'rovi parametrlarini yozib oluvchi sessiya (so'rov PostgreSQL CTE)."""
+
+    def __init__(self):
+        self.parametrlar = []
+
+    async def execute(self, sorov, parametrlar=None):
+        self.parametrlar.extend(parametrlar or [])
+
+
+def _deltalar(sessiya: _YozuvchiSessiya) -> dict:
+    return {p["bolim_id"]: {k: v for k, v in p.items() if k != "bolim_id"} for p in sessiya.parametrlar}
+
+
+class TestHissa:
+    """Holat hissasi testlari."""
+
+    def test_faqat_faol_va_chop_etilgan(self):
+        """Qoralama yoki o'chirilgan holat hisoblagichlarga kirmaydi."""
+        bolim = uuid4()
+
+        assert HisoblagichServisi.hissa(bolim, QiyinlikDarajasi.OSON, True, True) == (bolim, QiyinlikDarajasi.OSON)
+        assert HisoblagichServisi.hissa(bolim, QiyinlikDarajasi.OSON, True, False) is None
+        assert HisoblagichServisi.hissa(bolim, QiyinlikDarajasi.OSON, False, True) is None
+        assert HisoblagichServisi.hissa(None, QiyinlikDarajasi.OSON, True, True) is None
+
+
+class TestDeltaQollash:
+    """Yaratish, ko'chirish va o'chirishda delta qo'llash."""
+
+    @pytest.mark.asyncio
+    async def test_yaratish(self):
+        """Yangi chop etilgan holat bo'lim va qiyinlik hisoblagichiga +1."""
+        sessiya = _YozuvchiSessiya()
+        bolim = uuid4()
+
+        await HisoblagichServisi(sessiya).ozgarishni_qollash(None, (bolim, QiyinlikDarajasi.QIYIN))
+
+        assert _deltalar(sessiya) == {bolim: {"jami": 1, "oson": 0, "ortacha": 0, "qiyin": 1}}
+
+    @pytest.mark.asyncio
+    async def test_kochirish(self):
+        """Boshqa bo'limga ko'chirish: eskisidan -1, yangisiga +1."""
+        sessiya = _YozuvchiSessiya()
+        eski, yangi = uuid4(), uuid4()
+
+        await HisoblagichServisi(sessiya).ozgarishni_qollash(
+            (eski, QiyinlikDarajasi.OSON), (yangi, QiyinlikDarajasi.ORTACHA)
+        )
+
+        assert _deltalar(sessiya) == {
+            eski: {"jami": -1, "oson": -1, "ortacha": 0, "qiyin": 0},
+            yangi: {"jami": 1, "oson": 0, "ortacha": 1, "qiyin": 0},
+        }
+
+    @pytest.mark.asyncio
+    async def test_qiyinlik_ozgarishi(self):
+        """Bir bo'lim ichida qiyinlik o'zgarsa jami o'zgarmaydi."""
+        sessiya = _YozuvchiSessiya()
+        bolim = uuid4()
+
+        await HisoblagichServisi(sessiya).ozgarishni_qollash(
+            (bolim, QiyinlikDarajasi.OSON), (bolim, QiyinlikDarajasi.QIYIN)
+        )
+
+        assert _deltalar(sessiya) == {bolim: {"jami": 0, "oson": -1, "ortacha": 0, "qiyin": 1}}
+
+    @pytest.mark.asyncio
+    async def test_ochirish(self):
+        """O'chirilgan (yoki chop etilmagan) holat hissasi ayiriladi."""
+        sessiya = _YozuvchiSessiya()
+        bolim = uuid4()
+
+        await HisoblagichServisi(sessiya).ozgarishni_qollash((bolim, QiyinlikDarajasi.ORTACHA), None)
+
+        assert _deltalar(sessiya) == {bolim: {"jami": -1, "oson": 0, "ortacha": -1, "qiyin": 0}}
+
+    @pytest.mark.asyncio
+    async def test_ozgarishsiz_sorov_yoq(self):
+        """Hissa o'zgarmasa yoki deltalar nolga teng bo'lsa so'rov yuborilmaydi."""
+        sessiya = _YozuvchiSessiya()
+        hissa = (uuid4(), QiyinlikDarajasi.OSON)
+        servis = HisoblagichServisi(sessiya)
+
+        await servis.ozgarishni_qollash(hissa, hissa)
+        await servis.qollash(qoshilgan=[hissa], ayirilgan=[hissa])
+
+        assert sessiya.parametrlar == []
+
+    @pytest.mark.asyncio
+    async def test_import_bolim_boyicha_yigiladi(self):
+        """Ko'p holat qo'shilganda har bir bo'lim uchun bitta delta."""
+        sessiya = _YozuvchiSessiya()
+        bolim = uuid4()
+
+        await HisoblagichServisi(sessiya).qollash(qoshilgan=[
+            (bolim, QiyinlikDarajasi.OSON),
+            (bolim, QiyinlikDarajasi.OSON),
+            (bolim, QiyinlikDarajasi.QIYIN),
+        ])
+
+        assert _deltalar(sessiya) == {bolim: {"jami": 3, "oson": 2, "ortacha": 0, "qiyin": 1}}
+
+
+class TestOtaKochishi:
+    """Bo'lim / kichik kategoriya faolligi yoki otasi o'zgarganda ota hisoblagichlari."""
+
+    @pytest.mark.asyncio
+    async def test_bolim_kochirish(self):
+        """Boshqa kichik kategoriyaga ko'chgan bo'lim soni eski zanjirdan ayiriladi, yangisiga qo'shiladi."""
+        sessiya = _YozuvchiSessiya()
+        eski, yangi = uuid4(), uuid4()
+
+        await HisoblagichServisi(sessiya).bolim_kochishi(12, eski, yangi)
+
+        assert sessiya.parametrlar == [
+            {"kichik_id": eski, "jami": -12},
+            {"kichik_id": yangi, "jami": 12},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_bolim_faolligi(self):
+        """Faolsizlantirish -n, qayta faollashtirish +n."""
+        sessiya = _YozuvchiSessiya()
+        kichik = uuid4()
+        servis = HisoblagichServisi(sessiya)
+
+        await servis.bolim_kochishi(5, kichik, None)
+        await servis.bolim_kochishi(5, None, kichik)
+
+        assert sessiya.parametrlar == [
+            {"kichik_id": kichik, "jami": -5},
+            {"kichik_id": kichik, "jami": 5},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_kichik_faolligi_va_kochirish(self):
+        """Kichik kategoriya uchun delta asosiy kategoriyaga qo'llanadi."""
+        sessiya = _YozuvchiSessiya()
+        eski, yangi = uuid4(), uuid4()
+        servis = HisoblagichServisi(sessiya)
+
+        await servis.kichik_kochishi(7, eski, None)
+        await servis.kichik_kochishi(7, eski, yangi)
+
+        assert sessiya.parametrlar == [
+            {"asosiy_id": eski, "jami": -7},
+            {"asosiy_id": eski, "jami": -7},
+            {"asosiy_id": yangi, "jami": 7},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_ozgarishsiz_yoki_bosh(self):
+        """Ota o'zgarmasa, ikkalasi ham nofaol bo'lsa yoki son 0 bo'lsa so'rov yo'q."""
+        sessiya = _YozuvchiSessiya()
+        kichik = uuid4()
+        servis = HisoblagichServisi(sessiya)
+
+        await servis.bolim_kochishi(5, kichik, kichik)
+        await servis.bolim_kochishi(5, None, None)
+        await servis.bolim_kochishi(0, kichik, uuid4())
+
+        assert sessiya.parametrlar == []
@@ -0,0 +1,62 @@
+# MedCase Pro Platform - Nishon Qoidalari Testlari
+
+from uuid import uuid4
+
+from modellar.gamifikatsiya import Nishon
+from servislar.gamifikatsiya_servisi import NishonQoidalari
+
+
+def _nishon(nom: str, turi: str, qiymat: float) -> Nishon:
+    return Nishon(
+        id=uuid4(),
+        nom=nom,
+        ball_qiymati=10,
+        ochish_shartlari={"turi": turi, "qiymat": qiymat}
+    )
+
+
+def _qoidalar() -> NishonQoidalari:
+    return NishonQoidalari([
+        _nishon("Birinchi qadam", "urinishlar", 1),
+        _nishon("O'ntalik", "urinishlar", 10),
+        _nishon("Yuztalik", "urinishlar", 100),
+        _nishon("Haftalik streak", "streak", 7),
+        Nishon(id=uuid4(), nom="Shartsiz", ball_qiymati=0, ochish_shartlari={}),
+    ])
+
+
+class TestNishonNomzodlari:
+    """Hisoblagich chegarani kesib o'tganda nomzod nishonlar."""
+
+    def test_chegarani_kesib_otish(self):
+        """oldingi < chegara <= yangi bo'lgan nishon qaytadi."""
+        nomzodlar = _qoidalar().nomzodlar({"urinishlar": (9, 10)})
+
+        assert [n.nom for n in nomzodlar] == ["O'ntalik"]
+
+    def test_chegarada_turgan_qayta_berilmaydi(self):
+        """Oldingi qiymat chegaraga teng bo'lsa nishon allaqachon o'tilgan."""
+        assert _qoidalar().nomzodlar({"urinishlar": (10, 11)}) == []
+
+    def test_bir_nechta_chegara(self):
+        """Bitta katta sakrash oraliqdagi barcha chegaralarni tartib bilan beradi."""
+        nomzodlar = _qoidalar().nomzodlar({"urinishlar": (0, 150)})
+
+        assert [n.nom for n in nomzodlar] == ["Birinchi qadam", "O'ntalik", "Yuztalik"]
+
+    def test_kamayish_va_ozgarishsizlik(self):
+        """Qiymat kamaysa yoki o'zgarmasa nomzod yo'q."""
+        qoidalar = _qoidalar()
+
+        assert qoidalar.nomzodlar({"urinishlar": (100, 5)}) == []
+        assert qoidalar.nomzodlar({"urinishlar": (10, 10)}) == []
+
+    def test_turlar_alohida(self):
+        """Har bir shart turi o'z chegaralari bo'yicha tekshiriladi."""
+        nomzodlar = _qoidalar().nomzodlar({
+            "urinishlar": (0, 1),
+            "streak": (6, 7),
+            "nomalum": (0, 1000),
+        })
+
+        assert sorted(n.nom for n in nomzodlar) == ["Birinchi qadam", "Haftalik streak"]
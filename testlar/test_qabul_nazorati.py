@@ -0,0 +1,171 @@
+# MedCase Pro Platform - Qabul Nazorati Testlari
+
+import pytest
+
+from middleware import qabul_nazorati as qn
+from middleware.qabul_nazorati import (
+    MoslashuvchanLimit,
+    QabulNazorati,
+    TOLERANTLIK,
+    sinf_aniqlash,
+)
+from sozlamalar.sozlamalar import sozlamalar
+
+
+@pytest.fixture
+def nazorat(monkeypatch) -> QabulNazorati:
+    """Umumiy limiti 10, imtihon zaxirasi 20% bo'lgan nazoratchi."""
+    monkeypatch.setattr(sozlamalar, "qabul_umumiy_limit", 10)
+    monkeypatch.setattr(sozlamalar, "qabul_imtihon_zaxirasi", 0.2)
+    return QabulNazorati()
+
+
+class TestSinfAniqlash:
+    """Marshrut sinflari testlari."""
+
+    @pytest.mark.parametrize("yol", [
+        "/api/v1/holat/abc/javob",
+        "/api/v1/imtihon/abc/javob",
+        "/api/v1/imtihon/abc/yakunlash",
+        "/api/v1/takrorlash/baholash/abc",
+        "/api/v1/takrorlash/paket",
+    ])
+    def test_javob_yollari(self, yol: str):
+        """Javob yuborish marshrutlari 'javob' sinfiga tushadi."""
+        assert sinf_aniqlash("POST", yol) == "javob"
+
+    def test_boshqa_yollar(self):
+        """GET va boshqa imtihon amallari umumiy sinfda."""
+        assert sinf_aniqlash("GET", "/api/v1/takrorlash/paket") == "umumiy"
+        assert sinf_aniqlash("POST", "/api/v1/imtihon/boshlash") == "umumiy"
+        assert sinf_aniqlash("GET", "/health") is None
+
+
+class TestMoslashuvchanLimit:
+    """Gradient limit moslashuvi testlari."""
+
+    def test_barqaror_yuklamada_osadi(self):
+        """Kechikish barqaror va limitga yetilgan - limit o'sadi."""
+        sinf = MoslashuvchanLimit("test_osish", 10, 1.0)
+        sinf.maksimal = 100.0
+        sinf.jarayonda = 10
+        for _ in range(20):
+            sinf.qayd_etish(0.05)
+
+        assert sinf.limit > 10
+        assert sinf.limit <= sinf.maksimal
+
+    def test_bosh_turganda_osmaydi(self):
+        """Limitning yarmi ham band bo'lmasa limit o'zgarmaydi."""
+        sinf = MoslashuvchanLimit("test_bosh", 10, 1.0)
+        sinf.maksimal = 100.0
+        sinf.jarayonda = 2
+        for _ in range(20):
+            sinf.qayd_etish(0.05)
+
+        assert sinf.limit == 10
+
+    def test_kechikish_oshsa_kamayadi(self):
+        """Kechikish uzoq o'rtachadan TOLERANTLIK martadan oshsa limit kamayadi."""
+        sinf = MoslashuvchanLimit("test_kamayish", 40, 1.0)
+        sinf.jarayonda = 40
+        sinf.qayd_etish(0.05)
+        oldingi = sinf.limit
+        for _ in range(10):
+            sinf.qayd_etish(0.05 * TOLERANTLIK * 4)
+
+        assert sinf.limit < oldingi
+        assert sinf.limit >= 1
+
+    def test_yuklama_xatosi(self):
+        """DB pool timeout limitni ikki baravar kamaytiradi, lekin 1 dan pastga emas."""
+        sinf = MoslashuvchanLimit("test_xato", 8, 1.0)
+        sinf.yuklama_xatosi()
+        assert sinf.limit == 4
+        for _ in range(5):
+            sinf.yuklama_xatosi()
+        assert sinf.limit == 1
+
+
+class TestImtihonZaxirasi:
+    """Imtihon paytida javob yuborish uchun zaxira testlari."""
+
+    @pytest.mark.asyncio
+    async def test_zaxira_faqat_javob_uchun(self, nazorat: QabulNazorati):
+        """Imtihon rejimida umumiy so'rovlar sig'imning 80% idan oshmaydi."""
+        nazorat.imtihon_belgilash()
+        umumiy = nazorat.sinflar["umumiy"]
+        javob = nazorat.sinflar["javob"]
+
+        for _ in range(8):
+            assert await nazorat.kirish(umumiy) is None
+
+        assert not nazorat._sigadimi(umumiy)
+        assert nazorat._sigadimi(javob)
+        assert await nazorat.kirish(javob) is None
+
+        for _ in range(8):
+            nazorat.chiqish(umumiy, None)
+        nazorat.chiqish(javob, None)
+        assert nazorat.jarayonda == 0
+
+    @pytest.mark.asyncio
+    async def test_imtihonsiz_zaxira_yoq(self, nazorat: QabulNazorati):
+        """Imtihon bo'lmasa butun sig'im umumiy so'rovlar uchun ochiq."""
+        umumiy = nazorat.sinflar["umumiy"]
+        for _ in range(9):
+            assert await nazorat.kirish(umumiy) is None
+
+        assert nazorat._sigadimi(umumiy)
+
+
+class TestNavbatMuddati:
+    """Navbatda kutish byudjeti testlari."""
+
+    @pytest.mark.asyncio
+    async def test_muddat_otganda_rad_etiladi(self, nazorat: QabulNazorati):
+        """Joy byudjet ichida bo'shamasa so'rov Retry-After bilan rad etiladi."""
+        sinf = MoslashuvchanLimit("test_navbat", 1, 0.05)
+        sinf.ortacha_rtt = 0.01
+        nazorat.sinflar["test_navbat"] = sinf
+
+        assert await nazorat.kirish(sinf) is None
+        qayta_urinish = await nazorat.kirish(sinf)
+
+        assert qayta_urinish is not None and qayta_urinish >= 1
+        assert len(sinf.navbat) == 0
+        assert sinf.jarayonda == 1
+
+    @pytest.mark.asyncio
+    async def test_baho_oshsa_darhol_rad(self, nazorat: QabulNazorati):
+        """Kutish bahosi byudjetdan oshsa navbatga qo'yilmaydi."""
+        sinf = MoslashuvchanLimit("test_baho", 1, 0.05)
+        sinf.ortacha_rtt = 1.0
+        nazorat.sinflar["test_baho"] = sinf
+
+        assert await nazorat.kirish(sinf) is None
+        assert await nazorat.kirish(sinf) is not None
+        assert len(sinf.navbat) == 0
+
+
+class TestTanaOxiridaChiqish:
+    """Oqimli javoblarda joy tana tugaganda bo'shatilishi."""
+
+    @pytest.mark.asyncio
+    async def test_joy_tana_tugaguncha_band(self, nazorat: QabulNazorati, monkeypatch):
+        """Joy call_next qaytganda emas, oxirgi bo'lakdan keyin bo'shaydi."""
+        monkeypatch.setattr(qn, "qabul_nazoratchisi", nazorat)
+        sinf = nazorat.sinflar["eksport"]
+        assert await nazorat.kirish(sinf) is None
+
+        async def tana():
+            yield b"a"
+            yield b"b"
+
+        bolaklar = []
+        async for bolak in qn._tana_oxirida_chiqish(tana(), sinf, 0.0):
+            bolaklar.append(bolak)
+            assert sinf.jarayonda == 1
+
+        assert bolaklar == [b"a", b"b"]
+        assert sinf.jarayonda == 0
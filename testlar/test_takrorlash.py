@@ -0,0 +1,152 @@
+# MedCase Pro Platform - Takrorlash Testlari
+
+import pytest
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+from modellar.takrorlash import TakrorlashKartasi, sm2_qadam
+from servislar.takrorlash_servisi import TakrorlashServisi
+from sxemalar.takrorlash import PaketBaho
+
+# Sifat ketma-ketliklari: o'sish, xato bilan qayta boshlash, EF pastki chegarasi
+KETMA_KETLIKLAR = [
+    [5, 4, 5, 3],
+    [4, 5, 1, 4, 5],
+    [0, 0, 2, 3, 3, 3],
+]
+
+KartaQatori = namedtuple("KartaQatori", [
+    "id", "easiness_factor", "interval", "repetition", "jami_takrorlashlar",
+    "togri_javoblar", "keyingi_takrorlash", "oqilgan", "faol",
+])
+
+
+class _Natija:
+    def __init__(self, qatorlar):
+        self._qatorlar = qatorlar
+
+    def all(self):
+        return self._qatorlar
+
+
+class _PaketSessiya:
+    """
+    paket_baholash uchun sessiya: SELECT ... FOR UPDATE berilgan qatorlarni
+    qaytaradi, bulk UPDATE/INSERT parametrlari jadval bo'yicha yoziladi.
+    """
+
+    def __init__(self, qatorlar):
+        self.qatorlar = qatorlar
+        self.info = {}
+        self.yozuvlar = {}
+
+    async def execute(self, sorov, parametrlar=None):
+        if parametrlar is None:
+            return _Natija(self.qatorlar if sorov.is_select else [])
+        self.yozuvlar.setdefault(sorov.table.name, []).extend(parametrlar)
+        return _Natija([])
+
+
+def _yangi_karta() -> TakrorlashKartasi:
+    return TakrorlashKartasi(
+        id=uuid4(), foydalanuvchi_id=uuid4(), holat_id=uuid4(),
+        easiness_factor=2.5, interval=0, repetition=0,
+        jami_takrorlashlar=0, togri_javoblar=0,
+        keyingi_takrorlash=date.today(), oqilgan=False, faol=True
+    )
+
+
+def _qator(karta: TakrorlashKartasi) -> KartaQatori:
+    return KartaQatori(**{maydon: getattr(karta, maydon) for maydon in KartaQatori._fields})
+
+
+class TestSm2Qadam:
+    """ORM'siz SM-2 qadami testlari."""
+
+    def test_togri_javob_intervallari(self):
+        """1, 6, so'ng interval * EF."""
+        ef, interval, repetition, togri = sm2_qadam(2.5, 0, 0, 5)
+        assert (interval, repetition, togri) == (1, 1, True)
+
+        ef, interval, repetition, _ = sm2_qadam(ef, interval, repetition, 5)
+        assert (interval, repetition) == (6, 2)
+
+        ef, interval, repetition, _ = sm2_qadam(ef, interval, repetition, 5)
+        assert interval == round(6 * ef)
+
+    def test_xato_qayta_boshlaydi(self):
+        """Sifat < 3 - repetition 0, interval 1, EF 1.3 dan pastga tushmaydi."""
+        ef, interval, repetition, togri = sm2_qadam(1.3, 20, 5, 0)
+
+        assert (ef, interval, repetition, togri) == (1.3, 1, 0, False)
+
+
+class TestPaketBaholash:
+    """Paketli baholash ketma-ket baholash bilan bir xil natija berishi."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sifatlar", KETMA_KETLIKLAR)
+    async def test_ketma_ket_bilan_bir_xil(self, sifatlar):
+        """Bir karta paketda bir necha marta kelsa baholar tartib bilan qo'llanadi."""
+        karta = _yangi_karta()
+        sessiya = _PaketSessiya([_qator(karta)])
+
+        natija = await TakrorlashServisi(sessiya).paket_baholash(
+            karta.foydalanuvchi_id, [PaketBaho(karta_id=karta.id, sifat=sifat) for sifat in sifatlar]
+        )
+
+        # Ketma-ket: baholash ishlatadigan sm2_hisoblash har bir baho uchun
+        tarix = []
+        for sifat in sifatlar:
+            ef_oldin, interval_oldin = karta.easiness_factor, karta.interval
+            karta.sm2_hisoblash(sifat)
+            tarix.append((sifat, sifat >= 3, ef_oldin, karta.easiness_factor, interval_oldin, karta.interval))
+
+        assert natija["qabul_qilingan"] == len(sifatlar)
+        assert natija["topilmagan"] == []
+        assert natija["kartalar"] == [{
+            "karta_id": karta.id,
+            "easiness_factor": round(karta.easiness_factor, 2),
+            "interval": karta.interval,
+            "repetition": karta.repetition,
+            "keyingi_takrorlash": karta.keyingi_takrorlash,
+        }]
+
+        yangilanish, = sessiya.yozuvlar["takrorlash_kartalari"]
+        assert yangilanish["jami_takrorlashlar"] == karta.jami_takrorlashlar
+        assert yangilanish["togri_javoblar"] == karta.togri_javoblar
+        assert [
+            (q["sifat"], q["togri"], q["ef_oldin"], q["ef_keyin"], q["interval_oldin"], q["interval_keyin"])
+            for q in sessiya.yozuvlar["takrorlash_tarixi"]
+        ] == tarix
+
+        # Muddatlar indeksi deltasi commitdan keyinga qoldiriladi
+        assert len(sessiya.info["commitdan_keyin"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_oflayn_baho_mahalliy_kun(self):
+        """Oflayn baho sanasi date.today() bilan bir xil (mahalliy) kun manbaidan olinadi."""
+        karta = _yangi_karta()
+        sessiya = _PaketSessiya([_qator(karta)])
+        vaqt = datetime.now(timezone.utc) - timedelta(days=2, hours=7)
+
+        natija = await TakrorlashServisi(sessiya).paket_baholash(
+            karta.foydalanuvchi_id, [PaketBaho(karta_id=karta.id, sifat=5, baholangan_vaqt=vaqt)]
+        )
+
+        assert natija["kartalar"][0]["keyingi_takrorlash"] == vaqt.astimezone().date() + timedelta(days=1)
+
+    @pytest.mark.asyncio
+    async def test_begona_karta_topilmagan(self):
+        """Foydalanuvchiga tegishli bo'lmagan yoki mavjud bo'lmagan karta qo'llanmaydi."""
+        sessiya = _PaketSessiya([])
+        yoq = uuid4()
+
+        natija = await TakrorlashServisi(sessiya).paket_baholash(
+            uuid4(), [PaketBaho(karta_id=yoq, sifat=5)]
+        )
+
+        assert natija == {"qabul_qilingan": 0, "topilmagan": [yoq], "kartalar": []}
+        assert sessiya.yozuvlar == {}
+        assert "commitdan_keyin" not in sessiya.info
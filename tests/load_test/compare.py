@@ -0,0 +1,76 @@
+"""
+Compare two load test result files written by locustfile.py (--results-json).
+
+    python tests/load_test/compare.py results/baseline.json results/current.json
+    python tests/load_test/compare.py base.json head.json --threshold 0.15
+
+Prints per-endpoint p50/p95/p99 deltas and exits with 1 when any percentile
+regressed by more than --threshold (relative) and --min-delta-ms (absolute),
+so small absolute jitter on fast endpoints does not fail the comparison.
+"""
+import argparse
+import json
+import sys
+
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base, head, threshold, min_delta_ms, min_requests):
+    rows, regressions = [], []
+    for endpoint in sorted(set(base["endpoints"]) | set(head["endpoints"])):
+        before = base["endpoints"].get(endpoint)
+        after = head["endpoints"].get(endpoint)
+        if before is None or after is None:
+            rows.append((endpoint, "only in " + ("head" if before is None else "base")))
+            continue
+        cells = []
+        for metric in PERCENTILES:
+            old, new = before[metric] or 0, after[metric] or 0
+            change = (new - old) / old if old else 0.0
+            cells.append(f"{metric[:3]} {old:>7.0f} -> {new:>7.0f} ({change:+6.1%})")
+            enough = min(before["requests"], after["requests"]) >= min_requests
+            if enough and change > threshold and new - old > min_delta_ms:
+                regressions.append((endpoint, metric, old, new, change))
+        error_change = after["error_rate"] - before["error_rate"]
+        cells.append(f"err {after['error_rate']:.2%} ({error_change:+.2%})")
+        rows.append((endpoint, "  ".join(cells)))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two load test result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative percentile increase counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=10,
+                        help="Ignore increases smaller than this many milliseconds")
+    parser.add_argument("--min-requests", type=int, default=50,
+                        help="Skip endpoints with fewer samples in either run")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    print(f"base: {base.get('label') or args.base}  ({base['total_rps']} rps, {base['users']} users)")
+    print(f"head: {head.get('label') or args.head}  ({head['total_rps']} rps, {head['users']} users)")
+    print()
+
+    rows, regressions = compare(base, head, args.threshold, args.min_delta_ms, args.min_requests)
+    width = max((len(endpoint) for endpoint, _ in rows), default=0)
+    for endpoint, text in rows:
+        print(f"{endpoint:<{width}}  {text}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for endpoint, metric, old, new, change in regressions:
+            print(f"  {endpoint} {metric}: {old:.0f} -> {new:.0f} ms ({change:+.1%})")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
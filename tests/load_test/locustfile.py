@@ -1,88 +1,460 @@
-import random
-import string
+"""
+MedCase scenario load test.
+
+Weighted personas run against a seeded database (see seed.py):
+
+    StudentUser          practice loop: browse, open case, answer, search, comments
+    ExamTakerUser        timed exam: start, answer/next through every question, finish
+    ReviewerUser         spaced repetition: due count, session queue, SM-2 grading
+    AdminImportUser      Excel import as a background task, polled until done
+    WebSocketListener    passive /api/v1/ws connection that only receives
+
+Interactive:
+    locust -f tests/load_test/locustfile.py --host http://localhost:8000
+
+Headless / CI (exit code 1 when an SLO in slo.json is violated):
+    tests/load_test/run_ci.sh
+
+Every run writes per-endpoint p50/p95/p99 and the SLO verdict to --results-json,
+compare two runs with compare.py.
+
+Requires: pip install locust websocket-client openpyxl
+"""
+import io
 import json
-from locust import HttpUser, task, between, events
 import logging
+import os
+import random
+import threading
+import time
+
+from locust import HttpUser, SequentialTaskSet, User, between, constant, events, task
+
+from seed import ADMIN_EMAIL, PASSWORD, STUDENT_COUNT, student_email
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class MedCaseUser(HttpUser):
-    wait_time = between(1, 5)  # Simulate user think time between 1 and 5 seconds
+API = "/api/v1"
+SLO_FILE = os.path.join(os.path.dirname(__file__), "slo.json")
+
+SEARCH_TERMS = ["yurak", "nafas", "qon", "bosh", "infarkt", "pnevmoniya", "diabet", "anemiya"]
+
+# Shared across users in this process: case and section ids discovered once
+_catalog = {"cases": [], "sections": []}
+_catalog_lock = threading.Lock()
+_student_ids = iter(range(10 ** 9))
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser):
+    parser.add_argument("--seed", type=int, default=42, env_var="LOCUST_SEED",
+                        help="Random seed for persona choices")
+    parser.add_argument("--results-json", default="", env_var="LOCUST_RESULTS_JSON",
+                        help="Write per-endpoint percentiles and SLO verdict to this file")
+    parser.add_argument("--slo-file", default=SLO_FILE, env_var="LOCUST_SLO_FILE",
+                        help="Per-endpoint p50/p95/p99 and error-rate budgets")
+    parser.add_argument("--label", default="", env_var="LOCUST_LABEL",
+                        help="Free-form run label stored in the results file (e.g. git sha)")
+
+
+@events.init.add_listener
+def _on_init(environment, **kwargs):
+    if environment.parsed_options:
+        random.seed(environment.parsed_options.seed)
+
+
+def login(user, email):
+    """Log in with a seeded account and attach the bearer token. Returns the token or None."""
+    payload = {"email_yoki_nom": email, "parol": PASSWORD}
+    with user.client.post(f"{API}/autentifikatsiya/kirish", json=payload,
+                          catch_response=True) as response:
+        if response.status_code != 200:
+            response.failure(f"Login failed for {email}: {response.status_code}")
+            return None
+        token = response.json().get("kirish_tokeni")
+    user.client.headers.update({"Authorization": f"Bearer {token}"})
+    return token
+
+
+def next_student_email():
+    """Seeded students are handed out round-robin so sessions spread across accounts."""
+    return student_email(next(_student_ids) % STUDENT_COUNT)
+
+
+def load_catalog(user):
+    """Fetch published case and section ids once per process."""
+    with _catalog_lock:
+        if _catalog["cases"]:
+            return
+        response = user.client.get(f"{API}/holat/", params={"hajm": 100},
+                                   name=f"{API}/holat/ [catalog]")
+        if response.status_code == 200:
+            holatlar = response.json().get("holatlar", [])
+            _catalog["cases"] = [h["id"] for h in holatlar]
+            _catalog["sections"] = sorted({h["bolim_id"] for h in holatlar if h.get("bolim_id")})
+        if not _catalog["cases"]:
+            logger.error("No published cases found - run seed.py / the dataset generator first")
+
+
+def random_case():
+    return random.choice(_catalog["cases"]) if _catalog["cases"] else None
+
+
+def check(response, expected=(200,)):
+    if response.status_code not in expected:
+        response.failure(f"{response.status_code}: {response.text[:200]}")
+
+
+class StudentUser(HttpUser):
+    """Self-paced practice: the bulk of real traffic."""
+    weight = 10
+    wait_time = between(2, 8)
 
     def on_start(self):
-        """
-        Executed when a user starts. We register a new user or login if already exists.
-        Since we need unique users for realistic load, we'll try to register a random user.
-        """
-        self.email = f"loadtest_{''.join(random.choices(string.ascii_lowercase, k=8))}@example.com"
-        self.password = "Password123" # Stronger password
-        self.token = None
-
-        # 1. Register
-        reg_payload = {
-            "ism": "LoadTester",
-            "familiya": "User",
-            "email": self.email,
-            "parol": self.password,
-            "parol_tasdiqlash": self.password,
-            "telefon": f"+998{random.randint(100000000, 999999999)}",
-            "foydalanuvchi_nomi": self.email.split("@")[0]
-        }
+        self.token = login(self, next_student_email())
+        load_catalog(self)
 
-        with self.client.post("/api/v1/autentifikatsiya/royxatdan-otish", json=reg_payload, catch_response=True) as response:
-            if response.status_code == 200 or response.status_code == 201:
-                # Registration successful
-                pass
-            elif response.status_code == 400 and "mavjud" in response.text:
-                pass
-            else:
-                logger.error(f"Registration failed: {response.text}")
-
-        # 2. Login
-        login_payload = {
-            "email_yoki_nom": self.email,  # Schema uses email_yoki_nom
-            "parol": self.password
-        }
+    @task(6)
+    def answer_case(self):
+        holat_id = random_case()
+        if not self.token or not holat_id:
+            return
+        self.client.get(f"{API}/holat/{holat_id}", name=f"{API}/holat/[id]")
+        params = {"tanlangan_javob": random.choice("ABCD"), "sarflangan_vaqt": random.randint(20, 180)}
+        with self.client.post(f"{API}/holat/{holat_id}/javob", params=params,
+                              name=f"{API}/holat/[id]/javob", catch_response=True) as response:
+            check(response)
+
+    @task(3)
+    def browse_section(self):
+        if not _catalog["sections"]:
+            return
+        self.client.get(f"{API}/kategoriya/asosiy")
+        bolim_id = random.choice(_catalog["sections"])
+        self.client.get(f"{API}/holat/bolim/{bolim_id}", params={"hajm": 20},
+                        name=f"{API}/holat/bolim/[id]")
+
+    @task(2)
+    def daily_case(self):
+        with self.client.get(f"{API}/holat/kunlik", catch_response=True) as response:
+            check(response, (200, 304, 404))
+
+    @task(2)
+    def search(self):
+        term = random.choice(SEARCH_TERMS)
+        self.client.get(f"{API}/qidiruv/taklif", params={"q": term[:3]}, name=f"{API}/qidiruv/taklif")
+        self.client.get(f"{API}/qidiruv/holatlar", params={"q": term}, name=f"{API}/qidiruv/holatlar")
+
+    @task(2)
+    def comments(self):
+        holat_id = random_case()
+        if not self.token or not holat_id:
+            return
+        self.client.get(f"{API}/izoh/holat/{holat_id}", name=f"{API}/izoh/holat/[id]")
+        if random.random() < 0.1:
+            payload = {"holat_id": holat_id, "matn": "Load test izohi"}
+            with self.client.post(f"{API}/izoh/", json=payload, catch_response=True) as response:
+                check(response, (200, 201))
+
+    @task(1)
+    def dashboard(self):
+        if self.token:
+            self.client.get(f"{API}/rivojlanish/dashboard")
+
+
+class ExamFlow(SequentialTaskSet):
+    """One full exam per iteration; the user then rests before the next one."""
+
+    def on_start(self):
+        self.exam_id = None
+        self.questions = 0
+
+    @task
+    def start(self):
+        payload = {"savollar_soni": random.choice([10, 20]), "umumiy_vaqt": 1800}
+        with self.client.post(f"{API}/imtihon/boshlash", json=payload,
+                              catch_response=True) as response:
+            check(response, (201,))
+            data = response.json() if response.status_code == 201 else None
+        if data is None:
+            self.interrupt(reschedule=True)
+        self.exam_id = data["id"]
+        self.questions = data["jami_savollar"]
+
+    @task
+    def answer_all(self):
+        for index in range(self.questions):
+            time.sleep(random.uniform(1, 4))  # reading the question
+            payload = {"savol_indeksi": index, "tanlangan_javob": random.choice("ABCD")}
+            with self.client.post(f"{API}/imtihon/{self.exam_id}/javob", json=payload,
+                                  name=f"{API}/imtihon/[id]/javob", catch_response=True) as response:
+                check(response)
+            if index < self.questions - 1:
+                with self.client.post(f"{API}/imtihon/{self.exam_id}/keyingi",
+                                      name=f"{API}/imtihon/[id]/keyingi",
+                                      catch_response=True) as response:
+                    check(response)
+
+    @task
+    def finish(self):
+        with self.client.post(f"{API}/imtihon/{self.exam_id}/yakunlash",
+                              name=f"{API}/imtihon/[id]/yakunlash", catch_response=True) as response:
+            check(response)
+        self.client.get(f"{API}/imtihon/{self.exam_id}/natija", name=f"{API}/imtihon/[id]/natija")
+        self.interrupt(reschedule=False)
+
+
+class ExamTakerUser(HttpUser):
+    """Timed exam: bursty answer traffic, the path admission control protects first."""
+    weight = 3
+    wait_time = between(10, 30)
+    tasks = [ExamFlow]
 
-        with self.client.post("/api/v1/autentifikatsiya/kirish", json=login_payload, catch_response=True) as response:
-            if response.status_code == 200:
-                data = response.json()
-                self.token = data.get("kirish_tokeni")
-                self.client.headers.update({"Authorization": f"Bearer {self.token}"})
-            else:
-                logger.error(f"Login failed: {response.text}")
-                self.token = None
+    def on_start(self):
+        self.token = login(self, next_student_email())
+
+
+class ReviewerUser(HttpUser):
+    """Daily spaced-repetition review."""
+    weight = 3
+    wait_time = between(3, 10)
+
+    def on_start(self):
+        self.token = login(self, next_student_email())
+        load_catalog(self)
+        # Make sure there is something to review even on a fresh account
+        for holat_id in random.sample(_catalog["cases"], min(5, len(_catalog["cases"]))):
+            with self.client.post(f"{API}/takrorlash/qoshish/{holat_id}",
+                                  name=f"{API}/takrorlash/qoshish/[id]",
+                                  catch_response=True) as response:
+                check(response, (200, 201, 400, 409))
 
     @task(3)
-    def get_dashboard(self):
+    def review_session(self):
         if not self.token:
             return
+        self.client.get(f"{API}/takrorlash/bugun-soni")
+        with self.client.post(f"{API}/takrorlash/sessiya", json={"reja_kartalar": 20},
+                              catch_response=True) as response:
+            check(response, (200, 201))
+            if response.status_code not in (200, 201):
+                return
+            cards = response.json()["navbat"]["kartalar"]
+        for card in cards:
+            time.sleep(random.uniform(0.5, 3))
+            payload = {"sifat": random.choice([2, 3, 4, 4, 5]), "sarflangan_vaqt": random.randint(5, 60)}
+            with self.client.post(f"{API}/takrorlash/baholash/{card['holat_id']}", json=payload,
+                                  name=f"{API}/takrorlash/baholash/[id]",
+                                  catch_response=True) as response:
+                check(response)
 
-        with self.client.get("/api/v1/rivojlanish/dashboard", catch_response=True) as response:
-            if response.status_code != 200:
-                response.failure(f"Dashboard failed with {response.status_code}: {response.text}")
+    @task(1)
+    def stats(self):
+        if self.token:
+            self.client.get(f"{API}/takrorlash/statistika")
 
-    @task(2)
-    def get_profile(self):
+
+def import_workbook(rows=20):
+    """Small synthetic .xlsx in the admin import column layout."""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append([
+        "section", "main_category", "sub_category", "case", "question",
+        "opt_a", "opt_b", "opt_c", "opt_d", "correct", "diff",
+    ])
+    stamp = int(time.time() * 1000)
+    for i in range(rows):
+        sheet.append([
+            "Load test bo'limi", "Load test", "Yuklama",
+            f"Load test klinik holati {stamp}-{i}", "To'g'ri javobni tanlang",
+            "Variant A", "Variant B", "Variant C", "Variant D",
+            random.choice("ABCD"), random.choice(["basic", "intermediate", "advanced"]),
+        ])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class AdminImportUser(HttpUser):
+    """Single admin uploading an Excel file and polling the background task."""
+    fixed_count = 1
+    wait_time = constant(60)
+    poll_timeout = 120
+
+    def on_start(self):
+        self.token = login(self, ADMIN_EMAIL)
+
+    @task
+    def import_excel(self):
         if not self.token:
             return
+        files = {"fayl": ("load_test.xlsx", import_workbook(),
+                          "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+        with self.client.post(f"{API}/admin/import/excel/vazifa", files=files,
+                              catch_response=True) as response:
+            check(response)
+            if response.status_code != 200:
+                return
+            task_id = response.json()["vazifa_id"]
 
-        with self.client.get("/api/v1/autentifikatsiya/men", catch_response=True) as response:
+        deadline = time.time() + self.poll_timeout
+        while time.time() < deadline:
+            time.sleep(2)
+            response = self.client.get(f"{API}/admin/import/excel/vazifa/{task_id}",
+                                       name=f"{API}/admin/import/excel/vazifa/[id]")
             if response.status_code != 200:
-                response.failure(f"Profile failed with {response.status_code}: {response.text}")
+                return
+            state = response.json().get("holat")
+            if state in ("tugadi", "xato"):
+                return
+        logger.warning(f"Import task {task_id} did not finish in {self.poll_timeout}s")
+
+    @task
+    def admin_overview(self):
+        if self.token:
+            self.client.get(f"{API}/admin/qabul")
+
+
+class WebSocketListener(User):
+    """Passive listener: keeps one socket open, reconnects when it drops."""
+    weight = 4
+    wait_time = constant(1)
+    receive_timeout = 30
+
+    def on_start(self):
+        self.host_ws = self.host.replace("http://", "ws://").replace("https://", "wss://")
+        self.token = self._login()
+        self.ws = None
+
+    def _login(self):
+        import requests
+
+        start = time.perf_counter()
+        response = requests.post(f"{self.host}{API}/autentifikatsiya/kirish",
+                                 json={"email_yoki_nom": next_student_email(), "parol": PASSWORD})
+        self._fire("POST", f"{API}/autentifikatsiya/kirish", start,
+                   None if response.status_code == 200 else Exception(response.status_code))
+        return response.json().get("kirish_tokeni") if response.status_code == 200 else None
+
+    def _fire(self, request_type, name, start, exception=None, length=0):
+        self.environment.events.request.fire(
+            request_type=request_type, name=name,
+            response_time=(time.perf_counter() - start) * 1000,
+            response_length=length, exception=exception, context={},
+        )
+
+    def _connect(self):
+        import websocket
+
+        start = time.perf_counter()
+        try:
+            self.ws = websocket.create_connection(f"{self.host_ws}{API}/ws?token={self.token}",
+                                                  timeout=self.receive_timeout)
+            self._fire("WS", f"{API}/ws [connect]", start)
+        except Exception as error:
+            self.ws = None
+            self._fire("WS", f"{API}/ws [connect]", start, error)
+
+    @task
+    def listen(self):
+        import websocket
 
-    @task(1)
-    def get_categories(self):
         if not self.token:
             return
-
-        # Checking 'kategoriya' endpoint based on file list
-        # Assuming '/api/v1/kategoriya/asosiy' exists based on files
-        with self.client.get("/api/v1/kategoriya/asosiy", catch_response=True) as response:
-             if response.status_code != 200:
-                 pass
+        if self.ws is None:
+            self._connect()
+            return
+        start = time.perf_counter()
+        try:
+            message = self.ws.recv()
+            self._fire("WS", f"{API}/ws [message]", start, length=len(message))
+        except websocket.WebSocketTimeoutException:
+            # Quiet channel - keep the socket alive with a ping
+            self.ws.ping()
+        except Exception as error:
+            self._fire("WS", f"{API}/ws [message]", start, error)
+            self.ws = None
 
     def on_stop(self):
-        pass
+        if self.ws is not None:
+            self.ws.close()
+
+
+# ============== SLO gates and results ==============
+
+def _endpoint_results(stats):
+    results = {}
+    for (name, method), entry in stats.entries.items():
+        if not entry.num_requests:
+            continue
+        results[f"{method} {name}"] = {
+            "requests": entry.num_requests,
+            "failures": entry.num_failures,
+            "error_rate": round(entry.num_failures / entry.num_requests, 4),
+            "rps": round(entry.total_rps, 2),
+            "p50_ms": entry.get_response_time_percentile(0.50),
+            "p95_ms": entry.get_response_time_percentile(0.95),
+            "p99_ms": entry.get_response_time_percentile(0.99),
+            "max_ms": round(entry.max_response_time or 0, 1),
+        }
+    return results
+
+
+def _check_slos(results, slos):
+    """Each slo.json entry is keyed "METHOD name"; "*" applies to every endpoint without its own entry."""
+    violations = []
+    default = slos.get("*", {})
+    for endpoint, measured in results.items():
+        budget = slos.get(endpoint, default)
+        if measured["requests"] < budget.get("min_requests", 1):
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "error_rate"):
+            limit = budget.get(metric)
+            if limit is not None and measured[metric] > limit:
+                violations.append({"endpoint": endpoint, "metric": metric,
+                                   "limit": limit, "measured": measured[metric]})
+    for endpoint in slos:
+        if endpoint != "*" and endpoint not in results:
+            logger.warning(f"SLO endpoint not exercised in this run: {endpoint}")
+    return violations
+
+
+@events.quitting.add_listener
+def _on_quitting(environment, **kwargs):
+    # In distributed runs only the master has the aggregated stats
+    if environment.runner is None or environment.runner.__class__.__name__ == "WorkerRunner":
+        return
+    options = environment.parsed_options
+
+    with open(options.slo_file) as f:
+        slos = json.load(f)
+    results = _endpoint_results(environment.stats)
+    violations = _check_slos(results, slos)
+
+    for v in violations:
+        logger.error(f"SLO violated: {v['endpoint']} {v['metric']} "
+                     f"{v['measured']} > {v['limit']}")
+    if violations:
+        environment.process_exit_code = 1
+    else:
+        logger.info(f"All SLOs met across {len(results)} endpoints")
+
+    if options.results_json:
+        total = environment.stats.total
+        with open(options.results_json, "w") as f:
+            json.dump({
+                "label": options.label,
+                "timestamp": int(time.time()),
+                "users": environment.runner.target_user_count,
+                "seed": options.seed,
+                "duration_s": round(total.last_request_timestamp - total.start_time, 1)
+                if total.last_request_timestamp else 0,
+                "total_rps": round(total.total_rps, 2),
+                "passed": not violations,
+                "violations": violations,
+                "endpoints": results,
+            }, f, indent=2, sort_keys=True)
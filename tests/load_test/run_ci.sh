@@ -0,0 +1,36 @@
+#!/bin/bash
+# Headless load test for CI: seeds accounts, runs the persona mix and fails on SLO violations.
+#
+#   HOST=http://localhost:8000 USERS=200 RUN_TIME=5m tests/load_test/run_ci.sh
+#
+# Results land in $RESULTS_DIR/<label>.json; compare runs with
+#   python tests/load_test/compare.py baseline.json current.json
+
+set -e
+
+cd "$(dirname "$0")"
+
+HOST=${HOST:-http://localhost:8000}
+USERS=${USERS:-200}
+SPAWN_RATE=${SPAWN_RATE:-20}
+RUN_TIME=${RUN_TIME:-5m}
+LABEL=${LABEL:-$(git rev-parse --short HEAD 2>/dev/null || date +%s)}
+RESULTS_DIR=${RESULTS_DIR:-results}
+
+mkdir -p "$RESULTS_DIR"
+
+if [ "${SKIP_SEED:-0}" != "1" ]; then
+    python seed.py --students "${LOCUST_STUDENTS:-500}"
+fi
+
+locust -f locustfile.py \
+    --headless \
+    --host "$HOST" \
+    --users "$USERS" \
+    --spawn-rate "$SPAWN_RATE" \
+    --run-time "$RUN_TIME" \
+    --stop-timeout 30 \
+    --only-summary \
+    --csv "$RESULTS_DIR/$LABEL" \
+    --label "$LABEL" \
+    --results-json "$RESULTS_DIR/$LABEL.json"
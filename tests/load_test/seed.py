@@ -0,0 +1,86 @@
+"""
+Seed the accounts the load test logs in with.
+
+Creates STUDENT_COUNT students (loadtest_0000@example.com ...) and one admin
+(loadtest_admin@example.com), all with PASSWORD. Idempotent: existing accounts
+are kept. Content (categories, cases) comes from skriptlar.boshlangich_malumotlar
+and the synthetic dataset generator - the load test only reads it.
+
+    python tests/load_test/seed.py --students 500
+
+The constants are imported by locustfile.py, so application imports stay
+inside the functions (the load generator does not need the app installed).
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+STUDENT_COUNT = int(os.environ.get("LOCUST_STUDENTS", 500))
+PASSWORD = "Password123"
+ADMIN_EMAIL = "loadtest_admin@example.com"
+
+
+def student_email(index):
+    return f"loadtest_{index:04d}@example.com"
+
+
+async def seed(students):
+    from sqlalchemy import select
+
+    from modellar.foydalanuvchi import Foydalanuvchi, FoydalanuvchiProfili, FoydalanuvchiRoli
+    from modellar.rivojlanish import FoydalanuvchiRivojlanishi
+    from sozlamalar.malumotlar_bazasi import malumotlar_bazasi
+    from yordamchilar.xavfsizlik import parol_hashlash
+
+    # bcrypt is slow on purpose - hash once and share it across the seeded accounts
+    password_hash = parol_hashlash(PASSWORD)
+    accounts = [(student_email(i), FoydalanuvchiRoli.TALABA) for i in range(students)]
+    accounts.append((ADMIN_EMAIL, FoydalanuvchiRoli.ADMIN))
+
+    await malumotlar_bazasi.ulanish()
+    try:
+        async with malumotlar_bazasi.sessiya() as db:
+            result = await db.execute(
+                select(Foydalanuvchi.email).where(Foydalanuvchi.email.like("loadtest_%"))
+            )
+            existing = set(result.scalars().all())
+
+            created = 0
+            for email, role in accounts:
+                if email in existing:
+                    continue
+                user = Foydalanuvchi(
+                    email=email,
+                    foydalanuvchi_nomi=email.split("@")[0],
+                    parol_hash=password_hash,
+                    ism="LoadTester",
+                    familiya="User",
+                    rol=role,
+                    email_tasdiqlangan=True,
+                )
+                db.add(user)
+                await db.flush()
+                db.add(FoydalanuvchiProfili(foydalanuvchi_id=user.id))
+                db.add(FoydalanuvchiRivojlanishi(foydalanuvchi_id=user.id))
+                created += 1
+
+            await db.commit()
+    finally:
+        await malumotlar_bazasi.uzish()
+
+    print(f"Load test accounts: {created} created, {len(accounts) - created} already present")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed load test accounts")
+    parser.add_argument("--students", type=int, default=STUDENT_COUNT)
+    args = parser.parse_args()
+
+    # Run from anywhere: the application packages live at the repository root
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+    asyncio.run(seed(args.students))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 
 broker_url = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
@@ -20,6 +21,37 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     broker_connection_retry_on_startup=True,
+    beat_schedule={
+        # Kategoriya hisoblagichlari delta bilan yuritiladi - kechasi nomuvofiqlikni tekshirish
+        "kategoriya-hisoblagichlari-tekshirish": {
+            "task": "vositalar.tasks.kategoriya_hisoblagichlarini_tekshirish",
+            "schedule": 24 * 3600,
+        },
+        # Takrorlash muddatlari indeksi delta bilan yuritiladi - kunlik qayta qurish
+        "takrorlash-muddatlarini-qayta-qurish": {
+            "task": "vositalar.tasks.takrorlash_muddatlarini_qayta_qurish",
+            "schedule": 24 * 3600,
+        },
+        # Kunlik holat yarim tundan oldin tanlanadi va render qilinadi
+        "kunlik-holatni-tayyorlash": {
+            "task": "vositalar.tasks.kunlik_holatni_tayyorlash",
+            "schedule": crontab(hour=23, minute=30),
+        },
+        # Urinishlar oylik bo'laklari bir necha oy oldinga tayyor turadi
+        "urinish-bolaklarini-tayyorlash": {
+            "task": "vositalar.tasks.urinish_bolaklarini_tayyorlash",
+            "schedule": crontab(hour=2, minute=0),
+        },
+        # Saqlash oynasidan eski oylar: oylik yig'indi + gzip CSV arxiv
+        "urinishlarni-arxivlash": {
+            "task": "vositalar.tasks.urinishlarni_arxivlash",
+            "schedule": crontab(day_of_month=1, hour=3, minute=0),
+        },
+        "takrorlash-eslatmalari": {
+            "task": "vositalar.tasks.takrorlash_eslatmalarini_yuborish",
+            "schedule": 24 * 3600,
+        },
+    },
 )
 
 celery_app.autodiscover_tasks(["vositalar"])
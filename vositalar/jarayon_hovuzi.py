@@ -0,0 +1,34 @@
+# MedCase Pro Platform - Jarayonlar Hovuzi
+# CPU og'ir ishlarni (Excel tahlili, PDF/Excel render) event loopdan tashqarida bajarish
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import multiprocessing
+
+_jarayon_hovuzi: Optional[ProcessPoolExecutor] = None
+
+
+def jarayon_hovuzini_olish() -> ProcessPoolExecutor:
+    """Umumiy jarayonlar hovuzini (lazy) qaytaradi."""
+    global _jarayon_hovuzi
+    if _jarayon_hovuzi is None:
+        _jarayon_hovuzi = ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _jarayon_hovuzi
+
+
+async def jarayonda_bajarish(funksiya: Callable[..., Any], *args) -> Any:
+    """Modul darajasidagi (picklable) funksiyani alohida jarayonda bajaradi."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(jarayon_hovuzini_olish(), funksiya, *args)
+
+
+def jarayon_hovuzini_yopish() -> None:
+    """Ilova yopilganda jarayonlar hovuzini to'xtatadi."""
+    global _jarayon_hovuzi
+    if _jarayon_hovuzi is not None:
+        _jarayon_hovuzi.shutdown(wait=False, cancel_futures=True)
+        _jarayon_hovuzi = None
@@ -0,0 +1,198 @@
+# MedCase Pro Platform - Prometheus Metrikalari
+# HTTP kechikish gistogrammalari, DB pool, Redis, kesh, WebSocket va Celery navbati
+#
+# Gunicorn ostida PROMETHEUS_MULTIPROC_DIR o'rnatiladi (ishlab_chiqarish.sh) -
+# har bir worker qiymatlarini shu katalogdagi mmap fayllarga yozadi va /metrics
+# ularni MultiProcessCollector orqali yig'adi.
+
+import logging
+import os
+from typing import Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+METRIKALAR_TURI = CONTENT_TYPE_LATEST
+
+KECHIKISH_CHEGARALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QISQA_CHEGARALAR = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+# ============== HTTP ==============
+
+HTTP_KECHIKISH = Histogram(
+    "medcase_http_sorov_soniya",
+    "HTTP so'rov davomiyligi (marshrut shabloni bo'yicha)",
+    ["metod", "marshrut", "holat"],
+    buckets=KECHIKISH_CHEGARALARI,
+)
+HTTP_JARAYONDA = Gauge(
+    "medcase_http_jarayondagi_sorovlar",
+    "Hozir bajarilayotgan HTTP so'rovlar",
+    multiprocess_mode="livesum",
+)
+
+# ============== Ma'lumotlar bazasi pool ==============
+
+POOL_BAND = Gauge(
+    "medcase_db_pool_band_ulanishlar",
+    "Pooldan olingan (checked-out) ulanishlar",
+    ["baza"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "medcase_db_pool_overflow",
+    "pool_size dan ortiq ochilgan ulanishlar",
+    ["baza"],
+    multiprocess_mode="livesum",
+)
+POOL_KUTISH = Histogram(
+    "medcase_db_pool_kutish_soniya",
+    "Pooldan ulanish olish uchun kutish vaqti",
+    ["baza"],
+    buckets=QISQA_CHEGARALAR + (2.5, 5.0, 10.0),
+)
+
+# ============== Redis va kesh ==============
+
+REDIS_KECHIKISH = Histogram(
+    "medcase_redis_buyruq_soniya",
+    "RedisKesh amallari davomiyligi",
+    ["amal"],
+    buckets=QISQA_CHEGARALAR,
+)
+KESH_MUROJAATLAR = Counter(
+    "medcase_kesh_murojaatlar",
+    "Kesh o'qishlari (natija: topildi / topilmadi), kalit prefiksi bo'yicha",
+    ["kesh", "natija"],
+)
+
+# ============== WebSocket va Celery ==============
+
+WS_ULANISHLAR = Gauge(
+    "medcase_websocket_ulanishlar",
+    "Ochiq WebSocket ulanishlari",
+    multiprocess_mode="livesum",
+)
+
+# ============== Qabul nazorati (load shedding) ==============
+
+QABUL_LIMIT = Gauge(
+    "medcase_qabul_limit",
+    "Moslashuvchan parallellik limiti (marshrut sinfi bo'yicha)",
+    ["sinf"],
+    multiprocess_mode="livesum",
+)
+QABUL_JARAYONDA = Gauge(
+    "medcase_qabul_jarayonda",
+    "Qabul qilingan va bajarilayotgan so'rovlar",
+    ["sinf"],
+    multiprocess_mode="livesum",
+)
+QABUL_NAVBAT = Gauge(
+    "medcase_qabul_navbat",
+    "Qabul navbatida kutayotgan so'rovlar",
+    ["sinf"],
+    multiprocess_mode="livesum",
+)
+QABUL_KUTISH = Histogram(
+    "medcase_qabul_kutish_soniya",
+    "Qabul navbatida kutish vaqti",
+    ["sinf"],
+    buckets=QISQA_CHEGARALAR + (2.5, 5.0, 10.0),
+)
+QABUL_RAD = Counter(
+    "medcase_qabul_rad_etilgan",
+    "503 bilan rad etilgan so'rovlar (sabab: kutish_bahosi / kutish_muddati)",
+    ["sinf", "sabab"],
+)
+
+CELERY_NAVBATLARI = ("celery",)
+
+
+class CeleryNavbatKollektori:
+    """
+    Celery broker navbatlari uzunligi - scrape paytida Redisdan o'qiladi.
+    Gauge emas: multiprocess rejimida Gauge har bir worker uchun mmap faylga
+    yozadi va MultiProcessCollector uni takroran chiqaradi. Kollektor qiymatni
+    faqat shu scrape uchun GaugeMetricFamily sifatida beradi.
+    """
+
+    def __init__(self):
+        self._uzunliklar: Dict[str, int] = {}
+
+    async def yangilash(self) -> None:
+        """Broker navbatlari uzunligi (Celery broker Redis bilan bir xil bo'lganda)."""
+        from sozlamalar.redis_kesh import redis_kesh
+
+        uzunliklar = {}
+        for navbat in CELERY_NAVBATLARI:
+            try:
+                if redis_kesh._redis is None:
+                    await redis_kesh.ulanish()
+                uzunliklar[navbat] = await redis_kesh._redis.llen(navbat)
+            except Exception as xato:
+                logger.debug(f"Celery navbatini o'qib bo'lmadi: {xato}")
+        self._uzunliklar = uzunliklar
+
+    def collect(self):
+        oila = GaugeMetricFamily(
+            "medcase_celery_navbat_uzunligi",
+            "Celery broker navbatidagi vazifalar",
+            labels=["navbat"],
+        )
+        for navbat, uzunlik in self._uzunliklar.items():
+            oila.add_metric([navbat], uzunlik)
+        yield oila
+
+
+_navbat_registri = CollectorRegistry()
+CELERY_NAVBAT = CeleryNavbatKollektori()
+_navbat_registri.register(CELERY_NAVBAT)
+
+
+def kesh_murojaati(kalit: str, topildi: bool) -> None:
+    """Kesh o'qishini qayd etadi (kalit prefiksi - KeshKalitlari qiymati)."""
+    KESH_MUROJAATLAR.labels(
+        kalit.split(":", 1)[0], "topildi" if topildi else "topilmadi"
+    ).inc()
+
+
+def pool_kuzatish(engine, baza: str) -> None:
+    """Engine pooliga band/overflow gauge lari va kutish gistogrammasini ulaydi."""
+    from sqlalchemy import event
+
+    pool = engine.sync_engine.pool
+    pool.kutish_metrikasi = POOL_KUTISH.labels(baza)
+    band = POOL_BAND.labels(baza)
+    overflow = POOL_OVERFLOW.labels(baza)
+
+    def _yangilash(*_):
+        band.set(pool.checkedout())
+        overflow.set(max(pool.overflow(), 0))
+
+    event.listen(engine.sync_engine, "checkout", _yangilash)
+    event.listen(engine.sync_engine, "checkin", _yangilash)
+
+
+async def metrikalar_matni() -> bytes:
+    """Prometheus text formatidagi barcha metrikalar."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registr = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registr)
+    else:
+        registr = REGISTRY
+
+    await CELERY_NAVBAT.yangilash()
+    return generate_latest(registr) + generate_latest(_navbat_registri)
+
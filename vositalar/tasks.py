@@ -85,3 +85,257 @@ def yangi_holat_push(holat_id: str, sarlavha: str):
                     await _obunani_ochirish(obuna.endpoint)
 
     asyncio.run(_run())
+
+
+@shared_task
+def excel_import_vazifasi(vazifa_id: str):
+    """Excel importni fon rejimida bajarish (checkpoint dan davom etadi)."""
+    from servislar.import_servisi import ImportVazifasi
+    from sozlamalar.redis_kesh import redis_kesh
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await ImportVazifasi.bajarish(vazifa_id, db)
+        except Exception as xato:
+            await ImportVazifasi.yangilash(vazifa_id, holat=ImportVazifasi.XATO, xato=str(xato))
+            raise
+        finally:
+            # Har bir asyncio.run yangi event loop - ulanishlarni qayta yaratish uchun yopamiz
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    natija = asyncio.run(_run())
+    return {
+        "muvaffaqiyat": natija.get("muvaffaqiyat", False),
+        "checkpoint": natija.get("checkpoint", 0)
+    }
+
+
+@shared_task
+def eksport_vazifasi(vazifa_id: str):
+    """Rivojlanish hisobotini fon rejimida render qilish (PDF/Excel)."""
+    from servislar.export_servisi import EksportVazifasi
+    from sozlamalar.redis_kesh import redis_kesh
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await EksportVazifasi.bajarish(vazifa_id, db)
+        except Exception as xato:
+            await EksportVazifasi.yangilash(vazifa_id, holat=EksportVazifasi.XATO, xato=str(xato))
+            raise
+        finally:
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    return asyncio.run(_run())
+
+
+@shared_task
+def kategoriya_hisoblagichlarini_tekshirish(tuzatish: bool = True):
+    """Kategoriya hisoblagichlaridagi nomuvofiqliklarni aniqlash (va tuzatish)."""
+    from servislar.hisoblagich_servisi import HisoblagichServisi
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await HisoblagichServisi(db).nomuvofiqliklarni_aniqlash(tuzatish=tuzatish)
+        finally:
+            await malumotlar_bazasi.uzish()
+
+    hisobot = asyncio.run(_run())
+    return {kalit: len(qiymat) for kalit, qiymat in hisobot.items()}
+
+
+@shared_task
+def kategoriya_rivojlanishini_qayta_hisoblash(foydalanuvchi_id: str = None):
+    """Foydalanuvchi x kategoriya agregatini urinishlar tarixidan qayta qurish."""
+    from uuid import UUID
+    from servislar.kategoriya_rivojlanishi_servisi import KategoriyaRivojlanishiServisi
+    from servislar.dashboard_servisi import DashboardServisi
+    from sozlamalar.redis_kesh import redis_kesh, KeshKalitlari
+
+    async def _run():
+        try:
+            fid = UUID(foydalanuvchi_id) if foydalanuvchi_id else None
+            async with malumotlar_bazasi.sessiya() as db:
+                qatorlar = await KategoriyaRivojlanishiServisi(db).qayta_hisoblash(fid)
+            # Dashboard snapshotlaridagi kategoriya sonlari ham eskirgan
+            if fid:
+                await redis_kesh.ochirish(DashboardServisi.kalit(fid))
+            else:
+                await redis_kesh.shablon_ochirish(f"{KeshKalitlari.DASHBOARD}:*")
+            return qatorlar
+        finally:
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    return {"qatorlar": asyncio.run(_run())}
+
+
+@shared_task
+def takrorlash_qayta_rejalashtirish(
+    siyosat: str,
+    parametrlar: dict = None,
+    foydalanuvchi_id: str = None,
+    sinov: bool = False
+):
+    """Takrorlash kartalarini siyosat bo'yicha ommaviy qayta rejalashtirish."""
+    from uuid import UUID
+    from servislar.rejalashtirish_servisi import RejalashtirishServisi
+    from servislar.muddat_servisi import MuddatServisi
+    from sozlamalar.redis_kesh import redis_kesh
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                hisobot = await RejalashtirishServisi(db).qayta_rejalashtirish(
+                    siyosat,
+                    parametrlar,
+                    UUID(foydalanuvchi_id) if foydalanuvchi_id else None,
+                    sinov
+                )
+                # Sanalar ommaviy o'zgardi - muddatlar indeksini qayta qurish
+                if hisobot["ozgargan"] and not sinov:
+                    if foydalanuvchi_id:
+                        await MuddatServisi(db).qayta_qurish(UUID(foydalanuvchi_id))
+                    else:
+                        await MuddatServisi(db).hammasini_qayta_qurish()
+                return hisobot
+        finally:
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    return asyncio.run(_run())
+
+
+@shared_task
+def takrorlash_muddatlarini_qayta_qurish():
+    """Muddatlar indeksini (Redis) bazadan qayta qurish - o'tgan sanalarni yig'adi, driftni tuzatadi."""
+    from servislar.muddat_servisi import MuddatServisi
+    from sozlamalar.redis_kesh import redis_kesh
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await MuddatServisi(db).hammasini_qayta_qurish()
+        finally:
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    return {"foydalanuvchilar": asyncio.run(_run())}
+
+
+@shared_task
+def takrorlash_eslatmalarini_yuborish():
+    """Bugun muddati kelgan kartasi bor foydalanuvchilarga eslatma yaratish."""
+    from servislar.muddat_servisi import MuddatServisi
+    from servislar.bildirishnoma_servisi import BildirishnomServisi
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                idlar = await MuddatServisi(db).muddatli_foydalanuvchilar()
+                return await BildirishnomServisi(db).takrorlash_eslatmalari(idlar)
+        finally:
+            await malumotlar_bazasi.uzish()
+
+    return {"eslatmalar": asyncio.run(_run())}
+
+
+@shared_task
+def nishonlarni_qayta_tekshirish():
+    """
+    Barcha foydalanuvchilar uchun nishonlarni to'liq tekshirish.
+    Yangi nishon qo'shilganda (chegarasi allaqachon o'tilgan foydalanuvchilar uchun) ishlatiladi.
+    """
+    from servislar.gamifikatsiya_servisi import GamifikatsiyaServisi, nishon_keshini_tozalash
+    from modellar.rivojlanish import FoydalanuvchiRivojlanishi
+
+    async def _run():
+        nishon_keshini_tozalash()
+        berilgan = 0
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                natija = await db.execute(select(FoydalanuvchiRivojlanishi.foydalanuvchi_id))
+                servis = GamifikatsiyaServisi(db)
+                for foydalanuvchi_id in natija.scalars().all():
+                    berilgan += len(await servis.nishon_tekshirish_va_berish(foydalanuvchi_id))
+            return berilgan
+        finally:
+            await malumotlar_bazasi.uzish()
+
+    return {"berilgan_nishonlar": asyncio.run(_run())}
+
+
+@shared_task
+def darajalarni_qayta_hisoblash():
+    """Daraja chegaralari o'zgargandan keyin barcha foydalanuvchilar darajasini qayta hisoblash."""
+    from servislar.daraja_servisi import DarajaServisi
+    from sozlamalar.redis_kesh import redis_kesh
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await DarajaServisi(db).hammasini_qayta_hisoblash()
+        finally:
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    return {"ozgargan": asyncio.run(_run())}
+
+
+@shared_task
+def kunlik_holatni_tayyorlash():
+    """Bugungi (yo'q bo'lsa) va ertangi kunlik holatni oldindan tanlash va render qilish."""
+    from datetime import date, timedelta
+    from servislar.kunlik_holat_servisi import KunlikHolatServisi
+    from sozlamalar.redis_kesh import redis_kesh
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                servis = KunlikHolatServisi(db)
+                bugun = date.today()
+                natija = {}
+                for sana in (bugun, bugun + timedelta(days=1)):
+                    tayyor = await servis.tayyorlash(sana)
+                    natija[sana.isoformat()] = tayyor["holat_id"] if tayyor else None
+                return natija
+        finally:
+            await malumotlar_bazasi.uzish()
+            await redis_kesh.uzish()
+
+    return asyncio.run(_run())
+
+
+@shared_task
+def urinish_bolaklarini_tayyorlash():
+    """holat_urinishlari uchun kelgusi oylik bo'laklarni oldindan yaratish."""
+    from servislar.bolak_servisi import BolakServisi
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await BolakServisi(db).kelgusi_bolaklar()
+        finally:
+            await malumotlar_bazasi.uzish()
+
+    return {"yaratildi": asyncio.run(_run())}
+
+
+@shared_task
+def urinishlarni_arxivlash(saqlash_oylari: int = None):
+    """Saqlash oynasidan eski oylarni yig'indiga o'tkazish va xom qatorlarni arxivlash."""
+    from servislar.arxiv_servisi import ArxivServisi
+
+    async def _run():
+        try:
+            async with malumotlar_bazasi.sessiya() as db:
+                return await ArxivServisi(db).hammasini_arxivlash(saqlash_oylari)
+        finally:
+            await malumotlar_bazasi.uzish()
+
+    natijalar = asyncio.run(_run())
+    return {"oylar": [n["oy"] for n in natijalar], "qatorlar": sum(n["qatorlar"] for n in natijalar)}